@@ -11,6 +11,9 @@
       se financial_responsible_id existe e != patient_id -> usa CPF do responsável financeiro
       senão -> usa CPF do paciente
   - Checks não têm clinic_id nesta tabela, então a associação é por CPF+tempo.
+  - CPF+tempo via índices pré-normalizados (CREDIT_CHECKS_CPF_INDEX / CRIVO_CHECKS_CPF_INDEX,
+    clusterizados por (cpf_digits, created_at)); match por CPF só-dígitos, como nos enrichments.
+    Rodar queries/index/refresh_checks_cpf_index.sql antes.
   - Heurística em 2 estágios:
       1) primary: checks em torno do evento (±primary_hours do cs_created_at)
       2) fallback: para sims sem primary, usar lookback de cache_days ([-cache_days, 0])
@@ -89,16 +92,16 @@ cs_enriched AS (
    CRIVO: resolução de crivo_check_id
    ============================ */
 crivo_base AS (
+  /* Índice pré-normalizado (queries/index/refresh_checks_cpf_index.sql) */
   SELECT
-    c.CRIVO_CHECK_ID,
-    c.ENGINEABLE_TYPE,
-    c.ENGINEABLE_ID,
-    c.CRIVO_CHECK_CREATED_AT,
-    c.POLITICA,
-    c.KEY_PARAMETERS:campos:"CPF"::string AS crivo_cpf_raw,
-    REGEXP_REPLACE(c.KEY_PARAMETERS:campos:"CPF"::string, '\\D','') AS crivo_cpf_digits
-  FROM CAPIM_DATA.SOURCE_STAGING.SOURCE_CRIVO_CHECKS c
-  WHERE c.ENGINEABLE_TYPE = 'CreditSimulation'
+    c.crivo_check_id  AS CRIVO_CHECK_ID,
+    c.engineable_type AS ENGINEABLE_TYPE,
+    c.engineable_id   AS ENGINEABLE_ID,
+    c.created_at      AS CRIVO_CHECK_CREATED_AT,
+    c.politica        AS POLITICA,
+    c.cpf_digits      AS crivo_cpf_digits
+  FROM CAPIM_DATA_DEV.POSSANI_SANDBOX.CRIVO_CHECKS_CPF_INDEX c
+  WHERE c.engineable_type = 'CreditSimulation'
 ),
 
 crivo_candidates AS (
@@ -217,7 +220,7 @@ primary_matches AS (
     cs.credit_lead_id,
     cs.cpf_effective,
 
-    cc.id         AS credit_check_id,
+    cc.credit_check_id,
     cc.created_at AS credit_check_created_at,
     cc.source,
     cc.kind,
@@ -228,8 +231,8 @@ primary_matches AS (
 
   FROM cs_enriched cs
   JOIN params p ON TRUE
-  JOIN CAPIM_DATA.RESTRICTED.INCREMENTAL_CREDIT_CHECKS_API cc
-    ON cc.cpf = cs.cpf_effective
+  JOIN CAPIM_DATA_DEV.POSSANI_SANDBOX.CREDIT_CHECKS_CPF_INDEX cc
+    ON cc.cpf_digits = cs.cpf_effective_digits
    AND cc.created_at BETWEEN DATEADD('hour', -p.primary_hours, cs.cs_created_at)
                         AND DATEADD('hour',  p.primary_hours, cs.cs_created_at)
 ),
@@ -252,7 +255,7 @@ fallback_matches AS (
     cs.credit_lead_id,
     cs.cpf_effective,
 
-    cc.id         AS credit_check_id,
+    cc.credit_check_id,
     cc.created_at AS credit_check_created_at,
     cc.source,
     cc.kind,
@@ -266,8 +269,8 @@ fallback_matches AS (
   JOIN has_primary hp
     ON hp.credit_simulation_id = cs.credit_simulation_id
    AND hp.has_primary = 0
-  JOIN CAPIM_DATA.RESTRICTED.INCREMENTAL_CREDIT_CHECKS_API cc
-    ON cc.cpf = cs.cpf_effective
+  JOIN CAPIM_DATA_DEV.POSSANI_SANDBOX.CREDIT_CHECKS_CPF_INDEX cc
+    ON cc.cpf_digits = cs.cpf_effective_digits
    AND cc.created_at BETWEEN DATEADD('day', -p.cache_days, cs.cs_created_at)
                         AND cs.cs_created_at
 ),
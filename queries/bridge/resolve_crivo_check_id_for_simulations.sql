@@ -12,7 +12,8 @@
     2) fallback: lookback de 15 dias ([-15d, 0]) por CPF.
 
   Observações:
-  - CPF em KEY_PARAMETERS vem mascarado; normalizamos removendo não-dígitos.
+  - CPF em KEY_PARAMETERS vem mascarado; a normalização (remoção de não-dígitos) é feita uma vez,
+    no índice CRIVO_CHECKS_CPF_INDEX (rodar queries/index/refresh_checks_cpf_index.sql antes).
   - Pode haver múltiplos crivo_checks; escolhemos o mais próximo por abs(minutos).
   - Não materializa nada; é uma query para exploração/validação.
 */
@@ -64,16 +65,16 @@ cs_cpf AS (
 ),
 
 crivo_base AS (
+  /* Índice pré-normalizado (queries/index/refresh_checks_cpf_index.sql) */
   SELECT
-    c.CRIVO_CHECK_ID,
-    c.ENGINEABLE_TYPE,
-    c.ENGINEABLE_ID,
-    c.CRIVO_CHECK_CREATED_AT,
-    c.POLITICA,
-    c.KEY_PARAMETERS:campos:"CPF"::string AS cpf_raw,
-    REGEXP_REPLACE(c.KEY_PARAMETERS:campos:"CPF"::string, '\\D','') AS cpf_digits
-  FROM CAPIM_DATA.SOURCE_STAGING.SOURCE_CRIVO_CHECKS c
-  WHERE c.ENGINEABLE_TYPE = 'CreditSimulation'
+    c.crivo_check_id AS CRIVO_CHECK_ID,
+    c.engineable_type AS ENGINEABLE_TYPE,
+    c.engineable_id   AS ENGINEABLE_ID,
+    c.created_at      AS CRIVO_CHECK_CREATED_AT,
+    c.politica        AS POLITICA,
+    c.cpf_digits
+  FROM CAPIM_DATA_DEV.POSSANI_SANDBOX.CRIVO_CHECKS_CPF_INDEX c
+  WHERE c.engineable_type = 'CreditSimulation'
 ),
 
 -- Camada 0: match direto por engineable_id
@@ -18,6 +18,10 @@
     - Pushdown total no Snowflake (sem processamento local)
     - Colunas explícitas de linhagem/source para evitar ambiguidade
 
+  Pré-requisitos (refresh incremental; os materializadores rodam automaticamente):
+    - queries/index/refresh_checks_cpf_index.sql   (CREDIT_CHECKS_CPF_INDEX / CRIVO_CHECKS_CPF_INDEX)
+    - queries/features/refresh_check_features.sql  (CREDIT_CHECK_FEATURES / CRIVO_CHECK_FEATURES)
+
   LGPD:
     - Evita persistir PII “rica” (nome, endereço linha) — mantém flags e alguns campos (birthdate/zip) conforme necessidade analítica.
 */
@@ -52,8 +56,9 @@ cs_base AS (
     cs.financing_conditions,
     cs.created_at  AS cs_created_at,
     cs.updated_at  AS cs_updated_at
-  FROM CAPIM_DATA.CAPIM_PRODUCTION.CREDIT_SIMULATIONS cs
-  -- Opcional: recortes por tempo/estado aqui (para iteração).
+  FROM CAPIM_DATA.CAPIM_PRODUCTION.CREDIT_SIMULATIONS cs /*@sample cs*/
+  /* Recorte (período/meses/amostra/watermark) injetado por src/utils/sql_template.py; sem render = tudo. */
+  WHERE TRUE /*@scope cs ts=cs.created_at id=cs.id*/
 ),
 
 /* ============================
@@ -179,7 +184,7 @@ pa_cs_dedup AS (
     TRY_TO_NUMBER(pa.RISK_CAPIM)::NUMBER AS risk_capim,
     pa.RISK_CAPIM_SUBCLASS::TEXT AS risk_capim_subclass
   FROM CAPIM_DATA.CAPIM_ANALYTICS.PRE_ANALYSES pa
-  WHERE pa.PRE_ANALYSIS_TYPE='credit_simulation'
+  WHERE pa.PRE_ANALYSIS_TYPE='credit_simulation' /*@scope pa_cs id=pa.PRE_ANALYSIS_ID::NUMBER*/
   QUALIFY ROW_NUMBER() OVER (
     PARTITION BY pa.PRE_ANALYSIS_ID
     ORDER BY pa.PRE_ANALYSIS_UPDATED_AT DESC, pa.PRE_ANALYSIS_CREATED_AT DESC
@@ -189,19 +194,18 @@ pa_cs_dedup AS (
 /* ============================
    CRIVO: resolução de crivo_check_id
    ============================ */
+/* Índice pré-normalizado (queries/index/refresh_checks_cpf_index.sql): candidatos por id/engineable e
+   por CPF+tempo com poda por (cpf_digits, created_at). Payload (BUREAU_CHECK_INFO/KEY_PARAMETERS) já vem
+   extraído em CRIVO_CHECK_FEATURES (queries/features/refresh_check_features.sql). */
 crivo_base AS (
   SELECT
-    c.CRIVO_CHECK_ID,
-    c.ENGINEABLE_TYPE,
-    c.ENGINEABLE_ID,
-    c.CRIVO_CHECK_CREATED_AT,
-    c.POLITICA,
-    c.BUREAU_CHECK_INFO,
-    c.KEY_PARAMETERS,
-    c.KEY_PARAMETERS:campos:"CPF"::string AS crivo_cpf_raw,
-    REGEXP_REPLACE(c.KEY_PARAMETERS:campos:"CPF"::string, '\\D','') AS crivo_cpf_digits
-  FROM CAPIM_DATA.SOURCE_STAGING.SOURCE_CRIVO_CHECKS c
-  WHERE c.ENGINEABLE_TYPE = 'CreditSimulation'
+    ci.crivo_check_id AS CRIVO_CHECK_ID,
+    ci.engineable_id  AS ENGINEABLE_ID,
+    ci.created_at     AS CRIVO_CHECK_CREATED_AT,
+    ci.politica       AS POLITICA,
+    ci.cpf_digits     AS crivo_cpf_digits
+  FROM CAPIM_DATA_DEV.POSSANI_SANDBOX.CRIVO_CHECKS_CPF_INDEX ci
+  WHERE ci.engineable_type = 'CreditSimulation'
 ),
 
 crivo_candidates AS (
@@ -329,112 +333,45 @@ crivo_resolution AS (
 ),
 
 /* ============================
-   CRIVO: features (BUREAU_CHECK_INFO:campos + KEY_PARAMETERS:campos)
+   CRIVO: features (BUREAU_CHECK_INFO:campos + KEY_PARAMETERS:campos), pré-extraídas por crivo_check_id
+   em CRIVO_CHECK_FEATURES. `crivo_n_campos > 0` reproduz o FLATTEN inner sobre campos.
    ============================ */
 crivo_features_campos AS (
   SELECT
     cr.credit_simulation_id,
-    MAX(IFF(f.value:nome::string = 'PEFIN Serasa',    TRY_TO_NUMBER(f.value:valor::string), NULL)) AS crivo_pefin_serasa,
-    MAX(IFF(f.value:nome::string = 'REFIN Serasa',    TRY_TO_NUMBER(f.value:valor::string), NULL)) AS crivo_refin_serasa,
-    MAX(IFF(f.value:nome::string = 'Protesto Serasa', TRY_TO_NUMBER(f.value:valor::string), NULL)) AS crivo_protesto_serasa,
-    MAX(IFF(f.value:nome::string = 'Score Serasa',
-            IFF(TRY_TO_NUMBER(f.value:valor::string) > 0, TRY_TO_NUMBER(f.value:valor::string), NULL),
-            NULL)) AS crivo_score_serasa,
-    /* Renda presumida (CREDILINK / SERASA) — geralmente vem como string monetária (PT-BR) */
-    MAX(
-      IFF(
-        LOWER(TRIM(f.value:nome::string)) LIKE 'credilink%renda presumida%',
-        TRY_TO_NUMBER(
-          REPLACE(
-            REPLACE(
-              REPLACE(
-                REPLACE(
-                  REPLACE(NULLIF(TRIM(f.value:valor::string), ''), '\"', ''),
-                  'R$', ''
-                ),
-                '.',''
-              ),
-              ',','.'
-            ),
-            ' ',''
-          )
-        ),
-        NULL
-      )
-    ) AS crivo_renda_presumida_credilink,
-    MAX(
-      IFF(
-        LOWER(TRIM(f.value:nome::string)) LIKE 'serasa%renda presumida%',
-        TRY_TO_NUMBER(
-          REPLACE(
-            REPLACE(
-              REPLACE(
-                REPLACE(
-                  REPLACE(NULLIF(TRIM(f.value:valor::string), ''), '\"', ''),
-                  'R$', ''
-                ),
-                '.',''
-              ),
-              ',','.'
-            ),
-            ' ',''
-          )
-        ),
-        NULL
-      )
-    ) AS crivo_renda_presumida_serasa,
-    /* Cadastro: fallback de birthdate observado via bureau BVS dentro do Crivo
-       Importante: restringir ao campo correto para evitar capturar datas não-nascimento. */
-    MAX(IFF(f.value:nome::string = 'Data de Nascimento BVS',
-            TRY_TO_DATE(NULLIF(TRIM(f.value:valor::string),''), 'DD/MM/YYYY'),
-            NULL)) AS crivo_birthdate_bvs,
-    MAX(IFF(f.value:nome::string = 'CEP do Proponente',     f.value:valor::string, NULL)) AS crivo_zipcode,
-    MAX(IFF(f.value:nome::string = 'Telefone do proponente', f.value:valor::string, NULL)) AS crivo_phone_raw,
-    MAX(IFF(f.value:nome::string = 'Telefone do proponente' AND NULLIF(TRIM(f.value:valor::string),'') IS NOT NULL, 1, 0)) AS crivo_has_phone
+    cf.crivo_pefin_serasa,
+    cf.crivo_refin_serasa,
+    cf.crivo_protesto_serasa,
+    cf.crivo_score_serasa,
+    /* Renda presumida (CREDILINK / SERASA) — string monetária (PT-BR) já convertida */
+    cf.crivo_renda_presumida_credilink,
+    cf.crivo_renda_presumida_serasa,
+    /* Cadastro: fallback de birthdate via bureau BVS dentro do Crivo (campo 'Data de Nascimento BVS') */
+    cf.crivo_birthdate_bvs,
+    cf.crivo_zipcode,
+    cf.crivo_phone_raw,
+    cf.crivo_has_phone
   FROM crivo_resolution cr
   JOIN crivo_base cb
     ON cb.CRIVO_CHECK_ID = cr.crivo_check_id_resolved
-  , LATERAL FLATTEN(input => cb.BUREAU_CHECK_INFO:campos) f
-  GROUP BY 1
+  JOIN CAPIM_DATA_DEV.POSSANI_SANDBOX.CRIVO_CHECK_FEATURES cf
+    ON cf.crivo_check_id = cr.crivo_check_id_resolved
+  WHERE cf.crivo_n_campos > 0
 ),
 
 crivo_features_key_params AS (
   SELECT
     cr.credit_simulation_id,
-    TRY_TO_NUMBER(cb.KEY_PARAMETERS:campos:BacenScore::string) AS crivo_bacen_score,
-    /* tentativa: às vezes CreditLimits é número/string; se for objeto/array, fica NULL */
-    TRY_TO_NUMBER(
-      REPLACE(
-        REPLACE(
-          REPLACE(cb.KEY_PARAMETERS:campos:CreditLimits::string, '\"', ''),
-          '.',''
-        ),
-        ',','.'
-      )
-    ) AS crivo_credit_limits_value
-    ,
+    cf.crivo_bacen_score,
+    cf.crivo_credit_limits_value,
     /* Proxies adicionais (formato monetário PT-BR como string: "1.272,15", "0,0", etc.) */
-    TRY_TO_NUMBER(
-      REPLACE(
-        REPLACE(
-          REPLACE(NULLIF(TRIM(cb.KEY_PARAMETERS:campos:OverduePortfolio::string), ''), '\"', ''),
-          '.',''
-        ),
-        ',','.'
-      )
-    ) AS crivo_overdue_portfolio_value,
-    TRY_TO_NUMBER(
-      REPLACE(
-        REPLACE(
-          REPLACE(NULLIF(TRIM(cb.KEY_PARAMETERS:campos:Loss::string), ''), '\"', ''),
-          '.',''
-        ),
-        ',','.'
-      )
-    ) AS crivo_loss_value
+    cf.crivo_overdue_portfolio_value,
+    cf.crivo_loss_value
   FROM crivo_resolution cr
   JOIN crivo_base cb
     ON cb.CRIVO_CHECK_ID = cr.crivo_check_id_resolved
+  JOIN CAPIM_DATA_DEV.POSSANI_SANDBOX.CRIVO_CHECK_FEATURES cf
+    ON cf.crivo_check_id = cr.crivo_check_id_resolved
 ),
 
 /* ============================
@@ -442,35 +379,21 @@ crivo_features_key_params AS (
    - Aqui encontramos um "código sexo" com bom sinal (inferido via cruzamento com SERASA):
      1 -> M, 2 -> F (0/outros -> NULL)
    ============================ */
-crivo_databusca_pf_raw AS (
-  SELECT
-    cr.credit_simulation_id,
-    MAX(
-      IFF(
-        /* Pode aparecer como "lista - código sexo" ou variações; pegamos qualquer nome contendo 'sexo' */
-        LOWER(p.value:nome::string) LIKE '%sexo%',
-        NULLIF(TRIM(p.value:valor::string), ''),
-        NULL
-      )
-    ) AS crivo_sexo_codigo_raw
-  FROM crivo_resolution cr
-  JOIN crivo_base cb
-    ON cb.CRIVO_CHECK_ID = cr.crivo_check_id_resolved
-  , LATERAL FLATTEN(input => cb.BUREAU_CHECK_INFO:drivers) d
-  , LATERAL FLATTEN(input => d.value:produtos:"api DataBusca - Consulta Dados Pessoa - PF") p
-  GROUP BY 1
-),
-
 crivo_features_databusca_pf AS (
   SELECT
-    credit_simulation_id,
-    crivo_sexo_codigo_raw,
+    cr.credit_simulation_id,
+    cf.crivo_sexo_codigo_raw,
     CASE
-      WHEN crivo_sexo_codigo_raw = '1' THEN 'M'
-      WHEN crivo_sexo_codigo_raw = '2' THEN 'F'
+      WHEN cf.crivo_sexo_codigo_raw = '1' THEN 'M'
+      WHEN cf.crivo_sexo_codigo_raw = '2' THEN 'F'
       ELSE NULL
     END AS crivo_gender
-  FROM crivo_databusca_pf_raw
+  FROM crivo_resolution cr
+  JOIN crivo_base cb
+    ON cb.CRIVO_CHECK_ID = cr.crivo_check_id_resolved
+  JOIN CAPIM_DATA_DEV.POSSANI_SANDBOX.CRIVO_CHECK_FEATURES cf
+    ON cf.crivo_check_id = cr.crivo_check_id_resolved
+  WHERE cf.crivo_n_databusca_pf > 0
 ),
 
 /* ============================
@@ -480,94 +403,79 @@ crivo_features_databusca_pf AS (
      1) lenient_primary_24h  : [cs-24h, cs+24h]
      2) lenient_fallback_15d : [cs-15d, cs]
      3) lenient_fallback_180d: [cs-180d, cs]
-   ============================ */
-cc_matches_strict_1h AS (
-  SELECT
-    cs.credit_simulation_id,
-    cc.id         AS credit_check_id,
-    cc.created_at AS credit_check_created_at,
-    cc.source,
-    cc.kind,
-    cc.new_data_format,
-    cc.data       AS credit_check_data,
-    'strict_primary_1h' AS credit_check_match_stage,
-    0 AS credit_check_match_leniency_rank,
-    DATEDIFF('minute', cc.created_at, cs.cs_created_at) AS credit_check_minutes_from_cs
-  FROM cs_enriched cs
-  JOIN params p ON TRUE
-  JOIN CAPIM_DATA.RESTRICTED.INCREMENTAL_CREDIT_CHECKS_API cc
-    ON REGEXP_REPLACE(cc.cpf, '\\D','') = cs.cpf_effective_digits
-   AND cc.created_at BETWEEN DATEADD('hour', -p.primary_hours, cs.cs_created_at)
-                        AND DATEADD('hour',  p.primary_hours, cs.cs_created_at)
-),
-
-cc_matches_lenient_24h AS (
-  SELECT
-    cs.credit_simulation_id,
-    cc.id         AS credit_check_id,
-    cc.created_at AS credit_check_created_at,
-    cc.source,
-    cc.kind,
-    cc.new_data_format,
-    cc.data       AS credit_check_data,
-    'lenient_primary_24h' AS credit_check_match_stage,
-    1 AS credit_check_match_leniency_rank,
-    DATEDIFF('minute', cc.created_at, cs.cs_created_at) AS credit_check_minutes_from_cs
-  FROM cs_enriched cs
-  JOIN CAPIM_DATA.RESTRICTED.INCREMENTAL_CREDIT_CHECKS_API cc
-    ON REGEXP_REPLACE(cc.cpf, '\\D','') = cs.cpf_effective_digits
-   AND cc.created_at BETWEEN DATEADD('hour', -24, cs.cs_created_at)
-                        AND DATEADD('hour',  24, cs.cs_created_at)
-),
 
-cc_matches_fallback_15d AS (
+   Implementação (1 passada):
+     - CPF normalizado uma única vez por credit check, no índice CREDIT_CHECKS_CPF_INDEX (cc_norm),
+       sem carregar `data`;
+     - um único range join na janela mais larga ([cs-180d, cs+24h] = união das 4 janelas),
+       rotulando cada par (simulation, check) com o estágio MAIS estrito que ele satisfaz.
+       Equivalente ao UNION das 4 janelas para os rankings abaixo: o melhor rank de cada check
+       domina as suas demais cópias na ordenação (leniency_rank ASC, ...);
+     - `data` (VARIANT) não é lido aqui: features dos checks vencedores vêm de CREDIT_CHECK_FEATURES.
+   ============================ */
+cc_norm AS (
+  /* Índice pré-normalizado (queries/index/refresh_checks_cpf_index.sql), clusterizado por (cpf_digits, created_at) */
   SELECT
-    cs.credit_simulation_id,
-    cc.id         AS credit_check_id,
+    cc.credit_check_id,
     cc.created_at AS credit_check_created_at,
     cc.source,
     cc.kind,
     cc.new_data_format,
-    cc.data       AS credit_check_data,
-    'lenient_fallback_15d' AS credit_check_match_stage,
-    2 AS credit_check_match_leniency_rank,
-    DATEDIFF('minute', cc.created_at, cs.cs_created_at) AS credit_check_minutes_from_cs
-  FROM cs_enriched cs
-  JOIN params p ON TRUE
-  JOIN CAPIM_DATA.RESTRICTED.INCREMENTAL_CREDIT_CHECKS_API cc
-    ON REGEXP_REPLACE(cc.cpf, '\\D','') = cs.cpf_effective_digits
-   AND cc.created_at BETWEEN DATEADD('day', -p.cache_days, cs.cs_created_at)
-                        AND cs.cs_created_at
+    /* Mitigação de “misflag”: alguns registros vêm com new_data_format=FALSE mas payload é new (OBJECT com reports).
+       TYPEOF(data) não roda aqui: o flag é calculado uma vez por check no refresh do índice. */
+    cc.payload_is_new AS credit_check_payload_is_new,
+    cc.cpf_digits
+  FROM CAPIM_DATA_DEV.POSSANI_SANDBOX.CREDIT_CHECKS_CPF_INDEX cc
+  /* janela do match: [cs - crivo_cap_days(180), cs + 24h] */
+  WHERE TRUE /*@scope cc ts=cc.created_at lookback_days=180 lookahead_days=1*/
 ),
 
-cc_matches_fallback_180d AS (
+cc_banded_matches AS (
   SELECT
     cs.credit_simulation_id,
-    cc.id         AS credit_check_id,
-    cc.created_at AS credit_check_created_at,
+    cc.credit_check_id,
+    cc.credit_check_created_at,
     cc.source,
     cc.kind,
     cc.new_data_format,
-    cc.data       AS credit_check_data,
-    'lenient_fallback_180d' AS credit_check_match_stage,
-    3 AS credit_check_match_leniency_rank,
-    DATEDIFF('minute', cc.created_at, cs.cs_created_at) AS credit_check_minutes_from_cs
+    cc.credit_check_payload_is_new,
+    CASE
+      WHEN cc.credit_check_created_at BETWEEN DATEADD('hour', -p.primary_hours, cs.cs_created_at)
+                                          AND DATEADD('hour',  p.primary_hours, cs.cs_created_at) THEN 0
+      WHEN cc.credit_check_created_at BETWEEN DATEADD('hour', -24, cs.cs_created_at)
+                                          AND DATEADD('hour',  24, cs.cs_created_at) THEN 1
+      WHEN cc.credit_check_created_at BETWEEN DATEADD('day', -p.cache_days, cs.cs_created_at)
+                                          AND cs.cs_created_at THEN 2
+      ELSE 3
+    END AS credit_check_match_leniency_rank,
+    DATEDIFF('minute', cc.credit_check_created_at, cs.cs_created_at) AS credit_check_minutes_from_cs
   FROM cs_enriched cs
   JOIN params p ON TRUE
-  JOIN CAPIM_DATA.RESTRICTED.INCREMENTAL_CREDIT_CHECKS_API cc
-    ON REGEXP_REPLACE(cc.cpf, '\\D','') = cs.cpf_effective_digits
-   AND cc.created_at BETWEEN DATEADD('day', -p.crivo_cap_days, cs.cs_created_at)
-                        AND cs.cs_created_at
+  JOIN cc_norm cc
+    ON cc.cpf_digits = cs.cpf_effective_digits
+   AND cc.credit_check_created_at BETWEEN DATEADD('day', -p.crivo_cap_days, cs.cs_created_at)
+                                      AND DATEADD('hour', 24, cs.cs_created_at)
 ),
 
 cc_all_matches AS (
-  SELECT * FROM cc_matches_strict_1h
-  UNION ALL
-  SELECT * FROM cc_matches_lenient_24h
-  UNION ALL
-  SELECT * FROM cc_matches_fallback_15d
-  UNION ALL
-  SELECT * FROM cc_matches_fallback_180d
+  SELECT
+    m.credit_simulation_id,
+    m.credit_check_id,
+    m.credit_check_created_at,
+    m.source,
+    m.kind,
+    m.new_data_format,
+    m.credit_check_payload_is_new,
+    DECODE(
+      m.credit_check_match_leniency_rank,
+      0, 'strict_primary_1h',
+      1, 'lenient_primary_24h',
+      2, 'lenient_fallback_15d',
+      'lenient_fallback_180d'
+    ) AS credit_check_match_stage,
+    m.credit_check_match_leniency_rank,
+    m.credit_check_minutes_from_cs
+  FROM cc_banded_matches m
 ),
 
 cc_best_per_source_kind AS (
@@ -584,6 +492,45 @@ cc_best_per_source_kind AS (
   FROM cc_all_matches m
 ),
 
+cc_best_serasa_old AS (
+  SELECT
+    m.*,
+    ROW_NUMBER() OVER (
+      PARTITION BY m.credit_simulation_id
+      ORDER BY
+        m.credit_check_match_leniency_rank ASC,
+        ABS(m.credit_check_minutes_from_cs) ASC,
+        m.credit_check_created_at DESC,
+        m.credit_check_id DESC
+    ) AS rn_best
+  FROM cc_all_matches m
+  WHERE m.source = 'serasa'
+    AND COALESCE(m.new_data_format, FALSE) = FALSE
+    /* Evitar classificar como “old” quando o payload é claramente new (OBJECT com reports) */
+    AND NOT m.credit_check_payload_is_new
+),
+
+cc_best_serasa_new_strict AS (
+  /* SERASA new (score_without_income) apenas na janela estrita (±1h) — usado no cadastro estrito */
+  SELECT
+    m.*,
+    ROW_NUMBER() OVER (
+      PARTITION BY m.credit_simulation_id
+      ORDER BY
+        ABS(m.credit_check_minutes_from_cs) ASC,
+        m.credit_check_created_at DESC,
+        m.credit_check_id DESC
+    ) AS rn_best_strict
+  FROM cc_all_matches m
+  WHERE m.credit_check_match_leniency_rank = 0
+    AND m.source = 'serasa'
+    AND (
+      COALESCE(m.new_data_format, FALSE) = TRUE
+      OR m.credit_check_payload_is_new
+    )
+    AND m.kind = 'check_score_without_income'
+),
+
 cc_best_source_kind_1 AS (
   SELECT *
   FROM cc_best_per_source_kind
@@ -600,8 +547,7 @@ cc_best_serasa_new_score_without_income_1 AS (
   WHERE source = 'serasa'
     AND (
       COALESCE(new_data_format, FALSE) = TRUE
-      /* Mitigação de “misflag”: alguns registros vêm com new_data_format=FALSE mas payload é new (OBJECT com reports) */
-      OR (TYPEOF(credit_check_data) = 'OBJECT' AND credit_check_data:reports IS NOT NULL)
+      OR credit_check_payload_is_new
     )
     AND kind = 'check_score_without_income'
 ),
@@ -613,58 +559,21 @@ cc_best_serasa_new_income_only_1 AS (
   WHERE source = 'serasa'
     AND (
       COALESCE(new_data_format, FALSE) = TRUE
-      OR (TYPEOF(credit_check_data) = 'OBJECT' AND credit_check_data:reports IS NOT NULL)
+      OR credit_check_payload_is_new
     )
     AND kind = 'check_income_only'
 ),
 
-cc_best_serasa_new AS (
-  SELECT
-    m.*,
-    ROW_NUMBER() OVER (
-      PARTITION BY m.credit_simulation_id
-      ORDER BY
-        m.credit_check_match_leniency_rank ASC,
-        ABS(m.credit_check_minutes_from_cs) ASC,
-        m.credit_check_created_at DESC,
-        m.credit_check_id DESC
-    ) AS rn_best
-  FROM cc_all_matches m
-  WHERE m.source = 'serasa'
-    AND (
-      COALESCE(m.new_data_format, FALSE) = TRUE
-      OR (TYPEOF(m.credit_check_data) = 'OBJECT' AND m.credit_check_data:reports IS NOT NULL)
-    )
-),
-
-cc_best_serasa_new_1 AS (
+cc_best_serasa_old_1 AS (
   SELECT *
-  FROM cc_best_serasa_new
+  FROM cc_best_serasa_old
   WHERE rn_best = 1
 ),
 
-cc_best_serasa_old AS (
-  SELECT
-    m.*,
-    ROW_NUMBER() OVER (
-      PARTITION BY m.credit_simulation_id
-      ORDER BY
-        m.credit_check_match_leniency_rank ASC,
-        ABS(m.credit_check_minutes_from_cs) ASC,
-        m.credit_check_created_at DESC,
-        m.credit_check_id DESC
-    ) AS rn_best
-  FROM cc_all_matches m
-  WHERE m.source = 'serasa'
-    AND COALESCE(m.new_data_format, FALSE) = FALSE
-    /* Evitar classificar como “old” quando o payload é claramente new (OBJECT com reports) */
-    AND NOT (TYPEOF(m.credit_check_data) = 'OBJECT' AND m.credit_check_data:reports IS NOT NULL)
-),
-
-cc_best_serasa_old_1 AS (
+cc_best_serasa_new_strict_1 AS (
   SELECT *
-  FROM cc_best_serasa_old
-  WHERE rn_best = 1
+  FROM cc_best_serasa_new_strict
+  WHERE rn_best_strict = 1
 ),
 
 cc_best_bacen_internal_score AS (
@@ -687,42 +596,12 @@ cc_best_boa_vista_scpc_net AS (
 ),
 
 /* ============================
-   SERASA novo: reports[] -> report preferido -> registration + negativeData summary + score/range
+   Features de payload: pré-extraídas por credit_check_id em CREDIT_CHECK_FEATURES
+   (queries/features/refresh_check_features.sql; contratos em docs/reference/PAYLOAD_CONTRACTS_MAP.md).
+   Aqui só há join por id — nenhum parsing de VARIANT.
    ============================ */
-serasa_new_reports AS (
-  SELECT
-    s.credit_simulation_id,
-    s.credit_check_id,
-    s.credit_check_created_at,
-    s.credit_check_match_stage,
-    s.credit_check_minutes_from_cs,
-    s.credit_check_match_leniency_rank,
-    s.kind AS serasa_new_kind,
-    s.credit_check_data,
-    r.value AS report,
-    r.index AS report_index
-  FROM cc_best_serasa_new_score_without_income_1 s
-  , LATERAL FLATTEN(input => s.credit_check_data:reports) r
-),
-
-serasa_new_best_report AS (
-  SELECT
-    sr.*,
-    ROW_NUMBER() OVER (
-      PARTITION BY sr.credit_simulation_id
-      ORDER BY
-        IFF(sr.report:reportName::string = 'COMBO_CONCESSAO', 0, 1),
-        sr.report_index ASC
-    ) AS rn_best_report
-  FROM serasa_new_reports sr
-),
-
-serasa_new_best_report_1 AS (
-  SELECT *
-  FROM serasa_new_best_report
-  WHERE rn_best_report = 1
-),
 
+/* SERASA novo: report preferido (COMBO_CONCESSAO, depois menor índice) -> registration + negativeData + score/range */
 serasa_new_features AS (
   SELECT
     s.credit_simulation_id,
@@ -734,159 +613,43 @@ serasa_new_features AS (
     s.credit_check_minutes_from_cs   AS serasa_new_minutes_from_cs,
     s.credit_check_match_leniency_rank AS serasa_new_match_leniency_rank,
     s.kind AS serasa_new_kind,
-    br.report:reportName::string AS serasa_new_report_name,
+    f.serasa_new_report_name,
 
     /* registration */
-    TRY_TO_DATE(br.report:registration:birthDate::string) AS serasa_new_birthdate,
-    br.report:registration:consumerGender::string         AS serasa_new_gender,
-    br.report:registration:address:zipCode::string        AS serasa_new_zipcode,
-    br.report:registration:statusRegistration::string     AS serasa_new_status_registration,
-    TRY_TO_DATE(br.report:registration:statusDate::string) AS serasa_new_status_date,
-    IFF(br.report:registration:birthDate IS NOT NULL, 1, 0) AS serasa_new_has_birthdate,
-    IFF(br.report:registration:consumerGender IS NOT NULL, 1, 0) AS serasa_new_has_gender,
-    IFF(br.report:registration:address:zipCode IS NOT NULL, 1, 0) AS serasa_new_has_zipcode,
-    IFF(br.report:registration:phone IS NOT NULL, 1, 0) AS serasa_new_has_phone,
-    IFF(br.report:registration:address IS NOT NULL, 1, 0) AS serasa_new_has_address,
+    f.serasa_new_birthdate,
+    f.serasa_new_gender,
+    f.serasa_new_zipcode,
+    f.serasa_new_status_registration,
+    f.serasa_new_status_date,
+    COALESCE(f.serasa_new_has_birthdate, 0) AS serasa_new_has_birthdate,
+    COALESCE(f.serasa_new_has_gender, 0)    AS serasa_new_has_gender,
+    COALESCE(f.serasa_new_has_zipcode, 0)   AS serasa_new_has_zipcode,
+    COALESCE(f.serasa_new_has_phone, 0)     AS serasa_new_has_phone,
+    COALESCE(f.serasa_new_has_address, 0)   AS serasa_new_has_address,
 
     /* negativeData summary (counts) */
-    TRY_TO_NUMBER(br.report:negativeData:pefin:summary:count::string)  AS serasa_new_pefin_count,
-    TRY_TO_NUMBER(br.report:negativeData:refin:summary:count::string)  AS serasa_new_refin_count,
-    TRY_TO_NUMBER(br.report:negativeData:notary:summary:count::string) AS serasa_new_notary_count,
-    TRY_TO_NUMBER(br.report:negativeData:check:summary:count::string)  AS serasa_new_check_count,
+    f.serasa_new_pefin_count,
+    f.serasa_new_refin_count,
+    f.serasa_new_notary_count,
+    f.serasa_new_check_count,
 
     /* balances (quando disponíveis) */
-    TRY_TO_NUMBER(br.report:negativeData:pefin:summary:balance::string)  AS serasa_new_pefin_balance,
-    TRY_TO_NUMBER(br.report:negativeData:refin:summary:balance::string)  AS serasa_new_refin_balance,
-    TRY_TO_NUMBER(br.report:negativeData:notary:summary:balance::string) AS serasa_new_notary_balance,
-    TRY_TO_NUMBER(br.report:negativeData:check:summary:balance::string)  AS serasa_new_check_balance,
-
-    /* score/range/model (quando o payload trouxer)
-       Observado com frequência em `KIND='check_income_only'` no top-level,
-       mas pode existir em blocos alternativos (`data` ou dentro do report). */
-    /* normalização: SERASA new (check_income_only) tende a devolver score “escalado”
-       - valores como 435000 parecem representar 435.0 (÷1000)
-       - valores como 8975000 parecem representar 897.5 (÷10000)
-       - valores <= 0 (ex.: -1) tratamos como NULL */
-    IFF(
-      /* clip final para evitar implausíveis */
-      (
-        CASE
-          WHEN COALESCE(
-                 TRY_TO_NUMBER(s.credit_check_data:score::string),
-                 TRY_TO_NUMBER(s.credit_check_data:data:score::string),
-                 /* alguns payloads trazem report.score como OBJETO: {score,range,scoreModel,...} */
-                 TRY_TO_NUMBER(br.report:score:score::string),
-                 TRY_TO_NUMBER(br.report:score::string)
-               ) IS NULL THEN NULL
-          WHEN COALESCE(
-                 TRY_TO_NUMBER(s.credit_check_data:score::string),
-                 TRY_TO_NUMBER(s.credit_check_data:data:score::string),
-                 TRY_TO_NUMBER(br.report:score:score::string),
-                 TRY_TO_NUMBER(br.report:score::string)
-               ) <= 0 THEN NULL
-          WHEN COALESCE(
-                 TRY_TO_NUMBER(s.credit_check_data:score::string),
-                 TRY_TO_NUMBER(s.credit_check_data:data:score::string),
-                 TRY_TO_NUMBER(br.report:score:score::string),
-                 TRY_TO_NUMBER(br.report:score::string)
-               ) >= 1000000 THEN COALESCE(
-                                  TRY_TO_NUMBER(s.credit_check_data:score::string),
-                                  TRY_TO_NUMBER(s.credit_check_data:data:score::string),
-                                  TRY_TO_NUMBER(br.report:score:score::string),
-                                  TRY_TO_NUMBER(br.report:score::string)
-                                ) / 10000
-          WHEN COALESCE(
-                 TRY_TO_NUMBER(s.credit_check_data:score::string),
-                 TRY_TO_NUMBER(s.credit_check_data:data:score::string),
-                 TRY_TO_NUMBER(br.report:score:score::string),
-                 TRY_TO_NUMBER(br.report:score::string)
-               ) >= 1000 THEN COALESCE(
-                                TRY_TO_NUMBER(s.credit_check_data:score::string),
-                                TRY_TO_NUMBER(s.credit_check_data:data:score::string),
-                                TRY_TO_NUMBER(br.report:score:score::string),
-                                TRY_TO_NUMBER(br.report:score::string)
-                              ) / 1000
-          ELSE COALESCE(
-                 TRY_TO_NUMBER(s.credit_check_data:score::string),
-                 TRY_TO_NUMBER(s.credit_check_data:data:score::string),
-                 TRY_TO_NUMBER(br.report:score:score::string),
-                 TRY_TO_NUMBER(br.report:score::string)
-               )
-        END
-      ) > 1000,
-      NULL,
-      (
-        CASE
-          WHEN COALESCE(
-                 TRY_TO_NUMBER(s.credit_check_data:score::string),
-                 TRY_TO_NUMBER(s.credit_check_data:data:score::string),
-                 TRY_TO_NUMBER(br.report:score:score::string),
-                 TRY_TO_NUMBER(br.report:score::string)
-               ) IS NULL THEN NULL
-          WHEN COALESCE(
-                 TRY_TO_NUMBER(s.credit_check_data:score::string),
-                 TRY_TO_NUMBER(s.credit_check_data:data:score::string),
-                 TRY_TO_NUMBER(br.report:score:score::string),
-                 TRY_TO_NUMBER(br.report:score::string)
-               ) <= 0 THEN NULL
-          WHEN COALESCE(
-                 TRY_TO_NUMBER(s.credit_check_data:score::string),
-                 TRY_TO_NUMBER(s.credit_check_data:data:score::string),
-                 TRY_TO_NUMBER(br.report:score:score::string),
-                 TRY_TO_NUMBER(br.report:score::string)
-               ) >= 1000000 THEN COALESCE(
-                                  TRY_TO_NUMBER(s.credit_check_data:score::string),
-                                  TRY_TO_NUMBER(s.credit_check_data:data:score::string),
-                                  TRY_TO_NUMBER(br.report:score:score::string),
-                                  TRY_TO_NUMBER(br.report:score::string)
-                                ) / 10000
-          WHEN COALESCE(
-                 TRY_TO_NUMBER(s.credit_check_data:score::string),
-                 TRY_TO_NUMBER(s.credit_check_data:data:score::string),
-                 TRY_TO_NUMBER(br.report:score:score::string),
-                 TRY_TO_NUMBER(br.report:score::string)
-               ) >= 1000 THEN COALESCE(
-                                TRY_TO_NUMBER(s.credit_check_data:score::string),
-                                TRY_TO_NUMBER(s.credit_check_data:data:score::string),
-                                TRY_TO_NUMBER(br.report:score:score::string),
-                                TRY_TO_NUMBER(br.report:score::string)
-                              ) / 1000
-          ELSE COALESCE(
-                 TRY_TO_NUMBER(s.credit_check_data:score::string),
-                 TRY_TO_NUMBER(s.credit_check_data:data:score::string),
-                 TRY_TO_NUMBER(br.report:score:score::string),
-                 TRY_TO_NUMBER(br.report:score::string)
-               )
-        END
-      )
-    ) AS serasa_new_score,
-
-    COALESCE(
-      s.credit_check_data:range::string,
-      s.credit_check_data:data:range::string,
-      br.report:range::string,
-      br.report:score:range::string
-    ) AS serasa_new_score_range,
-
-    COALESCE(
-      s.credit_check_data:scoreModel::string,
-      s.credit_check_data:data:scoreModel::string,
-      br.report:scoreModel::string,
-      br.report:score:scoreModel::string
-    ) AS serasa_new_score_model,
-
-    CASE
-      WHEN TRY_TO_NUMBER(s.credit_check_data:score::string) IS NOT NULL THEN 'serasa_new_top_level'
-      WHEN TRY_TO_NUMBER(s.credit_check_data:data:score::string) IS NOT NULL THEN 'serasa_new_data_block'
-      WHEN TRY_TO_NUMBER(br.report:score:score::string) IS NOT NULL THEN 'serasa_new_report_score_object'
-      WHEN TRY_TO_NUMBER(br.report:score::string) IS NOT NULL THEN 'serasa_new_report_score_scalar'
-      ELSE NULL
-    END AS serasa_new_score_source_detail,
+    f.serasa_new_pefin_balance,
+    f.serasa_new_refin_balance,
+    f.serasa_new_notary_balance,
+    f.serasa_new_check_balance,
+
+    /* score/range/model: top-level, bloco `data` ou dentro do report; normalização de score
+       “escalado” (÷1000 / ÷10000, <=0 -> NULL, >1000 -> NULL) feita na extração (ADR 0004) */
+    f.serasa_new_score,
+    f.serasa_new_score_range,
+    f.serasa_new_score_model,
+    f.serasa_new_score_source_detail,
 
     'credit_checks_serasa_new' AS serasa_new_source
   FROM cc_best_serasa_new_score_without_income_1 s
-  LEFT JOIN serasa_new_best_report_1 br
-    ON br.credit_simulation_id = s.credit_simulation_id
+  LEFT JOIN CAPIM_DATA_DEV.POSSANI_SANDBOX.CREDIT_CHECK_FEATURES f
+    ON f.credit_check_id = s.credit_check_id
 ),
 
 /* ============================
@@ -905,33 +668,18 @@ serasa_new_income_only_features AS (
     s.credit_check_match_leniency_rank AS serasa_income_only_match_leniency_rank,
 
     /* campos brutos (para auditoria e debug) */
-    TRY_TO_NUMBER(
-      COALESCE(
-        s.credit_check_data:score::string,
-        s.credit_check_data:data:score::string
-      )
-    ) AS serasa_income_only_raw_value,
-
-    COALESCE(s.credit_check_data:range::string, s.credit_check_data:data:range::string) AS serasa_income_only_range,
-    COALESCE(s.credit_check_data:scoreModel::string, s.credit_check_data:data:scoreModel::string) AS serasa_income_only_model,
+    f.serasa_income_only_raw_value,
+    f.serasa_income_only_range,
+    f.serasa_income_only_model,
 
     /* semântica inferida (anti-cegueira): HRP* tem forte evidência de ser "renda estimada" */
-    CASE
-      WHEN COALESCE(s.credit_check_data:scoreModel::string, s.credit_check_data:data:scoreModel::string) ILIKE 'HRP%' THEN 'income_cents'
-      ELSE 'unknown'
-    END AS serasa_income_only_semantic,
+    COALESCE(f.serasa_income_only_semantic, 'unknown') AS serasa_income_only_semantic,
 
     /* renda estimada (reais): somente quando a semântica indicar income_cents e o valor for plausível */
-    IFF(
-      COALESCE(s.credit_check_data:scoreModel::string, s.credit_check_data:data:scoreModel::string) ILIKE 'HRP%'
-      AND TRY_TO_NUMBER(COALESCE(s.credit_check_data:score::string, s.credit_check_data:data:score::string)) IS NOT NULL
-      AND TRY_TO_NUMBER(COALESCE(s.credit_check_data:score::string, s.credit_check_data:data:score::string)) > 0
-      /* sanidade: renda mensal em R$ raramente > 1.000.000; como está em centavos, limite ~100.000.000 */
-      AND TRY_TO_NUMBER(COALESCE(s.credit_check_data:score::string, s.credit_check_data:data:score::string)) <= 100000000,
-      (TRY_TO_NUMBER(COALESCE(s.credit_check_data:score::string, s.credit_check_data:data:score::string)) / 100.0)::FLOAT,
-      NULL
-    ) AS serasa_income_estimated
+    f.serasa_income_estimated
   FROM cc_best_serasa_new_income_only_1 s
+  LEFT JOIN CAPIM_DATA_DEV.POSSANI_SANDBOX.CREDIT_CHECK_FEATURES f
+    ON f.credit_check_id = s.credit_check_id
 ),
 
 /* ============================
@@ -939,219 +687,93 @@ serasa_new_income_only_features AS (
    Motivo: evitar que o “best SERASA new” (por simulation) seja income_only e o eixo de cadastro perca registration/negativeData.
    ============================ */
 serasa_new_registration_strict AS (
-  WITH strict_serasa_candidates AS (
-    SELECT
-      m.credit_simulation_id,
-      m.credit_check_id,
-      m.credit_check_created_at,
-      m.credit_check_match_stage,
-      m.credit_check_minutes_from_cs,
-      m.credit_check_match_leniency_rank,
-      m.credit_check_data,
-      ROW_NUMBER() OVER (
-        PARTITION BY m.credit_simulation_id
-        ORDER BY
-          ABS(m.credit_check_minutes_from_cs) ASC,
-          m.credit_check_created_at DESC,
-          m.credit_check_id DESC
-      ) AS rn_best_strict
-    FROM cc_matches_strict_1h m
-    WHERE m.source = 'serasa'
-      AND (
-        COALESCE(m.new_data_format, FALSE) = TRUE
-        OR (TYPEOF(m.credit_check_data) = 'OBJECT' AND m.credit_check_data:reports IS NOT NULL)
-      )
-      AND m.kind = 'check_score_without_income'
-  ),
-  strict_best AS (
-    SELECT *
-    FROM strict_serasa_candidates
-    WHERE rn_best_strict = 1
-  ),
-  reports AS (
-    SELECT
-      s.credit_simulation_id,
-      s.credit_check_id,
-      s.credit_check_created_at,
-      s.credit_check_match_stage,
-      s.credit_check_minutes_from_cs,
-      s.credit_check_match_leniency_rank,
-      r.value AS report,
-      r.index AS report_index
-    FROM strict_best s
-    , LATERAL FLATTEN(input => s.credit_check_data:reports) r
-  ),
-  best_report AS (
-    SELECT
-      r.*,
-      ROW_NUMBER() OVER (
-        PARTITION BY r.credit_simulation_id
-        ORDER BY
-          IFF(r.report:reportName::string = 'COMBO_CONCESSAO', 0, 1),
-          r.report_index ASC
-      ) AS rn_report
-    FROM reports r
-  )
   SELECT
-    credit_simulation_id,
-    credit_check_id AS serasa_reg_strict_credit_check_id,
-    credit_check_created_at AS serasa_reg_strict_credit_check_created_at,
-    credit_check_match_stage AS serasa_reg_strict_match_stage,
-    credit_check_minutes_from_cs AS serasa_reg_strict_minutes_from_cs,
-    credit_check_match_leniency_rank AS serasa_reg_strict_match_leniency_rank,
-    report:reportName::string AS serasa_reg_strict_report_name,
-    TRY_TO_DATE(report:registration:birthDate::string) AS serasa_reg_strict_birthdate,
-    report:registration:consumerGender::string         AS serasa_reg_strict_gender,
-    report:registration:address:zipCode::string        AS serasa_reg_strict_zipcode,
-    report:registration:statusRegistration::string     AS serasa_reg_strict_status_registration,
-    TRY_TO_DATE(report:registration:statusDate::string) AS serasa_reg_strict_status_date,
-    IFF(report:registration:phone IS NOT NULL, 1, 0) AS serasa_reg_strict_has_phone,
-    IFF(report:registration:address IS NOT NULL, 1, 0) AS serasa_reg_strict_has_address
-  FROM best_report
-  WHERE rn_report = 1
+    s.credit_simulation_id,
+    s.credit_check_id AS serasa_reg_strict_credit_check_id,
+    s.credit_check_created_at AS serasa_reg_strict_credit_check_created_at,
+    s.credit_check_match_stage AS serasa_reg_strict_match_stage,
+    s.credit_check_minutes_from_cs AS serasa_reg_strict_minutes_from_cs,
+    s.credit_check_match_leniency_rank AS serasa_reg_strict_match_leniency_rank,
+    f.serasa_new_report_name AS serasa_reg_strict_report_name,
+    f.serasa_new_birthdate   AS serasa_reg_strict_birthdate,
+    f.serasa_new_gender      AS serasa_reg_strict_gender,
+    f.serasa_new_zipcode     AS serasa_reg_strict_zipcode,
+    f.serasa_new_status_registration AS serasa_reg_strict_status_registration,
+    f.serasa_new_status_date AS serasa_reg_strict_status_date,
+    f.serasa_new_has_phone   AS serasa_reg_strict_has_phone,
+    f.serasa_new_has_address AS serasa_reg_strict_has_address
+  FROM cc_best_serasa_new_strict_1 s
+  JOIN CAPIM_DATA_DEV.POSSANI_SANDBOX.CREDIT_CHECK_FEATURES f
+    ON f.credit_check_id = s.credit_check_id
+  WHERE f.serasa_new_n_reports > 0
 ),
 
 /* ============================
-   SERASA antigo: B-codes em data (ARRAY) -> extrair cadastro/score/negativação (sumários)
+   SERASA antigo: B-codes em data (ARRAY) -> cadastro/score/negativação (sumários)
    ============================ */
-serasa_old_features_raw AS (
+serasa_old_features AS (
   SELECT
     s.credit_simulation_id,
 
     /* linhagem do check */
-    MAX(s.credit_check_id)         AS serasa_old_credit_check_id,
-    MAX(s.credit_check_created_at) AS serasa_old_credit_check_created_at,
-    MAX(s.credit_check_match_stage) AS serasa_old_match_stage,
-    MAX(s.credit_check_minutes_from_cs)   AS serasa_old_minutes_from_cs,
-    MAX(s.credit_check_match_leniency_rank) AS serasa_old_match_leniency_rank,
-
-    /* cadastro/demografia: agregamos por B-code para garantir 1 linha por simulation */
-    MAX(TRY_TO_DATE(f.value:"B002":birth_date::string)) AS b002_birth_date,
-    MAX(TRY_TO_DATE(f.value:"B001":birthdate::string))  AS b001_birthdate,
-    MAX(TRY_TO_DATE(f.value:"B001":birth_date::string)) AS b001_birth_date,
-
-    MAX(f.value:"B002":gender::string) AS b002_gender,
-    MAX(f.value:"B001":gender::string) AS b001_gender,
-
-    MAX(f.value:"B004":zip_code::string) AS b004_zip_code,
-    MAX(f.value:"B004":zipcode::string)  AS b004_zipcode,
-    MAX(f.value:"B004":cep::string)      AS b004_cep,
-
-    MAX(IFF(f.value:"B003" IS NOT NULL, 1, 0)) AS serasa_old_has_phone,
-    MAX(IFF(f.value:"B004" IS NOT NULL, 1, 0)) AS serasa_old_has_address,
-
-    /* score */
-    MAX(NULLIF(TRY_TO_NUMBER(f.value:"B280":score::string), 0)) AS serasa_old_score_b280,
-    MAX(f.value:"B280":score_range_name::string)     AS serasa_old_score_range_name,
-    MAX(TRY_TO_NUMBER(f.value:"B280":delinquency_probability_percent::string)) AS serasa_old_delinquency_prob_pct,
-
-    /* negativação (sumários) */
-    MAX(TRY_TO_NUMBER(f.value:"B357":occurrences_count::string)) AS serasa_old_b357_occurrences_count,
-    MAX(TRY_TO_NUMBER(f.value:"B357":total_occurrence_value::string)) AS serasa_old_b357_total_value,
-    MAX(TRY_TO_NUMBER(f.value:"B361":occurrences_count::string)) AS serasa_old_b361_occurrences_count,
-    MAX(TRY_TO_NUMBER(f.value:"B361":total_occurrence_value::string)) AS serasa_old_b361_total_value,
+    s.credit_check_id         AS serasa_old_credit_check_id,
+    s.credit_check_created_at AS serasa_old_credit_check_created_at,
+    s.credit_check_match_stage AS serasa_old_match_stage,
+    s.credit_check_minutes_from_cs   AS serasa_old_minutes_from_cs,
+    s.credit_check_match_leniency_rank AS serasa_old_match_leniency_rank,
+
+    /* cadastro/demografia: B002 > B001 (nascimento/sexo); B004 (CEP) */
+    f.serasa_old_birthdate,
+    f.serasa_old_gender,
+    f.serasa_old_zipcode,
+
+    f.serasa_old_has_phone,
+    f.serasa_old_has_address,
+
+    f.serasa_old_score_b280,
+    f.serasa_old_score_range_name,
+    f.serasa_old_delinquency_prob_pct,
+
+    f.serasa_old_b357_occurrences_count,
+    f.serasa_old_b357_total_value, /* Observado (amostral): valores vêm como inteiros em R$ (ex.: "000000116" => 116) */
+    f.serasa_old_b361_occurrences_count,
+    f.serasa_old_b361_total_value,
 
     'credit_checks_serasa_old' AS serasa_old_source
   FROM cc_best_serasa_old_1 s
-  , LATERAL FLATTEN(input => s.credit_check_data) f
-  GROUP BY 1
-),
-
-serasa_old_features AS (
-  SELECT
-    credit_simulation_id,
-    serasa_old_credit_check_id,
-    serasa_old_credit_check_created_at,
-    serasa_old_match_stage,
-    serasa_old_minutes_from_cs,
-    serasa_old_match_leniency_rank,
-
-    COALESCE(b002_birth_date, b001_birthdate, b001_birth_date) AS serasa_old_birthdate,
-    COALESCE(b002_gender, b001_gender) AS serasa_old_gender,
-    COALESCE(b004_zip_code, b004_zipcode, b004_cep) AS serasa_old_zipcode,
-
-    serasa_old_has_phone,
-    serasa_old_has_address,
-
-    serasa_old_score_b280,
-    serasa_old_score_range_name,
-    serasa_old_delinquency_prob_pct,
-
-    serasa_old_b357_occurrences_count,
-    (serasa_old_b357_total_value)::FLOAT AS serasa_old_b357_total_value, /* Observado (amostral): valores vêm como inteiros em R$ (ex.: "000000116" => 116) */
-    serasa_old_b361_occurrences_count,
-    (serasa_old_b361_total_value)::FLOAT AS serasa_old_b361_total_value,
-
-    serasa_old_source
-  FROM serasa_old_features_raw
+  JOIN CAPIM_DATA_DEV.POSSANI_SANDBOX.CREDIT_CHECK_FEATURES f
+    ON f.credit_check_id = s.credit_check_id
+  WHERE f.serasa_old_n_blocks > 0
 ),
 
 /* ============================
-   BOA VISTA SCPC (scpc_net): extração de negativação (bloco 141) e cadastro (249)
+   BOA VISTA SCPC (scpc_net): negativação (bloco 141) e cadastro (249)
    ============================ */
-boa_vista_scpc_net_features_raw AS (
-  SELECT
-    s.credit_simulation_id,
-    MAX(s.credit_check_id)         AS bvs_net_credit_check_id,
-    MAX(s.credit_check_created_at) AS bvs_net_credit_check_created_at,
-    MAX(s.credit_check_match_stage) AS bvs_net_match_stage,
-    MAX(s.credit_check_minutes_from_cs)   AS bvs_net_minutes_from_cs,
-    MAX(s.credit_check_match_leniency_rank) AS bvs_net_match_leniency_rank,
-
-    /* Bloco 249: Cadastro */
-    /* formato data BVS: DDMMYYYY */
-    MAX(TRY_TO_DATE(f.value:"249":birthdate::string, 'DDMMYYYY')) AS bvs_net_birthdate,
-    MAX(f.value:"249":name::string) AS bvs_net_name,
-    MAX(f.value:"249":status::string) AS bvs_net_status,
-
-    /* Bloco 141: Débitos */
-    MAX(TRY_TO_NUMBER(f.value:"141":debit_total_count::string)) AS bvs_net_debit_count,
-    /* valor vem sem pontuação (ex: 0000000299113) mas geralmente é centavos? Na inspeção visual:
-       299113 => 2991.13? ou 299.113?
-       No exemplo: "0000000299113" com "currency_type": "R$"
-       Vamos assumir centavos por padrão bancário, mas confirmar se possível.
-       Se for R$ 299,11 então é divide por 100.
-       Se for R$ 2991,13 então é divide por 100.
-       Se for 2 dívidas totalizando isso, parece alto.
-       OBS: O exemplo do usuário diz "2 dívidas (total R$ 299,00)". Se o raw é 299113, então não bate fácil.
-       Espera: 299113 / 100 = 2991.13.
-       Talvez o exemplo visual que vi tenha sido mal interpretado.
-       Vou assumir divide por 100 (centavos). */
-    MAX(TRY_TO_NUMBER(f.value:"141":debit_total_value::string)) AS bvs_net_debit_value_raw,
-
-    /* Bloco 123: flag simples de existência (S/N) */
-    MAX(NULLIF(TRIM(f.value:"123":exists::string), '')) AS bvs_net_exists_123_raw,
-
-    /* Recência (quando disponível) */
-    MAX(TRY_TO_DATE(NULLIF(TRIM(f.value:"141":last_debit_date::string), ''))) AS bvs_net_last_debit_date,
-
-    'credit_checks_boa_vista_scpc_net' AS bvs_net_source
-  FROM cc_best_boa_vista_scpc_net s
-  , LATERAL FLATTEN(input => s.credit_check_data) f
-  GROUP BY 1
-),
-
 boa_vista_scpc_net_features AS (
   SELECT
-    credit_simulation_id,
-    bvs_net_credit_check_id,
-    bvs_net_credit_check_created_at,
-    bvs_net_match_stage,
-    bvs_net_minutes_from_cs,
-    bvs_net_match_leniency_rank,
-    bvs_net_birthdate,
-    bvs_net_status,
-    bvs_net_debit_count,
-    (bvs_net_debit_value_raw / 100.0)::FLOAT AS bvs_net_debit_value,
-    bvs_net_exists_123_raw,
+    s.credit_simulation_id,
+    s.credit_check_id         AS bvs_net_credit_check_id,
+    s.credit_check_created_at AS bvs_net_credit_check_created_at,
+    s.credit_check_match_stage AS bvs_net_match_stage,
+    s.credit_check_minutes_from_cs   AS bvs_net_minutes_from_cs,
+    s.credit_check_match_leniency_rank AS bvs_net_match_leniency_rank,
+    f.bvs_net_birthdate,
+    f.bvs_net_status,
+    f.bvs_net_debit_count,
+    /* debit_total_value vem sem pontuação (ex.: "0000000299113"); assumimos centavos (÷100) */
+    (f.bvs_net_debit_value_raw / 100.0)::FLOAT AS bvs_net_debit_value,
+    f.bvs_net_exists_123_raw,
     CASE
-      WHEN bvs_net_exists_123_raw = 'S' THEN TRUE
-      WHEN bvs_net_exists_123_raw = 'N' THEN FALSE
+      WHEN f.bvs_net_exists_123_raw = 'S' THEN TRUE
+      WHEN f.bvs_net_exists_123_raw = 'N' THEN FALSE
       ELSE NULL
     END AS bvs_net_exists_123,
-    bvs_net_last_debit_date,
-    bvs_net_source
-  FROM boa_vista_scpc_net_features_raw
+    f.bvs_net_last_debit_date,
+    'credit_checks_boa_vista_scpc_net' AS bvs_net_source
+  FROM cc_best_boa_vista_scpc_net s
+  JOIN CAPIM_DATA_DEV.POSSANI_SANDBOX.CREDIT_CHECK_FEATURES f
+    ON f.credit_check_id = s.credit_check_id
+  WHERE f.bvs_net_n_blocks > 0
 ),
 
 /* ============================
@@ -1163,17 +785,17 @@ scr_matches_5y AS (
      Motivo: em amostras, SCR não aparece no entorno (±1h/15d/180d) das simulations. */
   SELECT
     cs.credit_simulation_id,
-    cc.id AS scr_credit_check_id,
-    cc.created_at AS scr_credit_check_created_at,
-    cc.data AS scr_credit_check_data,
+    ix.credit_check_id AS scr_credit_check_id,
+    ix.created_at AS scr_credit_check_created_at,
     'scr_fallback_5y' AS scr_match_stage,
     4 AS scr_match_leniency_rank,
-    DATEDIFF('minute', cc.created_at, cs.cs_created_at) AS scr_minutes_from_cs
+    DATEDIFF('minute', ix.created_at, cs.cs_created_at) AS scr_minutes_from_cs
   FROM cs_enriched cs
-  JOIN CAPIM_DATA.RESTRICTED.INCREMENTAL_CREDIT_CHECKS_API cc
-    ON REGEXP_REPLACE(cc.cpf, '\\D','') = cs.cpf_effective_digits
-   AND cc.source = 'scr'
-   AND cc.created_at BETWEEN DATEADD('day', -1825, cs.cs_created_at) AND cs.cs_created_at
+  JOIN CAPIM_DATA_DEV.POSSANI_SANDBOX.CREDIT_CHECKS_CPF_INDEX ix
+    ON ix.cpf_digits = cs.cpf_effective_digits
+   AND ix.source = 'scr'
+   AND ix.created_at BETWEEN DATEADD('day', -1825, cs.cs_created_at) AND cs.cs_created_at
+  WHERE TRUE /*@scope scr ts=ix.created_at lookback_days=1825*/
 ),
 
 cc_best_scr AS (
@@ -1192,33 +814,6 @@ cc_best_scr_1 AS (
   WHERE rn_best = 1
 ),
 
-scr_ops AS (
-  SELECT
-    s.credit_simulation_id,
-    o.value AS op
-  FROM cc_best_scr_1 s
-  , LATERAL FLATTEN(
-      input => COALESCE(
-        /* nested (camelCase) */
-        s.scr_credit_check_data:resumoDoCliente:listaDeResumoDasOperacoes,
-        s.scr_credit_check_data:resumoDoCliente:ListaDeResumoDasOperacoes,
-        s.scr_credit_check_data:ResumoDoCliente:listaDeResumoDasOperacoes,
-        s.scr_credit_check_data:ResumoDoCliente:ListaDeResumoDasOperacoes,
-        /* top-level fallbacks */
-        s.scr_credit_check_data:listaDeResumoDasOperacoes,
-        s.scr_credit_check_data:ListaDeResumoDasOperacoes
-      )
-    ) o
-),
-
-scr_vencimentos AS (
-  SELECT
-    so.credit_simulation_id,
-    v.value AS venc
-  FROM scr_ops so
-  , LATERAL FLATTEN(input => COALESCE(so.op:listaDeVencimentos, so.op:ListaDeVencimentos)) v
-),
-
 scr_features AS (
   SELECT
     s.credit_simulation_id,
@@ -1227,48 +822,17 @@ scr_features AS (
     s.scr_match_stage,
     s.scr_minutes_from_cs,
     s.scr_match_leniency_rank,
-    IFF(
-      s.scr_credit_check_data:resumoDoCliente IS NOT NULL
-      OR s.scr_credit_check_data:ResumoDoCliente IS NOT NULL,
-      TRUE, FALSE
-    ) AS scr_has_resumo_do_cliente,
+    COALESCE(f.scr_has_resumo_do_cliente, FALSE) AS scr_has_resumo_do_cliente,
     /* contagens (unitless, estáveis) */
-    COALESCE(opc.n_ops, 0) AS scr_operations_count,
-    COALESCE(vc.n_vencimentos, 0) AS scr_vencimentos_count,
+    COALESCE(f.scr_operations_count, 0) AS scr_operations_count,
+    COALESCE(f.scr_vencimentos_count, 0) AS scr_vencimentos_count,
     /* somatório raw (unidade/escala a confirmar; não usamos em score canônico) */
-    vc.sum_valor_raw AS scr_sum_valor_raw,
-    TRY_TO_DATE(
-      COALESCE(
-        s.scr_credit_check_data:resumoDoCliente:dataBaseConsultada::string,
-        s.scr_credit_check_data:ResumoDoCliente:DataBaseConsultada::string,
-        s.scr_credit_check_data:resumoDoCliente:dataBase::string,
-        s.scr_credit_check_data:ResumoDoCliente:DataBase::string
-      )
-    ) AS scr_data_base_consultada,
+    f.scr_sum_valor_raw,
+    f.scr_data_base_consultada,
     'credit_checks_scr' AS scr_source
   FROM cc_best_scr_1 s
-  LEFT JOIN (
-    SELECT credit_simulation_id, COUNT(*) AS n_ops
-    FROM scr_ops
-    GROUP BY 1
-  ) opc
-    ON opc.credit_simulation_id = s.credit_simulation_id
-  LEFT JOIN (
-    SELECT
-      credit_simulation_id,
-      COUNT(*) AS n_vencimentos,
-      SUM(
-        TRY_TO_NUMBER(
-          COALESCE(
-            venc:valorVencimento::string,
-            venc:ValorVencimento::string
-          )
-        )
-      )::FLOAT AS sum_valor_raw
-    FROM scr_vencimentos
-    GROUP BY 1
-  ) vc
-    ON vc.credit_simulation_id = s.credit_simulation_id
+  LEFT JOIN CAPIM_DATA_DEV.POSSANI_SANDBOX.CREDIT_CHECK_FEATURES f
+    ON f.credit_check_id = s.scr_credit_check_id
 ),
 
 /* ============================
@@ -1312,18 +876,15 @@ bacen_internal_features AS (
     b.credit_check_created_at AS bacen_credit_check_created_at,
     b.credit_check_match_stage AS bacen_match_stage,
     b.credit_check_minutes_from_cs AS bacen_minutes_from_cs,
-    TRY_TO_NUMBER(b.credit_check_data:predictions[0]:score::string) AS bacen_internal_score,
+    f.bacen_internal_score,
     /* Proxies adicionais (alta cobertura) vindos do motor interno Bacen */
-    TRY_TO_NUMBER(b.credit_check_data:predictions[0]:limitesdecredito::string) AS bacen_credit_limits_total,
-    TRY_TO_NUMBER(b.credit_check_data:predictions[0]:valorvencimento_mean_credit_limits::string) AS bacen_mean_due_value_credit_limits,
-    CASE
-      WHEN b.credit_check_data:predictions[0]:is_not_banked IS NULL THEN NULL
-      WHEN LOWER(b.credit_check_data:predictions[0]:is_not_banked::string) IN ('true','1') THEN TRUE
-      WHEN LOWER(b.credit_check_data:predictions[0]:is_not_banked::string) IN ('false','0') THEN FALSE
-      ELSE NULL
-    END AS bacen_is_not_banked,
+    f.bacen_credit_limits_total,
+    f.bacen_mean_due_value_credit_limits,
+    f.bacen_is_not_banked,
     'credit_checks_bacen_internal_score' AS bacen_source
   FROM cc_best_bacen_internal_score b
+  LEFT JOIN CAPIM_DATA_DEV.POSSANI_SANDBOX.CREDIT_CHECK_FEATURES f
+    ON f.credit_check_id = b.credit_check_id
 ),
 
 /* ============================
@@ -1336,10 +897,12 @@ boa_vista_score_pf_features AS (
     b.credit_check_created_at AS bvs_credit_check_created_at,
     b.credit_check_match_stage AS bvs_match_stage,
     b.credit_check_minutes_from_cs AS bvs_minutes_from_cs,
-    /* path observado no doc (pode variar; esta é a leitura mais simples) */
-    TRY_TO_NUMBER(b.credit_check_data:score_positivo:score_classificacao_varios_modelos:score::string) AS bvs_score,
+    /* path observado no doc: score_positivo.score_classificacao_varios_modelos.score */
+    f.bvs_score,
     'credit_checks_boa_vista_score_pf' AS bvs_source
   FROM cc_best_boa_vista_score_pf b
+  LEFT JOIN CAPIM_DATA_DEV.POSSANI_SANDBOX.CREDIT_CHECK_FEATURES f
+    ON f.credit_check_id = b.credit_check_id
 ),
 
 /* ============================
@@ -1948,12 +1511,11 @@ axis_score AS (
 
 credit_check_stats AS (
   SELECT
-    cs.credit_simulation_id,
-    COUNT(DISTINCT cc.id) AS total_credit_checks_count
-  FROM cs_enriched cs
-  JOIN CAPIM_DATA.RESTRICTED.INCREMENTAL_CREDIT_CHECKS_API cc
-    ON REGEXP_REPLACE(cc.cpf, '\\D','') = cs.cpf_effective_digits
-   AND cc.created_at BETWEEN DATEADD('hour', -1, cs.cs_created_at) AND DATEADD('hour', 1, cs.cs_created_at)
+    m.credit_simulation_id,
+    COUNT(DISTINCT m.credit_check_id) AS total_credit_checks_count
+  FROM cc_all_matches m
+  /* rank 0 = janela estrita ±1h (mesma janela do antigo join dedicado) */
+  WHERE m.credit_check_match_leniency_rank = 0
   GROUP BY 1
 ),
 
@@ -25,8 +25,10 @@
     - Enrichment canônico (simulações): CAPIM_DATA_DEV.POSSANI_SANDBOX.CREDIT_SIMULATIONS_ENRICHED_BORROWER
       (ajuste o schema se necessário)
     - Legacy: CAPIM_DATA.RESTRICTED.SOURCE_PRE_ANALYSIS_API (contém CPF e BIRTHDATE)
-    - Credit checks: CAPIM_DATA.RESTRICTED.INCREMENTAL_CREDIT_CHECKS_API (por CPF+tempo)
-    - Crivo checks: CAPIM_DATA.SOURCE_STAGING.SOURCE_CRIVO_CHECKS (CPF em KEY_PARAMETERS; fallback por CPF+tempo)
+    - Credit checks: CAPIM_DATA.RESTRICTED.INCREMENTAL_CREDIT_CHECKS_API (por CPF+tempo, via CREDIT_CHECKS_CPF_INDEX;
+      features pré-extraídas em CREDIT_CHECK_FEATURES)
+    - Crivo checks: CAPIM_DATA.SOURCE_STAGING.SOURCE_CRIVO_CHECKS (CPF em KEY_PARAMETERS; fallback por CPF+tempo,
+      via CRIVO_CHECKS_CPF_INDEX; features pré-extraídas em CRIVO_CHECK_FEATURES)
 */
 
 WITH params AS (
@@ -37,28 +39,16 @@ WITH params AS (
     180::INT AS cap_days,
     1  ::INT AS crivo_primary_hours,
     15 ::INT AS crivo_cache_days,
-    180::INT AS crivo_cap_days,
-
-    /* ============================
-       SAMPLING (opcional; para evitar full scan)
-       - Se sample_n_per_month for NULL: roda tudo (padrão)
-       - Se sample_n_per_month tiver valor: limita a N linhas por (type, mês)
-       - Se sample_months estiver vazio: não restringe por mês (padrão)
-       - Se sample_months tiver valores: restringe aos meses listados
-       ============================ */
-    NULL::INT AS sample_n_per_month
+    180::INT AS crivo_cap_days
 ),
 
-/* Lista opcional de meses (primeiro dia do mês). Deixe vazio para não filtrar por período. */
-sample_months AS (
-  SELECT NULL::DATE AS month WHERE FALSE
-  /*
-  UNION ALL SELECT TO_DATE('2025-12-01')
-  UNION ALL SELECT TO_DATE('2025-09-01')
-  UNION ALL SELECT TO_DATE('2025-03-01')
-  UNION ALL SELECT TO_DATE('2024-10-01')
-  */
-),
+/* ============================
+   RECORTE (opcional; para evitar full scan)
+   - Marcadores `@scope` (comentários) recebem período/meses/amostra via src/utils/sql_template.py
+     (CLI: --period-start/--period-end/--months/--sample-fraction);
+   - amostra por hash do PRE_ANALYSIS_ID (determinística, mesma seleção em todos os CTEs);
+   - rodando o arquivo direto no Worksheet, os marcadores são só comentários: roda tudo (padrão).
+   ============================ */
 
 /* ============================
    Base: PRE_ANALYSES deduplicada no grão (type,id)
@@ -88,9 +78,7 @@ pa_dedup AS (
     pa.FINANCING_CONDITIONS,
     pa.INTEREST_RATES_ARRAY
   FROM CAPIM_DATA.CAPIM_ANALYTICS.PRE_ANALYSES pa
-  WHERE
-    (SELECT COUNT(*) FROM sample_months) = 0
-    OR DATE_TRUNC('month', pa.PRE_ANALYSIS_CREATED_AT) IN (SELECT month FROM sample_months)
+  WHERE TRUE /*@scope pa ts=pa.PRE_ANALYSIS_CREATED_AT id=pa.PRE_ANALYSIS_ID::NUMBER*/
   QUALIFY ROW_NUMBER() OVER (
     PARTITION BY pa.PRE_ANALYSIS_TYPE, pa.PRE_ANALYSIS_ID
     ORDER BY
@@ -99,19 +87,6 @@ pa_dedup AS (
   ) = 1
 ),
 
-/* Escopo final: aplica sampling por mês/tipo (opcional) */
-pa_scope AS (
-  SELECT pa.*
-  FROM pa_dedup pa
-  JOIN params p ON TRUE
-  QUALIFY
-    p.sample_n_per_month IS NULL
-    OR ROW_NUMBER() OVER (
-      PARTITION BY pa.PRE_ANALYSIS_TYPE, DATE_TRUNC('month', pa.PRE_ANALYSIS_CREATED_AT)
-      ORDER BY UNIFORM(0, 1000000, RANDOM())
-    ) <= p.sample_n_per_month
-),
-
 /* ============================
    Parte A: tipo credit_simulation → reuso do enrichment de credit_simulations
    ============================ */
@@ -133,8 +108,9 @@ pa_as_credit_simulation AS (
     pa.MINIMUM_TERM_AVAILABLE,
     pa.PROPOSAL_INTEREST,
     pa.HAS_REQUEST,
-    pa.FINANCING_CONDITIONS
-  FROM pa_scope pa
+    pa.FINANCING_CONDITIONS,
+    pa.PRE_ANALYSIS_UPDATED_AT AS pa_updated_at
+  FROM pa_dedup pa
   WHERE pa.PRE_ANALYSIS_TYPE = 'credit_simulation'
 ),
 
@@ -143,6 +119,7 @@ cs_enriched AS (
      Ajuste se o schema destino for diferente. */
   SELECT *
   FROM CAPIM_DATA_DEV.POSSANI_SANDBOX.CREDIT_SIMULATIONS_ENRICHED_BORROWER
+  WHERE TRUE /*@scope cs id=credit_simulation_id*/
 ),
 
 part_a_reused AS (
@@ -242,7 +219,10 @@ part_a_reused AS (
     /* Crivo lineage (quando existir) */
     cs.crivo_check_id_resolved,
     cs.crivo_resolution_stage,
-    NULL::NUMBER AS crivo_minutes_from_cs
+    NULL::NUMBER AS crivo_minutes_from_cs,
+
+    /* watermark de atualização da origem (delta do snapshot/cubo do C1) */
+    a.pa_updated_at
   FROM pa_as_credit_simulation a
   LEFT JOIN cs_enriched cs
     ON cs.credit_simulation_id = a.credit_simulation_id
@@ -257,6 +237,7 @@ spa_dedup AS (
   SELECT
     spa.*
   FROM CAPIM_DATA.RESTRICTED.SOURCE_PRE_ANALYSIS_API spa
+  WHERE TRUE /*@scope spa id=spa.PRE_ANALYSIS_ID::NUMBER*/
   QUALIFY ROW_NUMBER() OVER (
     PARTITION BY spa.PRE_ANALYSIS_ID
     ORDER BY
@@ -287,6 +268,7 @@ pa_legacy AS (
     pa.HAS_REQUEST,
     pa.FINANCING_CONDITIONS,
     pa.INTEREST_RATES_ARRAY,
+    pa.PRE_ANALYSIS_UPDATED_AT AS pa_updated_at,
 
     spa.CPF AS cpf_raw,
     REGEXP_REPLACE(spa.CPF, '\\D','') AS cpf_digits,
@@ -295,7 +277,7 @@ pa_legacy AS (
     spa.ZIPCODE AS legacy_zipcode,
     spa.STATE   AS legacy_state,
     spa.OCCUPATION AS legacy_occupation
-  FROM pa_scope pa
+  FROM pa_dedup pa
   LEFT JOIN spa_dedup spa
     ON spa.PRE_ANALYSIS_ID = pa.PRE_ANALYSIS_ID
   WHERE pa.PRE_ANALYSIS_TYPE = 'pre_analysis'
@@ -460,7 +442,7 @@ pacc_legacy AS (
     TRY_TO_NUMBER(p.SERASA_REFIN::string)   AS pacc_serasa_refin_count,
     TRY_TO_NUMBER(p.SERASA_PROTEST::string) AS pacc_serasa_protest_count
   FROM CAPIM_DATA.CAPIM_ANALYTICS.PRE_ANALYSIS_CREDIT_CHECK p
-  WHERE p.PRE_ANALYSIS_TYPE = 'pre_analysis'
+  WHERE p.PRE_ANALYSIS_TYPE = 'pre_analysis' /*@scope pacc id=p.PRE_ANALYSIS_ID::NUMBER*/
   QUALIFY ROW_NUMBER() OVER (
     PARTITION BY p.PRE_ANALYSIS_ID
     ORDER BY p.PRE_ANALYSIS_CREATED_AT DESC
@@ -496,6 +478,7 @@ serasa_hash_old_15d AS (
   WHERE DATE(pa.c1_created_at) < '2024-04-04'
     AND (s.kind IS NULL OR s.kind = 'check_score')
     AND ABS(DATEDIFF('days', pa.c1_created_at, DATEADD('hours', -3, s.serasa_consulted_at))) BETWEEN 0 AND 15
+    /*@scope serasa ts=s.serasa_consulted_at lookback_days=17 lookahead_days=17*/
 ),
 
 serasa_hash_new_15d_aux AS (
@@ -521,6 +504,7 @@ serasa_hash_new_15d_aux AS (
   WHERE DATE(pa.c1_created_at) >= '2024-04-04'
     AND s.kind IN ('check_income_only', 'check_score_without_income')
     AND ABS(DATEDIFF('days', pa.c1_created_at, DATEADD('hours', -3, s.serasa_consulted_at))) BETWEEN 0 AND 15
+    /*@scope serasa ts=s.serasa_consulted_at lookback_days=17 lookahead_days=17*/
 ),
 
 serasa_hash_new_15d AS (
@@ -583,6 +567,7 @@ bvs_score_pf_hash_15d AS (
   JOIN CAPIM_DATA.RESTRICTED.SOURCE_CREDIT_CHECKS_API_BOA_VISTA_SCORE_PF v
     ON v.hash_cpf = pa.hash_cpf
   WHERE ABS(DATEDIFF('days', pa.c1_created_at, DATEADD('hours', -3, v.bvs_score_pf_net_consulted_at))) BETWEEN 0 AND 15
+    /*@scope bvs_score_pf ts=v.bvs_score_pf_net_consulted_at lookback_days=17 lookahead_days=17*/
   QUALIFY rn = 1
 ),
 
@@ -604,6 +589,7 @@ bvs_scpc_hash_15d AS (
   JOIN CAPIM_DATA.RESTRICTED.SOURCE_CREDIT_CHECKS_API_BOA_VISTA_SCPC_NET s
     ON s.hash_cpf = pa.hash_cpf
   WHERE ABS(DATEDIFF('days', pa.c1_created_at, DATEADD('hours', -3, s.bvs_scpc_net_consulted_at))) BETWEEN 0 AND 15
+    /*@scope bvs_scpc ts=s.bvs_scpc_net_consulted_at lookback_days=17 lookahead_days=17*/
   QUALIFY rn = 1
 ),
 
@@ -621,92 +607,95 @@ scr_report_hash_15d AS (
   JOIN CAPIM_DATA.RESTRICTED.SOURCE_CREDIT_CHECKS_API_SCR_REPORT r
     ON r.hash_cpf = pa.hash_cpf
   WHERE ABS(DATEDIFF('days', pa.c1_created_at, DATEADD('hours', -3, r.scr_report_consulted_at))) BETWEEN 0 AND 15
+    /*@scope scr ts=r.scr_report_consulted_at lookback_days=17 lookahead_days=17*/
   QUALIFY rn = 1
 ),
 
-/* ===== Credit checks: associação por CPF + tempo (mesmas janelas do core) ===== */
+/* ===== Credit checks: associação por CPF + tempo (mesmas janelas do core) =====
+   Matches sobre o índice pré-normalizado CREDIT_CHECKS_CPF_INDEX (poda por cpf_digits/created_at);
+   `data` (VARIANT) não é lido aqui: features dos vencedores vêm de CREDIT_CHECK_FEATURES. */
 cc_matches_strict_1h AS (
   SELECT
     pa.c1_entity_id,
-    cc.id         AS credit_check_id,
+    cc.credit_check_id,
     cc.created_at AS credit_check_created_at,
     cc.source,
     cc.kind,
     COALESCE(cc.new_data_format, FALSE) AS new_data_format,
-    cc.data       AS credit_check_data,
+    cc.payload_is_new AS credit_check_payload_is_new,
     'strict_primary_1h' AS match_stage,
     0 AS leniency_rank,
     DATEDIFF('minute', cc.created_at, pa.c1_created_at) AS minutes_from_c1
   FROM pa_legacy pa
   JOIN params p ON TRUE
-  JOIN CAPIM_DATA.RESTRICTED.INCREMENTAL_CREDIT_CHECKS_API cc
-    ON REGEXP_REPLACE(cc.cpf, '\\D','') = pa.cpf_digits
+  JOIN CAPIM_DATA_DEV.POSSANI_SANDBOX.CREDIT_CHECKS_CPF_INDEX cc
+    ON cc.cpf_digits = pa.cpf_digits
    AND cc.created_at BETWEEN DATEADD('hour', -p.primary_hours, pa.c1_created_at)
                         AND DATEADD('hour',  p.primary_hours, pa.c1_created_at)
-  WHERE pa.cpf_digits IS NOT NULL
+  WHERE pa.cpf_digits IS NOT NULL /*@scope cc ts=cc.created_at lookback_days=180 lookahead_days=1*/
 ),
 
 cc_matches_lenient_24h AS (
   SELECT
     pa.c1_entity_id,
-    cc.id         AS credit_check_id,
+    cc.credit_check_id,
     cc.created_at AS credit_check_created_at,
     cc.source,
     cc.kind,
     COALESCE(cc.new_data_format, FALSE) AS new_data_format,
-    cc.data       AS credit_check_data,
+    cc.payload_is_new AS credit_check_payload_is_new,
     'lenient_primary_24h' AS match_stage,
     1 AS leniency_rank,
     DATEDIFF('minute', cc.created_at, pa.c1_created_at) AS minutes_from_c1
   FROM pa_legacy pa
   JOIN params p ON TRUE
-  JOIN CAPIM_DATA.RESTRICTED.INCREMENTAL_CREDIT_CHECKS_API cc
-    ON REGEXP_REPLACE(cc.cpf, '\\D','') = pa.cpf_digits
+  JOIN CAPIM_DATA_DEV.POSSANI_SANDBOX.CREDIT_CHECKS_CPF_INDEX cc
+    ON cc.cpf_digits = pa.cpf_digits
    AND cc.created_at BETWEEN DATEADD('hour', -p.primary_hours_wide, pa.c1_created_at)
                         AND DATEADD('hour',  p.primary_hours_wide, pa.c1_created_at)
-  WHERE pa.cpf_digits IS NOT NULL
+  WHERE pa.cpf_digits IS NOT NULL /*@scope cc ts=cc.created_at lookback_days=180 lookahead_days=1*/
 ),
 
 cc_matches_fallback_15d AS (
   SELECT
     pa.c1_entity_id,
-    cc.id         AS credit_check_id,
+    cc.credit_check_id,
     cc.created_at AS credit_check_created_at,
     cc.source,
     cc.kind,
     COALESCE(cc.new_data_format, FALSE) AS new_data_format,
-    cc.data       AS credit_check_data,
+    cc.payload_is_new AS credit_check_payload_is_new,
     'lenient_fallback_15d' AS match_stage,
     2 AS leniency_rank,
     DATEDIFF('minute', cc.created_at, pa.c1_created_at) AS minutes_from_c1
   FROM pa_legacy pa
   JOIN params p ON TRUE
-  JOIN CAPIM_DATA.RESTRICTED.INCREMENTAL_CREDIT_CHECKS_API cc
-    ON REGEXP_REPLACE(cc.cpf, '\\D','') = pa.cpf_digits
+  JOIN CAPIM_DATA_DEV.POSSANI_SANDBOX.CREDIT_CHECKS_CPF_INDEX cc
+    ON cc.cpf_digits = pa.cpf_digits
    AND cc.created_at BETWEEN DATEADD('day', -p.cache_days, pa.c1_created_at)
                         AND pa.c1_created_at
-  WHERE pa.cpf_digits IS NOT NULL
+  WHERE pa.cpf_digits IS NOT NULL /*@scope cc ts=cc.created_at lookback_days=180 lookahead_days=1*/
 ),
 
 cc_matches_fallback_180d AS (
   SELECT
     pa.c1_entity_id,
-    cc.id         AS credit_check_id,
+    cc.credit_check_id,
     cc.created_at AS credit_check_created_at,
     cc.source,
     cc.kind,
     COALESCE(cc.new_data_format, FALSE) AS new_data_format,
-    cc.data       AS credit_check_data,
+    cc.payload_is_new AS credit_check_payload_is_new,
     'lenient_fallback_180d' AS match_stage,
     3 AS leniency_rank,
     DATEDIFF('minute', cc.created_at, pa.c1_created_at) AS minutes_from_c1
   FROM pa_legacy pa
   JOIN params p ON TRUE
-  JOIN CAPIM_DATA.RESTRICTED.INCREMENTAL_CREDIT_CHECKS_API cc
-    ON REGEXP_REPLACE(cc.cpf, '\\D','') = pa.cpf_digits
+  JOIN CAPIM_DATA_DEV.POSSANI_SANDBOX.CREDIT_CHECKS_CPF_INDEX cc
+    ON cc.cpf_digits = pa.cpf_digits
    AND cc.created_at BETWEEN DATEADD('day', -p.cap_days, pa.c1_created_at)
                         AND pa.c1_created_at
-  WHERE pa.cpf_digits IS NOT NULL
+  WHERE pa.cpf_digits IS NOT NULL /*@scope cc ts=cc.created_at lookback_days=180 lookahead_days=1*/
 ),
 
 cc_all_matches AS (
@@ -730,12 +719,6 @@ cc_best_per_source_kind AS (
   FROM cc_all_matches m
 ),
 
-cc_best_source_kind_1 AS (
-  SELECT *
-  FROM cc_best_per_source_kind
-  WHERE rn_best_source_kind = 1
-),
-
 /* Algumas fontes têm `kind` inconsistente (às vezes NULL). Para evitar duplicação
    na montagem final, escolhemos 1 linha por (c1_entity_id, source). */
 cc_best_per_source AS (
@@ -752,6 +735,12 @@ cc_best_per_source AS (
   FROM cc_all_matches m
 ),
 
+cc_best_source_kind_1 AS (
+  SELECT *
+  FROM cc_best_per_source_kind
+  WHERE rn_best_source_kind = 1
+),
+
 cc_best_source_1 AS (
   SELECT *
   FROM cc_best_per_source
@@ -765,7 +754,7 @@ cc_best_serasa_new_score_without_income_1 AS (
   WHERE source = 'serasa'
     AND (
       new_data_format = TRUE
-      OR (TYPEOF(credit_check_data) = 'OBJECT' AND credit_check_data:reports IS NOT NULL)
+      OR credit_check_payload_is_new
     )
     AND kind = 'check_score_without_income'
 ),
@@ -776,7 +765,7 @@ cc_best_serasa_new_income_only_1 AS (
   WHERE source = 'serasa'
     AND (
       new_data_format = TRUE
-      OR (TYPEOF(credit_check_data) = 'OBJECT' AND credit_check_data:reports IS NOT NULL)
+      OR credit_check_payload_is_new
     )
     AND kind = 'check_income_only'
 ),
@@ -786,7 +775,7 @@ cc_best_serasa_old_1 AS (
   FROM cc_best_source_kind_1
   WHERE source = 'serasa'
     AND new_data_format = FALSE
-    AND NOT (TYPEOF(credit_check_data) = 'OBJECT' AND credit_check_data:reports IS NOT NULL)
+    AND NOT credit_check_payload_is_new
 ),
 
 cc_best_boa_vista_score_pf_1 AS (
@@ -801,102 +790,89 @@ cc_best_bacen_internal_1 AS (
   WHERE source = 'bacen_internal_score'
 ),
 
+/* ===== Features de payload: pré-extraídas por credit_check_id (CREDIT_CHECK_FEATURES) =====
+   Mesmos paths do core (queries/features/refresh_check_features.sql); `*_n_* > 0` reproduz o FLATTEN inner. */
+
 /* ===== SERASA old (B-codes) ===== */
 serasa_old_features AS (
   SELECT
     s.c1_entity_id,
-    MAX(NULLIF(TRY_TO_NUMBER(f.value:"B280":score::string), 0)) AS serasa_old_score_b280,
-    MAX(f.value:"B280":score_range_name::string) AS serasa_old_score_range_name,
-    MAX(TRY_TO_NUMBER(f.value:"B280":delinquency_probability_percent::string)) AS serasa_old_delinquency_prob_pct,
-    MAX(TRY_TO_NUMBER(f.value:"B357":occurrences_count::string)) AS serasa_old_b357_occurrences_count,
-    MAX(TRY_TO_NUMBER(f.value:"B357":total_occurrence_value::string)) AS serasa_old_b357_total_value,
-    MAX(TRY_TO_NUMBER(f.value:"B361":occurrences_count::string)) AS serasa_old_b361_occurrences_count,
-    MAX(TRY_TO_NUMBER(f.value:"B361":total_occurrence_value::string)) AS serasa_old_b361_total_value
+    f.serasa_old_score_b280,
+    f.serasa_old_score_range_name,
+    f.serasa_old_delinquency_prob_pct,
+    f.serasa_old_b357_occurrences_count,
+    f.serasa_old_b357_total_value,
+    f.serasa_old_b361_occurrences_count,
+    f.serasa_old_b361_total_value
   FROM cc_best_serasa_old_1 s
-  , LATERAL FLATTEN(input => s.credit_check_data) f
-  GROUP BY 1
+  JOIN CAPIM_DATA_DEV.POSSANI_SANDBOX.CREDIT_CHECK_FEATURES f
+    ON f.credit_check_id = s.credit_check_id
+  WHERE f.serasa_old_n_blocks > 0
 ),
 
-/* ===== SERASA new: extrair do report preferido ===== */
-serasa_new_reports AS (
+/* ===== SERASA new: report preferido (COMBO_CONCESSAO, depois menor índice) ===== */
+serasa_new_features AS (
   SELECT
     s.c1_entity_id,
-    s.credit_check_id,
-    s.credit_check_created_at,
-    s.match_stage,
-    s.minutes_from_c1,
-    s.leniency_rank,
-    r.value AS report,
-    r.index AS report_index
+    f.serasa_new_birthdate,
+    f.serasa_new_gender,
+    f.serasa_new_zipcode,
+    f.serasa_new_pefin_count,
+    f.serasa_new_refin_count,
+    f.serasa_new_notary_count,
+    f.serasa_new_pefin_balance,
+    f.serasa_new_refin_balance,
+    f.serasa_new_notary_balance
   FROM cc_best_serasa_new_score_without_income_1 s
-  , LATERAL FLATTEN(input => s.credit_check_data:reports) r
-),
-
-serasa_new_best_report_1 AS (
-  SELECT
-    sr.*,
-    ROW_NUMBER() OVER (
-      PARTITION BY sr.c1_entity_id
-      ORDER BY
-        IFF(sr.report:reportName::string = 'COMBO_CONCESSAO', 0, 1),
-        sr.report_index ASC
-    ) AS rn_best_report
-  FROM serasa_new_reports sr
-),
-
-serasa_new_features AS (
-  SELECT
-    b.c1_entity_id,
-    TRY_TO_DATE(b.report:registration:birthDate::string) AS serasa_new_birthdate,
-    b.report:registration:consumerGender::string         AS serasa_new_gender,
-    b.report:registration:address:zipCode::string        AS serasa_new_zipcode,
-    TRY_TO_NUMBER(b.report:negativeData:pefin:summary:count::string)  AS serasa_new_pefin_count,
-    TRY_TO_NUMBER(b.report:negativeData:refin:summary:count::string)  AS serasa_new_refin_count,
-    TRY_TO_NUMBER(b.report:negativeData:notary:summary:count::string) AS serasa_new_notary_count,
-    TRY_TO_NUMBER(b.report:negativeData:pefin:summary:balance::string)  AS serasa_new_pefin_balance,
-    TRY_TO_NUMBER(b.report:negativeData:refin:summary:balance::string)  AS serasa_new_refin_balance,
-    TRY_TO_NUMBER(b.report:negativeData:notary:summary:balance::string) AS serasa_new_notary_balance
-  FROM serasa_new_best_report_1 b
-  WHERE b.rn_best_report = 1
+  JOIN CAPIM_DATA_DEV.POSSANI_SANDBOX.CREDIT_CHECK_FEATURES f
+    ON f.credit_check_id = s.credit_check_id
+  WHERE f.serasa_new_n_reports > 0
 ),
 
 serasa_income_only_features AS (
   SELECT
     s.c1_entity_id,
-    COALESCE(s.credit_check_data:scoreModel::string, s.credit_check_data:data:scoreModel::string) AS score_model,
+    f.serasa_income_only_model AS score_model,
     IFF(
-      COALESCE(s.credit_check_data:scoreModel::string, s.credit_check_data:data:scoreModel::string) ILIKE 'HRP%'
-      AND TRY_TO_NUMBER(COALESCE(s.credit_check_data:score::string, s.credit_check_data:data:score::string)) > 0,
-      (TRY_TO_NUMBER(COALESCE(s.credit_check_data:score::string, s.credit_check_data:data:score::string)) / 100.0)::FLOAT,
+      f.serasa_income_only_model ILIKE 'HRP%'
+      AND f.serasa_income_only_raw_value > 0,
+      (f.serasa_income_only_raw_value / 100.0)::FLOAT,
       NULL
     ) AS serasa_income_estimated
   FROM cc_best_serasa_new_income_only_1 s
+  LEFT JOIN CAPIM_DATA_DEV.POSSANI_SANDBOX.CREDIT_CHECK_FEATURES f
+    ON f.credit_check_id = s.credit_check_id
 ),
 
 boa_vista_score_pf_features AS (
   SELECT
     b.c1_entity_id,
-    TRY_TO_NUMBER(b.credit_check_data:score_positivo:score_classificacao_varios_modelos:score::string) AS boa_vista_score
+    f.bvs_score AS boa_vista_score
   FROM cc_best_boa_vista_score_pf_1 b
+  LEFT JOIN CAPIM_DATA_DEV.POSSANI_SANDBOX.CREDIT_CHECK_FEATURES f
+    ON f.credit_check_id = b.credit_check_id
 ),
 
 bacen_internal_features AS (
   SELECT
     b.c1_entity_id,
-    TRY_TO_NUMBER(b.credit_check_data:predictions[0]:score::string) AS bacen_internal_score
+    f.bacen_internal_score
   FROM cc_best_bacen_internal_1 b
+  LEFT JOIN CAPIM_DATA_DEV.POSSANI_SANDBOX.CREDIT_CHECK_FEATURES f
+    ON f.credit_check_id = b.credit_check_id
 ),
 
 /* ===== Crivo por CPF+tempo (fallback) ===== */
+/* Índice pré-normalizado (poda por cpf_digits/created_at); payload em CRIVO_CHECK_FEATURES */
 crivo_base AS (
   SELECT
-    c.CRIVO_CHECK_ID,
-    c.CRIVO_CHECK_CREATED_AT,
-    c.POLITICA,
-    c.BUREAU_CHECK_INFO,
-    c.KEY_PARAMETERS,
-    REGEXP_REPLACE(c.KEY_PARAMETERS:campos:"CPF"::string, '\\D','') AS crivo_cpf_digits
-  FROM CAPIM_DATA.SOURCE_STAGING.SOURCE_CRIVO_CHECKS c
+    ci.crivo_check_id AS CRIVO_CHECK_ID,
+    ci.created_at     AS CRIVO_CHECK_CREATED_AT,
+    ci.politica       AS POLITICA,
+    ci.cpf_digits     AS crivo_cpf_digits
+  FROM CAPIM_DATA_DEV.POSSANI_SANDBOX.CRIVO_CHECKS_CPF_INDEX ci
+  /* janela do match: [c1 - crivo_cap_days(180), c1 + 1h] */
+  WHERE TRUE /*@scope crivo ts=ci.created_at lookback_days=180 lookahead_days=1*/
 ),
 
 crivo_candidates AS (
@@ -972,46 +948,30 @@ crivo_best_1 AS (
 crivo_features_campos AS (
   SELECT
     b.c1_entity_id,
-    MAX(IFF(f.value:nome::string = 'PEFIN Serasa',    TRY_TO_NUMBER(f.value:valor::string), NULL)) AS crivo_pefin_serasa,
-    MAX(IFF(f.value:nome::string = 'REFIN Serasa',    TRY_TO_NUMBER(f.value:valor::string), NULL)) AS crivo_refin_serasa,
-    MAX(IFF(f.value:nome::string = 'Protesto Serasa', TRY_TO_NUMBER(f.value:valor::string), NULL)) AS crivo_protesto_serasa,
-    MAX(IFF(f.value:nome::string = 'Score Serasa', IFF(TRY_TO_NUMBER(f.value:valor::string) > 0, TRY_TO_NUMBER(f.value:valor::string), NULL), NULL)) AS crivo_score_serasa
+    cf.crivo_pefin_serasa,
+    cf.crivo_refin_serasa,
+    cf.crivo_protesto_serasa,
+    cf.crivo_score_serasa
   FROM crivo_best_1 b
-  JOIN crivo_base cb
-    ON cb.CRIVO_CHECK_ID = b.CRIVO_CHECK_ID
-  , LATERAL FLATTEN(input => cb.BUREAU_CHECK_INFO:campos) f
-  GROUP BY 1
+  JOIN CAPIM_DATA_DEV.POSSANI_SANDBOX.CRIVO_CHECK_FEATURES cf
+    ON cf.crivo_check_id = b.CRIVO_CHECK_ID
+  WHERE cf.crivo_n_campos > 0
 ),
 
 /* Gênero via Crivo (DataBusca PF) — mesma semântica do core de credit_simulations: 1->M, 2->F */
-crivo_databusca_pf_raw AS (
-  SELECT
-    b.c1_entity_id,
-    MAX(
-      IFF(
-        LOWER(p.value:nome::string) LIKE '%sexo%',
-        NULLIF(TRIM(p.value:valor::string), ''),
-        NULL
-      )
-    ) AS crivo_sexo_codigo_raw
-  FROM crivo_best_1 b
-  JOIN crivo_base cb
-    ON cb.CRIVO_CHECK_ID = b.CRIVO_CHECK_ID
-  , LATERAL FLATTEN(input => cb.BUREAU_CHECK_INFO:drivers) d
-  , LATERAL FLATTEN(input => d.value:produtos:"api DataBusca - Consulta Dados Pessoa - PF") p
-  GROUP BY 1
-),
-
 crivo_features_databusca_pf AS (
   SELECT
-    c1_entity_id,
-    crivo_sexo_codigo_raw,
+    b.c1_entity_id,
+    cf.crivo_sexo_codigo_raw,
     CASE
-      WHEN crivo_sexo_codigo_raw = '1' THEN 'M'
-      WHEN crivo_sexo_codigo_raw = '2' THEN 'F'
+      WHEN cf.crivo_sexo_codigo_raw = '1' THEN 'M'
+      WHEN cf.crivo_sexo_codigo_raw = '2' THEN 'F'
       ELSE NULL
     END AS crivo_gender
-  FROM crivo_databusca_pf_raw
+  FROM crivo_best_1 b
+  JOIN CAPIM_DATA_DEV.POSSANI_SANDBOX.CRIVO_CHECK_FEATURES cf
+    ON cf.crivo_check_id = b.CRIVO_CHECK_ID
+  WHERE cf.crivo_n_databusca_pf > 0
 ),
 
 /* ===== N8N (motor) via CEI: features agregadas recentes (2025-10+) =====
@@ -1359,7 +1319,10 @@ part_b_enriched AS (
     /* Crivo lineage (legado via CPF+tempo) */
     cb.CRIVO_CHECK_ID AS crivo_check_id_resolved,
     cb.crivo_match_stage AS crivo_resolution_stage,
-    cb.crivo_minutes_from_c1 AS crivo_minutes_from_cs
+    cb.crivo_minutes_from_c1 AS crivo_minutes_from_cs,
+
+    /* watermark de atualização da origem (delta do snapshot/cubo do C1) */
+    pa.pa_updated_at
   FROM pa_legacy pa
   /* mapping de appealable do CS: por (risk_capim,rejection_reason) e fallback só por reason */
   LEFT JOIN (
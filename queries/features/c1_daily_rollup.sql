@@ -0,0 +1,64 @@
+/*
+  Rollup diário do C1 (cubo) para o painel de série histórica e dashboards de aprovação/risco.
+
+  Grão: (day, clinic_id, c1_entity_type, c1_outcome_bucket, risk_capim, um *_source por eixo:
+         cadastro_evidence_source, negativacao_source, income_estimated_source, serasa_score_source).
+
+  Medidas aditivas (contagens e somas): qualquer agregação por cima do grão é SUM das colunas; médias e taxas
+  saem de razões de somas (ex.: SUM(sum_approved_amount) / SUM(n_approved_amount), SUM(n_approved) / SUM(n_c1)).
+  `n_<coluna>` = linhas com a coluna não nula (preenchimento por eixo).
+
+  Lido da view oficial (`C1_ENRICHED_BORROWER`: mesma deduplicação CS/PA de
+  `queries/validate/c1_enriched_timeseries_panel.sql`). Materializado e atualizado por dia por:
+
+    python -m src.cli.manage_c1_rollup refresh
+
+  Marcador `@scope c1`: dias afetados no incremental (ver src/utils/sql_template.py).
+*/
+
+SELECT
+  DATE(c1_created_at) AS day,
+  clinic_id,
+  c1_entity_type,
+  c1_outcome_bucket,
+  risk_capim,
+  cadastro_evidence_source,
+  negativacao_source,
+  income_estimated_source,
+  serasa_score_source,
+
+  COUNT(*) AS n_c1,
+  COUNT_IF(c1_was_approved) AS n_approved,
+  COUNT_IF(c1_has_counter_proposal) AS n_counter_proposal,
+  COUNT_IF(c1_appealable) AS n_appealable,
+
+  /* valores */
+  COUNT(c1_requested_amount) AS n_requested_amount,
+  SUM(c1_requested_amount) AS sum_requested_amount,
+  COUNT(c1_approved_amount) AS n_approved_amount,
+  SUM(c1_approved_amount) AS sum_approved_amount,
+
+  /* eixo cadastro/demografia */
+  COUNT(borrower_birthdate) AS n_borrower_birthdate,
+  COUNT(borrower_gender) AS n_borrower_gender,
+  COUNT(borrower_zipcode) AS n_borrower_zipcode,
+
+  /* eixo negativação */
+  COUNT(total_negative_value) AS n_total_negative_value,
+  SUM(total_negative_value) AS sum_total_negative_value,
+  COUNT_IF(total_negative_value > 0) AS n_has_negative,
+
+  /* eixo renda */
+  COUNT(income_estimated) AS n_income_estimated,
+  SUM(income_estimated) AS sum_income_estimated,
+  COUNT(scr_operations_count) AS n_scr_operations_count,
+
+  /* eixo scores */
+  COUNT(serasa_score) AS n_serasa_score,
+  SUM(serasa_score) AS sum_serasa_score,
+  COUNT(boa_vista_score) AS n_boa_vista_score,
+  SUM(boa_vista_score) AS sum_boa_vista_score
+FROM CAPIM_DATA_DEV.POSSANI_SANDBOX.C1_ENRICHED_BORROWER
+WHERE TRUE /*@scope c1 ts=c1_created_at*/
+GROUP BY 1, 2, 3, 4, 5, 6, 7, 8, 9
+;
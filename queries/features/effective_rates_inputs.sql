@@ -0,0 +1,61 @@
+/*
+  Entradas do solver de taxa efetiva (1 linha por credit_simulation_id): cenários de prazo mínimo/máximo
+  de financing_conditions, sem a bisseção recursiva.
+
+  Mesma extração de `queries/views/create_view_credit_simulations_effective_interest_rates.sql`
+  (cs -> offers -> summary -> cenários); a taxa é resolvida fora do Snowflake, em lote, por
+  `src/utils/rate_engine.py`, e persistida em CAPIM_DATA_DEV.POSSANI_SANDBOX.CREDIT_SIMULATIONS_EFFECTIVE_RATES:
+
+    python -m src.cli.materialize_effective_rates
+
+  Marcador `@scope cs`: recorte/amostra e watermark do incremental (ver src/utils/sql_template.py).
+*/
+
+WITH cs AS (
+  SELECT
+    cs.id AS credit_simulation_id,
+    cs.created_at AS cs_created_at,
+    cs.updated_at AS cs_updated_at,
+    cs.permitted_amount AS permitted_amount_cents,
+    cs.financing_conditions
+  FROM CAPIM_DATA.CAPIM_PRODUCTION.CREDIT_SIMULATIONS cs
+  WHERE cs.financing_conditions IS NOT NULL
+    AND TYPEOF(cs.financing_conditions) = 'OBJECT' /*@scope cs ts=cs.created_at id=cs.id*/
+),
+
+offers AS (
+  SELECT
+    s.credit_simulation_id,
+    TRY_TO_NUMBER(f.key::string) AS term_months,
+    TRY_TO_NUMBER(f.value:installment_value::string) AS installment_value_cents,
+    TRY_TO_NUMBER(f.value:total_debt_amount::string) AS total_debt_amount_cents
+  FROM cs s
+  , LATERAL FLATTEN(input => s.financing_conditions) f
+),
+
+summary AS (
+  SELECT
+    credit_simulation_id,
+    MIN(term_months) AS term_min,
+    MAX(term_months) AS term_max
+  FROM offers
+  GROUP BY 1
+)
+
+SELECT
+  c.credit_simulation_id,
+  c.cs_created_at,
+  c.cs_updated_at,
+  c.permitted_amount_cents,
+  s.term_min,
+  s.term_max,
+  MAX(IFF(o.term_months = s.term_min, o.installment_value_cents, NULL)) AS installment_value_at_term_min_cents,
+  MAX(IFF(o.term_months = s.term_max, o.installment_value_cents, NULL)) AS installment_value_at_term_max_cents,
+  MAX(IFF(o.term_months = s.term_min, o.total_debt_amount_cents, NULL)) AS total_debt_at_term_min_cents,
+  MAX(IFF(o.term_months = s.term_max, o.total_debt_amount_cents, NULL)) AS total_debt_at_term_max_cents
+FROM cs c
+JOIN summary s
+  ON s.credit_simulation_id = c.credit_simulation_id
+JOIN offers o
+  ON o.credit_simulation_id = c.credit_simulation_id
+GROUP BY 1, 2, 3, 4, 5, 6
@@ -0,0 +1,79 @@
+/*
+  Entradas das estimativas de PMT do legado de pre_analyses (1 linha por pre_analysis) + valores gravados
+  na tabela enriched, para conferir `pa_legacy_financing_estimates` com o motor vetorizado:
+
+    python -m src.cli.materialize_effective_rates --check pa
+
+  Mesma reconstrução de `queries/enrich/enrich_pre_analyses_borrower.sql` (pa_legacy_interest_rate_buckets
+  -> pa_legacy_terms -> pa_legacy_interest_rate_at_terms). Marcador `@scope pa`: recorte/amostra.
+*/
+
+WITH pa AS (
+  SELECT
+    pa.PRE_ANALYSIS_ID::NUMBER AS c1_entity_id,
+    pa.PRE_ANALYSIS_AMOUNT AS c1_amount,
+    pa.MINIMUM_TERM_AVAILABLE,
+    pa.MAXIMUM_TERM_AVAILABLE,
+    pa.INTEREST_RATES_ARRAY
+  FROM CAPIM_DATA.CAPIM_ANALYTICS.PRE_ANALYSES pa
+  WHERE pa.PRE_ANALYSIS_TYPE = 'pre_analysis' /*@scope pa ts=pa.PRE_ANALYSIS_CREATED_AT id=pa.PRE_ANALYSIS_ID::NUMBER*/
+  QUALIFY ROW_NUMBER() OVER (
+    PARTITION BY pa.PRE_ANALYSIS_TYPE, pa.PRE_ANALYSIS_ID
+    ORDER BY
+      pa.PRE_ANALYSIS_UPDATED_AT DESC,
+      pa.PRE_ANALYSIS_CREATED_AT DESC
+  ) = 1
+),
+
+buckets AS (
+  SELECT
+    pa.c1_entity_id,
+    TRY_TO_NUMBER(SPLIT_PART(f.key::string, '..', 1)) AS term_start,
+    TRY_TO_NUMBER(SPLIT_PART(f.key::string, '..', 2)) AS term_end,
+    TRY_TO_NUMBER(f.value::string) AS monthly_rate
+  FROM pa,
+  LATERAL FLATTEN(input => pa.INTEREST_RATES_ARRAY) f
+  WHERE pa.INTEREST_RATES_ARRAY IS NOT NULL
+    AND TYPEOF(pa.INTEREST_RATES_ARRAY) = 'OBJECT'
+),
+
+terms AS (
+  SELECT
+    pa.c1_entity_id,
+    pa.c1_amount,
+    COALESCE(pa.MINIMUM_TERM_AVAILABLE::NUMBER, MIN(b.term_start))::NUMBER AS term_min,
+    COALESCE(pa.MAXIMUM_TERM_AVAILABLE::NUMBER, MAX(b.term_end))::NUMBER AS term_max
+  FROM pa
+  LEFT JOIN buckets b
+    ON b.c1_entity_id = pa.c1_entity_id
+  GROUP BY 1, 2, pa.MINIMUM_TERM_AVAILABLE, pa.MAXIMUM_TERM_AVAILABLE
+),
+
+rates AS (
+  SELECT
+    t.c1_entity_id,
+    MAX(IFF(t.term_min BETWEEN b.term_start AND b.term_end, b.monthly_rate, NULL)) AS rate_at_term_min,
+    MAX(IFF(t.term_max BETWEEN b.term_start AND b.term_end, b.monthly_rate, NULL)) AS rate_at_term_max
+  FROM terms t
+  LEFT JOIN buckets b
+    ON b.c1_entity_id = t.c1_entity_id
+  GROUP BY 1
+)
+
+SELECT
+  t.c1_entity_id,
+  t.c1_amount::FLOAT AS c1_amount,
+  t.term_min,
+  t.term_max,
+  r.rate_at_term_min::FLOAT AS rate_at_term_min,
+  r.rate_at_term_max::FLOAT AS rate_at_term_max,
+  e.financing_installment_value_min,
+  e.financing_installment_value_max,
+  e.financing_total_debt_min,
+  e.financing_total_debt_max
+FROM terms t
+JOIN rates r
+  ON r.c1_entity_id = t.c1_entity_id
+JOIN CAPIM_DATA_DEV.POSSANI_SANDBOX.PRE_ANALYSES_ENRICHED_BORROWER e
+  ON e.c1_entity_type = 'pre_analysis'
+ AND e.c1_entity_id = t.c1_entity_id
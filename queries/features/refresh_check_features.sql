@@ -0,0 +1,588 @@
+/*
+  Feature store de payloads de bureau: campos tipados/achatados por check (1 linha por check).
+
+  Motivação:
+    - Os enrichments re-parseavam os mesmos payloads (imutáveis) a cada execução: FLATTEN de
+      reports[] / B-codes / blocos BVS / operações SCR / campos do Crivo + ~150 TRY_TO_NUMBER/TRY_TO_DATE
+      sobre paths profundos. Parsing de VARIANT é o 2º maior custo do CTAS.
+    - Aqui cada payload é parseado UMA vez; os enrichments fazem join por id.
+
+  Tabelas:
+    - CAPIM_DATA_DEV.POSSANI_SANDBOX.CREDIT_CHECK_FEATURES (chave: credit_check_id)
+        famílias (colunas NULL fora da família do check) — contratos em docs/reference/PAYLOAD_CONTRACTS_MAP.md:
+          serasa_new_*        : SERASA novo (report preferido: COMBO_CONCESSAO, depois menor índice)
+          serasa_income_only_*: SERASA novo, score/range/scoreModel top-level (renda HRP em centavos)
+          serasa_old_*        : SERASA antigo (B-codes)
+          bvs_net_*           : Boa Vista scpc_net (blocos 249/141/123)
+          scr_*               : SCR (operações/vencimentos)
+          bacen_*             : bacen_internal_score (predictions[0])
+          bvs_score           : boa_vista_score_pf
+        `*_n_*` = nº de itens achatados (0 => o enrichment trata como "sem feature", igual ao FLATTEN inner).
+    - CAPIM_DATA_DEV.POSSANI_SANDBOX.CRIVO_CHECK_FEATURES (chave: crivo_check_id)
+        BUREAU_CHECK_INFO:campos, KEY_PARAMETERS:campos e DataBusca PF (código sexo).
+
+  Refresh incremental (idempotente; 1ª execução = carga completa):
+    - só extrai checks presentes nos índices CPF (queries/index/refresh_checks_cpf_index.sql) que ainda
+      não estão no feature store (ou cujo updated_at no índice mudou — reprocessamento raro);
+    - features de checks que saíram do índice (apagados na origem) são removidas;
+    - o payload é lido da tabela raw por id (1 versão por id, a mais recente).
+
+  Execução (depois do refresh dos índices):
+    python -m src.cli.run_sql_file --file queries/features/refresh_check_features.sql
+  Os materializadores rodam índices + features automaticamente, exceto com `--skip-index-refresh` e em
+  execuções de amostra/recorte sem `--refresh-index`.
+*/
+
+CREATE TABLE IF NOT EXISTS CAPIM_DATA_DEV.POSSANI_SANDBOX.CREDIT_CHECK_FEATURES (
+  credit_check_id NUMBER,
+  source          VARCHAR,
+  kind            VARCHAR,
+  payload_family  VARCHAR,
+  source_updated_at TIMESTAMP_NTZ,
+
+  /* SERASA novo */
+  serasa_new_n_reports            NUMBER,
+  serasa_new_report_name          VARCHAR,
+  serasa_new_birthdate            DATE,
+  serasa_new_gender               VARCHAR,
+  serasa_new_zipcode              VARCHAR,
+  serasa_new_status_registration  VARCHAR,
+  serasa_new_status_date          DATE,
+  serasa_new_has_birthdate        NUMBER,
+  serasa_new_has_gender           NUMBER,
+  serasa_new_has_zipcode          NUMBER,
+  serasa_new_has_phone            NUMBER,
+  serasa_new_has_address          NUMBER,
+  serasa_new_pefin_count          NUMBER,
+  serasa_new_refin_count          NUMBER,
+  serasa_new_notary_count         NUMBER,
+  serasa_new_check_count          NUMBER,
+  serasa_new_pefin_balance        NUMBER(38, 6),
+  serasa_new_refin_balance        NUMBER(38, 6),
+  serasa_new_notary_balance       NUMBER(38, 6),
+  serasa_new_check_balance        NUMBER(38, 6),
+  serasa_new_score                NUMBER(38, 6),
+  serasa_new_score_range          VARCHAR,
+  serasa_new_score_model          VARCHAR,
+  serasa_new_score_source_detail  VARCHAR,
+
+  /* SERASA novo — income_only */
+  serasa_income_only_raw_value    NUMBER(38, 6),
+  serasa_income_only_range        VARCHAR,
+  serasa_income_only_model        VARCHAR,
+  serasa_income_only_semantic     VARCHAR,
+  serasa_income_estimated         FLOAT,
+
+  /* SERASA antigo (B-codes) */
+  serasa_old_n_blocks             NUMBER,
+  serasa_old_birthdate            DATE,
+  serasa_old_gender               VARCHAR,
+  serasa_old_zipcode              VARCHAR,
+  serasa_old_has_phone            NUMBER,
+  serasa_old_has_address          NUMBER,
+  serasa_old_score_b280           NUMBER(38, 6),
+  serasa_old_score_range_name     VARCHAR,
+  serasa_old_delinquency_prob_pct NUMBER(38, 6),
+  serasa_old_b357_occurrences_count NUMBER,
+  serasa_old_b357_total_value     FLOAT,
+  serasa_old_b361_occurrences_count NUMBER,
+  serasa_old_b361_total_value     FLOAT,
+
+  /* Boa Vista scpc_net */
+  bvs_net_n_blocks                NUMBER,
+  bvs_net_birthdate               DATE,
+  bvs_net_name                    VARCHAR,
+  bvs_net_status                  VARCHAR,
+  bvs_net_debit_count             NUMBER,
+  bvs_net_debit_value_raw         NUMBER(38, 6),
+  bvs_net_exists_123_raw          VARCHAR,
+  bvs_net_last_debit_date         DATE,
+
+  /* SCR */
+  scr_has_resumo_do_cliente       BOOLEAN,
+  scr_operations_count            NUMBER,
+  scr_vencimentos_count           NUMBER,
+  scr_sum_valor_raw               FLOAT,
+  scr_data_base_consultada        DATE,
+
+  /* bacen_internal_score */
+  bacen_internal_score            NUMBER(38, 6),
+  bacen_credit_limits_total       NUMBER(38, 6),
+  bacen_mean_due_value_credit_limits NUMBER(38, 6),
+  bacen_is_not_banked             BOOLEAN,
+
+  /* boa_vista_score_pf */
+  bvs_score                       NUMBER(38, 6),
+
+  extracted_at                    TIMESTAMP_NTZ
+)
+CLUSTER BY (credit_check_id);
+
+CREATE TABLE IF NOT EXISTS CAPIM_DATA_DEV.POSSANI_SANDBOX.CRIVO_CHECK_FEATURES (
+  crivo_check_id                  NUMBER,
+  crivo_n_campos                  NUMBER,
+  crivo_pefin_serasa              NUMBER(38, 6),
+  crivo_refin_serasa              NUMBER(38, 6),
+  crivo_protesto_serasa           NUMBER(38, 6),
+  crivo_score_serasa              NUMBER(38, 6),
+  crivo_renda_presumida_credilink NUMBER(38, 6),
+  crivo_renda_presumida_serasa    NUMBER(38, 6),
+  crivo_birthdate_bvs             DATE,
+  crivo_zipcode                   VARCHAR,
+  crivo_phone_raw                 VARCHAR,
+  crivo_has_phone                 NUMBER,
+  crivo_bacen_score               NUMBER(38, 6),
+  crivo_credit_limits_value       NUMBER(38, 6),
+  crivo_overdue_portfolio_value   NUMBER(38, 6),
+  crivo_loss_value                NUMBER(38, 6),
+  crivo_n_databusca_pf            NUMBER,
+  crivo_sexo_codigo_raw           VARCHAR,
+  extracted_at                    TIMESTAMP_NTZ
+)
+CLUSTER BY (crivo_check_id);
+
+BEGIN;
+
+/* ===== Credit checks: descarta features de checks re-atualizados na fonte (serão re-extraídos) ===== */
+DELETE FROM CAPIM_DATA_DEV.POSSANI_SANDBOX.CREDIT_CHECK_FEATURES f
+USING CAPIM_DATA_DEV.POSSANI_SANDBOX.CREDIT_CHECKS_CPF_INDEX ix
+WHERE f.credit_check_id = ix.credit_check_id
+  AND f.source_updated_at IS DISTINCT FROM ix.updated_at;
+
+/* ===== Credit checks: remove features de checks apagados na origem (fora do índice) ===== */
+DELETE FROM CAPIM_DATA_DEV.POSSANI_SANDBOX.CREDIT_CHECK_FEATURES f
+WHERE NOT EXISTS (
+  SELECT 1
+  FROM CAPIM_DATA_DEV.POSSANI_SANDBOX.CREDIT_CHECKS_CPF_INDEX ix
+  WHERE ix.credit_check_id = f.credit_check_id
+);
+
+/* ===== Credit checks: extrai apenas checks ainda ausentes (ordem das colunas = DDL acima) ===== */
+INSERT INTO CAPIM_DATA_DEV.POSSANI_SANDBOX.CREDIT_CHECK_FEATURES
+  WITH todo AS (
+    SELECT
+      ix.credit_check_id,
+      ix.source,
+      ix.kind,
+      ix.updated_at,
+      CASE
+        WHEN ix.source = 'serasa' AND (COALESCE(ix.new_data_format, FALSE) = TRUE OR ix.payload_is_new) THEN 'serasa_new'
+        WHEN ix.source = 'serasa' THEN 'serasa_old'
+        WHEN ix.source IN ('boa_vista_scpc_net', 'scr', 'bacen_internal_score', 'boa_vista_score_pf') THEN ix.source
+        ELSE NULL
+      END AS payload_family
+    FROM CAPIM_DATA_DEV.POSSANI_SANDBOX.CREDIT_CHECKS_CPF_INDEX ix
+    LEFT JOIN CAPIM_DATA_DEV.POSSANI_SANDBOX.CREDIT_CHECK_FEATURES f
+      ON f.credit_check_id = ix.credit_check_id
+    WHERE f.credit_check_id IS NULL
+  ),
+
+  payloads AS (
+    SELECT
+      t.credit_check_id,
+      t.source,
+      t.kind,
+      t.payload_family,
+      t.updated_at,
+      cc.data
+    FROM todo t
+    JOIN CAPIM_DATA.RESTRICTED.INCREMENTAL_CREDIT_CHECKS_API cc
+      ON cc.id = t.credit_check_id
+    WHERE t.payload_family IS NOT NULL
+    QUALIFY ROW_NUMBER() OVER (PARTITION BY cc.id ORDER BY cc.updated_at DESC) = 1
+  ),
+
+  /* ---- SERASA novo: report preferido + score (top-level / data / report) ---- */
+  serasa_new_reports AS (
+    SELECT
+      p.credit_check_id,
+      r.value AS report,
+      COUNT(*) OVER (PARTITION BY p.credit_check_id) AS n_reports,
+      ROW_NUMBER() OVER (
+        PARTITION BY p.credit_check_id
+        ORDER BY IFF(r.value:reportName::string = 'COMBO_CONCESSAO', 0, 1), r.index ASC
+      ) AS rn_report
+    FROM payloads p
+    , LATERAL FLATTEN(input => p.data:reports) r
+    WHERE p.payload_family = 'serasa_new'
+  ),
+
+  serasa_new_raw AS (
+    SELECT
+      p.credit_check_id,
+      COALESCE(br.n_reports, 0) AS serasa_new_n_reports,
+      br.report:reportName::string AS serasa_new_report_name,
+      TRY_TO_DATE(br.report:registration:birthDate::string) AS serasa_new_birthdate,
+      br.report:registration:consumerGender::string         AS serasa_new_gender,
+      br.report:registration:address:zipCode::string        AS serasa_new_zipcode,
+      br.report:registration:statusRegistration::string     AS serasa_new_status_registration,
+      TRY_TO_DATE(br.report:registration:statusDate::string) AS serasa_new_status_date,
+      IFF(br.report:registration:birthDate IS NOT NULL, 1, 0) AS serasa_new_has_birthdate,
+      IFF(br.report:registration:consumerGender IS NOT NULL, 1, 0) AS serasa_new_has_gender,
+      IFF(br.report:registration:address:zipCode IS NOT NULL, 1, 0) AS serasa_new_has_zipcode,
+      IFF(br.report:registration:phone IS NOT NULL, 1, 0) AS serasa_new_has_phone,
+      IFF(br.report:registration:address IS NOT NULL, 1, 0) AS serasa_new_has_address,
+      TRY_TO_NUMBER(br.report:negativeData:pefin:summary:count::string)  AS serasa_new_pefin_count,
+      TRY_TO_NUMBER(br.report:negativeData:refin:summary:count::string)  AS serasa_new_refin_count,
+      TRY_TO_NUMBER(br.report:negativeData:notary:summary:count::string) AS serasa_new_notary_count,
+      TRY_TO_NUMBER(br.report:negativeData:check:summary:count::string)  AS serasa_new_check_count,
+      TRY_TO_NUMBER(br.report:negativeData:pefin:summary:balance::string)  AS serasa_new_pefin_balance,
+      TRY_TO_NUMBER(br.report:negativeData:refin:summary:balance::string)  AS serasa_new_refin_balance,
+      TRY_TO_NUMBER(br.report:negativeData:notary:summary:balance::string) AS serasa_new_notary_balance,
+      TRY_TO_NUMBER(br.report:negativeData:check:summary:balance::string)  AS serasa_new_check_balance,
+
+      TRY_TO_NUMBER(p.data:score::string)       AS score_top_level,
+      TRY_TO_NUMBER(p.data:data:score::string)  AS score_data_block,
+      TRY_TO_NUMBER(br.report:score:score::string) AS score_report_object,
+      TRY_TO_NUMBER(br.report:score::string)    AS score_report_scalar,
+      COALESCE(p.data:range::string, p.data:data:range::string, br.report:range::string, br.report:score:range::string)
+        AS serasa_new_score_range,
+      COALESCE(p.data:scoreModel::string, p.data:data:scoreModel::string, br.report:scoreModel::string, br.report:score:scoreModel::string)
+        AS serasa_new_score_model,
+
+      /* income_only: score/range/scoreModel top-level (ou bloco data) */
+      TRY_TO_NUMBER(COALESCE(p.data:score::string, p.data:data:score::string)) AS serasa_income_only_raw_value,
+      COALESCE(p.data:range::string, p.data:data:range::string)           AS serasa_income_only_range,
+      COALESCE(p.data:scoreModel::string, p.data:data:scoreModel::string) AS serasa_income_only_model
+    FROM payloads p
+    LEFT JOIN serasa_new_reports br
+      ON br.credit_check_id = p.credit_check_id
+     AND br.rn_report = 1
+    WHERE p.payload_family = 'serasa_new'
+  ),
+
+  serasa_new AS (
+    SELECT
+      r.*,
+      COALESCE(score_top_level, score_data_block, score_report_object, score_report_scalar) AS score_raw,
+      /* normalização (ADR 0004): <=0 -> NULL; >=1e6 -> /10000; >=1000 -> /1000; clip final > 1000 -> NULL */
+      CASE
+        WHEN score_raw IS NULL OR score_raw <= 0 THEN NULL
+        WHEN score_raw >= 1000000 THEN score_raw / 10000
+        WHEN score_raw >= 1000 THEN score_raw / 1000
+        ELSE score_raw
+      END AS score_scaled,
+      IFF(score_scaled > 1000, NULL, score_scaled) AS serasa_new_score,
+      CASE
+        WHEN score_top_level IS NOT NULL THEN 'serasa_new_top_level'
+        WHEN score_data_block IS NOT NULL THEN 'serasa_new_data_block'
+        WHEN score_report_object IS NOT NULL THEN 'serasa_new_report_score_object'
+        WHEN score_report_scalar IS NOT NULL THEN 'serasa_new_report_score_scalar'
+        ELSE NULL
+      END AS serasa_new_score_source_detail,
+      /* ADR 0003: HRP* => renda estimada em centavos */
+      CASE
+        WHEN serasa_income_only_model ILIKE 'HRP%' THEN 'income_cents'
+        ELSE 'unknown'
+      END AS serasa_income_only_semantic,
+      IFF(
+        serasa_income_only_model ILIKE 'HRP%'
+        AND serasa_income_only_raw_value IS NOT NULL
+        AND serasa_income_only_raw_value > 0
+        AND serasa_income_only_raw_value <= 100000000,
+        (serasa_income_only_raw_value / 100.0)::FLOAT,
+        NULL
+      ) AS serasa_income_estimated
+    FROM serasa_new_raw r
+  ),
+
+  /* ---- SERASA antigo: B-codes ---- */
+  serasa_old AS (
+    SELECT
+      p.credit_check_id,
+      COUNT(*) AS serasa_old_n_blocks,
+      COALESCE(
+        MAX(TRY_TO_DATE(f.value:"B002":birth_date::string)),
+        MAX(TRY_TO_DATE(f.value:"B001":birthdate::string)),
+        MAX(TRY_TO_DATE(f.value:"B001":birth_date::string))
+      ) AS serasa_old_birthdate,
+      COALESCE(MAX(f.value:"B002":gender::string), MAX(f.value:"B001":gender::string)) AS serasa_old_gender,
+      COALESCE(
+        MAX(f.value:"B004":zip_code::string),
+        MAX(f.value:"B004":zipcode::string),
+        MAX(f.value:"B004":cep::string)
+      ) AS serasa_old_zipcode,
+      MAX(IFF(f.value:"B003" IS NOT NULL, 1, 0)) AS serasa_old_has_phone,
+      MAX(IFF(f.value:"B004" IS NOT NULL, 1, 0)) AS serasa_old_has_address,
+      MAX(NULLIF(TRY_TO_NUMBER(f.value:"B280":score::string), 0)) AS serasa_old_score_b280,
+      MAX(f.value:"B280":score_range_name::string) AS serasa_old_score_range_name,
+      MAX(TRY_TO_NUMBER(f.value:"B280":delinquency_probability_percent::string)) AS serasa_old_delinquency_prob_pct,
+      MAX(TRY_TO_NUMBER(f.value:"B357":occurrences_count::string)) AS serasa_old_b357_occurrences_count,
+      /* Observado (amostral): valores vêm como inteiros em R$ (ex.: "000000116" => 116) */
+      (MAX(TRY_TO_NUMBER(f.value:"B357":total_occurrence_value::string)))::FLOAT AS serasa_old_b357_total_value,
+      MAX(TRY_TO_NUMBER(f.value:"B361":occurrences_count::string)) AS serasa_old_b361_occurrences_count,
+      (MAX(TRY_TO_NUMBER(f.value:"B361":total_occurrence_value::string)))::FLOAT AS serasa_old_b361_total_value
+    FROM payloads p
+    , LATERAL FLATTEN(input => p.data) f
+    WHERE p.payload_family = 'serasa_old'
+    GROUP BY 1
+  ),
+
+  /* ---- Boa Vista scpc_net: blocos 249 (cadastro), 141 (débitos), 123 (existência) ---- */
+  bvs_net AS (
+    SELECT
+      p.credit_check_id,
+      COUNT(*) AS bvs_net_n_blocks,
+      MAX(TRY_TO_DATE(f.value:"249":birthdate::string, 'DDMMYYYY')) AS bvs_net_birthdate,
+      MAX(f.value:"249":name::string) AS bvs_net_name,
+      MAX(f.value:"249":status::string) AS bvs_net_status,
+      MAX(TRY_TO_NUMBER(f.value:"141":debit_total_count::string)) AS bvs_net_debit_count,
+      MAX(TRY_TO_NUMBER(f.value:"141":debit_total_value::string)) AS bvs_net_debit_value_raw,
+      MAX(NULLIF(TRIM(f.value:"123":exists::string), '')) AS bvs_net_exists_123_raw,
+      MAX(TRY_TO_DATE(NULLIF(TRIM(f.value:"141":last_debit_date::string), ''))) AS bvs_net_last_debit_date
+    FROM payloads p
+    , LATERAL FLATTEN(input => p.data) f
+    WHERE p.payload_family = 'boa_vista_scpc_net'
+    GROUP BY 1
+  ),
+
+  /* ---- SCR: operações/vencimentos ---- */
+  scr_base AS (
+    SELECT
+      p.credit_check_id,
+      p.data,
+      COALESCE(
+        p.data:resumoDoCliente:listaDeResumoDasOperacoes,
+        p.data:resumoDoCliente:ListaDeResumoDasOperacoes,
+        p.data:ResumoDoCliente:listaDeResumoDasOperacoes,
+        p.data:ResumoDoCliente:ListaDeResumoDasOperacoes,
+        p.data:listaDeResumoDasOperacoes,
+        p.data:ListaDeResumoDasOperacoes
+      ) AS ops
+    FROM payloads p
+    WHERE p.payload_family = 'scr'
+  ),
+
+  scr_ops AS (
+    SELECT s.credit_check_id, o.value AS op
+    FROM scr_base s
+    , LATERAL FLATTEN(input => s.ops) o
+  ),
+
+  scr_venc AS (
+    SELECT
+      so.credit_check_id,
+      COUNT(*) AS n_vencimentos,
+      SUM(TRY_TO_NUMBER(COALESCE(v.value:valorVencimento::string, v.value:ValorVencimento::string)))::FLOAT AS sum_valor_raw
+    FROM scr_ops so
+    , LATERAL FLATTEN(input => COALESCE(so.op:listaDeVencimentos, so.op:ListaDeVencimentos)) v
+    GROUP BY 1
+  ),
+
+  scr AS (
+    SELECT
+      s.credit_check_id,
+      IFF(s.data:resumoDoCliente IS NOT NULL OR s.data:ResumoDoCliente IS NOT NULL, TRUE, FALSE) AS scr_has_resumo_do_cliente,
+      COALESCE(opc.n_ops, 0) AS scr_operations_count,
+      COALESCE(vc.n_vencimentos, 0) AS scr_vencimentos_count,
+      vc.sum_valor_raw AS scr_sum_valor_raw,
+      TRY_TO_DATE(
+        COALESCE(
+          s.data:resumoDoCliente:dataBaseConsultada::string,
+          s.data:ResumoDoCliente:DataBaseConsultada::string,
+          s.data:resumoDoCliente:dataBase::string,
+          s.data:ResumoDoCliente:DataBase::string
+        )
+      ) AS scr_data_base_consultada
+    FROM scr_base s
+    LEFT JOIN (SELECT credit_check_id, COUNT(*) AS n_ops FROM scr_ops GROUP BY 1) opc
+      ON opc.credit_check_id = s.credit_check_id
+    LEFT JOIN scr_venc vc
+      ON vc.credit_check_id = s.credit_check_id
+  ),
+
+  /* ---- bacen_internal_score / boa_vista_score_pf ---- */
+  bacen AS (
+    SELECT
+      p.credit_check_id,
+      TRY_TO_NUMBER(p.data:predictions[0]:score::string) AS bacen_internal_score,
+      TRY_TO_NUMBER(p.data:predictions[0]:limitesdecredito::string) AS bacen_credit_limits_total,
+      TRY_TO_NUMBER(p.data:predictions[0]:valorvencimento_mean_credit_limits::string) AS bacen_mean_due_value_credit_limits,
+      CASE
+        WHEN p.data:predictions[0]:is_not_banked IS NULL THEN NULL
+        WHEN LOWER(p.data:predictions[0]:is_not_banked::string) IN ('true','1') THEN TRUE
+        WHEN LOWER(p.data:predictions[0]:is_not_banked::string) IN ('false','0') THEN FALSE
+        ELSE NULL
+      END AS bacen_is_not_banked
+    FROM payloads p
+    WHERE p.payload_family = 'bacen_internal_score'
+  ),
+
+  bvs_score_pf AS (
+    SELECT
+      p.credit_check_id,
+      TRY_TO_NUMBER(p.data:score_positivo:score_classificacao_varios_modelos:score::string) AS bvs_score
+    FROM payloads p
+    WHERE p.payload_family = 'boa_vista_score_pf'
+  )
+
+  SELECT
+    t.credit_check_id,
+    t.source,
+    t.kind,
+    t.payload_family,
+    t.updated_at AS source_updated_at,
+
+    sn.serasa_new_n_reports,
+    sn.serasa_new_report_name,
+    sn.serasa_new_birthdate,
+    sn.serasa_new_gender,
+    sn.serasa_new_zipcode,
+    sn.serasa_new_status_registration,
+    sn.serasa_new_status_date,
+    sn.serasa_new_has_birthdate,
+    sn.serasa_new_has_gender,
+    sn.serasa_new_has_zipcode,
+    sn.serasa_new_has_phone,
+    sn.serasa_new_has_address,
+    sn.serasa_new_pefin_count,
+    sn.serasa_new_refin_count,
+    sn.serasa_new_notary_count,
+    sn.serasa_new_check_count,
+    sn.serasa_new_pefin_balance,
+    sn.serasa_new_refin_balance,
+    sn.serasa_new_notary_balance,
+    sn.serasa_new_check_balance,
+    sn.serasa_new_score,
+    sn.serasa_new_score_range,
+    sn.serasa_new_score_model,
+    sn.serasa_new_score_source_detail,
+
+    sn.serasa_income_only_raw_value,
+    sn.serasa_income_only_range,
+    sn.serasa_income_only_model,
+    sn.serasa_income_only_semantic,
+    sn.serasa_income_estimated,
+
+    so.serasa_old_n_blocks,
+    so.serasa_old_birthdate,
+    so.serasa_old_gender,
+    so.serasa_old_zipcode,
+    so.serasa_old_has_phone,
+    so.serasa_old_has_address,
+    so.serasa_old_score_b280,
+    so.serasa_old_score_range_name,
+    so.serasa_old_delinquency_prob_pct,
+    so.serasa_old_b357_occurrences_count,
+    so.serasa_old_b357_total_value,
+    so.serasa_old_b361_occurrences_count,
+    so.serasa_old_b361_total_value,
+
+    bn.bvs_net_n_blocks,
+    bn.bvs_net_birthdate,
+    bn.bvs_net_name,
+    bn.bvs_net_status,
+    bn.bvs_net_debit_count,
+    bn.bvs_net_debit_value_raw,
+    bn.bvs_net_exists_123_raw,
+    bn.bvs_net_last_debit_date,
+
+    sc.scr_has_resumo_do_cliente,
+    sc.scr_operations_count,
+    sc.scr_vencimentos_count,
+    sc.scr_sum_valor_raw,
+    sc.scr_data_base_consultada,
+
+    bc.bacen_internal_score,
+    bc.bacen_credit_limits_total,
+    bc.bacen_mean_due_value_credit_limits,
+    bc.bacen_is_not_banked,
+
+    bp.bvs_score,
+
+    CURRENT_TIMESTAMP()::TIMESTAMP_NTZ AS extracted_at
+  FROM todo t
+  LEFT JOIN serasa_new sn   ON sn.credit_check_id = t.credit_check_id
+  LEFT JOIN serasa_old so   ON so.credit_check_id = t.credit_check_id
+  LEFT JOIN bvs_net bn      ON bn.credit_check_id = t.credit_check_id
+  LEFT JOIN scr sc          ON sc.credit_check_id = t.credit_check_id
+  LEFT JOIN bacen bc        ON bc.credit_check_id = t.credit_check_id
+  LEFT JOIN bvs_score_pf bp ON bp.credit_check_id = t.credit_check_id;
+
+COMMIT;
+
+/* ===== Crivo checks: remove features de checks apagados na origem (fora do índice) ===== */
+DELETE FROM CAPIM_DATA_DEV.POSSANI_SANDBOX.CRIVO_CHECK_FEATURES f
+WHERE NOT EXISTS (
+  SELECT 1
+  FROM CAPIM_DATA_DEV.POSSANI_SANDBOX.CRIVO_CHECKS_CPF_INDEX ix
+  WHERE ix.crivo_check_id = f.crivo_check_id
+);
+
+/* ===== Crivo checks: append-only (payload imutável), apenas ids ainda ausentes ===== */
+INSERT INTO CAPIM_DATA_DEV.POSSANI_SANDBOX.CRIVO_CHECK_FEATURES
+WITH todo AS (
+  SELECT c.CRIVO_CHECK_ID, c.BUREAU_CHECK_INFO, c.KEY_PARAMETERS
+  FROM CAPIM_DATA_DEV.POSSANI_SANDBOX.CRIVO_CHECKS_CPF_INDEX ix
+  JOIN CAPIM_DATA.SOURCE_STAGING.SOURCE_CRIVO_CHECKS c
+    ON c.CRIVO_CHECK_ID = ix.crivo_check_id
+  LEFT JOIN CAPIM_DATA_DEV.POSSANI_SANDBOX.CRIVO_CHECK_FEATURES f
+    ON f.crivo_check_id = ix.crivo_check_id
+  WHERE f.crivo_check_id IS NULL
+  QUALIFY ROW_NUMBER() OVER (PARTITION BY c.CRIVO_CHECK_ID ORDER BY c.CRIVO_CHECK_CREATED_AT DESC) = 1
+),
+
+campos AS (
+  SELECT
+    t.CRIVO_CHECK_ID,
+    COUNT(*) AS crivo_n_campos,
+    MAX(IFF(f.value:nome::string = 'PEFIN Serasa',    TRY_TO_NUMBER(f.value:valor::string), NULL)) AS crivo_pefin_serasa,
+    MAX(IFF(f.value:nome::string = 'REFIN Serasa',    TRY_TO_NUMBER(f.value:valor::string), NULL)) AS crivo_refin_serasa,
+    MAX(IFF(f.value:nome::string = 'Protesto Serasa', TRY_TO_NUMBER(f.value:valor::string), NULL)) AS crivo_protesto_serasa,
+    MAX(IFF(f.value:nome::string = 'Score Serasa',
+            IFF(TRY_TO_NUMBER(f.value:valor::string) > 0, TRY_TO_NUMBER(f.value:valor::string), NULL),
+            NULL)) AS crivo_score_serasa,
+    /* Renda presumida — string monetária PT-BR ("R$ 1.272,15") */
+    MAX(IFF(LOWER(TRIM(f.value:nome::string)) LIKE 'credilink%renda presumida%',
+            TRY_TO_NUMBER(REPLACE(REPLACE(REPLACE(REPLACE(REPLACE(NULLIF(TRIM(f.value:valor::string), ''), '\"', ''), 'R$', ''), '.', ''), ',', '.'), ' ', '')),
+            NULL)) AS crivo_renda_presumida_credilink,
+    MAX(IFF(LOWER(TRIM(f.value:nome::string)) LIKE 'serasa%renda presumida%',
+            TRY_TO_NUMBER(REPLACE(REPLACE(REPLACE(REPLACE(REPLACE(NULLIF(TRIM(f.value:valor::string), ''), '\"', ''), 'R$', ''), '.', ''), ',', '.'), ' ', '')),
+            NULL)) AS crivo_renda_presumida_serasa,
+    MAX(IFF(f.value:nome::string = 'Data de Nascimento BVS',
+            TRY_TO_DATE(NULLIF(TRIM(f.value:valor::string),''), 'DD/MM/YYYY'),
+            NULL)) AS crivo_birthdate_bvs,
+    MAX(IFF(f.value:nome::string = 'CEP do Proponente',     f.value:valor::string, NULL)) AS crivo_zipcode,
+    MAX(IFF(f.value:nome::string = 'Telefone do proponente', f.value:valor::string, NULL)) AS crivo_phone_raw,
+    MAX(IFF(f.value:nome::string = 'Telefone do proponente' AND NULLIF(TRIM(f.value:valor::string),'') IS NOT NULL, 1, 0)) AS crivo_has_phone
+  FROM todo t
+  , LATERAL FLATTEN(input => t.BUREAU_CHECK_INFO:campos) f
+  GROUP BY 1
+),
+
+databusca_pf AS (
+  SELECT
+    t.CRIVO_CHECK_ID,
+    COUNT(*) AS crivo_n_databusca_pf,
+    /* "lista - código sexo" ou variações: qualquer nome contendo 'sexo' */
+    MAX(IFF(LOWER(p.value:nome::string) LIKE '%sexo%', NULLIF(TRIM(p.value:valor::string), ''), NULL)) AS crivo_sexo_codigo_raw
+  FROM todo t
+  , LATERAL FLATTEN(input => t.BUREAU_CHECK_INFO:drivers) d
+  , LATERAL FLATTEN(input => d.value:produtos:"api DataBusca - Consulta Dados Pessoa - PF") p
+  GROUP BY 1
+)
+
+SELECT
+  t.CRIVO_CHECK_ID,
+  COALESCE(c.crivo_n_campos, 0),
+  c.crivo_pefin_serasa,
+  c.crivo_refin_serasa,
+  c.crivo_protesto_serasa,
+  c.crivo_score_serasa,
+  c.crivo_renda_presumida_credilink,
+  c.crivo_renda_presumida_serasa,
+  c.crivo_birthdate_bvs,
+  c.crivo_zipcode,
+  c.crivo_phone_raw,
+  c.crivo_has_phone,
+  /* KEY_PARAMETERS:campos (formato monetário PT-BR como string; objeto/array -> NULL) */
+  TRY_TO_NUMBER(t.KEY_PARAMETERS:campos:BacenScore::string),
+  TRY_TO_NUMBER(REPLACE(REPLACE(REPLACE(t.KEY_PARAMETERS:campos:CreditLimits::string, '\"', ''), '.', ''), ',', '.')),
+  TRY_TO_NUMBER(REPLACE(REPLACE(REPLACE(NULLIF(TRIM(t.KEY_PARAMETERS:campos:OverduePortfolio::string), ''), '\"', ''), '.', ''), ',', '.')),
+  TRY_TO_NUMBER(REPLACE(REPLACE(REPLACE(NULLIF(TRIM(t.KEY_PARAMETERS:campos:Loss::string), ''), '\"', ''), '.', ''), ',', '.')),
+  COALESCE(d.crivo_n_databusca_pf, 0),
+  d.crivo_sexo_codigo_raw,
+  CURRENT_TIMESTAMP()::TIMESTAMP_NTZ
+FROM todo t
+LEFT JOIN campos c       ON c.CRIVO_CHECK_ID = t.CRIVO_CHECK_ID
+LEFT JOIN databusca_pf d ON d.CRIVO_CHECK_ID = t.CRIVO_CHECK_ID;
@@ -0,0 +1,28 @@
+/*
+  Fixtures do backend local (src/utils/local_engine.py): pessoas (dados sensíveis) e leads.
+  CPFs fictícios (gerados, não pertencem a ninguém). Cenário coberto pelos arquivos 0x_*.sql:
+    - pessoa 101..105: pacientes; 106: responsável financeiro do paciente 105 (menor de idade);
+    - cada CPF tem um "perfil" de bureau diferente (SERASA novo/antigo, Boa Vista, SCR, bacen, crivo).
+*/
+
+CREATE OR REPLACE TABLE CAPIM_DATA.RESTRICTED.INCREMENTAL_SENSITIVE_DATA_API AS
+SELECT column1::NUMBER AS id, column2::VARCHAR AS cpf, column3::DATE AS birthdate, column4::VARCHAR AS city,
+       column5::VARCHAR AS state, column6::VARCHAR AS zipcode, column7::NUMBER AS monthly_income,
+       column8::VARCHAR AS occupation, column9::TIMESTAMP_NTZ AS created_at, column9::TIMESTAMP_NTZ AS updated_at
+FROM VALUES
+  (101, '111.444.777-35', '1990-03-12', 'São Paulo',      'SP', '01310-100', 4500,  'professor',   '2025-01-02 10:00:00'),
+  (102, '222.555.888-46', '1985-07-30', 'Campinas',       'SP', '13010-000', 7200,  'engenheiro',  '2025-01-03 11:00:00'),
+  (103, '333.666.999-57', '1979-11-05', 'Belo Horizonte', 'MG', '30130-000', 3100,  'vendedor',    '2025-01-05 09:30:00'),
+  (104, '444.777.000-68', '1995-01-20', 'Curitiba',       'PR', '80010-000', NULL,  NULL,          '2025-01-07 14:00:00'),
+  (105, '555.888.111-79', '2010-05-15', 'Recife',         'PE', '50010-000', NULL,  'estudante',   '2025-01-10 16:00:00'),
+  (106, '666.999.222-80', '1975-09-09', 'Recife',         'PE', '50010-000', 12000, 'médica',      '2025-01-10 16:00:00');
+
+CREATE OR REPLACE TABLE CAPIM_DATA.SOURCE_STAGING.SOURCE_CREDIT_LEADS AS
+SELECT column1::NUMBER AS credit_lead_id, column2::FLOAT AS credit_lead_requested_amount,
+       column3::BOOLEAN AS under_age_patient_verified, column4::TIMESTAMP_NTZ AS credit_lead_created_at
+FROM VALUES
+  (9001, 3500.0,  FALSE, '2025-01-02 09:50:00'),
+  (9002, 12000.0, FALSE, '2025-01-03 10:50:00'),
+  (9003, 2500.0,  FALSE, '2025-01-05 09:00:00'),
+  (9004, 8000.0,  FALSE, '2025-01-07 13:30:00'),
+  (9005, 6000.0,  TRUE,  '2025-01-10 15:40:00');
@@ -0,0 +1,39 @@
+/* Fixtures: simulações (C1 credit_simulation). financing_conditions em centavos, chaves = prazo. */
+
+CREATE OR REPLACE TABLE CAPIM_DATA.CAPIM_PRODUCTION.CREDIT_SIMULATIONS AS
+SELECT
+  column1::NUMBER AS id,
+  column2::NUMBER AS credit_lead_id,
+  column3::NUMBER AS retail_id,
+  column4::NUMBER AS patient_id,
+  column5::NUMBER AS financial_responsible_id,
+  column6::VARCHAR AS state,
+  column7::VARCHAR AS rejection_reason,
+  column8::TIMESTAMP_NTZ AS approved_at,
+  column9::NUMBER AS crivo_check_id,
+  column10::BOOLEAN AS appealable,
+  column11::VARCHAR AS score,
+  column12::VARCHAR AS payment_default_risk,
+  column13::NUMBER AS permitted_amount,
+  PARSE_JSON(column14) AS financing_conditions,
+  column15::TIMESTAMP_NTZ AS created_at,
+  column16::TIMESTAMP_NTZ AS updated_at
+FROM VALUES
+  (5001, 9001, 77, 101, NULL, 'approved', NULL, '2025-01-02 10:05:00', 7001, FALSE, 'A', 'low', 350000,
+   '{"6": {"installment_value": 63500, "term": 6, "total_debt_amount": 381000}, "12": {"installment_value": 34100, "term": 12, "total_debt_amount": 409200}}',
+   '2025-01-02 10:00:00', '2025-01-02 10:05:00'),
+  (5002, 9002, 77, 102, NULL, 'approved', NULL, '2025-01-03 11:10:00', NULL, FALSE, 'B', 'medium', 1200000,
+   '{"3": {"installment_value": 420000, "term": 3, "total_debt_amount": 1260000}, "18": {"installment_value": 81000, "term": 18, "total_debt_amount": 1458000}}',
+   '2025-01-03 11:00:00', '2025-01-03 11:10:00'),
+  (5003, 9003, 88, 103, NULL, 'rejected', 'score_too_low', NULL, NULL, TRUE, 'E', 'high', 0,
+   NULL,
+   '2025-01-05 09:30:00', '2025-01-05 09:31:00'),
+  (5004, 9004, 88, 104, NULL, 'approved', NULL, '2025-01-07 14:20:00', NULL, FALSE, 'C', 'medium', 800000,
+   '{"10": {"installment_value": 92000, "term": 10, "total_debt_amount": 920000}}',
+   '2025-01-07 14:00:00', '2025-01-07 14:20:00'),
+  (5005, 9005, 99, 105, 106, 'approved', NULL, '2025-01-10 16:30:00', NULL, FALSE, 'B', 'low', 600000,
+   '{"6": {"installment_value": 108000, "term": 6, "total_debt_amount": 648000}, "24": {"installment_value": 33000, "term": 24, "total_debt_amount": 792000}}',
+   '2025-01-10 16:00:00', '2025-01-10 16:30:00'),
+  (5006, 9001, 77, 101, NULL, 'rejected', 'has_restrictions', NULL, NULL, FALSE, 'D', 'high', 0,
+   NULL,
+   '2025-02-14 09:00:00', '2025-02-14 09:01:00');
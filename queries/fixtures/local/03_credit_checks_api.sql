@@ -0,0 +1,42 @@
+/*
+  Fixtures: credit checks (payloads por source/kind/formato — docs/reference/PAYLOAD_CONTRACTS_MAP.md).
+  CPF 111.444.777-35: SERASA novo (score + income_only); 222.555.888-46: SERASA antigo (B-codes);
+  333.666.999-57: Boa Vista scpc_net + score_pf; 444.777.000-68: bacen_internal_score + SCR;
+  666.999.222-80: SERASA novo (responsável financeiro).
+*/
+
+CREATE OR REPLACE TABLE CAPIM_DATA.RESTRICTED.INCREMENTAL_CREDIT_CHECKS_API AS
+SELECT
+  column1::NUMBER AS id,
+  column2::VARCHAR AS cpf,
+  column3::VARCHAR AS source,
+  column4::VARCHAR AS kind,
+  column5::BOOLEAN AS new_data_format,
+  PARSE_JSON(column6) AS data,
+  column7::TIMESTAMP_NTZ AS created_at,
+  column7::TIMESTAMP_NTZ AS updated_at
+FROM VALUES
+  (8001, '111.444.777-35', 'serasa', 'check_score_without_income', TRUE,
+   '{"reports": [{"reportName": "COMBO_CONCESSAO", "registration": {"birthDate": "1990-03-12", "consumerGender": "F", "address": {"zipCode": "01310100"}, "phone": {"areaCode": 11}, "statusRegistration": "REGULAR", "statusDate": "2024-12-01"}, "negativeData": {"pefin": {"summary": {"count": 0, "balance": 0}}, "refin": {"summary": {"count": 1, "balance": 1250.5}}, "notary": {"summary": {"count": 0, "balance": 0}}, "check": {"summary": {"count": 0, "balance": 0}}}, "score": {"score": 712, "range": "C", "scoreModel": "HSPN"}}]}',
+   '2025-01-02 09:58:00'),
+  (8002, '111.444.777-35', 'serasa', 'check_income_only', TRUE,
+   '{"score": 452000, "range": "R4", "scoreModel": "HRP9"}',
+   '2025-01-02 09:59:00'),
+  (8003, '222.555.888-46', 'serasa', 'check_score', FALSE,
+   '[{"B001": {"birthdate": "1985-07-30", "gender": "M"}}, {"B003": {"phone": "19999990000"}}, {"B004": {"zip_code": "13010000"}}, {"B280": {"score": 455, "score_range_name": "FAIXA 4", "delinquency_probability_percent": 12.5}}, {"B357": {"occurrences_count": 2, "total_occurrence_value": 3400}}, {"B361": {"occurrences_count": 1, "total_occurrence_value": 800}}]',
+   '2025-01-03 10:55:00'),
+  (8004, '333.666.999-57', 'boa_vista_scpc_net', 'check_score', FALSE,
+   '[{"249": {"birthdate": "05111979", "name": "FULANO DE TAL", "status": "ATIVO"}}, {"141": {"debit_total_count": 3, "debit_total_value": 157000, "last_debit_date": "2024-10-01"}}, {"123": {"exists": "S"}}]',
+   '2025-01-05 09:20:00'),
+  (8005, '333.666.999-57', 'boa_vista_score_pf', 'check_score', FALSE,
+   '{"score_positivo": {"score_classificacao_varios_modelos": {"score": 380}}}',
+   '2025-01-05 09:21:00'),
+  (8006, '444.777.000-68', 'bacen_internal_score', 'check_score', FALSE,
+   '{"predictions": [{"score": 0.82, "limitesdecredito": 15000, "valorvencimento_mean_credit_limits": 320.5, "is_not_banked": "false"}]}',
+   '2025-01-07 13:55:00'),
+  (8007, '444.777.000-68', 'scr', 'check_score', FALSE,
+   '{"resumoDoCliente": {"dataBaseConsultada": "2024-11", "listaDeResumoDasOperacoes": [{"modalidade": "0203", "listaDeVencimentos": [{"codigoVencimento": "110", "valorVencimento": 1500.25}, {"codigoVencimento": "120", "valorVencimento": 300}]}]}}',
+   '2025-01-07 13:56:00'),
+  (8008, '666.999.222-80', 'serasa', 'check_score_without_income', TRUE,
+   '{"reports": [{"reportName": "COMBO_CONCESSAO", "registration": {"birthDate": "1975-09-09", "consumerGender": "F", "address": {"zipCode": "50010000"}, "statusRegistration": "REGULAR"}, "negativeData": {"pefin": {"summary": {"count": 2, "balance": 980}}, "refin": {"summary": {"count": 0, "balance": 0}}, "notary": {"summary": {"count": 1, "balance": 450}}, "check": {"summary": {"count": 0, "balance": 0}}}, "score": 8975000}]}',
+   '2025-01-10 15:55:00');
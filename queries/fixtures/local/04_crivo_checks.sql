@@ -0,0 +1,18 @@
+/* Fixtures: crivo checks (KEY_PARAMETERS:campos OBJECT; BUREAU_CHECK_INFO:campos ARRAY de {nome, valor}). */
+
+CREATE OR REPLACE TABLE CAPIM_DATA.SOURCE_STAGING.SOURCE_CRIVO_CHECKS AS
+SELECT
+  column1::NUMBER AS CRIVO_CHECK_ID,
+  column2::TIMESTAMP_NTZ AS CRIVO_CHECK_CREATED_AT,
+  column3::VARCHAR AS ENGINEABLE_TYPE,
+  column4::NUMBER AS ENGINEABLE_ID,
+  column5::VARCHAR AS POLITICA,
+  PARSE_JSON(column6) AS KEY_PARAMETERS,
+  PARSE_JSON(column7) AS BUREAU_CHECK_INFO
+FROM VALUES
+  (7001, '2025-01-02 10:01:00', 'CreditSimulation', 5001, 'politica_padrao',
+   '{"campos": {"CPF": "111.444.777-35", "BacenScore": "0,71", "CreditLimits": "12.500,00", "OverduePortfolio": "0,00", "Loss": "0,00"}}',
+   '{"campos": [{"nome": "Score Serasa", "valor": "712"}, {"nome": "PEFIN Serasa", "valor": "0"}, {"nome": "REFIN Serasa", "valor": "1"}, {"nome": "Protesto Serasa", "valor": "0"}, {"nome": "CREDILINK - Renda Presumida", "valor": "R$ 4.272,15"}, {"nome": "CEP do Proponente", "valor": "01310-100"}, {"nome": "Telefone do proponente", "valor": "11988887777"}], "drivers": [{"produtos": {"api DataBusca - Consulta Dados Pessoa - PF": {"sexo": "2"}}}]}'),
+  (7002, '2025-01-05 09:25:00', 'CreditSimulation', 5003, 'politica_padrao',
+   '{"campos": {"CPF": "33366699957", "BacenScore": "0,35", "CreditLimits": "2.000,00", "OverduePortfolio": "1.570,00", "Loss": "0,00"}}',
+   '{"campos": [{"nome": "Score Serasa", "valor": "0"}, {"nome": "PEFIN Serasa", "valor": "3"}, {"nome": "Data de Nascimento BVS", "valor": "05/11/1979"}], "drivers": []}');
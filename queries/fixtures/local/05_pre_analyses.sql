@@ -0,0 +1,115 @@
+/*
+  Fixtures do backend local: pre_analyses (C1 unificado) e fontes do legado (hash_cpf + 15d, PACC, N8N/CEI).
+    - PRE_ANALYSIS_TYPE='credit_simulation': 5001..5006 (mesmos ids de CREDIT_SIMULATIONS; risk_capim);
+    - PRE_ANALYSIS_TYPE='pre_analysis' (legado, via SOURCE_PRE_ANALYSIS_API):
+        3001: CPF da pessoa 103, antes do cutover Serasa (2024-04-04) -> serasa check_score + BVS score_pf;
+        3002: CPF da pessoa 104, depois do cutover -> serasa income_only + BVS scpc_net + SCR + PACC;
+        3003: CPF da pessoa 102, 2025-10+ -> só o motor N8N (SOURCE_CREDIT_ENGINE_INFORMATION).
+  hash_cpf = SHA2(cpf só dígitos, 256), como em enrich_pre_analyses_borrower.sql.
+*/
+
+CREATE OR REPLACE TABLE CAPIM_DATA.CAPIM_ANALYTICS.PRE_ANALYSES AS
+SELECT
+  column1::VARCHAR AS pre_analysis_type,
+  column2::NUMBER AS pre_analysis_id,
+  column3::TIMESTAMP_NTZ AS pre_analysis_created_at,
+  column4::TIMESTAMP_NTZ AS pre_analysis_updated_at,
+  column5::NUMBER AS retail_id,
+  column6::VARCHAR AS retail_group,
+  column7::NUMBER AS retail_group_id,
+  column8::NUMBER AS credit_lead_id,
+  column9::VARCHAR AS pre_analysis_state,
+  column10::VARCHAR AS risk_capim,
+  column11::VARCHAR AS risk_capim_subclass,
+  column12::VARCHAR AS rejection_reason,
+  column13::BOOLEAN AS is_elegible_with_counter_proposal,
+  column14::FLOAT AS pre_analysis_amount,
+  column15::FLOAT AS pre_analysis_installment_amount,
+  column16::FLOAT AS counter_proposal_amount,
+  column17::NUMBER AS maximum_term_available,
+  column18::NUMBER AS minimum_term_available,
+  column19::FLOAT AS proposal_interest,
+  column20::BOOLEAN AS has_request,
+  PARSE_JSON(column21) AS financing_conditions,
+  PARSE_JSON(column22) AS interest_rates_array
+FROM VALUES
+  ('credit_simulation', 5001, '2025-01-02 10:00:00', '2025-01-02 10:05:00', 77, 'Rede Sorriso', 7, 9001, 'approved',
+   '2', 'B', NULL, FALSE, 3500.0, 635.0, NULL, 12, 6, 0.0299, TRUE, NULL, NULL),
+  ('credit_simulation', 5002, '2025-01-03 11:00:00', '2025-01-03 11:10:00', 77, 'Rede Sorriso', 7, 9002, 'approved',
+   '3', 'A', NULL, FALSE, 12000.0, 810.0, NULL, 18, 3, 0.0349, FALSE, NULL, NULL),
+  ('credit_simulation', 5003, '2025-01-05 09:30:00', '2025-01-05 09:31:00', 88, NULL, NULL, 9003, 'rejected',
+   '5', NULL, 'score_too_low', TRUE, 2500.0, NULL, 1500.0, NULL, NULL, NULL, FALSE, NULL, NULL),
+  ('credit_simulation', 5004, '2025-01-07 14:00:00', '2025-01-07 14:20:00', 88, NULL, NULL, 9004, 'approved',
+   '3', 'C', NULL, FALSE, 8000.0, 920.0, NULL, 10, 10, 0.0249, TRUE, NULL, NULL),
+  ('credit_simulation', 5005, '2025-01-10 16:00:00', '2025-01-10 16:30:00', 99, 'Clínicas PE', 9, 9005, 'approved',
+   '2', 'A', NULL, FALSE, 6000.0, 1080.0, NULL, 24, 6, 0.0319, TRUE, NULL, NULL),
+  ('credit_simulation', 5006, '2025-02-14 09:00:00', '2025-02-14 09:01:00', 77, 'Rede Sorriso', 7, 9001, 'rejected',
+   '4', NULL, 'has_restrictions', FALSE, 3500.0, NULL, NULL, NULL, NULL, NULL, FALSE, NULL, NULL),
+  -- versão antiga da 5006 (dedup por PRE_ANALYSIS_UPDATED_AT deve descartar)
+  ('credit_simulation', 5006, '2025-02-14 09:00:00', '2025-02-14 09:00:30', 77, 'Rede Sorriso', 7, 9001, 'pending',
+   NULL, NULL, NULL, FALSE, 3500.0, NULL, NULL, NULL, NULL, NULL, FALSE, NULL, NULL),
+  ('pre_analysis', 3001, '2024-03-01 15:00:00', '2024-03-01 15:02:00', 88, NULL, NULL, NULL, 'approved',
+   '3', 'B', NULL, FALSE, 4000.0, 400.0, NULL, 12, 3, NULL, TRUE, NULL,
+   '{"1..6": 0.0299, "7..12": 0.0349}'),
+  ('pre_analysis', 3002, '2025-01-08 10:00:00', '2025-01-08 10:01:00', 77, 'Rede Sorriso', 7, NULL, 'rejected',
+   '5', NULL, 'income_too_low', TRUE, 9000.0, NULL, 4000.0, NULL, NULL, NULL, FALSE, NULL,
+   '{"1..12": 0.0329, "13..24": 0.0389}'),
+  ('pre_analysis', 3003, '2025-10-15 08:30:00', '2025-10-15 08:31:00', 99, 'Clínicas PE', 9, NULL, 'approved',
+   '1', 'A', NULL, FALSE, 15000.0, 1450.0, NULL, 18, 6, NULL, TRUE, NULL,
+   '{"1..18": 0.0279}');
+
+CREATE OR REPLACE TABLE CAPIM_DATA.RESTRICTED.SOURCE_PRE_ANALYSIS_API AS
+SELECT column1::NUMBER AS pre_analysis_id, column2::VARCHAR AS cpf, column3::DATE AS birthdate,
+       column4::VARCHAR AS zipcode, column5::VARCHAR AS state, column6::VARCHAR AS occupation,
+       column7::TIMESTAMP_NTZ AS pre_analysis_created_at, column8::TIMESTAMP_NTZ AS pre_analysis_updated_at
+FROM VALUES
+  (3001, '333.666.999-57', '1979-11-05', '30130-000', 'MG', 'vendedor',   '2024-03-01 15:00:00', '2024-03-01 15:00:00'),
+  (3001, '333.666.999-57', '1979-11-05', '30130-000', 'MG', 'vendedor',   '2024-03-01 15:00:00', '2024-03-01 15:02:00'),
+  (3002, '444.777.000-68', '1995-01-20', '80010-000', 'PR', NULL,         '2025-01-08 10:00:00', '2025-01-08 10:01:00'),
+  (3003, '222.555.888-46', '1985-07-30', '13010-000', 'SP', 'engenheiro', '2025-10-15 08:30:00', '2025-10-15 08:31:00');
+
+CREATE OR REPLACE TABLE CAPIM_DATA.CAPIM_ANALYTICS.PRE_ANALYSIS_CREDIT_CHECK AS
+SELECT column1::VARCHAR AS pre_analysis_type, column2::NUMBER AS pre_analysis_id,
+       column3::TIMESTAMP_NTZ AS pre_analysis_created_at, column4::VARCHAR AS serasa_positive_score,
+       column5::VARCHAR AS bvs_positive_score, column6::VARCHAR AS serasa_presumed_income,
+       column7::VARCHAR AS serasa_pefin, column8::VARCHAR AS serasa_refin, column9::VARCHAR AS serasa_protest,
+       column10::VARCHAR AS bvs_total_debt, column11::VARCHAR AS bvs_total_protest, column12::VARCHAR AS score_scr
+FROM VALUES
+  ('pre_analysis', 3002, '2025-01-08 10:00:00', '388', NULL, '2100', '1', '0', '0', '1570', '0', '3');
+
+CREATE OR REPLACE TABLE CAPIM_DATA.RESTRICTED.SOURCE_CREDIT_CHECKS_API_SERASA AS
+SELECT SHA2(column1, 256) AS hash_cpf, column2::VARCHAR AS kind, column3::TIMESTAMP_NTZ AS serasa_consulted_at,
+       column4::VARCHAR AS serasa_ir_status, column5::NUMBER AS serasa_ccf, column6::NUMBER AS serasa_positive_score,
+       column7::NUMBER AS serasa_refin, column8::NUMBER AS serasa_pefin, column9::NUMBER AS serasa_protest,
+       column10::FLOAT AS serasa_presumed_income
+FROM VALUES
+  ('33366699957', 'check_score',                '2024-03-01 18:05:00', 'REGULAR', 0, 455, 0, 2, 1, NULL),
+  ('44477700068', 'check_income_only',          '2025-01-08 13:00:00', NULL,      NULL, NULL, NULL, NULL, NULL, 2100.0),
+  ('44477700068', 'check_score_without_income', '2025-01-08 13:00:05', 'REGULAR', 0, 388, 0, 1, 0, NULL);
+
+CREATE OR REPLACE TABLE CAPIM_DATA.RESTRICTED.SOURCE_CREDIT_CHECKS_API_BOA_VISTA_SCORE_PF AS
+SELECT SHA2(column1, 256) AS hash_cpf, column2::TIMESTAMP_NTZ AS bvs_score_pf_net_consulted_at,
+       column3::NUMBER AS bvs_positive_score
+FROM VALUES
+  ('33366699957', '2024-03-02 12:00:00', 402);
+
+CREATE OR REPLACE TABLE CAPIM_DATA.RESTRICTED.SOURCE_CREDIT_CHECKS_API_BOA_VISTA_SCPC_NET AS
+SELECT SHA2(column1, 256) AS hash_cpf, column2::TIMESTAMP_NTZ AS bvs_scpc_net_consulted_at,
+       column3::NUMBER AS bvs_ccf_count, column4::FLOAT AS bvs_total_debt, column5::FLOAT AS bvs_total_protest,
+       column6::VARCHAR AS bvs_status_ir
+FROM VALUES
+  ('44477700068', '2025-01-08 13:01:00', 0, 1570.0, 0.0, 'REGULAR');
+
+CREATE OR REPLACE TABLE CAPIM_DATA.RESTRICTED.SOURCE_CREDIT_CHECKS_API_SCR_REPORT AS
+SELECT SHA2(column1, 256) AS hash_cpf, column2::TIMESTAMP_NTZ AS scr_report_consulted_at,
+       column3::VARCHAR AS scr_qtd_de_operacoes
+FROM VALUES
+  ('44477700068', '2025-01-09 09:00:00', '3');
+
+CREATE OR REPLACE TABLE CAPIM_DATA.SOURCE_STAGING.SOURCE_CREDIT_ENGINE_INFORMATION AS
+SELECT column1::NUMBER AS engineable_id, column2::VARCHAR AS engineable_type, column3::VARCHAR AS source,
+       column4::TIMESTAMP_NTZ AS credit_engine_consultation_created_at,
+       column5::TIMESTAMP_NTZ AS credit_engine_consultation_updated_at, column6::VARCHAR AS data
+FROM VALUES
+  (3003, 'PreAnalysis', 'n8n_credit_engine', '2025-10-15 08:30:10', '2025-10-15 08:30:12',
+   '{"scoreSerasa": "701", "scoreBvs": "655", "pefinSerasa": "0", "refinSerasa": "0", "protestoSerasa": "0", "protestoBvs": "0", "rendaSerasa": "8300", "cepProponente": "13010000", "dataNascimentoBvs": "1985-07-30"}');
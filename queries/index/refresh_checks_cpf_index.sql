@@ -0,0 +1,134 @@
+/*
+  Índices CPF+tempo de credit checks e crivo checks (pré-normalizados, clusterizados).
+
+  Motivação:
+    - Enrichments (CS e PA) e bridges re-normalizavam CPF com REGEXP_REPLACE e varriam
+      INCREMENTAL_CREDIT_CHECKS_API / SOURCE_CRIVO_CHECKS inteiras a cada execução: o predicado
+      `REGEXP_REPLACE(cc.cpf, ...) = cpf_digits` não poda micro-partições.
+    - Aqui o CPF é normalizado uma única vez por check e a tabela é clusterizada por
+      (cpf_digits, created_at): os range joins CPF+janela passam a podar partições.
+
+  Tabelas (sem VARIANT; payload é lido por id na tabela raw, só para os checks vencedores):
+    - CAPIM_DATA_DEV.POSSANI_SANDBOX.CREDIT_CHECKS_CPF_INDEX
+        credit_check_id, cpf_digits, created_at, updated_at, source, kind, new_data_format,
+        payload_is_new (mitigação de “misflag”: OBJECT com reports; TYPEOF só avaliado nos candidatos a
+        misflag — serasa com new_data_format não TRUE —, FALSE nos demais, onde o flag não é consultado)
+    - CAPIM_DATA_DEV.POSSANI_SANDBOX.CRIVO_CHECKS_CPF_INDEX
+        crivo_check_id, cpf_digits, created_at, engineable_type, engineable_id, politica
+
+  Refresh incremental (idempotente; a 1ª execução faz a carga completa):
+    - credit checks: MERGE das linhas com UPDATED_AT >= watermark (MAX(updated_at) do índice; `>=` para não
+      perder linhas empatadas no watermark que chegaram depois do último refresh), 1 versão por id
+      (a mais recente); linhas já indexadas com o mesmo updated_at não são reescritas;
+    - crivo checks: sem watermark confiável (um check pode chegar na staging dias depois do created_at);
+      insere todo id da origem que ainda não está no índice (anti-join só pela chave, como o delete abaixo);
+    - deletes na origem: ids que não existem mais na tabela raw saem do índice (anti-join só pela chave).
+
+  Schema: CAPIM_DATA_DEV.POSSANI_SANDBOX é o padrão; o `--schema` dos materializadores reaponta as tabelas de
+  checks deste arquivo, do feature store e do enrichment (`qualify_check_tables` em src/utils/checks_index.py).
+
+  Execução (antes dos enrichments / bridges):
+    python -m src.cli.run_sql_file --file queries/index/refresh_checks_cpf_index.sql
+  Os materializadores (`materialize_enriched_*`) rodam este arquivo automaticamente,
+  exceto com `--skip-index-refresh` e em execuções de amostra/recorte sem `--refresh-index`.
+*/
+
+CREATE TABLE IF NOT EXISTS CAPIM_DATA_DEV.POSSANI_SANDBOX.CREDIT_CHECKS_CPF_INDEX (
+  credit_check_id NUMBER,
+  cpf_digits      VARCHAR,
+  created_at      TIMESTAMP_NTZ,
+  updated_at      TIMESTAMP_NTZ,
+  source          VARCHAR,
+  kind            VARCHAR,
+  new_data_format BOOLEAN,
+  payload_is_new  BOOLEAN,
+  indexed_at      TIMESTAMP_NTZ
+)
+CLUSTER BY (cpf_digits, created_at);
+
+CREATE TABLE IF NOT EXISTS CAPIM_DATA_DEV.POSSANI_SANDBOX.CRIVO_CHECKS_CPF_INDEX (
+  crivo_check_id  NUMBER,
+  cpf_digits      VARCHAR,
+  created_at      TIMESTAMP_NTZ,
+  engineable_type VARCHAR,
+  engineable_id   NUMBER,
+  politica        VARCHAR,
+  indexed_at      TIMESTAMP_NTZ
+)
+CLUSTER BY (cpf_digits, created_at);
+
+/* ===== Credit checks: novas linhas + linhas atualizadas desde o watermark ===== */
+MERGE INTO CAPIM_DATA_DEV.POSSANI_SANDBOX.CREDIT_CHECKS_CPF_INDEX t
+USING (
+  WITH wm AS (
+    SELECT COALESCE(MAX(updated_at), '1900-01-01'::TIMESTAMP_NTZ) AS max_updated_at
+    FROM CAPIM_DATA_DEV.POSSANI_SANDBOX.CREDIT_CHECKS_CPF_INDEX
+  )
+  SELECT
+    cc.id         AS credit_check_id,
+    REGEXP_REPLACE(cc.cpf, '\\D','') AS cpf_digits,
+    cc.created_at,
+    cc.updated_at,
+    cc.source,
+    cc.kind,
+    cc.new_data_format,
+    CASE
+      WHEN cc.source = 'serasa' AND COALESCE(cc.new_data_format, FALSE) = FALSE
+        THEN (TYPEOF(cc.data) = 'OBJECT' AND cc.data:reports IS NOT NULL)
+      ELSE FALSE
+    END AS payload_is_new
+  FROM CAPIM_DATA.RESTRICTED.INCREMENTAL_CREDIT_CHECKS_API cc
+  JOIN wm ON TRUE
+  WHERE cc.updated_at >= wm.max_updated_at
+  QUALIFY ROW_NUMBER() OVER (PARTITION BY cc.id ORDER BY cc.updated_at DESC) = 1
+) s
+  ON t.credit_check_id = s.credit_check_id
+WHEN MATCHED AND t.updated_at IS DISTINCT FROM s.updated_at THEN UPDATE SET
+  cpf_digits      = s.cpf_digits,
+  created_at      = s.created_at,
+  updated_at      = s.updated_at,
+  source          = s.source,
+  kind            = s.kind,
+  new_data_format = s.new_data_format,
+  payload_is_new  = s.payload_is_new,
+  indexed_at      = CURRENT_TIMESTAMP()::TIMESTAMP_NTZ
+WHEN NOT MATCHED THEN INSERT
+  (credit_check_id, cpf_digits, created_at, updated_at, source, kind, new_data_format, payload_is_new, indexed_at)
+VALUES
+  (s.credit_check_id, s.cpf_digits, s.created_at, s.updated_at, s.source, s.kind, s.new_data_format, s.payload_is_new,
+   CURRENT_TIMESTAMP()::TIMESTAMP_NTZ);
+
+/* ===== Credit checks: remove ids apagados na origem ===== */
+DELETE FROM CAPIM_DATA_DEV.POSSANI_SANDBOX.CREDIT_CHECKS_CPF_INDEX t
+WHERE NOT EXISTS (
+  SELECT 1
+  FROM CAPIM_DATA.RESTRICTED.INCREMENTAL_CREDIT_CHECKS_API cc
+  WHERE cc.id = t.credit_check_id
+);
+
+/* ===== Crivo checks: append-only (ids da origem ainda não indexados, sem filtro de data) ===== */
+INSERT INTO CAPIM_DATA_DEV.POSSANI_SANDBOX.CRIVO_CHECKS_CPF_INDEX
+  (crivo_check_id, cpf_digits, created_at, engineable_type, engineable_id, politica, indexed_at)
+SELECT
+  c.CRIVO_CHECK_ID,
+  REGEXP_REPLACE(c.KEY_PARAMETERS:campos:"CPF"::string, '\\D','') AS cpf_digits,
+  c.CRIVO_CHECK_CREATED_AT,
+  c.ENGINEABLE_TYPE,
+  c.ENGINEABLE_ID,
+  c.POLITICA,
+  CURRENT_TIMESTAMP()::TIMESTAMP_NTZ
+FROM CAPIM_DATA.SOURCE_STAGING.SOURCE_CRIVO_CHECKS c
+WHERE NOT EXISTS (
+  SELECT 1
+  FROM CAPIM_DATA_DEV.POSSANI_SANDBOX.CRIVO_CHECKS_CPF_INDEX i
+  WHERE i.crivo_check_id = c.CRIVO_CHECK_ID
+)
+QUALIFY ROW_NUMBER() OVER (PARTITION BY c.CRIVO_CHECK_ID ORDER BY c.CRIVO_CHECK_CREATED_AT DESC) = 1;
+
+/* ===== Crivo checks: remove ids apagados na origem ===== */
+DELETE FROM CAPIM_DATA_DEV.POSSANI_SANDBOX.CRIVO_CHECKS_CPF_INDEX t
+WHERE NOT EXISTS (
+  SELECT 1
+  FROM CAPIM_DATA.SOURCE_STAGING.SOURCE_CRIVO_CHECKS c
+  WHERE c.CRIVO_CHECK_ID = t.crivo_check_id
+);
@@ -8,6 +8,9 @@
   Requisitos:
     - CREDIT_SIMULATIONS_ENRICHED_BORROWER materializada.
     - PRE_ANALYSES_ENRICHED_BORROWER materializada via `python -m src.cli.materialize_enriched_pre_analyses_borrower`.
+
+  Tendências agregadas (aprovação/risco/preenchimento por dia/mês): use o cubo `C1_DAILY_ROLLUP`
+  (`python -m src.cli.manage_c1_rollup query ...`) em vez de agregar este painel linha a linha.
 */
 
 SET cs_table = 'CAPIM_DATA_DEV.POSSANI_SANDBOX.CREDIT_SIMULATIONS_ENRICHED_BORROWER';
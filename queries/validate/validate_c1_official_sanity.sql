@@ -9,6 +9,10 @@
     - Duplicidade e grão: 1 linha por (c1_entity_type, c1_entity_id)
     - Escala/unidade: valores monetários comparáveis (reais vs centavos), percentis, outliers
     - Coerência lógica: aprovado vs valores, min/max, não-negatividade, formatos UF/CEP
+
+  Limites (src/cli/run_validation_suite.py):
+    @assert 1 max(n_duplicate_rows) == 0
+    @assert 2 rows == 0
 */
 
 /* =========================================================
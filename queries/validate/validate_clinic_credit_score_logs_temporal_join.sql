@@ -4,6 +4,9 @@
 
   Objetivo:
     - Demonstrar join temporal "último score <= c1_created_at" em amostra de C1.
+
+  Limites (src/cli/run_validation_suite.py):
+    @assert 1 min(n_rows) > 0
 */
 
 /* [A] Cobertura do log: range temporal e volume */
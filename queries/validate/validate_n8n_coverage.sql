@@ -10,6 +10,7 @@
 
   Observação:
     - n8n observado a partir de 2025-10.
+    - Recorte opcional via run_sql_file (--months 2025-11,2025-12 / --period-start ...) dentro dos meses abaixo.
 */
 
 WITH params AS (
@@ -37,15 +38,20 @@ sample_pa AS (
     DATE_TRUNC('month', pa.PRE_ANALYSIS_CREATED_AT) AS month,
     SHA2(REGEXP_REPLACE(spa.CPF, '\\D',''), 256) AS hash_cpf
   FROM CAPIM_DATA.CAPIM_ANALYTICS.PRE_ANALYSES pa
-  JOIN sample_months m
-    ON DATE_TRUNC('month', pa.PRE_ANALYSIS_CREATED_AT) = m.month
   LEFT JOIN spa_dedup spa
     ON spa.PRE_ANALYSIS_ID = pa.PRE_ANALYSIS_ID
   JOIN params p ON TRUE
+  JOIN sample_months m
+    ON DATE_TRUNC('month', pa.PRE_ANALYSIS_CREATED_AT) = m.month
   WHERE pa.PRE_ANALYSIS_TYPE = 'pre_analysis'
+    /* mesmo intervalo de sample_months, como range literal (poda micro-partições) */
+    AND pa.PRE_ANALYSIS_CREATED_AT >= '2025-10-01'::DATE
+    AND pa.PRE_ANALYSIS_CREATED_AT <  '2026-01-01'::DATE
+    /*@scope pa ts=pa.PRE_ANALYSIS_CREATED_AT id=pa.PRE_ANALYSIS_ID::NUMBER*/
+  /* amostra determinística: os N menores hashes do mês (reprodutível entre execuções) */
   QUALIFY ROW_NUMBER() OVER (
     PARTITION BY DATE_TRUNC('month', pa.PRE_ANALYSIS_CREATED_AT)
-    ORDER BY UNIFORM(0,1000000,RANDOM())
+    ORDER BY HASH(pa.PRE_ANALYSIS_ID::NUMBER, 7)
   ) <= p.n_per_month
 ),
 
@@ -8,6 +8,12 @@
         clinic_id
         4 eixos + *_source (para comparabilidade e auditoria)
 
+  Modo gerenciado (dynamic table com TARGET_LAG): `python -m src.cli.manage_c1_refresh deploy` usa o SELECT
+  abaixo para `C1_ENRICHED_BORROWER_DT` e reaponta esta view para ela; rodar este arquivo volta ao modo view.
+
+  Marcadores `@sample cs` / `@sample pa` (comentários; sem efeito aqui): o fill-rate `--approx` de
+  `src/cli/report_c1_dictionary_and_fill_rates.py` renderiza este SELECT com SAMPLE nas tabelas base.
+
   Pré-requisitos:
     - CAPIM_DATA_DEV.POSSANI_SANDBOX.CREDIT_SIMULATIONS_ENRICHED_BORROWER
     - CAPIM_DATA_DEV.POSSANI_SANDBOX.PRE_ANALYSES_ENRICHED_BORROWER (materializar via `python -m src.cli.materialize_enriched_pre_analyses_borrower`)
@@ -84,7 +90,7 @@ cs AS (
     serasa_score,
     serasa_score_source,
     boa_vista_score
-  FROM CAPIM_DATA_DEV.POSSANI_SANDBOX.CREDIT_SIMULATIONS_ENRICHED_BORROWER
+  FROM CAPIM_DATA_DEV.POSSANI_SANDBOX.CREDIT_SIMULATIONS_ENRICHED_BORROWER /*@sample cs*/
 ),
 pa AS (
   SELECT
@@ -145,7 +151,7 @@ pa AS (
     serasa_score,
     serasa_score_source,
     boa_vista_score
-  FROM CAPIM_DATA_DEV.POSSANI_SANDBOX.PRE_ANALYSES_ENRICHED_BORROWER
+  FROM CAPIM_DATA_DEV.POSSANI_SANDBOX.PRE_ANALYSES_ENRICHED_BORROWER /*@sample pa*/
   WHERE c1_entity_type = 'pre_analysis'
 ),
 
@@ -18,6 +18,10 @@
   - PMT = installment_value do cenário (centavos/100)
   - N = term (meses)
 
+  Preferível para consumo: CAPIM_DATA_DEV.POSSANI_SANDBOX.CREDIT_SIMULATIONS_EFFECTIVE_RATES (mesmas colunas de
+  taxa, resolvidas em lote por `python -m src.cli.materialize_effective_rates`): join por credit_simulation_id,
+  sem rodar o solver. Esta view segue como referência do check (`--check view`).
+
   IMPORTANTE:
   - Ajuste o DB/SCHEMA da view conforme seu ambiente.
   - Se preferir, aplique um filtro por período (ex.: últimos 12 meses) para reduzir custo.
@@ -0,0 +1,371 @@
+"""
+Benchmark multi-ponto do enrichment de credit_simulations (tempo, bytes e spill vs linhas).
+
+Motivação:
+  - o materializador extrapola o full linearmente a partir de um único `SAMPLE (N ROWS)`, e o próprio
+    script avisa que o custo pode não escalar linearmente (range joins CPF+tempo, janelas, QUALIFY).
+
+O que faz:
+  - roda o enrichment em vários pontos: amostras (`--sample-rows 5000,20000,80000`) e janelas de
+    created_at (`--window-days 7,30,90`), `--repeats` vezes cada, com `USE_CACHED_RESULT = FALSE`;
+  - `--cold`: suspende/retoma o warehouse antes da 1ª repetição de cada ponto (cache local de disco
+    frio); as demais repetições são "warm";
+  - `--per-stage`: executa cada ponto em estágios (`src/utils/stage_runner.py`, em série) e mede cada CTE
+    declarada em `STAGES`; sem a flag, mede o CTAS monolítico (`stage = total`);
+  - métricas de cada query via QUERY_HISTORY (elapsed, fila, bytes/partições escaneadas, spill);
+  - ajusta curva de escala (log-log: métrica = a * linhas^b) e projeta o full;
+  - grava tudo em `ENRICHMENT_BENCHMARK_HISTORY` e sinaliza regressão quando, no mesmo ponto/estágio,
+    o hash do SQL mudou e a mediana ficou mais lenta que a da versão anterior além da tolerância.
+
+Uso:
+  python -m src.cli.benchmark_enrichment --sample-rows 5000,20000,80000 --repeats 2 --cold
+  python -m src.cli.benchmark_enrichment --per-stage --sample-rows 20000 --window-days 30
+"""
+
+from __future__ import annotations
+
+import argparse
+import hashlib
+import subprocess
+import time
+import uuid
+from dataclasses import dataclass
+from datetime import date, timedelta
+from typing import Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+from snowflake.connector.errors import ProgrammingError
+
+from src.cli.materialize_enriched_credit_simulations_borrower import STAGES, read_enrichment_sql, render_enrichment
+from src.utils.query_cache import normalize_sql
+from src.utils.query_profile import add_profile_args, init_profiler, query_metrics, report_profile, tag_query
+from src.utils.snowflake_connection import pooled_connection
+from src.utils.sql_template import ScopeParams
+from src.utils.stage_runner import plan_stages, run_stage_graph
+
+HISTORY_COLS = [
+    ("run_id", "VARCHAR"),
+    ("benchmarked_at", "TIMESTAMP_NTZ"),
+    ("sql_hash", "VARCHAR"),
+    ("git_rev", "VARCHAR"),
+    ("point_kind", "VARCHAR"),
+    ("point_value", "NUMBER"),
+    ("rep", "NUMBER"),
+    ("cache_state", "VARCHAR"),
+    ("stage", "VARCHAR"),
+    ("query_id", "VARCHAR"),
+    ("rows_out", "NUMBER"),
+    ("wall_s", "FLOAT"),
+    ("elapsed_s", "FLOAT"),
+    ("queued_s", "FLOAT"),
+    ("bytes_scanned", "NUMBER"),
+    ("partitions_scanned", "NUMBER"),
+    ("partitions_total", "NUMBER"),
+    ("spill_local_bytes", "NUMBER"),
+    ("spill_remote_bytes", "NUMBER"),
+    ("warehouse_size", "VARCHAR"),
+]
+
+
+@dataclass
+class BenchPoint:
+    kind: str  # sample | window
+    value: int
+    sql: str
+
+    @property
+    def label(self) -> str:
+        return f"{self.kind}={self.value}"
+
+
+def _int_list(value: Optional[str]) -> List[int]:
+    return [int(v) for v in (value or "").split(",") if v.strip()]
+
+
+def sql_version(sql: str) -> str:
+    return hashlib.sha256(normalize_sql(sql).encode("utf-8")).hexdigest()[:16]
+
+
+def _git_rev() -> Optional[str]:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except Exception:
+        return None
+
+
+def build_points(sql: str, sample_rows: List[int], window_days: List[int]) -> List[BenchPoint]:
+    """`sql` = template com marcadores; janelas recortam cs e os CTEs de checks (período + lookback)."""
+    points = [BenchPoint("sample", n, render_enrichment(sql, ScopeParams(sample_rows=n))) for n in sorted(sample_rows)]
+    today = date.today()
+    points += [
+        BenchPoint("window", d, render_enrichment(sql, ScopeParams(period_start=today - timedelta(days=int(d)))))
+        for d in sorted(window_days)
+    ]
+    return points
+
+
+def ensure_history_table(cur, table: str) -> None:
+    cols = ",\n  ".join(f"{c} {t}" for c, t in HISTORY_COLS)
+    cur.execute(f"CREATE TABLE IF NOT EXISTS {table} (\n  {cols}\n)")
+
+
+def make_cold(cur) -> None:
+    """Suspende e retoma o warehouse atual (descarta o cache local de disco). Exige OPERATE no warehouse."""
+    cur.execute("SELECT CURRENT_WAREHOUSE()")
+    (wh,) = cur.fetchone()
+    if not wh:
+        raise SystemExit("--cold: sessão sem warehouse corrente.")
+    try:
+        cur.execute(f"ALTER WAREHOUSE {wh} SUSPEND")
+    except ProgrammingError:
+        pass  # já suspenso
+    cur.execute(f"ALTER WAREHOUSE {wh} RESUME IF SUSPENDED")
+
+
+def run_point_monolithic(cur, point: BenchPoint, bench_table: str) -> List[tuple[str, Optional[str], float]]:
+    tag_query(cur, step="benchmark", point=point.label, stage="total")
+    t0 = time.time()
+    cur.execute(f"CREATE OR REPLACE TRANSIENT TABLE {bench_table} AS {point.sql}")
+    return [("total", cur.sfqid, time.time() - t0)]
+
+
+def run_point_staged(conn, point: BenchPoint, bench_table: str) -> List[tuple[str, Optional[str], float]]:
+    """Estágios em série (medição limpa por CTE) + montagem; `total` = wall do ponto inteiro."""
+    t0 = time.time()
+    stages, final_sql, _ = plan_stages(point.sql, bench_table, STAGES)
+    run_stage_graph(conn, stages, max_concurrency=1, max_retries=0, poll_seconds=1.0)
+    failed = [s.name for s in stages if s.status != "done"]
+    if failed:
+        raise SystemExit(f"Benchmark {point.label}: estágios com falha: {', '.join(failed)}")
+    cur = conn.cursor()
+    tag_query(cur, step="benchmark", point=point.label, stage="assemble")
+    t_final = time.time()
+    cur.execute(f"CREATE OR REPLACE TRANSIENT TABLE {bench_table} AS\n{final_sql}")
+    out = [(s.name, s.query_id, s.elapsed) for s in stages]
+    out.append(("assemble", cur.sfqid, time.time() - t_final))
+    for s in stages:
+        cur.execute(f"DROP TABLE IF EXISTS {s.table}")
+    out.append(("total", None, time.time() - t0))
+    return out
+
+
+def collect_records(
+    cur,
+    runs: List[tuple[str, Optional[str], float]],
+    base: Dict[str, object],
+    since: float,
+) -> List[Dict[str, object]]:
+    metrics = query_metrics(cur, [q for _, q, _ in runs if q], since=since)
+    records = []
+    for stage, qid, wall in runs:
+        m = metrics.get(qid or "", {})
+        records.append(
+            {
+                **base,
+                "stage": stage,
+                "query_id": qid,
+                "wall_s": round(wall, 3),
+                "elapsed_s": (m.get("total_elapsed_time") or 0) / 1000 if m else None,
+                "queued_s": ((m.get("queued_provisioning_time") or 0) + (m.get("queued_overload_time") or 0)) / 1000
+                if m
+                else None,
+                "bytes_scanned": m.get("bytes_scanned"),
+                "partitions_scanned": m.get("partitions_scanned"),
+                "partitions_total": m.get("partitions_total"),
+                "spill_local_bytes": m.get("bytes_spilled_to_local_storage"),
+                "spill_remote_bytes": m.get("bytes_spilled_to_remote_storage"),
+                "warehouse_size": m.get("warehouse_size"),
+            }
+        )
+    total = [r for r in records if r["stage"] == "total" and r["query_id"] is None]
+    if total:
+        # staged: métricas do total = soma dos estágios + montagem
+        parts = [r for r in records if r["stage"] != "total"]
+        for k in ["elapsed_s", "queued_s", "bytes_scanned", "partitions_scanned", "partitions_total", "spill_local_bytes", "spill_remote_bytes"]:
+            total[0][k] = sum((r.get(k) or 0) for r in parts)
+    return records
+
+
+def insert_history(cur, table: str, records: List[Dict[str, object]]) -> None:
+    names = [c for c, _ in HISTORY_COLS]
+    placeholders = ", ".join(["%s"] * len(names))
+    cur.executemany(
+        f"INSERT INTO {table} ({', '.join(names)}) VALUES ({placeholders})",
+        [tuple(r.get(c) for c in names) for r in records],
+    )
+
+
+def fit_scaling(df: pd.DataFrame, n_full: int) -> pd.DataFrame:
+    """Ajuste log-log por (estágio, métrica): métrica ≈ a * linhas^b; b > 1 = superlinear."""
+    out = []
+    spill = df["spill_local_bytes"].fillna(0) + df["spill_remote_bytes"].fillna(0)
+    df = df.assign(spill_bytes=spill)
+    for stage, g in df[df["cache_state"] == "warm"].groupby("stage"):
+        for metric in ["elapsed_s", "bytes_scanned", "spill_bytes"]:
+            pts = g.groupby("rows_out")[metric].median().reset_index()
+            pts = pts[(pts["rows_out"] > 0) & (pts[metric] > 0)]
+            if len(pts) < 2:
+                continue
+            x, y = np.log(pts["rows_out"].astype(float)), np.log(pts[metric].astype(float))
+            b, log_a = np.polyfit(x, y, 1)
+            pred = np.polyval([b, log_a], x)
+            ss_res = float(((y - pred) ** 2).sum())
+            ss_tot = float(((y - y.mean()) ** 2).sum())
+            out.append(
+                {
+                    "stage": stage,
+                    "metric": metric,
+                    "exponent_b": round(float(b), 3),
+                    "r2": round(1 - ss_res / ss_tot, 3) if ss_tot > 0 else None,
+                    "n_points": len(pts),
+                    "projected_full": float(np.exp(log_a) * float(n_full) ** b),
+                }
+            )
+    return pd.DataFrame(out)
+
+
+def detect_regressions(
+    cur,
+    table: str,
+    current: pd.DataFrame,
+    sql_hash: str,
+    tolerance: float,
+    min_seconds: float,
+) -> pd.DataFrame:
+    """
+    Compara a mediana de elapsed por (ponto, estágio, cache) com a versão de SQL imediatamente anterior
+    (último sql_hash diferente já medido no mesmo ponto). Regressão = mais lento que (1 + tolerance)
+    e por mais de `min_seconds`.
+    """
+    cur.execute(
+        f"""
+        SELECT point_kind, point_value, stage, cache_state, sql_hash, benchmarked_at, elapsed_s, bytes_scanned
+        FROM {table}
+        WHERE sql_hash <> '{sql_hash}'
+          AND benchmarked_at >= DATEADD('day', -180, CURRENT_TIMESTAMP())
+        """
+    )
+    prev = pd.DataFrame(cur.fetchall(), columns=[d[0].lower() for d in cur.description])
+    if prev.empty:
+        return pd.DataFrame()
+
+    keys = ["point_kind", "point_value", "stage", "cache_state"]
+    latest = prev.sort_values("benchmarked_at").groupby(keys)["sql_hash"].last().rename("prev_hash").reset_index()
+    prev = prev.merge(latest, on=keys)
+    prev = prev[prev["sql_hash"] == prev["prev_hash"]]
+    base = prev.groupby(keys + ["prev_hash"]).agg(prev_elapsed_s=("elapsed_s", "median"), prev_bytes=("bytes_scanned", "median"))
+    cur_med = current.groupby(keys).agg(elapsed_s=("elapsed_s", "median"), bytes_scanned=("bytes_scanned", "median"))
+    cmp = cur_med.join(base.reset_index("prev_hash"), how="inner").reset_index()
+    cmp["ratio"] = cmp["elapsed_s"] / cmp["prev_elapsed_s"]
+    cmp["regression"] = (cmp["ratio"] > 1 + tolerance) & ((cmp["elapsed_s"] - cmp["prev_elapsed_s"]) > min_seconds)
+    return cmp.sort_values("ratio", ascending=False)
+
+
+def main() -> int:
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--schema", default="CAPIM_DATA_DEV.POSSANI_SANDBOX", help="Schema (db.schema) das tabelas de benchmark")
+    ap.add_argument("--sample-rows", default="5000,20000,80000", help="Tamanhos de amostra (SAMPLE N ROWS), separados por vírgula")
+    ap.add_argument("--window-days", default="", help="Janelas de created_at (últimos N dias), separadas por vírgula")
+    ap.add_argument("--repeats", type=int, default=2, help="Repetições por ponto")
+    ap.add_argument("--cold", action="store_true", help="Suspende/retoma o warehouse antes da 1ª repetição de cada ponto")
+    ap.add_argument("--per-stage", action="store_true", help="Mede cada estágio (CTE de STAGES) em vez do CTAS monolítico")
+    ap.add_argument(
+        "--history-table",
+        default="CAPIM_DATA_DEV.POSSANI_SANDBOX.ENRICHMENT_BENCHMARK_HISTORY",
+        help="Tabela (db.schema.tabela) do histórico de benchmarks",
+    )
+    ap.add_argument("--tolerance", type=float, default=0.2, help="Regressão: mediana mais lenta que (1 + tolerance) x versão anterior")
+    ap.add_argument("--min-seconds", type=float, default=2.0, help="Regressão: diferença mínima absoluta (s)")
+    add_profile_args(ap)
+    args = ap.parse_args()
+    init_profiler("benchmark_enrichment", enabled=not args.no_profile)
+
+    try:
+        with pooled_connection() as conn:
+            try:
+                return benchmark(args, conn)
+            finally:
+                report_profile(conn.cursor())
+    except ConnectionError:
+        raise SystemExit("Falha ao conectar no Snowflake.")
+
+
+def benchmark(args, conn) -> int:
+    sql = read_enrichment_sql()
+    sql_hash = sql_version(sql)
+    points = build_points(sql, _int_list(args.sample_rows), _int_list(args.window_days))
+    if not points:
+        raise SystemExit("Nenhum ponto de benchmark (use --sample-rows e/ou --window-days).")
+    run_id = uuid.uuid4().hex[:12]
+    bench_table = f"{args.schema}.ENRICHMENT_BENCHMARK_{run_id.upper()}"
+    git_rev = _git_rev()
+
+    cur = conn.cursor()
+    cur.execute("ALTER SESSION SET USE_CACHED_RESULT = FALSE")
+    ensure_history_table(cur, args.history_table)
+    cur.execute("SELECT COUNT(*) FROM CAPIM_DATA.CAPIM_PRODUCTION.CREDIT_SIMULATIONS")
+    (n_full,) = cur.fetchone()
+    print(f"Benchmark run_id={run_id} sql_hash={sql_hash} git={git_rev}; {len(points)} pontos x {args.repeats} repetições")
+
+    records: List[Dict[str, object]] = []
+    try:
+        for point in points:
+            for rep in range(1, max(1, int(args.repeats)) + 1):
+                cold = args.cold and rep == 1
+                if cold:
+                    make_cold(cur)
+                since = time.time()
+                if args.per_stage:
+                    runs = run_point_staged(conn, point, bench_table)
+                else:
+                    runs = run_point_monolithic(cur, point, bench_table)
+                cur.execute(f"SELECT COUNT(*) FROM {bench_table}")
+                (rows_out,) = cur.fetchone()
+                base = {
+                    "run_id": run_id,
+                    "benchmarked_at": time.strftime("%Y-%m-%d %H:%M:%S"),
+                    "sql_hash": sql_hash,
+                    "git_rev": git_rev,
+                    "point_kind": point.kind,
+                    "point_value": point.value,
+                    "rep": rep,
+                    "cache_state": "cold" if cold else "warm",
+                    "rows_out": int(rows_out),
+                }
+                recs = collect_records(cur, runs, base, since=since)
+                records.extend(recs)
+                total = next(r for r in recs if r["stage"] == "total")
+                print(
+                    f"  {point.label:<16} rep={rep} {base['cache_state']:<4} linhas={int(rows_out):>9} "
+                    f"wall={round(total['wall_s'], 1):>7}s GB={round((total.get('bytes_scanned') or 0) / 1024**3, 2)}"
+                )
+    finally:
+        cur.execute(f"DROP TABLE IF EXISTS {bench_table}")
+        if records:
+            insert_history(cur, args.history_table, records)
+            print(f"\n{len(records)} medições gravadas em {args.history_table}")
+
+    df = pd.DataFrame(records)
+    fit = fit_scaling(df, int(n_full))
+    if not fit.empty:
+        print(f"\nCurva de escala (log-log, warm; projeção para {int(n_full)} linhas):")
+        print(fit.to_string(index=False))
+
+    reg = detect_regressions(cur, args.history_table, df, sql_hash, args.tolerance, args.min_seconds)
+    if reg.empty:
+        print("\nSem versão anterior do SQL medida nos mesmos pontos: nada a comparar.")
+        return 0
+    print("\nComparação com a versão anterior do SQL (mediana de elapsed):")
+    print(reg.to_string(index=False))
+    flagged = reg[reg["regression"]]
+    if not flagged.empty:
+        print(f"\nREGRESSÃO em {len(flagged)} ponto(s)/estágio(s):", ", ".join(sorted(set(flagged["stage"]))))
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,350 @@
+"""
+Exporta as tabelas enriched (C1 / CS / PA) para Parquet local particionado por `c1_entity_type` e mês.
+
+Motivação:
+  - tirar `CREDIT_SIMULATIONS_ENRICHED_BORROWER` / `C1_ENRICHED_BORROWER` para modelagem via
+    `run_query("SELECT * ...")` passa tudo por um cursor e um DataFrame: lento e estoura memória.
+
+Como funciona (`--method unload`, padrão):
+  - fingerprint por partição no Snowflake: `COUNT(*)` + `HASH_AGG(<colunas projetadas>)` agrupado por
+    (`c1_entity_type`, `TO_CHAR(ts, 'YYYY-MM')`), dentro do recorte `--start/--end`;
+  - compara com `<out>/_manifest.json` da exportação anterior: só partições novas/alteradas são
+    descarregadas (mudar colunas/recorte/tabela invalida tudo); partições locais que sumiram do recorte são apagadas;
+  - `COPY INTO @stage/<prefixo>/ ... PARTITION BY ('c1_entity_type=..' || '/month=..')` para Parquet
+    (SNAPPY, `HEADER = TRUE`) das partições alteradas: o warehouse escreve os arquivos em paralelo;
+  - `GET` por partição em paralelo (`--workers` conexões do pool, `PARALLEL` por GET) para
+    `<out>/.incoming/<partição>/`; a partição só substitui a anterior depois de baixada inteira;
+  - `REMOVE @stage/<prefixo>/` ao final. Memória do cliente: só buffers de transferência.
+
+`--method stream`: sem stage (e único modo no backend local): cada partição alterada vira um SELECT lido em
+batches Arrow (`src/utils/result_stream.py`) e escrito em Parquet; mais lento, memória = 1 batch por worker.
+
+Leitura do resultado (hive):
+  pyarrow.dataset.dataset("outputs/exports/c1", format="parquet", partitioning="hive")
+
+Uso:
+  python -m src.cli.export_enriched --table c1 --start 2025-01-01 --end 2025-07-01
+  python -m src.cli.export_enriched --table cs --columns credit_simulation_id,clinic_id,cs_created_at --workers 8
+  python -m src.cli.export_enriched --table pa --method stream --out-dir outputs/exports/pa_stream
+"""
+
+from __future__ import annotations
+
+import argparse
+import hashlib
+import json
+import shutil
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from dataclasses import dataclass
+from datetime import date, datetime
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from src.utils.local_engine import local_backend_enabled
+from src.utils.query_profile import add_profile_args, init_profiler, report_profile, tag_query
+from src.utils.result_stream import iter_arrow_batches, result_chunk_size, write_parquet_stream
+from src.utils.snowflake_connection import pooled_connection, reserve_pool_workers
+
+MANIFEST = "_manifest.json"
+INCOMING = ".incoming"
+
+
+@dataclass(frozen=True)
+class ExportSource:
+    table: str
+    ts_column: str
+    entity_expr: str  # coluna (ou literal) que vira o nível `c1_entity_type=` do layout
+
+
+SOURCES: Dict[str, ExportSource] = {
+    "c1": ExportSource("C1_ENRICHED_BORROWER", "c1_created_at", "c1_entity_type"),
+    "cs": ExportSource("CREDIT_SIMULATIONS_ENRICHED_BORROWER", "cs_created_at", "'credit_simulation'"),
+    "pa": ExportSource("PRE_ANALYSES_ENRICHED_BORROWER", "c1_created_at", "c1_entity_type"),
+}
+
+
+def month_expr(ts_column: str) -> str:
+    return f"COALESCE(TO_CHAR({ts_column}, 'YYYY-MM'), 'null')"
+
+
+def partition_key(entity: str, month: str) -> str:
+    return f"c1_entity_type={entity}/month={month}"
+
+
+def range_filter(src: ExportSource, start: Optional[date], end: Optional[date]) -> str:
+    """Recorte em `ts` (início inclusivo, fim exclusivo), em predicados que podam micro-partições."""
+    conds = []
+    if start is not None:
+        conds.append(f"{src.ts_column} >= '{start.isoformat()}'::TIMESTAMP_NTZ")
+    if end is not None:
+        conds.append(f"{src.ts_column} < '{end.isoformat()}'::TIMESTAMP_NTZ")
+    return " AND ".join(conds) or "TRUE"
+
+
+def partitions_filter(src: ExportSource, keys: List[str]) -> str:
+    """Restringe às partições (entidade, mês) informadas."""
+    pairs = []
+    for key in sorted(keys):
+        entity, month = (p.split("=", 1)[1] for p in key.split("/"))
+        pairs.append(f"('{entity}', '{month}')")
+    return f"({src.entity_expr}, {month_expr(src.ts_column)}) IN ({', '.join(pairs)})"
+
+
+def resolve_columns(cur, full_table: str, requested: Optional[str], src: ExportSource) -> List[str]:
+    """Valida a projeção contra a tabela; `ts` e a entidade entram sempre (o layout depende delas)."""
+    cur.execute(f"SELECT * FROM {full_table} LIMIT 0")
+    available = [d[0].lower() for d in cur.description]
+    if not requested:
+        return available
+    cols = [c.strip().lower() for c in requested.split(",") if c.strip()]
+    missing = [c for c in cols if c not in available]
+    if missing:
+        raise SystemExit(f"Colunas inexistentes em {full_table}: {', '.join(missing)}")
+    for extra in (src.ts_column, src.entity_expr):
+        if extra in available and extra not in cols:
+            cols.append(extra)
+    return cols
+
+
+def fetch_fingerprints(cur, full_table: str, src: ExportSource, cols: List[str], where: str) -> Dict[str, Dict[str, object]]:
+    tag_query(cur, step="fingerprint")
+    cur.execute(
+        f"""
+        SELECT {src.entity_expr} AS entity, {month_expr(src.ts_column)} AS month,
+               COUNT(*) AS n, HASH_AGG({', '.join(cols)}) AS fp
+        FROM {full_table}
+        WHERE {where}
+        GROUP BY 1, 2
+        """
+    )
+    return {
+        partition_key(entity, month): {"rows": int(n), "fingerprint": str(fp)}
+        for entity, month, n, fp in cur.fetchall()
+    }
+
+
+def signature(full_table: str, cols: List[str], start: Optional[date], end: Optional[date]) -> str:
+    payload = json.dumps([full_table.upper(), cols, str(start), str(end)])
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()[:16]
+
+
+class Manifest:
+    """`<out>/_manifest.json`: assinatura da exportação + fingerprint/linhas/arquivos por partição (thread-safe)."""
+
+    def __init__(self, out_dir: Path, sig: str):
+        self.path = out_dir / MANIFEST
+        self._lock = threading.Lock()
+        previous = json.loads(self.path.read_text(encoding="utf-8")) if self.path.exists() else {}
+        self.reused = previous.get("signature") == sig
+        self.data = {"signature": sig, "partitions": previous.get("partitions", {}) if self.reused else {}}
+
+    def partitions(self) -> Dict[str, Dict[str, object]]:
+        return self.data["partitions"]
+
+    def update(self, **fields) -> None:
+        with self._lock:
+            self.data.update(fields)
+            self._save()
+
+    def set_partition(self, key: str, entry: Optional[Dict[str, object]]) -> None:
+        with self._lock:
+            if entry is None:
+                self.data["partitions"].pop(key, None)
+            else:
+                self.data["partitions"][key] = entry
+            self._save()
+
+    def _save(self) -> None:
+        tmp = self.path.with_suffix(".tmp")
+        tmp.write_text(json.dumps(self.data, indent=2, ensure_ascii=False), encoding="utf-8")
+        tmp.replace(self.path)
+
+
+def install_partition(out_dir: Path, key: str) -> tuple[int, int]:
+    """Troca `<out>/<partição>` pela versão completa em `<out>/.incoming/<partição>`. Retorna (arquivos, bytes)."""
+    incoming = out_dir / INCOMING / key
+    target = out_dir / key
+    if target.exists():
+        shutil.rmtree(target)
+    target.parent.mkdir(parents=True, exist_ok=True)
+    incoming.replace(target)
+    files = [f for f in target.rglob("*") if f.is_file()]
+    return len(files), sum(f.stat().st_size for f in files)
+
+
+def unload(cur, full_table: str, src: ExportSource, cols: List[str], where: str, stage_path: str, max_file_mb: int) -> None:
+    tag_query(cur, step="unload")
+    cur.execute(
+        f"""
+        COPY INTO {stage_path}/
+        FROM (SELECT {', '.join(cols)} FROM {full_table} WHERE {where})
+        PARTITION BY ('c1_entity_type=' || {src.entity_expr} || '/month=' || {month_expr(src.ts_column)})
+        FILE_FORMAT = (TYPE = PARQUET COMPRESSION = SNAPPY)
+        HEADER = TRUE
+        MAX_FILE_SIZE = {int(max_file_mb) * 1024 * 1024}
+        """
+    )
+    cur.fetchall()
+
+
+def download_partition(stage_path: str, key: str, out_dir: Path, parallel: int) -> None:
+    incoming = out_dir / INCOMING / key
+    if incoming.exists():
+        shutil.rmtree(incoming)
+    incoming.mkdir(parents=True)
+    with pooled_connection() as conn:
+        cur = conn.cursor()
+        try:
+            tag_query(cur, step="get", partition=key)
+            cur.execute(f"GET '{stage_path}/{key}/' '{incoming.resolve().as_uri()}/' PARALLEL = {int(parallel)}")
+            cur.fetchall()
+        finally:
+            cur.close()
+
+
+def stream_partition(full_table: str, src: ExportSource, cols: List[str], where: str, key: str, out_dir: Path, chunk_size_mb: Optional[int]) -> None:
+    incoming = out_dir / INCOMING / key
+    if incoming.exists():
+        shutil.rmtree(incoming)
+    with pooled_connection() as conn:
+        cur = conn.cursor()
+        try:
+            with result_chunk_size(cur, chunk_size_mb):
+                tag_query(cur, step="stream", partition=key)
+                cur.execute(
+                    f"SELECT {', '.join(cols)} FROM {full_table} WHERE {where} AND {partitions_filter(src, [key])}"
+                )
+                write_parquet_stream(iter_arrow_batches(cur, max_batch_rows=100_000), incoming)
+        finally:
+            cur.close()
+    incoming.mkdir(parents=True, exist_ok=True)  # partição vazia (ex.: linhas removidas entre fingerprint e SELECT)
+
+
+def run_parallel(keys: List[str], workers: int, fn, manifest: Manifest, fingerprints, out_dir: Path) -> None:
+    t0 = time.time()
+    reserve_pool_workers(min(int(workers), len(keys)))
+    with ThreadPoolExecutor(max_workers=max(1, min(int(workers), len(keys)))) as ex:
+        futures = {ex.submit(fn, key): key for key in keys}
+        for done, fut in enumerate(as_completed(futures), start=1):
+            key = futures[fut]
+            fut.result()
+            n_files, n_bytes = install_partition(out_dir, key)
+            manifest.set_partition(key, {
+                **fingerprints[key],
+                "files": n_files,
+                "bytes": n_bytes,
+                "exported_at": datetime.now().isoformat(timespec="seconds"),
+            })
+            print(f"  [{done}/{len(keys)}] {key}: {fingerprints[key]['rows']} linhas, "
+                  f"{n_files} arquivos, {n_bytes / 1e6:.1f} MB ({time.time() - t0:.1f}s)")
+
+
+def parse_day(value: str) -> date:
+    return date.fromisoformat(value)
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--table", choices=sorted(SOURCES), default="c1", help="c1 (view C1), cs ou pa (tabelas enriched)")
+    ap.add_argument("--schema", default="CAPIM_DATA_DEV.POSSANI_SANDBOX", help="Schema das tabelas (db.schema)")
+    ap.add_argument("--columns", default=None, help="Projeção (lista separada por vírgula); padrão: todas")
+    ap.add_argument("--start", type=parse_day, default=None, help="Início do recorte em ts (YYYY-MM-DD, inclusivo)")
+    ap.add_argument("--end", type=parse_day, default=None, help="Fim do recorte em ts (YYYY-MM-DD, exclusivo)")
+    ap.add_argument("--out-dir", default=None, help="Diretório de saída (padrão: outputs/exports/<table>)")
+    ap.add_argument("--method", choices=("unload", "stream"), default="unload")
+    ap.add_argument("--stage", default="CAPIM_DATA_DEV.POSSANI_SANDBOX.C1_EXPORT_STAGE",
+                    help="Stage interno (criado se não existir); cada run usa um prefixo próprio")
+    ap.add_argument("--workers", type=int, default=4, help="Partições baixadas/lidas em paralelo (conexões do pool)")
+    ap.add_argument("--get-parallel", type=int, default=8, help="Threads de download por GET")
+    ap.add_argument("--max-file-mb", type=int, default=256, help="MAX_FILE_SIZE do COPY INTO")
+    ap.add_argument("--chunk-size-mb", type=int, default=None, help="CLIENT_RESULT_CHUNK_SIZE (só --method stream)")
+    ap.add_argument("--force", action="store_true", help="Reexporta todas as partições (ignora o manifest)")
+    add_profile_args(ap)
+    args = ap.parse_args()
+
+    if args.method == "unload" and local_backend_enabled():
+        print("Backend local: sem stages/GET; usando --method stream.")
+        args.method = "stream"
+
+    src = SOURCES[args.table]
+    full_table = f"{args.schema}.{src.table}"
+    out_dir = Path(args.out_dir or f"outputs/exports/{args.table}")
+    out_dir.mkdir(parents=True, exist_ok=True)
+    where = range_filter(src, args.start, args.end)
+    init_profiler("export_enriched", enabled=not args.no_profile)
+
+    try:
+        with pooled_connection() as conn:
+            cur = conn.cursor()
+            try:
+                export(args, cur, src, full_table, out_dir, where)
+            finally:
+                report_profile(conn.cursor())
+    except ConnectionError:
+        raise SystemExit("Falha ao conectar no Snowflake.")
+
+
+def export(args, cur, src: ExportSource, full_table: str, out_dir: Path, where: str) -> None:
+    t0 = time.time()
+    cols = resolve_columns(cur, full_table, args.columns, src)
+    manifest = Manifest(out_dir, signature(full_table, cols, args.start, args.end))
+    if not manifest.reused and manifest.path.exists():
+        print("Tabela/colunas/recorte mudaram desde a última exportação: reexportando tudo.")
+    manifest.update(table=full_table, columns=cols, start=str(args.start), end=str(args.end), method=args.method)
+
+    fingerprints = fetch_fingerprints(cur, full_table, src, cols, where)
+    previous = manifest.partitions()
+    changed = sorted(
+        key for key, fp in fingerprints.items()
+        if args.force or previous.get(key, {}).get("fingerprint") != fp["fingerprint"] or not (out_dir / key).exists()
+    )
+    stale = sorted(set(previous) - set(fingerprints))
+    print(f"{full_table}: {len(fingerprints)} partições, {sum(f['rows'] for f in fingerprints.values())} linhas; "
+          f"{len(changed)} alteradas, {len(stale)} removidas ({len(cols)} colunas, método {args.method})")
+
+    for key in stale:
+        shutil.rmtree(out_dir / key, ignore_errors=True)
+        manifest.set_partition(key, None)
+    # diretórios de partição órfãos (sem entrada no manifest), ex.: export anterior com outra assinatura
+    for path in out_dir.glob("c1_entity_type=*/month=*"):
+        key = path.relative_to(out_dir).as_posix()
+        if key not in fingerprints:
+            shutil.rmtree(path, ignore_errors=True)
+
+    if changed:
+        if args.method == "unload":
+            stage_path = f"@{args.stage}/export_{args.table}_{uuid.uuid4().hex[:12]}"
+            cur.execute(f"CREATE STAGE IF NOT EXISTS {args.stage} FILE_FORMAT = (TYPE = PARQUET)")
+            try:
+                t_unload = time.time()
+                scope = where if len(changed) == len(fingerprints) else f"{where} AND {partitions_filter(src, changed)}"
+                unload(cur, full_table, src, cols, scope, stage_path, args.max_file_mb)
+                print(f"COPY INTO {stage_path}: {time.time() - t_unload:.1f}s")
+                run_parallel(
+                    changed, args.workers,
+                    lambda key: download_partition(stage_path, key, out_dir, args.get_parallel),
+                    manifest, fingerprints, out_dir,
+                )
+            finally:
+                cur.execute(f"REMOVE {stage_path}/")
+        else:
+            run_parallel(
+                changed, args.workers,
+                lambda key: stream_partition(full_table, src, cols, where, key, out_dir, args.chunk_size_mb),
+                manifest, fingerprints, out_dir,
+            )
+    shutil.rmtree(out_dir / INCOMING, ignore_errors=True)
+
+    parts = manifest.partitions()
+    size_mb = sum(int(p.get("bytes", 0)) for p in parts.values()) / 1e6
+    print("\n" + "=" * 90)
+    print(f"Exportação em {out_dir}: {len(parts)} partições, {sum(int(p['rows']) for p in parts.values())} linhas, "
+          f"{size_mb:,.1f} MB")
+    print(f"Tempo total (s) = {time.time() - t0:.1f}")
+
+
+if __name__ == "__main__":
+    main()
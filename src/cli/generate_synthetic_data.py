@@ -0,0 +1,143 @@
+"""
+Gera dados sintéticos do funil (CS, checks, crivo, PRE_ANALYSES + fontes do PA legado) em Parquet particionado, com vários processos.
+
+Para teste de carga dos range joins CPF+tempo e das janelas dos enrichments a volumes acima do atual
+(detalhes das distribuições em `src/utils/synthetic_data.py`).
+
+O que faz:
+  - divide pessoas e simulações em chunks de `--chunk-rows` ids; cada chunk roda num processo
+    (`--workers`) e é gravado direto em `<out>/<tabela>/created_month=YYYY-MM/part-*.parquet` (memória = 1 chunk/processo);
+  - grava `<out>/manifest.json` (configuração + linhas por tabela) e `<out>/load_local.sql`, fixture do backend
+    local que cria as tabelas de origem a partir dos Parquets:
+
+      SNOWFLAKE_BACKEND=local SNOWFLAKE_LOCAL_FIXTURES=<out> SNOWFLAKE_LOCAL_DB=<out>/c1.duckdb \\
+        python -m src.cli.materialize_enriched_credit_simulations_borrower
+    (depois, no mesmo banco, `materialize_enriched_pre_analyses_borrower`: PA legado com SOURCE_PRE_ANALYSIS_API,
+    PACC, tabelas dbt por hash_cpf e N8N).
+
+Uso:
+  python -m src.cli.generate_synthetic_data --simulations 5000000 --workers 8
+  python -m src.cli.generate_synthetic_data --simulations 200000 --cpf-skew 2.5 --check-reuse-frac 0.3 \\
+    --source-mix serasa=0.7,boa_vista=0.1,bacen=0.1,none=0.1 --out-dir outputs/synthetic/skew
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from dataclasses import asdict
+from pathlib import Path
+from typing import Dict
+
+from src.utils.synthetic_data import SOURCES, SyntheticConfig, generate_chunk, local_load_sql, plan_chunks
+
+
+def parse_mix(value: str) -> Dict[str, float]:
+    mix: Dict[str, float] = {}
+    for item in (value or "").split(","):
+        if not item.strip():
+            continue
+        key, _, weight = item.partition("=")
+        key = key.strip()
+        if key not in SOURCES:
+            raise argparse.ArgumentTypeError(f"fonte desconhecida em --source-mix: {key} (use {', '.join(SOURCES)})")
+        mix[key] = float(weight)
+    if not mix or sum(mix.values()) <= 0:
+        raise argparse.ArgumentTypeError("--source-mix precisa de ao menos um peso positivo")
+    return mix
+
+
+def main() -> None:
+    defaults = SyntheticConfig()
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--simulations", type=int, default=defaults.simulations, help="Número de credit_simulations")
+    ap.add_argument("--start-date", default=defaults.start_date, help="Início do período (YYYY-MM-DD)")
+    ap.add_argument("--months", type=int, default=defaults.months, help="Meses cobertos a partir de --start-date")
+    ap.add_argument("--seed", type=int, default=defaults.seed)
+    ap.add_argument("--cpf-pool-ratio", type=float, default=defaults.cpf_pool_ratio,
+                    help="Pessoas distintas por simulação (menor = mais reuso de CPF)")
+    ap.add_argument("--cpf-skew", type=float, default=defaults.cpf_skew,
+                    help="Concentração do reuso de CPF/clínica (1 = uniforme; maior = cauda pesada)")
+    ap.add_argument("--clinics", type=int, default=defaults.clinics)
+    ap.add_argument("--minor-frac", type=float, default=defaults.minor_frac, help="Fração de pacientes menores de idade")
+    ap.add_argument("--source-mix", type=parse_mix, default=defaults.source_mix,
+                    help="Pesos de bureau por simulação: serasa=..,boa_vista=..,bacen=..,none=..")
+    ap.add_argument("--check-delay-median-min", type=float, default=defaults.check_delay_median_min,
+                    help="Mediana (min) da distância check <-> cs_created_at (log-normal)")
+    ap.add_argument("--check-delay-sigma", type=float, default=defaults.check_delay_sigma,
+                    help="Sigma da log-normal do atraso (maior = mais checks fora da janela de 1h)")
+    ap.add_argument("--check-after-frac", type=float, default=defaults.check_after_frac,
+                    help="Fração de checks posteriores à simulação")
+    ap.add_argument("--check-reuse-frac", type=float, default=defaults.check_reuse_frac,
+                    help="Fração de simulações sem check novo (dependem de check antigo do CPF)")
+    ap.add_argument("--income-only-frac", type=float, default=defaults.income_only_frac)
+    ap.add_argument("--crivo-rate", type=float, default=defaults.crivo_rate)
+    ap.add_argument("--crivo-unlinked-frac", type=float, default=defaults.crivo_unlinked_frac,
+                    help="Fração de crivo checks sem engineable_id (só CPF+tempo)")
+    ap.add_argument("--pa-legacy-frac", type=float, default=defaults.pa_legacy_frac,
+                    help="Fração de simulações que também geram uma PRE_ANALYSES legado (type=pre_analysis)")
+    ap.add_argument("--pacc-frac", type=float, default=defaults.pacc_frac,
+                    help="Fração das PAs legado com linha em PRE_ANALYSIS_CREDIT_CHECK (PACC)")
+    ap.add_argument("--chunk-rows", type=int, default=100_000, help="Ids por chunk (pico de memória por processo)")
+    ap.add_argument("--workers", type=int, default=os.cpu_count() or 4, help="Processos geradores")
+    ap.add_argument("--out-dir", default="outputs/synthetic/default", help="Diretório de saída")
+    args = ap.parse_args()
+
+    cfg = SyntheticConfig(
+        simulations=args.simulations,
+        start_date=args.start_date,
+        months=args.months,
+        seed=args.seed,
+        cpf_pool_ratio=args.cpf_pool_ratio,
+        cpf_skew=args.cpf_skew,
+        clinics=args.clinics,
+        minor_frac=args.minor_frac,
+        source_mix=args.source_mix,
+        check_delay_median_min=args.check_delay_median_min,
+        check_delay_sigma=args.check_delay_sigma,
+        check_after_frac=args.check_after_frac,
+        check_reuse_frac=args.check_reuse_frac,
+        income_only_frac=args.income_only_frac,
+        crivo_rate=args.crivo_rate,
+        crivo_unlinked_frac=args.crivo_unlinked_frac,
+        pa_legacy_frac=args.pa_legacy_frac,
+        pacc_frac=args.pacc_frac,
+    )
+    out = Path(args.out_dir)
+    if out.exists() and any(out.iterdir()):
+        raise SystemExit(f"{out} já existe e não está vazio (use outro --out-dir).")
+    out.mkdir(parents=True, exist_ok=True)
+
+    tasks = plan_chunks(cfg, args.chunk_rows)
+    print(f"Gerando {cfg.simulations} simulações / {cfg.persons} pessoas em {len(tasks)} chunks, "
+          f"{args.workers} processos -> {out}")
+
+    t0 = time.time()
+    totals: Dict[str, int] = {}
+    with ProcessPoolExecutor(max_workers=max(1, min(int(args.workers), len(tasks)))) as ex:
+        futures = [ex.submit(generate_chunk, cfg, kind, lo, hi, chunk, str(out)) for kind, lo, hi, chunk in tasks]
+        for done, fut in enumerate(as_completed(futures), start=1):
+            for name, n in fut.result().items():
+                totals[name] = totals.get(name, 0) + n
+            if done % max(1, len(futures) // 10) == 0 or done == len(futures):
+                print(f"  {done}/{len(futures)} chunks ({time.time() - t0:.1f}s)")
+    elapsed = time.time() - t0
+
+    (out / "load_local.sql").write_text(local_load_sql(out), encoding="utf-8")
+    manifest = {"config": asdict(cfg), "rows": totals, "chunks": len(tasks), "elapsed_s": round(elapsed, 2)}
+    (out / "manifest.json").write_text(json.dumps(manifest, indent=2, ensure_ascii=False), encoding="utf-8")
+
+    size_mb = sum(f.stat().st_size for f in out.rglob("*.parquet")) / 1e6
+    print("\n" + "=" * 90)
+    for name, n in sorted(totals.items()):
+        print(f"  {name:<26} {n:>14,d} linhas")
+    print(f"Tempo total (s) = {elapsed:.1f} ({cfg.simulations / max(elapsed, 1e-9):,.0f} simulações/s)")
+    print(f"Parquet = {size_mb:,.1f} MB em {out}")
+    print(f"Backend local: SNOWFLAKE_BACKEND=local SNOWFLAKE_LOCAL_FIXTURES={out} SNOWFLAKE_LOCAL_DB={out}/c1.duckdb")
+
+
+if __name__ == "__main__":
+    main()
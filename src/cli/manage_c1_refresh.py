@@ -0,0 +1,236 @@
+"""
+Refresh gerenciado da camada C1: `C1_ENRICHED_BORROWER` sobre uma DYNAMIC TABLE incremental.
+
+Motivação:
+  - `queries/views/create_view_c1_enriched_borrower_v1.sql` define o C1 como VIEW: cada leitura de
+    dashboard refaz o UNION + re-projeção + lookup temporal do clinic score sobre as duas tabelas enriched.
+
+Como funciona:
+  - `deploy`: cria `C1_ENRICHED_BORROWER_DT` (DYNAMIC TABLE, `TARGET_LAG`, `REFRESH_MODE`) com o mesmo
+    SELECT da view oficial (lido do arquivo acima: fonte única da lógica) e troca a view
+    `C1_ENRICHED_BORROWER` por `SELECT * FROM C1_ENRICHED_BORROWER_DT` (consumidores não mudam);
+    habilita CHANGE_TRACKING nas tabelas base (exigido para refresh incremental);
+  - o Snowflake mantém a DT dentro do lag alvo: após um `--incremental` (MERGE) dos materializadores,
+    o refresh processa só as linhas alteradas;
+  - `status`: modo de refresh (e motivo, se caiu para FULL), lag atual/médio/máximo, % do tempo dentro do
+    alvo e últimos refreshes; `--max-lag-minutes` faz o comando sair com código 1 (monitoração/cron);
+  - `refresh`: refresh síncrono imediato (ex.: logo após uma materialização);
+  - `suspend` / `resume`; `revert`: volta para a view calculada na leitura (remove a DT).
+
+Atenção: CTAS full (`CREATE OR REPLACE TABLE`) das tabelas enriched recria a tabela base; o próximo
+refresh da DT é uma reinicialização (FULL). Rode `refresh` (ou `deploy`) depois de um full.
+
+Uso:
+  python -m src.cli.manage_c1_refresh deploy --target-lag "15 minutes"
+  python -m src.cli.manage_c1_refresh status --max-lag-minutes 60
+  python -m src.cli.manage_c1_refresh refresh
+"""
+
+from __future__ import annotations
+
+import argparse
+import os
+import re
+from typing import Dict, List
+
+from src.utils.query_cache import normalize_sql, referenced_tables
+from src.utils.query_profile import add_profile_args, init_profiler, report_profile, tag_query
+from src.utils.snowflake_connection import pooled_connection
+
+VIEW_SQL_PATH = "queries/views/create_view_c1_enriched_borrower_v1.sql"
+ACTIONS = ("deploy", "status", "refresh", "suspend", "resume", "revert")
+
+
+def read_view_sql(path: str = VIEW_SQL_PATH) -> str:
+    return open(path, "r", encoding="utf-8").read()
+
+
+def view_select(view_sql: str, view_name: str) -> str:
+    """SELECT da view oficial (tudo após `CREATE OR REPLACE VIEW <db.schema.view_name> AS`, sem o `;` final)."""
+    m = re.search(
+        r"CREATE\s+OR\s+REPLACE\s+VIEW\s+(?:[\w$]+\.){0,2}" + re.escape(view_name) + r"\s+AS\s+(.*)$",
+        view_sql,
+        flags=re.IGNORECASE | re.DOTALL,
+    )
+    if m is None:
+        raise SystemExit(f"Não encontrei `CREATE OR REPLACE VIEW {view_name} AS` em {VIEW_SQL_PATH}.")
+    return re.sub(r";\s*$", "", m.group(1).strip())
+
+
+def _rows_as_dicts(cur) -> List[Dict[str, object]]:
+    cols = [d[0].lower() for d in (cur.description or [])]
+    return [dict(zip(cols, r)) for r in cur.fetchall()]
+
+
+def ensure_change_tracking(cur, select_sql: str, schema: str) -> None:
+    """CHANGE_TRACKING nas tabelas base do schema de trabalho (fora dele, depende de grants do dono)."""
+    for fq in referenced_tables(normalize_sql(select_sql), {}):
+        try:
+            cur.execute(f"ALTER TABLE {fq} SET CHANGE_TRACKING = TRUE")
+            print("CHANGE_TRACKING ok:", fq)
+        except Exception as e:
+            level = "ERRO" if fq.startswith(schema.upper() + ".") else "aviso"
+            print(f"({level}: não habilitei CHANGE_TRACKING em {fq}: {str(e)[:160]})")
+
+
+def deploy(cur, args, view_fq: str, dt_fq: str) -> None:
+    select_sql = view_select(read_view_sql(), args.view)
+    ensure_change_tracking(cur, select_sql, args.schema)
+    warehouse = args.warehouse or os.getenv("SNOWFLAKE_WAREHOUSE")
+    if not warehouse:
+        raise SystemExit("Defina --warehouse (ou SNOWFLAKE_WAREHOUSE) para o refresh da dynamic table.")
+    print("CREATE DYNAMIC TABLE:", dt_fq, f"(TARGET_LAG='{args.target_lag}', REFRESH_MODE={args.refresh_mode})")
+    tag_query(cur, step="deploy_dynamic_table")
+    cur.execute(
+        f"""
+        CREATE OR REPLACE DYNAMIC TABLE {dt_fq}
+          TARGET_LAG = '{args.target_lag}'
+          WAREHOUSE = {warehouse}
+          REFRESH_MODE = {args.refresh_mode}
+          INITIALIZE = ON_CREATE
+        AS
+        {select_sql}
+        """
+    )
+    print("VIEW de consumo ->", view_fq)
+    cur.execute(f"CREATE OR REPLACE VIEW {view_fq} AS SELECT * FROM {dt_fq}")
+    show(cur, args, dt_fq)
+
+
+def show(cur, args, dt_fq: str) -> int:
+    db, schema, name = dt_fq.split(".")
+    cur.execute(f"SHOW DYNAMIC TABLES LIKE '{name}' IN SCHEMA {db}.{schema}")
+    rows = _rows_as_dicts(cur)
+    if not rows:
+        print(f"{dt_fq} não existe (modo view). Use `deploy`.")
+        return 1
+    dt = rows[0]
+    print("\n" + "=" * 90)
+    print(f"{dt_fq}")
+    print(f"  target_lag={dt.get('target_lag')} refresh_mode={dt.get('refresh_mode')} scheduling_state={dt.get('scheduling_state')}")
+    if dt.get("refresh_mode_reason"):
+        print(f"  refresh_mode_reason: {dt.get('refresh_mode_reason')}")
+
+    cur.execute(
+        f"""
+        SELECT
+          target_lag_sec,
+          mean_lag_sec,
+          maximum_lag_sec,
+          time_within_target_lag_ratio,
+          latest_data_timestamp,
+          last_completed_refresh_state,
+          DATEDIFF('second', latest_data_timestamp, CURRENT_TIMESTAMP()) AS current_lag_sec
+        FROM TABLE({db}.INFORMATION_SCHEMA.DYNAMIC_TABLES(NAME => '{dt_fq}'))
+        """
+    )
+    lag = (_rows_as_dicts(cur) or [{}])[0]
+    current_lag = lag.get("current_lag_sec")
+    print(
+        f"  lag atual (s)={current_lag} médio={lag.get('mean_lag_sec')} máximo={lag.get('maximum_lag_sec')} "
+        f"dentro do alvo={lag.get('time_within_target_lag_ratio')} último refresh={lag.get('last_completed_refresh_state')}"
+    )
+
+    cur.execute(
+        f"""
+        SELECT
+          refresh_start_time,
+          DATEDIFF('second', refresh_start_time, refresh_end_time) AS seconds,
+          state,
+          refresh_action,
+          refresh_trigger,
+          statistics:numInsertedRows::NUMBER AS inserted,
+          statistics:numDeletedRows::NUMBER  AS deleted,
+          state_message
+        FROM TABLE({db}.INFORMATION_SCHEMA.DYNAMIC_TABLE_REFRESH_HISTORY(NAME => '{dt_fq}', RESULT_LIMIT => {int(args.history)}))
+        ORDER BY refresh_start_time DESC
+        """
+    )
+    hist = _rows_as_dicts(cur)
+    if hist:
+        print(f"\n  {'início':<26} {'s':>6} {'estado':<10} {'ação':<13} {'gatilho':<10} {'+linhas':>9} {'-linhas':>9}")
+    for h in hist:
+        print(
+            f"  {str(h['refresh_start_time'])[:26]:<26} {str(h['seconds'] if h['seconds'] is not None else '-'):>6} "
+            f"{str(h['state']):<10} {str(h['refresh_action']):<13} {str(h['refresh_trigger']):<10} "
+            f"{str(h['inserted'] or 0):>9} {str(h['deleted'] or 0):>9}"
+        )
+        if h.get("state_message") and str(h["state"]).upper() == "FAILED":
+            print(f"    {str(h['state_message'])[:160]}")
+
+    if args.max_lag_minutes is not None and (current_lag is None or int(current_lag) > args.max_lag_minutes * 60):
+        print(f"\nALERTA: lag {current_lag}s acima do limite de {args.max_lag_minutes} min.")
+        return 1
+    return 0
+
+
+def refresh(cur, args, dt_fq: str) -> None:
+    select_sql = view_select(read_view_sql(), args.view)
+    ensure_change_tracking(cur, select_sql, args.schema)
+    print("Refresh síncrono:", dt_fq)
+    tag_query(cur, step="refresh_dynamic_table")
+    cur.execute(f"ALTER DYNAMIC TABLE {dt_fq} REFRESH")
+    for r in _rows_as_dicts(cur):
+        print(" ", r)
+    show(cur, args, dt_fq)
+
+
+def revert(conn, view_fq: str, dt_fq: str) -> None:
+    """Volta para a view calculada na leitura (arquivo oficial) e remove a dynamic table."""
+    cur = conn.cursor()
+    print("Recriando view oficial a partir de", VIEW_SQL_PATH)
+    tag_query(cur, file=VIEW_SQL_PATH)
+    for c in conn.execute_string(read_view_sql()):
+        c.close()
+    cur.execute(f"DROP DYNAMIC TABLE IF EXISTS {dt_fq}")
+    print("Removida:", dt_fq, "| view:", view_fq)
+
+
+def main() -> int:
+    ap = argparse.ArgumentParser()
+    ap.add_argument("action", choices=ACTIONS)
+    ap.add_argument("--schema", default="CAPIM_DATA_DEV.POSSANI_SANDBOX", help="Schema (db.schema) da view/DT.")
+    ap.add_argument("--view", default="C1_ENRICHED_BORROWER", help="View de consumo (nome sem schema).")
+    ap.add_argument("--dynamic-table", default=None, help="Nome da DT (padrão: <view>_DT).")
+    ap.add_argument("--target-lag", default="15 minutes", help="TARGET_LAG da DT (ex.: '15 minutes', '1 hour', 'DOWNSTREAM').")
+    ap.add_argument(
+        "--refresh-mode",
+        choices=["AUTO", "INCREMENTAL", "FULL"],
+        default="AUTO",
+        help="AUTO: o Snowflake escolhe (ver refresh_mode_reason no status); INCREMENTAL falha o deploy se não suportado.",
+    )
+    ap.add_argument("--warehouse", default=None, help="Warehouse do refresh (padrão: SNOWFLAKE_WAREHOUSE).")
+    ap.add_argument("--history", type=int, default=10, help="(status) Quantos refreshes recentes listar.")
+    ap.add_argument("--max-lag-minutes", type=float, default=None, help="(status) Sai com código 1 se o lag atual passar disso.")
+    add_profile_args(ap)
+    args = ap.parse_args()
+    init_profiler("manage_c1_refresh", enabled=not args.no_profile)
+
+    view_fq = f"{args.schema}.{args.view}"
+    dt_fq = f"{args.schema}.{args.dynamic_table or args.view + '_DT'}"
+    rc = 0
+    try:
+        with pooled_connection() as conn:
+            cur = conn.cursor()
+            try:
+                if args.action == "deploy":
+                    deploy(cur, args, view_fq, dt_fq)
+                elif args.action == "status":
+                    rc = show(cur, args, dt_fq)
+                elif args.action == "refresh":
+                    refresh(cur, args, dt_fq)
+                elif args.action in {"suspend", "resume"}:
+                    cur.execute(f"ALTER DYNAMIC TABLE {dt_fq} {args.action.upper()}")
+                    print(f"{dt_fq}: {args.action} ok")
+                elif args.action == "revert":
+                    revert(conn, view_fq, dt_fq)
+            finally:
+                if args.action != "status":
+                    report_profile(conn.cursor())
+    except ConnectionError:
+        raise SystemExit("Falha ao conectar no Snowflake.")
+    return rc
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
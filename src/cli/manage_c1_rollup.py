@@ -0,0 +1,258 @@
+"""
+Cubo diário do C1 (`C1_DAILY_ROLLUP`) para o painel de série histórica: refresh incremental por dia + consultas.
+
+Motivação:
+  - `queries/validate/c1_enriched_timeseries_panel.sql` refaz o C1 unificado a partir das duas tabelas
+    enriched e agrega do zero a cada olhada em tendência de aprovação/risco (varre todas as linhas).
+
+Como funciona:
+  - `refresh`: na primeira vez (ou `--full`), `CREATE OR REPLACE TABLE ... CLUSTER BY (day)` com o SELECT de
+    `queries/features/c1_daily_rollup.sql` (grão dia x clinic_id x c1_entity_type x c1_outcome_bucket x
+    risk_capim x *_source por eixo; só medidas aditivas);
+    depois, só os dias afetados: dias com C1 novo (`c1_created_at` > watermark - `--lookback-days`) ou com
+    update nas tabelas enriched (`cs_updated_at` da CS, `pa_updated_at` da PA) desde o último refresh
+    (mesmos watermarks de `src/utils/c1_snapshot.py`, guardados em `<cubo>_STATE`) e, para essas chaves, o dia
+    em que estavam no último refresh (mapa chave -> dia em `<cubo>_KEYS`: uma nova versão de PA pode mudar o
+    `c1_created_at` de dia); os dias são apagados e re-agregados numa transação;
+    `--verify`: compara `COUNT(*)` por dia da view com `SUM(n_c1)` do cubo e re-agrega dias divergentes
+    (ex.: linhas apagadas na origem); C1 sem `c1_created_at` (dia nulo) só é re-agregado no `--full`;
+  - `query`: painel/dashboard a partir do cubo (`src/utils/c1_rollup.py`): série por `--grain`, quebras `--by`,
+    métricas `--metrics` (taxas e médias como razão de somas), filtros `--where dim=v1|v2`.
+
+Uso:
+  python -m src.cli.manage_c1_rollup refresh
+  python -m src.cli.manage_c1_rollup refresh --lookback-days 30 --verify
+  python -m src.cli.manage_c1_rollup query --by c1_entity_type --grain month --start 2025-01-01
+  python -m src.cli.manage_c1_rollup query --by risk_capim --metrics n_c1,approval_rate --where c1_entity_type=credit_simulation
+"""
+
+from __future__ import annotations
+
+import argparse
+import re
+import time
+from typing import Dict, List, Optional
+
+from src.utils.c1_rollup import DEFAULT_TABLE, DIMENSIONS, GRAINS, METRICS, PANEL_METRICS, query_rollup
+from src.utils.c1_snapshot import KEY_COLUMNS, SnapshotSource, delta_filter, source_watermarks
+from src.utils.query_profile import add_profile_args, init_profiler, report_profile, tag_query
+from src.utils.snowflake_connection import pooled_connection
+from src.utils.sql_template import ScopeParams, render_sql
+
+ROLLUP_SQL_PATH = "queries/features/c1_daily_rollup.sql"
+C1_SOURCE = SnapshotSource.from_schema("CAPIM_DATA_DEV.POSSANI_SANDBOX")
+WATERMARKS = ("cs_updated_at", "pre_analysis_updated_at", "c1_created_at")
+ACTIONS = ("refresh", "query")
+
+
+def read_sql(path: str = ROLLUP_SQL_PATH) -> str:
+    return re.sub(r";\s*$", "", open(path, "r", encoding="utf-8").read().strip())
+
+
+def table_exists(cur, full_table: str) -> bool:
+    db, schema, table = full_table.split(".")
+    cur.execute(
+        f"""
+        SELECT COUNT(*)
+        FROM {db}.INFORMATION_SCHEMA.TABLES
+        WHERE table_schema = '{schema.upper()}'
+          AND table_name   = '{table.upper()}'
+        """
+    )
+    (n,) = cur.fetchone()
+    return int(n) > 0
+
+
+def read_state(cur, state_table: str) -> Optional[Dict[str, Optional[str]]]:
+    if not table_exists(cur, state_table):
+        return None
+    cur.execute(f"SELECT {', '.join(WATERMARKS)} FROM {state_table}")
+    row = cur.fetchone()
+    if row is None:
+        return None
+    return {k: (str(v) if v is not None else None) for k, v in zip(WATERMARKS, row)}
+
+
+def create_state_table(cur, state_table: str) -> None:
+    """DDL fora da transação: no Snowflake o CREATE faz commit implícito do que estiver aberto."""
+    cols = ", ".join(f"{k} TIMESTAMP_NTZ" for k in WATERMARKS)
+    cur.execute(f"CREATE TABLE IF NOT EXISTS {state_table} ({cols}, refreshed_at TIMESTAMP_NTZ)")
+
+
+def keys_select(where: str = "TRUE") -> str:
+    """Mapa chave -> dia de cada C1 (onde a linha está agregada no cubo)."""
+    return f"SELECT {', '.join(KEY_COLUMNS)}, DATE(c1_created_at) AS day FROM {C1_SOURCE.view} WHERE {where}"
+
+
+def write_state(cur, state_table: str, watermarks: Dict[str, Optional[str]]) -> None:
+    values = ", ".join(f"'{watermarks[k]}'::TIMESTAMP_NTZ" if watermarks.get(k) else "NULL" for k in WATERMARKS)
+    cur.execute(f"DELETE FROM {state_table}")
+    cur.execute(f"INSERT INTO {state_table} SELECT {values}, CURRENT_TIMESTAMP()::TIMESTAMP_NTZ")
+
+
+def exec_and_time(cur, query: str, step: str) -> float:
+    tag_query(cur, step=step)
+    t0 = time.time()
+    cur.execute(query)
+    if cur.description is not None:
+        _ = cur.fetchall()
+    return time.time() - t0
+
+
+def refresh_full(cur, table: str, state_table: str, template: str) -> None:
+    watermarks = source_watermarks(cur, C1_SOURCE)
+    sql = render_sql(template, ScopeParams(), required=("c1",))
+    t = exec_and_time(cur, f"CREATE OR REPLACE TABLE {table} CLUSTER BY (day) AS {sql}", step="rollup_full")
+    exec_and_time(cur, f"CREATE OR REPLACE TABLE {table}_KEYS AS {keys_select()}", step="rollup_keys")
+    create_state_table(cur, state_table)
+    write_state(cur, state_table, watermarks)
+    cur.execute(f"SELECT COUNT(*), SUM(n_c1) FROM {table}")
+    n_rows, n_c1 = cur.fetchone()
+    print(f"Cubo {table} recriado: {int(n_rows)} linhas ({int(n_c1 or 0)} C1) em {t:.1f}s")
+
+
+def refresh_incremental(cur, table: str, state_table: str, template: str, previous, lookback_days: int, verify: bool) -> None:
+    watermarks = source_watermarks(cur, C1_SOURCE)
+    days_table = f"{table}_AFFECTED_DAYS"
+    changed_table = f"{table}_CHANGED_KEYS"
+    keys_table = f"{table}_KEYS"
+    delta = delta_filter(C1_SOURCE, previous, lookback_days)
+    print("Watermarks do último refresh:", previous)
+    on_keys = " AND ".join(f"k.{c} = d.{c}" for c in KEY_COLUMNS)
+    t_days = exec_and_time(
+        cur,
+        f"CREATE OR REPLACE TEMPORARY TABLE {changed_table} AS {keys_select(delta)}",
+        step="rollup_changed_keys",
+    )
+    # dia atual das chaves alteradas + dia em que estavam agregadas (linha que mudou de dia sai do dia antigo)
+    t_days += exec_and_time(
+        cur,
+        f"""
+        CREATE OR REPLACE TEMPORARY TABLE {days_table} AS
+        SELECT day FROM {changed_table} WHERE day IS NOT NULL
+        UNION
+        SELECT k.day FROM {keys_table} k JOIN {changed_table} d ON {on_keys} WHERE k.day IS NOT NULL
+        """,
+        step="rollup_affected_days",
+    )
+    if verify:
+        exec_and_time(
+            cur,
+            f"""
+            INSERT INTO {days_table}
+            SELECT COALESCE(v.day, c.day)
+            FROM (SELECT DATE(c1_created_at) AS day, COUNT(*) AS n FROM {C1_SOURCE.view} GROUP BY 1) v
+            FULL OUTER JOIN (SELECT day, SUM(n_c1) AS n FROM {table} GROUP BY 1) c
+              ON c.day = v.day
+            WHERE COALESCE(v.n, 0) <> COALESCE(c.n, 0)
+              AND COALESCE(v.day, c.day) IS NOT NULL
+              AND NOT EXISTS (SELECT 1 FROM {days_table} d WHERE d.day = COALESCE(v.day, c.day))
+            """,
+            step="rollup_verify",
+        )
+    cur.execute(f"SELECT COUNT(*), MIN(day), MAX(day) FROM {days_table}")
+    n_days, first_day, last_day = cur.fetchone()
+    print(f"Dias afetados = {int(n_days)} ({first_day} .. {last_day}), {t_days:.1f}s")
+
+    sql = render_sql(
+        template,
+        ScopeParams(where={"c1": f"DATE(c1_created_at) IN (SELECT day FROM {days_table})"}),
+        required=("c1",),
+    )
+    create_state_table(cur, state_table)
+    t0 = time.time()
+    cur.execute("BEGIN")
+    try:
+        if int(n_days):
+            exec_and_time(cur, f"DELETE FROM {table} WHERE day IN (SELECT day FROM {days_table})", step="rollup_delete")
+            exec_and_time(cur, f"INSERT INTO {table} {sql}", step="rollup_insert")
+        exec_and_time(
+            cur,
+            f"DELETE FROM {keys_table} k WHERE EXISTS (SELECT 1 FROM {changed_table} d WHERE {on_keys})",
+            step="rollup_keys_delete",
+        )
+        exec_and_time(cur, f"INSERT INTO {keys_table} SELECT * FROM {changed_table}", step="rollup_keys_insert")
+        write_state(cur, state_table, watermarks)
+        cur.execute("COMMIT")
+    except Exception:
+        cur.execute("ROLLBACK")
+        raise
+    print(f"Re-agregação dos dias afetados: {time.time() - t0:.1f}s")
+
+
+def parse_where(items: List[str]) -> Dict[str, object]:
+    where: Dict[str, object] = {}
+    for item in items or []:
+        dim, _, values = item.partition("=")
+        parsed = []
+        for v in values.split("|"):
+            if v.lower() == "null":
+                parsed.append(None)
+            elif re.fullmatch(r"-?\d+", v):
+                parsed.append(int(v))
+            else:
+                parsed.append(v)
+        where[dim.strip()] = parsed
+    return where
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser()
+    ap.add_argument("action", choices=ACTIONS)
+    ap.add_argument("--table", default=DEFAULT_TABLE, help="Cubo (db.schema.tabela)")
+    # refresh
+    ap.add_argument("--full", action="store_true", help="refresh: recria o cubo inteiro")
+    ap.add_argument("--lookback-days", type=int, default=0,
+                    help="refresh: re-agrega também os N dias antes do watermark de c1_created_at (re-enrichments tardios)")
+    ap.add_argument("--verify", action="store_true", help="refresh: re-agrega dias com contagem divergente da view")
+    # query
+    ap.add_argument("--by", default="c1_entity_type", help=f"query: dimensões (vírgula) entre {', '.join(DIMENSIONS)}")
+    ap.add_argument("--grain", choices=GRAINS, default="month")
+    ap.add_argument("--metrics", default=",".join(PANEL_METRICS), help=f"query: entre {', '.join(METRICS)}")
+    ap.add_argument("--start", default=None, help="query: dia inicial (YYYY-MM-DD, inclusivo)")
+    ap.add_argument("--end", default=None, help="query: dia final (YYYY-MM-DD, exclusivo)")
+    ap.add_argument("--where", action="append", default=[], help="query: filtro dim=v1|v2 (repetível; null = IS NULL)")
+    ap.add_argument("--out", default=None, help="query: grava CSV em vez de imprimir")
+    add_profile_args(ap)
+    args = ap.parse_args()
+
+    if args.action == "query":
+        by = [d.strip() for d in args.by.split(",") if d.strip()]
+        metrics = [m.strip() for m in args.metrics.split(",") if m.strip()]
+        t0 = time.time()
+        try:
+            df = query_rollup(metrics, by, args.grain, args.start, args.end, parse_where(args.where), table=args.table)
+        except ValueError as e:
+            raise SystemExit(str(e))
+        if df is None:
+            raise SystemExit(1)
+        if args.out:
+            df.to_csv(args.out, index=False)
+            print(f"{len(df)} linhas em {args.out}")
+        else:
+            print(df.to_string(index=False))
+        print(f"\nTempo (s) = {time.time() - t0:.2f}")
+        return
+
+    init_profiler("manage_c1_rollup", enabled=not args.no_profile)
+    state_table = f"{args.table}_STATE"
+    template = read_sql()
+    try:
+        with pooled_connection() as conn:
+            cur = conn.cursor()
+            try:
+                previous = None
+                if not args.full and table_exists(cur, args.table) and table_exists(cur, f"{args.table}_KEYS"):
+                    previous = read_state(cur, state_table)
+                if previous is None:
+                    refresh_full(cur, args.table, state_table, template)
+                else:
+                    refresh_incremental(cur, args.table, state_table, template, previous, args.lookback_days, args.verify)
+            finally:
+                report_profile(conn.cursor())
+    except ConnectionError:
+        raise SystemExit("Falha ao conectar no Snowflake.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,299 @@
+"""
+Taxa efetiva das credit_simulations resolvida em lote (NumPy) e persistida numa tabela: lookup vira join.
+
+Motivação:
+  - `V_CREDIT_SIMULATIONS_EFFECTIVE_RATES` roda a bisseção recursiva (30 iterações por cenário) a cada
+    leitura; qualquer consulta de taxa paga o solver de novo sobre o histórico inteiro.
+
+Como funciona:
+  - lê as entradas (`queries/features/effective_rates_inputs.sql`: pv, parcela e prazo dos cenários de
+    prazo mínimo/máximo) em streaming (Arrow batches);
+  - resolve cada batch inteiro com `src/utils/rate_engine.py` (Halley + salvaguarda de bisseção);
+  - grava em `CREDIT_SIMULATIONS_EFFECTIVE_RATES` (chave: credit_simulation_id) via stage temporária + MERGE;
+  - incremental por padrão: só simulações com `updated_at` >= watermark da tabela (`MAX(cs_updated_at)`;
+    `>=` para não perder simulações empatadas no watermark gravadas depois do último run — as já resolvidas
+    são re-resolvidas e o MERGE por id as sobrescreve); tabela inexistente/vazia ou `--full` = carga completa;
+  - `--check view`: compara com a view SQL (mesma amostra/recorte; tolerância `--tol`) e lista divergências;
+  - `--check pa`: recalcula as estimativas de PMT de `pa_legacy_financing_estimates` com o mesmo motor e
+    compara com a tabela enriched de pre_analyses.
+  Código de saída 1 se algum check divergir.
+
+Uso:
+  python -m src.cli.materialize_effective_rates
+  python -m src.cli.materialize_effective_rates --full
+  python -m src.cli.materialize_effective_rates --no-solve --check view --sample-fraction 0.01
+  python -m src.cli.materialize_effective_rates --no-solve --check pa --period-start 2025-01-01
+"""
+
+from __future__ import annotations
+
+import argparse
+import re
+import time
+from dataclasses import replace
+from typing import Dict, List
+
+import numpy as np
+import pandas as pd
+
+from src.utils.local_engine import write_pandas
+from src.utils.query_profile import add_profile_args, init_profiler, report_profile, tag_query
+from src.utils.rate_engine import column_as_float, pmt, solve_batch
+from src.utils.result_stream import iter_arrow_batches, result_chunk_size
+from src.utils.snowflake_connection import pooled_connection
+from src.utils.sql_template import ScopeParams, add_scope_args, render_sql, scope_from_args
+
+INPUTS_SQL_PATH = "queries/features/effective_rates_inputs.sql"
+PA_INPUTS_SQL_PATH = "queries/features/pa_legacy_financing_inputs.sql"
+
+RATES_COLUMNS = (
+    ("credit_simulation_id", "NUMBER"),
+    ("cs_created_at", "TIMESTAMP_NTZ"),
+    ("cs_updated_at", "TIMESTAMP_NTZ"),
+    ("permitted_amount_cents", "NUMBER"),
+    ("term_min", "NUMBER"),
+    ("term_max", "NUMBER"),
+    ("installment_value_at_term_min_cents", "NUMBER"),
+    ("installment_value_at_term_max_cents", "NUMBER"),
+    ("total_debt_at_term_min_cents", "NUMBER"),
+    ("total_debt_at_term_max_cents", "NUMBER"),
+    ("rate_effective_monthly_min_term", "FLOAT"),
+    ("rate_effective_annual_min_term", "FLOAT"),
+    ("rate_solver_status_min_term", "VARCHAR"),
+    ("rate_effective_monthly_max_term", "FLOAT"),
+    ("rate_effective_annual_max_term", "FLOAT"),
+    ("rate_solver_status_max_term", "VARCHAR"),
+    ("solved_at", "TIMESTAMP_NTZ"),
+)
+
+
+def read_sql(path: str) -> str:
+    return re.sub(r";\s*$", "", open(path, "r", encoding="utf-8").read().strip())
+
+
+def ensure_table(cur, table: str, replace_table: bool) -> None:
+    cols = ",\n  ".join(f"{c} {t}" for c, t in RATES_COLUMNS)
+    verb = "CREATE OR REPLACE TABLE" if replace_table else "CREATE TABLE IF NOT EXISTS"
+    cur.execute(f"{verb} {table} (\n  {cols}\n)")
+
+
+def watermark(cur, table: str):
+    cur.execute(f"SELECT MAX(cs_updated_at) FROM {table}")
+    (wm,) = cur.fetchone()
+    return wm
+
+
+def merge_stage(cur, table: str, stage: str) -> None:
+    cols = [c for c, _ in RATES_COLUMNS if c != "solved_at"]
+    set_expr = ",\n      ".join(f"t.{c} = s.{c}" for c in cols if c != "credit_simulation_id")
+    tag_query(cur, step="merge_rates")
+    cur.execute(
+        f"""
+        MERGE INTO {table} t
+        USING {stage} s
+          ON t.credit_simulation_id = s.credit_simulation_id
+        WHEN MATCHED THEN UPDATE SET
+          {set_expr},
+          t.solved_at = CURRENT_TIMESTAMP()::TIMESTAMP_NTZ
+        WHEN NOT MATCHED THEN INSERT ({', '.join(cols)}, solved_at)
+          VALUES ({', '.join('s.' + c for c in cols)}, CURRENT_TIMESTAMP()::TIMESTAMP_NTZ)
+        """
+    )
+
+
+def upload(conn, cur, table: str, stage: str, frames: List[pd.DataFrame]) -> int:
+    """Sobe os batches resolvidos para a stage temporária (PUT + COPY do write_pandas) e faz o MERGE."""
+    df = pd.concat(frames, ignore_index=True)
+    df.columns = [c.upper() for c in df.columns]
+    cur.execute(f"TRUNCATE TABLE {stage}")
+    db, schema, name = stage.split(".")
+    ok, _, n_rows, _ = write_pandas(
+        conn, df, name, database=db, schema=schema, quote_identifiers=False, use_logical_type=True
+    )
+    if not ok:
+        raise SystemExit(f"Falha no upload para {stage}.")
+    merge_stage(cur, table, stage)
+    return int(n_rows)
+
+
+def solve(conn, args, table: str, scope: ScopeParams) -> None:
+    cur = conn.cursor()
+    table_missing = args.full
+    if not table_missing:
+        ensure_table(cur, table, replace_table=False)
+        wm = watermark(cur, table)
+        table_missing = wm is None
+    if table_missing:
+        print("Carga completa:", table)
+        ensure_table(cur, table, replace_table=True)
+    else:
+        print("Watermark cs_updated_at =", wm)
+        scope = replace(scope, where={**scope.where, "cs": f"cs.updated_at >= '{wm}'"})
+
+    sql = render_sql(read_sql(INPUTS_SQL_PATH), scope, required=("cs",))
+    stage = f"{table}_SOLVE_STAGE"
+    cur.execute(f"CREATE OR REPLACE TEMPORARY TABLE {stage} LIKE {table}")
+
+    n_in = n_loaded = 0
+    t_solve = 0.0
+    status_counts: Dict[str, int] = {}
+    frames: List[pd.DataFrame] = []
+    pending = 0
+    load_cur = conn.cursor()
+    with result_chunk_size(cur, args.chunk_size_mb):
+        tag_query(cur, step="inputs")
+        t0 = time.time()
+        cur.execute(sql)
+        t_query = time.time() - t0
+
+        for batch in iter_arrow_batches(cur, max_batch_rows=args.batch_rows):
+            t1 = time.time()
+            solved = solve_batch(batch)
+            t_solve += time.time() - t1
+            n_in += batch.num_rows
+            for col in ("RATE_SOLVER_STATUS_MIN_TERM", "RATE_SOLVER_STATUS_MAX_TERM"):
+                for vc in solved.column(solved.schema.get_field_index(col)).value_counts().to_pylist():
+                    status_counts[vc["values"]] = status_counts.get(vc["values"], 0) + vc["counts"]
+            frames.append(solved.to_pandas())
+            pending += batch.num_rows
+            if pending >= args.upload_rows:
+                n_loaded += upload(conn, load_cur, table, stage, frames)
+                frames, pending = [], 0
+                print(f"  {n_loaded} linhas gravadas")
+    if frames:
+        n_loaded += upload(conn, load_cur, table, stage, frames)
+    load_cur.execute(f"DROP TABLE IF EXISTS {stage}")
+
+    print("\n" + "=" * 90)
+    print("Simulações lidas =", n_in, "| gravadas (MERGE) =", n_loaded)
+    print("Tempo query de entrada (s) =", round(t_query, 2))
+    print(f"Tempo solver (s) = {round(t_solve, 3)} ({int(n_in / t_solve) if t_solve > 0 else '-'} simulações/s)")
+    print("Status do solver (cenários):", ", ".join(f"{k}={v}" for k, v in sorted(status_counts.items())))
+    print("Tempo total (s) =", round(time.time() - t0, 2))
+
+
+def check_view(cur, args, table: str, scope: ScopeParams) -> int:
+    """Diferença por cenário entre a tabela e a view SQL (NULL de um lado só conta como divergência)."""
+
+    def mismatch(c: str) -> str:
+        return f"((v.{c} IS NULL) <> (r.{c} IS NULL) OR ABS(v.{c} - r.{c}) > {float(args.tol)})"
+
+    cols = ("rate_effective_monthly_min_term", "rate_effective_monthly_max_term")
+    sql = render_sql(
+        f"""
+        SELECT
+          COUNT(*) AS n_compared,
+          {', '.join(f"COUNT_IF({mismatch(c)}) AS n_mismatch_{c[-8:]}, MAX(ABS(v.{c} - r.{c})) AS max_abs_diff_{c[-8:]}" for c in cols)}
+        FROM {args.view} v
+        JOIN {table} r
+          ON r.credit_simulation_id = v.credit_simulation_id
+        WHERE TRUE /*@scope r ts=r.cs_created_at id=r.credit_simulation_id*/
+        """,
+        scope,
+    )
+    tag_query(cur, step="check_view")
+    cur.execute(sql)
+    summary = dict(zip([d[0].lower() for d in cur.description], cur.fetchone()))
+    print("\n" + "=" * 90)
+    print(f"Check vs {args.view} (tol={args.tol}):")
+    for k, v in summary.items():
+        print(f"  {k} = {v}")
+    n_bad = int(summary.get("n_mismatch_min_term") or 0) + int(summary.get("n_mismatch_max_term") or 0)
+    if n_bad:
+        cur.execute(
+            render_sql(
+                f"""
+                SELECT v.credit_simulation_id, r.term_min, r.term_max,
+                  {', '.join(f'v.{c} AS view_{c[-8:]}, r.{c} AS table_{c[-8:]}' for c in cols)},
+                  r.rate_solver_status_min_term, r.rate_solver_status_max_term
+                FROM {args.view} v
+                JOIN {table} r
+                  ON r.credit_simulation_id = v.credit_simulation_id
+                WHERE ({' OR '.join(mismatch(c) for c in cols)}) /*@scope r ts=r.cs_created_at id=r.credit_simulation_id*/
+                LIMIT 10
+                """,
+                scope,
+            )
+        )
+        print(pd.DataFrame(cur.fetchall(), columns=[d[0] for d in cur.description]).to_string(index=False))
+    return 1 if n_bad else 0
+
+
+def check_pa(cur, args, scope: ScopeParams) -> int:
+    """Recalcula parcela/dívida mín/máx do legado de PA com `rate_engine.pmt` e compara com a tabela enriched."""
+    sql = render_sql(read_sql(PA_INPUTS_SQL_PATH), scope, required=("pa",))
+    tag_query(cur, step="check_pa")
+    cur.execute(sql)
+    n = 0
+    n_bad: Dict[str, int] = {}
+    max_diff: Dict[str, float] = {}
+    for batch in iter_arrow_batches(cur, max_batch_rows=args.batch_rows):
+        amount = column_as_float(batch, "C1_AMOUNT")
+        t_min, t_max = column_as_float(batch, "TERM_MIN"), column_as_float(batch, "TERM_MAX")
+        p_min = pmt(amount, column_as_float(batch, "RATE_AT_TERM_MIN"), t_min)
+        p_max = pmt(amount, column_as_float(batch, "RATE_AT_TERM_MAX"), t_max)
+        d_min, d_max = p_min * t_min, p_max * t_max
+        expected = {
+            "FINANCING_INSTALLMENT_VALUE_MIN": np.fmin(p_min, p_max),
+            "FINANCING_INSTALLMENT_VALUE_MAX": np.fmax(p_min, p_max),
+            "FINANCING_TOTAL_DEBT_MIN": np.fmin(d_min, d_max),
+            "FINANCING_TOTAL_DEBT_MAX": np.fmax(d_min, d_max),
+        }
+        for col, exp in expected.items():
+            got = column_as_float(batch, col)
+            with np.errstate(invalid="ignore"):
+                diff = np.abs(exp - got)
+                bad = (np.isnan(exp) != np.isnan(got)) | (diff > args.tol * np.maximum(1.0, np.abs(exp)))
+            n_bad[col] = n_bad.get(col, 0) + int(bad.sum())
+            if np.isfinite(diff).any():
+                max_diff[col] = max(max_diff.get(col, 0.0), float(np.nanmax(diff)))
+        n += batch.num_rows
+
+    print("\n" + "=" * 90)
+    print(f"Check pa_legacy_financing_estimates (tol relativa={args.tol}): {n} pre_analyses")
+    for col in sorted(n_bad):
+        print(f"  {col:<34} divergentes={n_bad[col]:>8} max_abs_diff={max_diff.get(col)}")
+    return 1 if any(n_bad.values()) else 0
+
+
+def main() -> int:
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--schema", default="CAPIM_DATA_DEV.POSSANI_SANDBOX", help="Schema (db.schema) da tabela de taxas")
+    ap.add_argument("--table", default="CREDIT_SIMULATIONS_EFFECTIVE_RATES", help="Tabela de taxas (sem schema)")
+    ap.add_argument("--full", action="store_true", help="Recria a tabela e resolve todas as simulações")
+    ap.add_argument("--no-solve", action="store_true", help="Não resolve/grava (só os --check)")
+    ap.add_argument("--check", choices=["view", "pa"], action="append", default=[], help="Confere contra a view SQL / o PMT do enrichment de PA")
+    ap.add_argument("--view", default="V_CREDIT_SIMULATIONS_EFFECTIVE_RATES", help="(check view) View SQL de referência")
+    ap.add_argument("--tol", type=float, default=1e-7, help="Tolerância (view: absoluta na taxa; pa: relativa)")
+    ap.add_argument("--batch-rows", type=int, default=200_000, help="Linhas por batch do solver")
+    ap.add_argument("--upload-rows", type=int, default=1_000_000, help="Linhas por upload/MERGE")
+    ap.add_argument("--chunk-size-mb", type=int, default=None, help="CLIENT_RESULT_CHUNK_SIZE (48..160)")
+    add_scope_args(ap)
+    add_profile_args(ap)
+    args = ap.parse_args()
+    init_profiler("materialize_effective_rates", enabled=not args.no_profile)
+    scope = scope_from_args(args)
+    if scope.sample_fraction is not None and scope.sample_method != "hash":
+        ap.error("--sample-method row/block não se aplica aqui (sem @sample); use hash.")
+    if scope.describe():
+        print("Recorte:", scope.describe())
+
+    table = f"{args.schema}.{args.table}"
+    rc = 0
+    try:
+        with pooled_connection() as conn:
+            if not args.no_solve:
+                solve(conn, args, table, scope)
+            cur = conn.cursor()
+            if "view" in args.check:
+                rc |= check_view(cur, args, table, scope)
+            if "pa" in args.check:
+                rc |= check_pa(cur, args, scope)
+            report_profile(conn.cursor())
+    except ConnectionError:
+        raise SystemExit("Falha ao conectar no Snowflake.")
+    return rc
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
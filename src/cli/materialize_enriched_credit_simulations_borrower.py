@@ -1,8 +1,42 @@
 import argparse
 import re
 import time
+from dataclasses import replace
 
-from src.utils.snowflake_connection import get_snowflake_connection
+from src.utils.backfill import add_backfill_args, backfill_by_month, month_starts, parse_month, source_month_range
+from src.utils.checks_index import add_index_args, maybe_refresh_check_tables, qualify_check_tables
+from src.utils.query_profile import add_profile_args, init_profiler, report_profile, tag_query
+from src.utils.snowflake_connection import pooled_connection
+from src.utils.sql_template import ScopeParams, add_scope_args, month_scope, render_sql, scope_from_args, scoped_target
+from src.utils.stage_runner import run_staged
+
+# Estágios do modo --staged (CTEs materializadas como tabelas TRANSIENT `<final>__STG_<CTE>`).
+# As dependências entre eles são derivadas das referências no SQL; CTEs fora da lista são inlinadas.
+STAGES = (
+    "cs_enriched",
+    "financing_features",
+    "pa_cs_dedup",
+    "crivo_resolution",
+    "crivo_features_campos",
+    "crivo_features_key_params",
+    "crivo_features_databusca_pf",
+    "cc_all_matches",
+    "cc_best_per_source_kind",
+    "serasa_new_features",
+    "serasa_old_features",
+    "boa_vista_scpc_net_features",
+    "scr_features",
+    "serasa_lineage",
+    "bacen_internal_features",
+    "boa_vista_score_pf_features",
+    "cad_best",
+    "axis_cadastro",
+    "neg_best",
+    "axis_negativacao",
+    "axis_renda",
+    "axis_score",
+    "credit_check_stats",
+)
 
 
 def read_enrichment_sql() -> str:
@@ -12,19 +46,93 @@ def read_enrichment_sql() -> str:
     return re.sub(r";\s*$", "", sql.strip())
 
 
-def make_sampled_sql(sql: str, sample_rows: int) -> str:
+def render_enrichment(sql: str, scope: ScopeParams) -> str:
+    """Aplica o recorte (período/meses/amostra/watermark) nos marcadores `@scope`/`@sample` do SQL."""
+    return render_sql(sql, scope, required=("cs",))
+
+
+def table_exists(cur, full_table: str) -> bool:
+    db, schema, table = full_table.split(".")
+    cur.execute(
+        f"""
+        SELECT COUNT(*)
+        FROM {db}.INFORMATION_SCHEMA.TABLES
+        WHERE table_schema = '{schema.upper()}'
+          AND table_name   = '{table.upper()}'
+        """
+    )
+    (n,) = cur.fetchone()
+    return int(n) > 0
+
+
+def table_columns(cur, full_table: str) -> list[str]:
+    cur.execute(f"SELECT * FROM {full_table} LIMIT 0")
+    return [d[0] for d in (cur.description or [])]
+
+
+def run_incremental(cur, final_table: str, sql: str, lookback_days: int, scope: ScopeParams) -> None:
     """
-    Faz amostragem no cs_base via TABLESAMPLE/SAMPLE, para reduzir custo do CTAS.
-    Estratégia: trocar o FROM do CREDIT_SIMULATIONS por '... SAMPLE (N ROWS)'.
+    Refresh incremental via MERGE por credit_simulation_id.
+
+    Watermark = estado atual da própria tabela destino (MAX de cs_updated_at / cs_created_at).
+    Re-enriquece:
+      - simulações com updated_at posterior ao watermark (novas ou alteradas);
+      - simulações criadas nos últimos `lookback_days` antes do watermark (credit checks / crivo
+        que chegam atrasados ainda podem mudar o match; 180d = crivo_cap_days).
     """
-    needle = "FROM CAPIM_DATA.CAPIM_PRODUCTION.CREDIT_SIMULATIONS cs"
-    replacement = f"FROM CAPIM_DATA.CAPIM_PRODUCTION.CREDIT_SIMULATIONS cs SAMPLE ({int(sample_rows)} ROWS)"
-    if needle not in sql:
-        raise ValueError("Não encontrei o FROM do CREDIT_SIMULATIONS em cs_base para aplicar SAMPLE.")
-    return sql.replace(needle, replacement, 1)
+    cur.execute(f"SELECT MAX(cs_updated_at), MAX(cs_created_at) FROM {final_table}")
+    wm_updated, wm_created = cur.fetchone()
+    if wm_updated is None and wm_created is None:
+        raise SystemExit(f"Tabela {final_table} vazia: rode sem --incremental (full) primeiro.")
+    print("Watermark cs_updated_at =", wm_updated)
+    print("Watermark cs_created_at =", wm_created)
 
+    preds = []
+    if wm_updated is not None:
+        preds.append(f"cs.updated_at > '{wm_updated}'")
+    if wm_created is not None:
+        preds.append(f"cs.created_at >= DATEADD('day', -{int(lookback_days)}, '{wm_created}'::TIMESTAMP_NTZ)")
+    where = " OR ".join(f"({p})" for p in preds)
+    scoped_sql = render_enrichment(sql, replace(scope, where={**scope.where, "cs": where}))
 
-def exec_and_time(cur, query: str) -> float:
+    stage_table = f"{final_table}_INCR_STAGE"
+    print("\nCTAS incremental (stage temporária):", stage_table)
+    t_stage = exec_and_time(cur, f"CREATE OR REPLACE TEMPORARY TABLE {stage_table} AS {scoped_sql}", step="incremental_stage")
+    cur.execute(f"SELECT COUNT(*) FROM {stage_table}")
+    (n_stage,) = cur.fetchone()
+    print("Linhas re-enriquecidas =", int(n_stage))
+    print("Tempo stage (s) =", round(t_stage, 2))
+
+    stage_cols = table_columns(cur, stage_table)
+    target_cols = table_columns(cur, final_table)
+    if [c.upper() for c in stage_cols] != [c.upper() for c in target_cols]:
+        raise SystemExit(
+            "Schema do enrichment mudou em relação à tabela destino; rode sem --incremental (full) para recriar."
+        )
+
+    set_expr = ",\n      ".join(f"t.{c} = s.{c}" for c in target_cols if c.upper() != "CREDIT_SIMULATION_ID")
+    ins_cols = ", ".join(target_cols)
+    ins_vals = ", ".join(f"s.{c}" for c in target_cols)
+    merge_sql = f"""
+    MERGE INTO {final_table} t
+    USING {stage_table} s
+      ON t.credit_simulation_id = s.credit_simulation_id
+    WHEN MATCHED THEN UPDATE SET
+      {set_expr}
+    WHEN NOT MATCHED THEN INSERT ({ins_cols})
+      VALUES ({ins_vals})
+    """
+    print("\nMERGE em:", final_table)
+    t_merge = exec_and_time(cur, merge_sql, step="incremental_merge")
+    cur.execute(f"SELECT COUNT(*) FROM {final_table}")
+    (n_full,) = cur.fetchone()
+    print("Linhas na tabela após MERGE =", int(n_full))
+    print("Tempo MERGE (s) =", round(t_merge, 2))
+    cur.execute(f"DROP TABLE IF EXISTS {stage_table}")
+
+
+def exec_and_time(cur, query: str, step: str | None = None) -> float:
+    tag_query(cur, step=step)
     t0 = time.time()
     cur.execute(query)
     # force fetch for completion (some drivers may lazily stream)
@@ -49,7 +157,7 @@ def main():
         "--sample-rows",
         type=int,
         default=20000,
-        help="Tamanho da amostra para CTAS de benchmark (via SAMPLE (N ROWS)).",
+        help="Tamanho da amostra para CTAS de benchmark (via SAMPLE (N ROWS) no marcador @sample cs).",
     )
     ap.add_argument(
         "--only-sample",
@@ -61,28 +169,129 @@ def main():
         action="store_true",
         help="Se setado, mantém a tabela _SAMPLE_ criada para benchmark. Por padrão, removemos o sample no final para evitar artefatos.",
     )
+    ap.add_argument(
+        "--incremental",
+        action="store_true",
+        help="Refresh incremental: re-enriquece apenas simulações novas/alteradas (+ lookback) e faz MERGE na tabela existente.",
+    )
+    ap.add_argument(
+        "--lookback-days",
+        type=int,
+        default=180,
+        help="Janela (dias antes do watermark de cs_created_at) re-enriquecida no modo incremental (padrão = crivo_cap_days).",
+    )
+    ap.add_argument(
+        "--staged",
+        action="store_true",
+        help="Materializa as CTEs de STAGES como tabelas TRANSIENT (DAG em paralelo, reaproveitando estágios inalterados) e monta a final a partir delas.",
+    )
+    ap.add_argument(
+        "--force-stage",
+        action="append",
+        default=[],
+        help="(--staged) Re-executa o estágio mesmo se inalterado (repetível). Downstream também são refeitos.",
+    )
+    ap.add_argument(
+        "--ignore-stage-inputs",
+        action="store_true",
+        help="(--staged) Reaproveita estágios olhando só SQL/upstream, ignorando LAST_ALTERED das tabelas base.",
+    )
+    ap.add_argument(
+        "--drop-stages",
+        action="store_true",
+        help="(--staged) Remove as tabelas de estágio após montar a final (perde o reaproveitamento).",
+    )
+    add_scope_args(ap)
+    add_backfill_args(ap)
+    add_index_args(ap)
+    add_profile_args(ap)
     args = ap.parse_args()
+    init_profiler("materialize_cs", enabled=not args.no_profile)
+
+    try:
+        with pooled_connection() as conn:
+            try:
+                materialize(args, conn)
+            finally:
+                report_profile(conn.cursor())
+    except ConnectionError:
+        raise SystemExit("Falha ao conectar no Snowflake.")
+
 
+def materialize(args, conn) -> None:
     schema = args.schema
     final_table = f"{schema}.{args.table}"
     sample_table = f"{schema}.{args.table}_SAMPLE_{args.sample_rows}"
     legacy_v1_table = f"{final_table}_V1" if not args.table.endswith("_V1") else None
 
-    sql = read_enrichment_sql()
-    sql_sample = make_sampled_sql(sql, args.sample_rows)
+    template = qualify_check_tables(read_enrichment_sql(), schema)
+    scope = scope_from_args(args)
+    if scope.describe():
+        print("Recorte ativo:", scope.describe())
+    sql = render_enrichment(template, scope)
+    sql_sample = render_enrichment(template, replace(scope, sample_rows=args.sample_rows))
 
-    conn = get_snowflake_connection()
-    if conn is None:
-        raise SystemExit("Falha ao conectar no Snowflake.")
     cur = conn.cursor()
 
+    # benchmark (--only-sample) e recorte fora do --incremental não publicam a tabela final
+    partial_run = args.only_sample or (not args.incremental and scoped_target(final_table, scope) != final_table)
+    maybe_refresh_check_tables(conn, args, schema, partial_run=partial_run)
+
+    if args.incremental:
+        if table_exists(cur, final_table):
+            run_incremental(cur, final_table, template, args.lookback_days, scope)
+            return
+        print(f"--incremental: {final_table} não existe; seguindo com materialização full.")
+
+    if scoped_target(final_table, scope) != final_table and not args.only_sample:
+        final_table = scoped_target(final_table, scope)
+        legacy_v1_table = None
+        print("Recorte ativo fora do --incremental: materializando em", final_table, "(tabela completa intacta)")
+
+    if args.backfill:
+        lo, hi = source_month_range(cur, "CAPIM_DATA.CAPIM_PRODUCTION.CREDIT_SIMULATIONS", "created_at")
+        first = parse_month(args.backfill_from) if args.backfill_from else lo
+        last = parse_month(args.backfill_to) if args.backfill_to else hi
+        partial = (first > lo or last < hi) and table_exists(cur, final_table)
+        backfill_by_month(
+            conn,
+            final_table,
+            month_starts(first, last),
+            lambda m: render_enrichment(template, month_scope(scope, m)),
+            ts_col="cs_created_at",
+            partial=partial,
+            max_concurrency=args.max_concurrency,
+            max_retries=args.max_retries,
+        )
+        # só depois da montagem: com janela com falha o backfill_by_month sai com erro e a tabela legado continua
+        if legacy_v1_table is not None and not partial:
+            cur.execute(f"DROP TABLE IF EXISTS {legacy_v1_table}")
+        return
+
+    if args.staged:
+        run_staged(
+            conn,
+            sql,
+            final_table,
+            STAGES,
+            max_concurrency=args.max_concurrency,
+            max_retries=args.max_retries,
+            force=args.force_stage,
+            ignore_inputs=args.ignore_stage_inputs,
+            drop_stages=args.drop_stages,
+        )
+        # só depois da montagem: com estágio com falha o run_staged sai com erro e a tabela legado continua
+        if legacy_v1_table is not None:
+            cur.execute(f"DROP TABLE IF EXISTS {legacy_v1_table}")
+        return
+
     print("Medindo universo total de credit_simulations...")
     cur.execute("SELECT COUNT(*) FROM CAPIM_DATA.CAPIM_PRODUCTION.CREDIT_SIMULATIONS")
     (n_total,) = cur.fetchone()
     print("TOTAL credit_simulations =", int(n_total))
 
     print("\nCTAS amostral (benchmark):", sample_table)
-    t_sample = exec_and_time(cur, f"CREATE OR REPLACE TABLE {sample_table} AS {sql_sample}")
+    t_sample = exec_and_time(cur, f"CREATE OR REPLACE TABLE {sample_table} AS {sql_sample}", step="sample_ctas")
     cur.execute(f"SELECT COUNT(*) FROM {sample_table}")
     (n_sample_out,) = cur.fetchone()
     n_sample_out = int(n_sample_out)
@@ -93,10 +302,10 @@ def main():
         est_seconds = t_sample * (int(n_total) / n_sample_out)
         print("Estimativa linear full (min) ~", round(est_seconds / 60, 1))
         print("Observação: estimativa é aproximada; custo pode não escalar linearmente.")
+        print("Curva de escala medida (vários pontos): python -m src.cli.benchmark_enrichment")
 
     if args.only_sample:
         print("\n--only-sample: não materializando tabela full.")
-        conn.close()
         return
 
     print("\nCTAS FULL:", final_table)
@@ -105,7 +314,7 @@ def main():
     if legacy_v1_table is not None:
         print("DROP (limpeza) tabela legado _V1 se existir:", legacy_v1_table)
         cur.execute(f"DROP TABLE IF EXISTS {legacy_v1_table}")
-    t_full = exec_and_time(cur, f"CREATE OR REPLACE TABLE {final_table} AS {sql}")
+    t_full = exec_and_time(cur, f"CREATE OR REPLACE TABLE {final_table} AS {sql}", step="full_ctas")
     cur.execute(f"SELECT COUNT(*) FROM {final_table}")
     (n_full,) = cur.fetchone()
     print("Linhas full materializadas =", int(n_full))
@@ -115,8 +324,6 @@ def main():
         print("\nRemovendo tabela sample (limpeza):", sample_table)
         cur.execute(f"DROP TABLE IF EXISTS {sample_table}")
 
-    conn.close()
-
 
 if __name__ == "__main__":
     main()
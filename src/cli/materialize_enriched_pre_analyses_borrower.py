@@ -2,7 +2,11 @@ import argparse
 import re
 import time
 
-from src.utils.snowflake_connection import get_snowflake_connection
+from src.utils.backfill import add_backfill_args, backfill_by_month, month_starts, parse_month, source_month_range
+from src.utils.checks_index import add_index_args, maybe_refresh_check_tables, qualify_check_tables
+from src.utils.query_profile import add_profile_args, init_profiler, report_profile, tag_query
+from src.utils.snowflake_connection import pooled_connection
+from src.utils.sql_template import ScopeParams, add_scope_args, month_scope, render_sql, scope_from_args, scoped_target
 
 
 def read_sql() -> str:
@@ -10,7 +14,27 @@ def read_sql() -> str:
     return re.sub(r";\s*$", "", sql.strip())
 
 
-def exec_and_time(cur, query: str) -> float:
+def render_enrichment(sql: str, scope: ScopeParams) -> str:
+    """Aplica o recorte (período/meses/amostra por hash do id) nos marcadores `@scope` do SQL."""
+    return render_sql(sql, scope, required=("pa",))
+
+
+def table_exists(cur, full_table: str) -> bool:
+    db, schema, table = full_table.split(".")
+    cur.execute(
+        f"""
+        SELECT COUNT(*)
+        FROM {db}.INFORMATION_SCHEMA.TABLES
+        WHERE table_schema = '{schema.upper()}'
+          AND table_name   = '{table.upper()}'
+        """
+    )
+    (n,) = cur.fetchone()
+    return int(n) > 0
+
+
+def exec_and_time(cur, query: str, step: str | None = None) -> float:
+    tag_query(cur, step=step)
     t0 = time.time()
     cur.execute(query)
     if cur.description is not None:
@@ -30,33 +54,82 @@ def main():
         default="PRE_ANALYSES_ENRICHED_BORROWER",
         help="Nome da tabela final (sem schema).",
     )
+    add_scope_args(ap)
+    add_backfill_args(ap)
+    add_index_args(ap)
+    add_profile_args(ap)
     args = ap.parse_args()
+    if args.sample_fraction is not None and args.sample_method != "hash":
+        ap.error("PA: apenas --sample-method hash (SAMPLE antes da deduplicação por (type,id) pegaria versões antigas).")
+    init_profiler("materialize_pa", enabled=not args.no_profile)
+
+    try:
+        with pooled_connection() as conn:
+            try:
+                materialize(args, conn)
+            finally:
+                report_profile(conn.cursor())
+    except ConnectionError:
+        raise SystemExit("Falha ao conectar no Snowflake.")
+
 
+def materialize(args, conn) -> None:
     schema = args.schema
     final_table = f"{schema}.{args.table}"
     legacy_v1_table = f"{final_table}_V1" if not args.table.endswith("_V1") else None
 
-    sql = read_sql()
+    template = qualify_check_tables(read_sql(), schema)
+    scope = scope_from_args(args)
+    if scope.describe():
+        print("Recorte ativo:", scope.describe())
+    sql = render_enrichment(template, scope)
+    scoped_run = scoped_target(final_table, scope) != final_table
+    if scoped_run:
+        final_table = scoped_target(final_table, scope)
+        legacy_v1_table = None
+        print("Recorte ativo: materializando em", final_table, "(tabela completa intacta)")
 
-    conn = get_snowflake_connection()
-    if conn is None:
-        raise SystemExit("Falha ao conectar no Snowflake.")
     cur = conn.cursor()
 
+    maybe_refresh_check_tables(conn, args, schema, partial_run=scoped_run)
+
+    if args.backfill:
+        lo, hi = source_month_range(cur, "CAPIM_DATA.CAPIM_ANALYTICS.PRE_ANALYSES", "PRE_ANALYSIS_CREATED_AT")
+        first = parse_month(args.backfill_from) if args.backfill_from else lo
+        last = parse_month(args.backfill_to) if args.backfill_to else hi
+        partial = (first > lo or last < hi) and table_exists(cur, final_table)
+        backfill_by_month(
+            conn,
+            final_table,
+            month_starts(first, last),
+            lambda m: render_enrichment(template, month_scope(scope, m)),
+            ts_col="c1_created_at",
+            partial=partial,
+            max_concurrency=args.max_concurrency,
+            max_retries=args.max_retries,
+            # versões da mesma PA com created_at em meses diferentes caem em 2 janelas: fica a mais recente
+            dedupe_key=("c1_entity_type", "c1_entity_id"),
+            dedupe_order="pa_updated_at DESC NULLS LAST, c1_created_at DESC",
+            # backfill parcial: só substitui a linha já materializada (outro mês) por uma versão tão ou mais nova
+            dedupe_guard="pa_updated_at",
+        )
+        # só depois da montagem: com janela com falha o backfill_by_month sai com erro e a tabela legado continua
+        if legacy_v1_table is not None and not partial:
+            cur.execute(f"DROP TABLE IF EXISTS {legacy_v1_table}")
+        return
+
     print("\nCTAS FULL:", final_table)
     print("DROP (limpeza) tabela destino se existir:", final_table)
     cur.execute(f"DROP TABLE IF EXISTS {final_table}")
     if legacy_v1_table is not None:
         print("DROP (limpeza) tabela legado _V1 se existir:", legacy_v1_table)
         cur.execute(f"DROP TABLE IF EXISTS {legacy_v1_table}")
-    t_full = exec_and_time(cur, f"CREATE OR REPLACE TABLE {final_table} AS {sql}")
+    t_full = exec_and_time(cur, f"CREATE OR REPLACE TABLE {final_table} AS {sql}", step="full_ctas")
     cur.execute(f"SELECT COUNT(*) FROM {final_table}")
     (n_full,) = cur.fetchone()
     print("Linhas materializadas =", int(n_full))
     print("Tempo (min) =", round(t_full / 60, 2))
 
-    conn.close()
-
 
 if __name__ == "__main__":
     main()
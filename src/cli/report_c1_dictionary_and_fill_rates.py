@@ -6,18 +6,42 @@ Gera:
 Saídas:
 - outputs/c1_enriched_borrower_dictionary.md
 - outputs/c1_enriched_borrower_fill_rates.csv
+- histórico diário (modo --history): tabela por (c1_day, c1_entity_type, column_name) com contagens
+  aditivas; cada run escaneia só os dias novos (+ bucket c1_day NULL e colunas novas da view, desde o início)
+  e o CSV overall/janelas sai do rollup do histórico
+  (outputs/c1_enriched_borrower_fill_rates_lastNd.csv com --window-days N)
+- outputs/c1_enriched_borrower_fill_rates_approx.csv (modo --approx: SAMPLE nas tabelas enriched base
+  + IC de Wilson; colunas cujo IC cruza --alert-threshold são recontadas exato)
 """
 
 from __future__ import annotations
 
 import argparse
+import re
+from concurrent.futures import ThreadPoolExecutor
 from dataclasses import dataclass
 from datetime import datetime, timezone, timedelta
 from pathlib import Path
+from statistics import NormalDist
 
+import numpy as np
 import pandas as pd
 
-from src.utils.snowflake_connection import get_snowflake_connection
+from src.cli.manage_c1_refresh import read_view_sql, view_select
+from src.utils.query_profile import add_profile_args, init_profiler, report_profile, tag_query
+from src.utils.snowflake_connection import pooled_connection, reserve_pool_workers
+from src.utils.sql_template import ScopeParams, render_sql
+
+# tabelas base (no schema da view) amostradas pelos marcadores `@sample` do SELECT da view oficial
+SAMPLED_BASE_TABLES = {
+    "credit_simulation": "CREDIT_SIMULATIONS_ENRICHED_BORROWER",
+    "pre_analysis": "PRE_ANALYSES_ENRICHED_BORROWER",
+}
+# schema em que o arquivo da view referencia as tabelas base (reapontado para --db/--schema no modo --approx)
+VIEW_FILE_SCHEMA = "CAPIM_DATA_DEV.POSSANI_SANDBOX"
+_BASE_TABLE_REF = re.compile(
+    re.escape(VIEW_FILE_SCHEMA) + r"\.(" + "|".join(SAMPLED_BASE_TABLES.values()) + r")\b", re.IGNORECASE
+)
 
 
 @dataclass(frozen=True)
@@ -91,37 +115,377 @@ def _fetch_columns(conn, db: str, schema: str, view: str) -> list[ColInfo]:
     return [ColInfo(str(r["COLUMN_NAME"]), str(r["DATA_TYPE"]), str(r["IS_NULLABLE"])) for _, r in df.iterrows()]
 
 
-def _build_fill_sql(db: str, schema: str, view: str, cols: list[ColInfo]) -> tuple[str, list[str]]:
+def _build_fill_sql(
+    db: str,
+    schema: str,
+    view: str,
+    cols: list[ColInfo],
+    offset: int = 0,
+    source_sql: str = "",
+) -> tuple[str, list[str]]:
+    """
+    Um único scan por chunk de colunas: GROUPING SETS ((c1_entity_type), ()) produz as linhas por
+    entidade e o total '__all__' na mesma passada (antes: GROUP BY + UNION ALL = 2 scans).
+    `offset` mantém os aliases (nn__NNN) únicos entre chunks; `source_sql` (modo aproximado) substitui a
+    view por um SELECT equivalente (ex.: o da view com SAMPLE nas tabelas base).
+    """
     # generate stable aliases
-    col_names = [c.name for c in cols]
-    pieces = []
-    for i, name in enumerate(col_names):
-        alias = f"nn__{i:03d}"
-        pieces.append(f'COUNT_IF("{name}" IS NOT NULL) AS {alias}')
+    aliases = [f"nn__{offset + i:04d}" for i in range(len(cols))]
+    pieces = [f'COUNT_IF("{c.name}" IS NOT NULL) AS {a}' for c, a in zip(cols, aliases)]
     counts_expr = ",\n      ".join(pieces)
 
     sql = f"""
-    WITH base AS (
-      SELECT * FROM {db}.{schema}.{view}
-    )
     SELECT
-      c1_entity_type,
+      IFF(GROUPING(c1_entity_type) = 1, '__all__', c1_entity_type) AS c1_entity_type,
       COUNT(*)::NUMBER AS n,
       {counts_expr}
-    FROM base
-    GROUP BY 1
+    FROM {f"({source_sql}) c1" if source_sql else f"{db}.{schema}.{view}"}
+    GROUP BY GROUPING SETS ((c1_entity_type), ())
+    """
+    return sql, aliases
 
-    UNION ALL
 
+def _chunks(cols: list[ColInfo], chunk_size: int) -> list[tuple[int, list[ColInfo]]]:
+    size = max(1, int(chunk_size))
+    return [(i, cols[i : i + size]) for i in range(0, len(cols), size)]
+
+
+def _fetch_fill_counts(
+    db: str, schema: str, view: str, cols: list[ColInfo], offset: int, source_sql: str = ""
+) -> pd.DataFrame:
+    """Roda um chunk (conexão própria do pool) e devolve as contagens em formato long."""
+    sql, aliases = _build_fill_sql(db, schema, view, cols, offset=offset, source_sql=source_sql)
+    with pooled_connection() as conn:
+        cur = conn.cursor()
+        try:
+            tag_query(cur, step="fill_counts", chunk_offset=offset)
+            cur.execute(sql)
+            df_counts = cur.fetch_pandas_all()
+        finally:
+            cur.close()
+    df_counts.columns = [c.upper() for c in df_counts.columns]
+
+    # reshape to long (vetorizado)
+    alias_to_col = {a.upper(): c.name.lower() for a, c in zip(aliases, cols)}
+    long = df_counts.melt(
+        id_vars=["C1_ENTITY_TYPE", "N"],
+        value_vars=list(alias_to_col),
+        var_name="alias",
+        value_name="n_nonnull",
+    )
+    return pd.DataFrame(
+        {
+            "c1_entity_type": long["C1_ENTITY_TYPE"],
+            "column": long["alias"].map(alias_to_col),
+            "n_rows": long["N"].astype("int64"),
+            "n_nonnull": long["n_nonnull"].astype("int64"),
+        }
+    )
+
+
+def compute_fill_rates(
+    db: str,
+    schema: str,
+    view: str,
+    cols: list[ColInfo],
+    chunk_size: int = 200,
+    max_workers: int = 4,
+    source_sql: str = "",
+) -> pd.DataFrame:
+    """
+    Fill-rate (não-nulo) por coluna × c1_entity_type (+ '__all__').
+    Views muito largas são quebradas em chunks de colunas executados em paralelo. Numa tabela, o storage
+    colunar faz cada chunk ler só as suas colunas; na view `C1_ENRICHED_BORROWER` não: cada chunk recalcula
+    o UNION CS+PA e o join temporal do clinic score, então o custo cresce com o nº de chunks — use
+    `--chunk-size` ≥ nº de colunas (1 chunk) quando o paralelismo não compensar esse retrabalho.
+    """
+    chunks = _chunks(cols, chunk_size)
+    reserve_pool_workers(min(int(max_workers), len(chunks)))
+    with ThreadPoolExecutor(max_workers=max(1, min(int(max_workers), len(chunks)))) as ex:
+        parts = list(ex.map(lambda ch: _fetch_fill_counts(db, schema, view, ch[1], ch[0], source_sql), chunks))
+    df_fill = pd.concat(parts, ignore_index=True)
+    df_fill["fill_rate"] = (df_fill["n_nonnull"] / df_fill["n_rows"]).where(df_fill["n_rows"] > 0)
+    return df_fill
+
+
+def _base_row_counts(conn, db: str, schema: str) -> pd.Series:
+    """
+    Linhas por entidade a partir do metadado (`INFORMATION_SCHEMA.TABLES.ROW_COUNT`; sem scan).
+    Na PA é um teto (a tabela também tem linhas 'credit_simulation', filtradas pela view): o IC sai do
+    tamanho real da amostra, então só a margem efetiva fica um pouco acima da alvo.
+    """
+    by_table = {t: e for e, t in SAMPLED_BASE_TABLES.items()}
+    names = ", ".join(f"'{t}'" for t in by_table)
+    cur = conn.cursor()
+    cur.execute(
+        f"""
+        SELECT table_name, row_count
+        FROM {db}.INFORMATION_SCHEMA.TABLES
+        WHERE table_schema = '{schema.upper()}'
+          AND table_name IN ({names})
+        """
+    )
+    return pd.Series(
+        {by_table[str(t).upper()]: int(n) for t, n in cur.fetchall() if n is not None}, dtype="int64"
+    )
+
+
+def qualify_base_tables(sql: str, db: str, schema: str) -> str:
+    """Reaponta as tabelas enriched base (`SAMPLED_BASE_TABLES`) de `VIEW_FILE_SCHEMA` para `db.schema`."""
+    target = f"{db}.{schema}".upper()
+    if target == VIEW_FILE_SCHEMA:
+        return sql
+    return _BASE_TABLE_REF.sub(lambda m: f"{target}.{m.group(1).upper()}", sql)
+
+
+def sampled_view_sql(db: str, schema: str, view: str, pct: float, sample_method: str = "row") -> str:
+    """
+    SELECT da view oficial (arquivo de `manage_c1_refresh`) com `SAMPLE ROW|BLOCK (pct)` nas tabelas enriched
+    base (marcadores `@sample cs|pa`): o lookup do clinic score e o scan só processam a amostra.
+    As tabelas base são reapontadas para `db.schema` — o mesmo schema de onde `_base_row_counts` tira o ROW_COUNT.
+    """
+    params = ScopeParams(sample_fraction=pct / 100.0, sample_method=sample_method)
+    select_sql = qualify_base_tables(view_select(read_view_sql(), view), db, schema)
+    return render_sql(select_sql, params, required=("cs", "pa"))
+
+
+def sample_pct_for_margin(min_group_rows: int, margin: float, confidence: float) -> float:
+    """
+    % de amostragem para que a menor entidade tenha erro máximo ~`margin` (pior caso p=0.5):
+    n = z² · 0.25 / margin², com correção de população finita.
+    """
+    if min_group_rows <= 0:
+        return 100.0
+    z = NormalDist().inv_cdf(0.5 + confidence / 2)
+    n0 = (z**2) * 0.25 / (margin**2)
+    n = n0 / (1 + (n0 - 1) / min_group_rows)
+    return float(min(100.0, max(0.0001, 100.0 * n / min_group_rows)))
+
+
+def wilson_interval(n_nonnull: pd.Series, n_rows: pd.Series, confidence: float) -> tuple[pd.Series, pd.Series]:
+    """Intervalo de Wilson para proporção (vetorizado)."""
+    z = NormalDist().inv_cdf(0.5 + confidence / 2)
+    n = n_rows.astype("float64").where(n_rows > 0)
+    p = n_nonnull.astype("float64") / n
+    denom = 1 + z**2 / n
+    center = (p + z**2 / (2 * n)) / denom
+    half = (z / denom) * np.sqrt(p * (1 - p) / n + z**2 / (4 * n**2))
+    return (center - half).clip(lower=0.0), (center + half).clip(upper=1.0)
+
+
+def compute_fill_rates_approx(
+    conn,
+    db: str,
+    schema: str,
+    view: str,
+    cols: list[ColInfo],
+    margin: float,
+    confidence: float,
+    thresholds: list[float],
+    sample_method: str = "row",
+    chunk_size: int = 200,
+    max_workers: int = 4,
+) -> pd.DataFrame:
+    """
+    Fill-rate aproximado via SAMPLE nas tabelas enriched base, com IC de Wilson por (entidade, coluna).
+    O % vem do ROW_COUNT do metadado (sem scan de contagem); as contagens por entidade saem da própria passada.
+    Colunas cujo IC cruza algum threshold de alerta são recontadas de forma exata (só essas colunas).
+    """
+    counts = _base_row_counts(conn, db, schema)
+    if len(counts) < len(SAMPLED_BASE_TABLES):
+        print("--approx: ROW_COUNT das tabelas base indisponível; usando contagem exata.")
+        pct = 100.0
+    else:
+        pct = sample_pct_for_margin(int(counts.min()), margin, confidence)
+    if pct >= 100.0:
+        print("--approx: amostra necessária ≥ 100%; usando contagem exata.")
+        df = compute_fill_rates(db, schema, view, cols, chunk_size=chunk_size, max_workers=max_workers)
+        df["fill_rate_ci_low"] = df["fill_rate"]
+        df["fill_rate_ci_high"] = df["fill_rate"]
+        df["is_exact"] = True
+        return df
+
+    print(
+        f"--approx: SAMPLE {sample_method.upper()} ({pct:.4f}) em {', '.join(SAMPLED_BASE_TABLES.values())} "
+        f"(margem alvo ±{margin}, confiança {confidence})"
+    )
+    df = compute_fill_rates(
+        db,
+        schema,
+        view,
+        cols,
+        chunk_size=chunk_size,
+        max_workers=max_workers,
+        source_sql=sampled_view_sql(db, schema, view, pct, sample_method),
+    )
+    low, high = wilson_interval(df["n_nonnull"], df["n_rows"], confidence)
+    df["fill_rate_ci_low"] = low
+    df["fill_rate_ci_high"] = high
+    df["is_exact"] = False
+
+    crosses = pd.Series(False, index=df.index)
+    for t in thresholds:
+        crosses |= (df["fill_rate_ci_low"] <= t) & (df["fill_rate_ci_high"] >= t)
+    escalate = sorted(df.loc[crosses, "column"].unique())
+    if not escalate:
+        return df
+
+    print(f"--approx: {len(escalate)} colunas com IC cruzando threshold; recontando exato.")
+    by_name = {c.name.lower(): c for c in cols}
+    exact = compute_fill_rates(
+        db, schema, view, [by_name[c] for c in escalate], chunk_size=chunk_size, max_workers=max_workers
+    )
+    exact["fill_rate_ci_low"] = exact["fill_rate"]
+    exact["fill_rate_ci_high"] = exact["fill_rate"]
+    exact["is_exact"] = True
+    return pd.concat([df[~df["column"].isin(escalate)], exact], ignore_index=True)
+
+
+def ensure_history_table(cur, history_table: str) -> None:
+    cur.execute(
+        f"""
+        CREATE TABLE IF NOT EXISTS {history_table} (
+          c1_day          DATE,
+          c1_entity_type  TEXT,
+          column_name     TEXT,
+          n_rows          NUMBER,
+          n_nonnull       NUMBER,
+          computed_at     TIMESTAMP_NTZ
+        )
+        CLUSTER BY (c1_day)
+        """
+    )
+
+
+def _build_daily_fill_insert(
+    stage_table: str, db: str, schema: str, view: str, cols: list[ColInfo], from_day: str | None
+) -> str:
+    """
+    INSERT de contagens por (dia de c1_created_at, c1_entity_type) para um chunk de colunas (UNPIVOT).
+    Linhas sem c1_created_at ficam no bucket c1_day NULL (recalculado a cada run), para o rollup overall
+    bater com o fill-rate exato; `from_day=None` recalcula todos os dias.
+    """
+    pieces = [f'COUNT_IF("{c.name}" IS NOT NULL) AS "NN__{c.name.upper()}"' for c in cols]
+    in_list = ", ".join(f'"NN__{c.name.upper()}"' for c in cols)
+    where = f"WHERE c1_created_at::DATE >= '{from_day}'::DATE OR c1_created_at IS NULL" if from_day else ""
+    counts_expr = ",\n          ".join(pieces)
+    return f"""
+    INSERT INTO {stage_table} (c1_day, c1_entity_type, column_name, n_rows, n_nonnull, computed_at)
     SELECT
-      '__all__' AS c1_entity_type,
-      COUNT(*)::NUMBER AS n,
-      {counts_expr}
-    FROM base
-    ;
+      c1_day,
+      c1_entity_type,
+      LOWER(REPLACE(column_name, 'NN__', '')) AS column_name,
+      n_rows,
+      n_nonnull,
+      CURRENT_TIMESTAMP()::TIMESTAMP_NTZ
+    FROM (
+      SELECT
+          c1_created_at::DATE AS c1_day,
+          c1_entity_type,
+          COUNT(*)::NUMBER AS n_rows,
+          {counts_expr}
+      FROM {db}.{schema}.{view}
+      {where}
+      GROUP BY 1, 2
+    ) UNPIVOT (n_nonnull FOR column_name IN ({in_list}))
     """
-    aliases = [f"nn__{i:03d}" for i in range(len(col_names))]
-    return sql, aliases
+
+
+def update_fill_history(
+    conn,
+    history_table: str,
+    db: str,
+    schema: str,
+    view: str,
+    cols: list[ColInfo],
+    lookback_days: int = 3,
+    chunk_size: int = 200,
+    max_workers: int = 4,
+) -> None:
+    """
+    Atualiza o histórico diário de fill-rate escaneando só os dias novos.
+
+    - watermark = MAX(c1_day) do histórico; re-calcula os últimos `lookback_days` dias antes dele
+      (dados atrasados / dia parcial), todos os dias posteriores e o bucket c1_day NULL;
+    - colunas da view ainda ausentes do histórico (ex.: adicionadas depois) são calculadas em todos os dias;
+    - chunks de colunas gravam em paralelo numa stage TRANSIENT; a troca (DELETE dos dias + INSERT)
+      é feita numa única transação, então o histórico nunca fica com dia parcial.
+    """
+    cur = conn.cursor()
+    ensure_history_table(cur, history_table)
+    cur.execute(f"SELECT MAX(c1_day) FROM {history_table}")
+    (watermark,) = cur.fetchone()
+    from_day = None
+    if watermark is not None:
+        from_day = (watermark - timedelta(days=int(lookback_days))).isoformat()
+    cur.execute(f"SELECT DISTINCT column_name FROM {history_table}")
+    known = {str(name).lower() for (name,) in cur.fetchall()}
+    new_cols = [c for c in cols if c.name.lower() not in known]
+    old_cols = [c for c in cols if c.name.lower() in known]
+    print("Histórico fill-rate:", history_table, "| recalculando a partir de:", from_day or "(início)")
+    if known and new_cols:
+        print(f"Colunas novas no histórico (backfill desde o início): {len(new_cols)}")
+
+    stage_table = f"{history_table}_STAGE"
+    cur.execute(f"CREATE OR REPLACE TRANSIENT TABLE {stage_table} LIKE {history_table}")
+
+    def run_chunk(task: tuple[list[ColInfo], str | None]) -> None:
+        chunk, chunk_from_day = task
+        with pooled_connection() as c:
+            cc = c.cursor()
+            try:
+                tag_query(cc, step="fill_history_chunk", first_col=chunk[0].name)
+                cc.execute(_build_daily_fill_insert(stage_table, db, schema, view, chunk, chunk_from_day))
+            finally:
+                cc.close()
+
+    tasks = [(ch, from_day) for _, ch in _chunks(old_cols, chunk_size)]
+    tasks += [(ch, None) for _, ch in _chunks(new_cols, chunk_size)]
+    reserve_pool_workers(min(int(max_workers), len(tasks)))
+    with ThreadPoolExecutor(max_workers=max(1, min(int(max_workers), len(tasks)))) as ex:
+        list(ex.map(run_chunk, tasks))
+
+    cur.execute("BEGIN")
+    try:
+        if from_day is not None:
+            cur.execute(f"DELETE FROM {history_table} WHERE c1_day >= '{from_day}'::DATE OR c1_day IS NULL")
+        cur.execute(f"INSERT INTO {history_table} SELECT * FROM {stage_table}")
+        cur.execute("COMMIT")
+    except Exception:
+        cur.execute("ROLLBACK")
+        raise
+    cur.execute(f"SELECT COUNT(DISTINCT c1_day) FROM {stage_table}")
+    (n_days,) = cur.fetchone()
+    print("Dias (re)calculados =", int(n_days))
+    cur.execute(f"DROP TABLE IF EXISTS {stage_table}")
+
+
+def rollup_fill_history(conn, history_table: str, window_days: int | None = None) -> pd.DataFrame:
+    """
+    Fill-rate overall (ou dos últimos `window_days` dias) a partir das contagens diárias:
+    SUM(n_nonnull) / SUM(n_rows) por coluna × entidade, com '__all__' via GROUPING SETS.
+    O bucket c1_day NULL (linhas sem c1_created_at) entra no overall e fica fora das janelas.
+    """
+    where = f"WHERE c1_day >= DATEADD('day', -{int(window_days)}, CURRENT_DATE())" if window_days else ""
+    cur = conn.cursor()
+    cur.execute(
+        f"""
+        SELECT
+          IFF(GROUPING(c1_entity_type) = 1, '__all__', c1_entity_type) AS c1_entity_type,
+          column_name AS "column",
+          SUM(n_rows)::NUMBER AS n_rows,
+          SUM(n_nonnull)::NUMBER AS n_nonnull
+        FROM {history_table}
+        {where}
+        GROUP BY GROUPING SETS ((c1_entity_type, column_name), (column_name))
+        """
+    )
+    df = cur.fetch_pandas_all()
+    df.columns = [c.lower() for c in df.columns]
+    df["n_rows"] = df["n_rows"].astype("int64")
+    df["n_nonnull"] = df["n_nonnull"].astype("int64")
+    df["fill_rate"] = (df["n_nonnull"] / df["n_rows"]).where(df["n_rows"] > 0)
+    return df
 
 
 def _md_table(df: pd.DataFrame, max_rows: int | None = None) -> str:
@@ -151,12 +515,61 @@ def main() -> int:
     ap.add_argument("--db", default="CAPIM_DATA_DEV")
     ap.add_argument("--schema", default="POSSANI_SANDBOX")
     ap.add_argument("--view", default="C1_ENRICHED_BORROWER")
+    ap.add_argument("--chunk-size", type=int, default=200, help="Máximo de colunas por query de fill-rate")
+    ap.add_argument("--max-workers", type=int, default=4, help="Chunks de colunas executados em paralelo")
+    ap.add_argument(
+        "--history",
+        action="store_true",
+        help="Atualiza o histórico diário (só dias novos) e calcula os fill-rates a partir dele (sem re-scan total)",
+    )
+    ap.add_argument(
+        "--history-table",
+        default="CAPIM_DATA_DEV.POSSANI_SANDBOX.C1_ENRICHED_BORROWER_FILL_RATE_DAILY",
+        help="Tabela (db.schema.tabela) do histórico diário de fill-rate",
+    )
+    ap.add_argument("--history-lookback-days", type=int, default=3, help="Dias antes do watermark recalculados a cada run")
+    ap.add_argument(
+        "--window-days",
+        type=int,
+        action="append",
+        default=None,
+        help="Com --history: também grava fill-rate dos últimos N dias (pode repetir)",
+    )
+    ap.add_argument(
+        "--approx",
+        action="store_true",
+        help="Fill-rate aproximado via SAMPLE nas tabelas enriched base, com intervalo de confiança (monitoramento diário)",
+    )
+    ap.add_argument("--approx-margin", type=float, default=0.01, help="Erro máximo alvo (±) do fill_rate no modo --approx")
+    ap.add_argument("--approx-confidence", type=float, default=0.95, help="Nível de confiança do intervalo no modo --approx")
+    ap.add_argument(
+        "--sample-method",
+        choices=["row", "block"],
+        default="row",
+        help="SAMPLE ROW (Bernoulli) ou BLOCK (mais barato; micro-partições inteiras) nas tabelas enriched base",
+    )
+    ap.add_argument(
+        "--alert-threshold",
+        type=float,
+        action="append",
+        default=None,
+        help="Threshold de alerta de fill_rate (pode repetir). Colunas cujo IC cruza o threshold são recontadas exato.",
+    )
+    add_profile_args(ap)
     args = ap.parse_args()
-
-    conn = get_snowflake_connection()
-    if conn is None:
+    init_profiler("report_c1_fill_rates", enabled=not args.no_profile)
+
+    try:
+        with pooled_connection() as conn:
+            try:
+                return build_report(args, conn)
+            finally:
+                report_profile(conn.cursor())
+    except ConnectionError:
         raise SystemExit("Falha ao conectar no Snowflake.")
 
+
+def build_report(args, conn) -> int:
     cols = _fetch_columns(conn, args.db, args.schema, args.view)
     if not cols:
         raise SystemExit(f"Nenhuma coluna encontrada para {args.db}.{args.schema}.{args.view}.")
@@ -175,35 +588,59 @@ def main() -> int:
     df_dict = pd.DataFrame(dict_rows)
 
     # fill rates
-    fill_sql, aliases = _build_fill_sql(args.db, args.schema, args.view, cols)
-    df_counts = pd.read_sql(fill_sql, conn)
-
-    # reshape to long
-    id_cols = ["C1_ENTITY_TYPE", "N"]
-    keep_cols = id_cols + [a.upper() for a in aliases]
-    df_counts = df_counts[keep_cols]
-
-    # map alias -> column
-    alias_to_col = {aliases[i].upper(): cols[i].name.lower() for i in range(len(cols))}
-    long_rows = []
-    for _, r in df_counts.iterrows():
-        entity = r["C1_ENTITY_TYPE"]
-        n = int(r["N"])
-        for a_upper, col in alias_to_col.items():
-            nn = int(r[a_upper])
-            long_rows.append(
-                {
-                    "c1_entity_type": entity,
-                    "column": col,
-                    "n_rows": n,
-                    "n_nonnull": nn,
-                    "fill_rate": (nn / n) if n else None,
-                }
-            )
-    df_fill = pd.DataFrame(long_rows).sort_values(["c1_entity_type", "fill_rate", "column"], ascending=[True, True, True])
+    if args.history:
+        update_fill_history(
+            conn,
+            args.history_table,
+            args.db,
+            args.schema,
+            args.view,
+            cols,
+            lookback_days=args.history_lookback_days,
+            chunk_size=args.chunk_size,
+            max_workers=args.max_workers,
+        )
+        df_fill = rollup_fill_history(conn, args.history_table)
+        for n_days in args.window_days or []:
+            out_win = Path("outputs") / f"c1_enriched_borrower_fill_rates_last{n_days}d.csv"
+            out_win.parent.mkdir(exist_ok=True)
+            rollup_fill_history(conn, args.history_table, window_days=n_days).sort_values(
+                ["c1_entity_type", "fill_rate", "column"]
+            ).to_csv(out_win, index=False)
+            print(f"Wrote: {out_win}")
+    elif args.approx:
+        df_fill = compute_fill_rates_approx(
+            conn,
+            args.db,
+            args.schema,
+            args.view,
+            cols,
+            margin=args.approx_margin,
+            confidence=args.approx_confidence,
+            thresholds=args.alert_threshold or [0.5],
+            sample_method=args.sample_method,
+            chunk_size=args.chunk_size,
+            max_workers=args.max_workers,
+        )
+    else:
+        df_fill = compute_fill_rates(
+            args.db, args.schema, args.view, cols, chunk_size=args.chunk_size, max_workers=args.max_workers
+        )
+    df_fill = df_fill.sort_values(["c1_entity_type", "fill_rate", "column"], ascending=[True, True, True])
 
     out_dir = Path("outputs")
     out_dir.mkdir(exist_ok=True)
+
+    if args.approx:
+        # Monitoramento: não sobrescreve o snapshot exato nem o dicionário em docs/.
+        out_approx = out_dir / "c1_enriched_borrower_fill_rates_approx.csv"
+        df_fill.to_csv(out_approx, index=False)
+        thresholds = args.alert_threshold or [0.5]
+        below = df_fill[(df_fill["c1_entity_type"] == "__all__") & (df_fill["fill_rate"] < min(thresholds))]
+        print(f"Colunas abaixo de {min(thresholds)} (__all__): {len(below)}")
+        print(f"Wrote: {out_approx}")
+        return 0
+
     out_csv = out_dir / "c1_enriched_borrower_fill_rates.csv"
     out_md = out_dir / "c1_enriched_borrower_dictionary.md"
     out_docs = Path("docs/reference")
@@ -286,7 +723,6 @@ def main() -> int:
     out_docs_md.write_text("\n".join(doc_lines), encoding="utf-8")
     print(f"Wrote: {out_docs_md}")
 
-    conn.close()
     print(f"Wrote: {out_csv}")
     print(f"Wrote: {out_md}")
     return 0
@@ -12,20 +12,49 @@ Uso:
 Observações:
   - Suporta múltiplos statements separados por ';' (com parser simples que respeita aspas).
   - Para statements sem result set (SET/DDL/DML), imprime apenas "OK".
+  - Result sets são lidos em streaming: o preview baixa só o necessário para `--max-rows`;
+    `--parquet-dir` grava o result set completo em Parquet sem carregar tudo em memória.
+  - `--parallel N`: statements sem dependência entre si (variáveis de sessão, tabelas temporárias,
+    CREATE/INSERT/USE) rodam ao mesmo tempo em até N sessões (`src/utils/parallel_sql.py`);
+    os `SET` (e overrides `--set`) são re-aplicados em cada sessão e a saída segue a ordem do arquivo.
+  - `--start-at N` re-aplica os `SET`/`USE` anteriores e recria sob demanda as tabelas temporárias
+    que os statements executados leem.
+  - `--checkpoint`: journal por statement (hash do SQL, query_id, status) em `src/utils/checkpoint.py`;
+    numa re-execução, statements concluídos e inalterados são pulados e o result set vem de `RESULT_SCAN`.
+  - Cada statement sai com `QUERY_TAG` (cli, arquivo, índice, run id); ao fim, métricas de
+    QUERY_HISTORY/GET_QUERY_OPERATOR_STATS vão para `outputs/query_profiles/` (`--no-profile` desliga).
+  - Scripts com marcadores `/*@scope ...*/` / `/*@sample ...*/` aceitam recorte tipado
+    (`--period-start/--period-end/--months/--sample-fraction/--sample-method/--seed`, ver
+    `src/utils/sql_template.py`); sem esses argumentos os marcadores somem e o script roda inteiro.
+  - SELECTs determinísticos usam o cache local (`src/utils/query_cache.py`), validado pelo LAST_ALTERED
+    das tabelas referenciadas; `--no-cache` força a execução.
 """
 
 from __future__ import annotations
 
 import argparse
+import time
 from dataclasses import dataclass
 from pathlib import Path
 from typing import Iterable, List, Optional
 
 import pandas as pd
-from snowflake.connector.errors import NotSupportedError
 import sys
-
-from src.utils.snowflake_connection import get_snowflake_connection
+from snowflake.connector.errors import ProgrammingError
+
+from src.utils.checkpoint import (
+    CheckpointJournal,
+    JournalEntry,
+    default_journal_path,
+    input_fingerprint,
+    statement_hash,
+)
+from src.utils.parallel_sql import StatementInfo, analyze_statements, run_parallel
+from src.utils.query_cache import get_query_cache
+from src.utils.query_profile import add_profile_args, init_profiler, report_profile, tag_query
+from src.utils.result_stream import fetch_preview, iter_arrow_batches, write_parquet_stream
+from src.utils.snowflake_connection import pooled_connection
+from src.utils.sql_template import add_scope_args, render_sql, scope_from_args, scope_markers
 
 
 @dataclass(frozen=True)
@@ -140,15 +169,220 @@ def _apply_sets(sets: Iterable[str]) -> List[str]:
     return stmts
 
 
-def _print_df(df: pd.DataFrame, max_rows: int) -> None:
+def _print_df(df: pd.DataFrame, max_rows: int, total_rows: Optional[int] = None) -> None:
+    total = len(df) if total_rows is None else total_rows
     if df.empty:
         print("(result set vazio)")
         return
-    if len(df) <= max_rows:
+    if total <= max_rows:
         print(df.to_string(index=False))
         return
     print(df.head(max_rows).to_string(index=False))
-    print(f"... ({len(df)} linhas no total; mostrando {max_rows})")
+    print(f"... ({total} linhas no total; mostrando {max_rows})")
+
+
+def _print_header(st: Statement, n_total: int, sql_path: Path, print_sql: bool) -> None:
+    print("\n" + "=" * 90)
+    print(f"[statement {st.idx}/{n_total}] {sql_path}")
+    if print_sql:
+        print(st.sql)
+
+
+def _emit_cached(lookup, max_rows: int) -> None:
+    print("(cache local: tabelas referenciadas sem alteração)")
+    table, total_rows = lookup.preview(max_rows)
+    _print_df(table.to_pandas(), max_rows=max_rows, total_rows=total_rows)
+
+
+def _emit_result(cur, idx: int, lookup, cache, args) -> None:
+    """Imprime/grava o result set corrente do cursor (preview, cache local ou Parquet)."""
+    if cur.description is None:
+        print("OK (sem result set)")
+        return
+
+    if lookup is not None and lookup.cacheable and 0 <= cur.rowcount <= cache.max_rows_per_entry:
+        # grava no cache em streaming (batch a batch); em memória fica só o preview
+        preview, total_rows = cache.store_stream(lookup, iter_arrow_batches(cur, max_batch_rows=100_000), args.max_rows)
+        if preview is None:
+            print("(result set vazio)")
+        else:
+            _print_df(preview.to_pandas(), max_rows=args.max_rows, total_rows=total_rows)
+        return
+
+    if args.parquet_dir:
+        out_dir = Path(args.parquet_dir) / f"statement_{idx:03d}"
+        n = write_parquet_stream(iter_arrow_batches(cur, max_batch_rows=100_000), out_dir)
+        print(f"Parquet: {n} linhas escritas em {out_dir}")
+        return
+
+    # Preview: baixa só os chunks necessários para `--max-rows` linhas.
+    df, total_rows = fetch_preview(cur, max_rows=args.max_rows)
+    _print_df(df, max_rows=args.max_rows, total_rows=total_rows)
+
+
+def _is_session_stmt(sql: str) -> bool:
+    return analyze_statements([(0, sql)])[0][0].session
+
+
+def _run_sequential(
+    conn,
+    all_stmts: List[Statement],
+    start_at: int,
+    end_at_exclusive: Optional[int],
+    n_total: int,
+    sql_path: Path,
+    cache,
+    args,
+    journal: Optional[CheckpointJournal],
+) -> int:
+    """
+    Execução em série na sessão principal.
+
+    - statements antes de `--start-at`: `SET`/`USE`/`ALTER SESSION` são re-aplicados; criações de
+      tabela TEMPORARY ficam adiadas e só rodam se algum statement executado depois as ler;
+    - com journal: statements concluídos antes (mesmo hash + mesmo LAST_ALTERED das entradas) são
+      pulados, com o result set lido de `RESULT_SCAN(query_id)` — exceto o antecessor de um statement com
+      LAST_QUERY_ID/RESULT_SCAN, que sempre re-executa (idem para o cache local).
+    """
+    cur = conn.cursor()
+    infos, _ = analyze_statements([(st.idx, st.sql) for st in all_stmts])
+    deferred: List[StatementInfo] = []
+
+    def run_deferred(names: set) -> None:
+        for d in list(deferred):
+            if d in deferred and d.writes & names:
+                deferred.remove(d)
+                run_deferred(d.reads - d.writes)
+                print(f"(recriando tabela temporária do statement {d.idx})")
+                cur.execute(d.sql)
+
+    for k, info in enumerate(infos):
+        # LAST_QUERY_ID/RESULT_SCAN no próximo statement: nenhuma query auxiliar (tag, cache, checkpoint)
+        # pode rodar na sessão entre este statement e o próximo, e este precisa de fato executar
+        # (sem hit de cache nem reuso de checkpoint), senão o próximo lê o query_id errado
+        next_history = k + 1 < len(infos) and infos[k + 1].history
+        if end_at_exclusive is not None and info.idx > end_at_exclusive:
+            break
+        if info.idx < start_at:
+            if info.session:
+                cur.execute(info.sql)
+            elif info.temp:
+                deferred.append(info)
+            continue
+
+        _print_header(Statement(info.idx, info.sql), n_total, sql_path, args.print_sql)
+
+        sql_hash = None
+        if journal is not None and not info.session and not info.history:
+            sql_hash = statement_hash(cur, info.sql)
+            entry = None if next_history else journal.reusable(info.idx, sql_hash, lambda: input_fingerprint(cur, info.sql))
+            if entry is not None and info.temp:
+                print("(checkpoint: concluído antes; tabela temporária só será recriada se necessária)")
+                deferred.append(info)
+                journal.record(entry)
+                continue
+            if entry is not None and not entry.has_result:
+                print(f"(checkpoint: concluído antes, query_id={entry.query_id}; pulado)")
+                journal.record(entry)
+                continue
+            if entry is not None:
+                try:
+                    cur.execute(f"SELECT * FROM TABLE(RESULT_SCAN('{entry.query_id}'))")
+                except ProgrammingError:
+                    print("(checkpoint: RESULT_SCAN indisponível; re-executando)")
+                else:
+                    print(f"(checkpoint: resultado via RESULT_SCAN, query_id={entry.query_id})")
+                    _emit_result(cur, info.idx, None, None, args)
+                    journal.record(entry)
+                    continue
+
+        run_deferred(info.reads)
+
+        lookup = cache.lookup(cur, info.sql) if cache is not None and not info.session and not next_history else None
+        if lookup is not None and lookup.hit:
+            _emit_cached(lookup, args.max_rows)
+            continue
+
+        try:
+            if not info.history:
+                tag_query(cur, file=str(sql_path), stmt=info.idx)
+            cur.execute(info.sql)
+        except ProgrammingError as e:
+            print(f"ERRO no statement {info.idx}: {e}")
+            if journal is not None and sql_hash is not None:
+                journal.record(JournalEntry(info.idx, sql_hash, getattr(e, "sfqid", None), "failed", False, None))
+            return 1
+        query_id = cur.sfqid
+        has_result = cur.description is not None
+        _emit_result(cur, info.idx, lookup, cache, args)
+        if journal is not None and sql_hash is not None:
+            journal.record(
+                JournalEntry(
+                    info.idx, sql_hash, query_id, "done", has_result, None if next_history else input_fingerprint(cur, info.sql)
+                )
+            )
+    return 0
+
+
+def _run_parallel(conn, selected: List[Statement], n_total: int, sql_path: Path, override_stmts, cache, args) -> int:
+    """`--parallel N`: statements independentes em até N sessões; saída na ordem do arquivo."""
+    infos, parallelizable = analyze_statements([(st.idx, st.sql) for st in selected])
+    if not parallelizable:
+        print("Script com transação explícita (BEGIN/COMMIT): executando em série na sessão principal.")
+        for s in infos:
+            s.pinned = True
+            s.deps = [x.idx for x in infos if x.idx < s.idx]
+
+    n_indep = sum(1 for s in infos if not s.deps and not s.session)
+    print(f"--parallel {args.parallel}: {len(infos)} statements, {n_indep} sem dependências")
+    lookups = {}
+    # antecessor de LAST_QUERY_ID/RESULT_SCAN: precisa executar de fato na sessão (sem hit de cache)
+    before_history = {infos[j - 1].idx for j in range(1, len(infos)) if infos[j].history}
+
+    def before_submit(info: StatementInfo, cur) -> bool:
+        if info.history:
+            return False
+        tag_query(cur, file=str(sql_path), stmt=info.idx)
+        if cache is None or info.session or info.idx in before_history:
+            return False
+        lookup = cache.lookup(cur, info.sql)
+        lookups[info.idx] = lookup
+        if lookup.hit:
+            info.result = lookup
+            return True
+        return False
+
+    def on_result(info: StatementInfo, cur) -> None:
+        _print_header(Statement(info.idx, info.sql), n_total, sql_path, args.print_sql)
+        if info.session:
+            print("OK (sem result set)")
+            return
+        if info.result is not None:
+            _emit_cached(info.result, args.max_rows)
+            return
+        print(f"(sessão {info.worker}, {round(info.elapsed, 1)}s, query_id={info.query_id})")
+        _emit_result(cur, info.idx, lookups.get(info.idx), cache, args)
+
+    t0 = time.time()
+    run_parallel(
+        conn,
+        infos,
+        n_workers=args.parallel,
+        preamble=override_stmts,
+        on_result=on_result,
+        before_submit=before_submit,
+    )
+    failed = [s for s in infos if s.status == "failed"]
+    print("\n" + "=" * 90)
+    print(f"Tempo total (s) = {round(time.time() - t0, 2)}; soma das queries (s) = {round(sum(s.elapsed for s in infos), 2)}")
+    if failed:
+        s = failed[0]
+        print(f"ERRO no statement {s.idx}: {s.error}")
+        skipped = [x.idx for x in infos if x.status == "skipped"]
+        if skipped:
+            print("Não executados:", ", ".join(map(str, skipped)))
+        return 1
+    return 0
 
 
 def main() -> int:
@@ -159,7 +393,32 @@ def main() -> int:
     parser.add_argument("--set", action="append", default=[], help="Override de variáveis de sessão: NAME=VALUE (pode repetir)")
     parser.add_argument("--print-sql", action="store_true", help="Imprime o SQL de cada statement antes de executar")
     parser.add_argument("--max-rows", type=int, default=40, help="Máximo de linhas para imprimir por result set")
+    parser.add_argument(
+        "--parquet-dir",
+        default=None,
+        help="Se setado, grava cada result set completo em Parquet (streaming) em DIR/statement_NNN/ em vez de imprimir",
+    )
+    parser.add_argument("--no-cache", action="store_true", help="Ignora o cache local de resultados (não lê nem grava)")
+    parser.add_argument(
+        "--parallel",
+        type=int,
+        default=1,
+        help="Executa statements independentes em até N sessões (queries assíncronas); saída na ordem do arquivo",
+    )
+    parser.add_argument(
+        "--checkpoint",
+        nargs="?",
+        const="",
+        default=None,
+        help="Grava journal de checkpoint (padrão: .cache/run_sql_file/); re-execuções pulam statements já concluídos e inalterados",
+    )
+    parser.add_argument("--checkpoint-reset", action="store_true", help="Ignora o journal anterior (começa do zero)")
+    add_scope_args(parser)
+    add_profile_args(parser)
     args = parser.parse_args()
+    init_profiler("run_sql_file", enabled=not args.no_profile)
+    if args.checkpoint is not None and args.parallel > 1:
+        parser.error("--checkpoint ainda não é suportado junto com --parallel")
 
     # Windows/PowerShell às vezes usa cp1252 e quebra com Unicode.
     # Deixamos a saída resiliente para não interromper execuções longas.
@@ -170,6 +429,13 @@ def main() -> int:
 
     sql_path = Path(args.file)
     sql_text = sql_path.read_text(encoding="utf-8")
+    scope = scope_from_args(args)
+    if scope_markers(sql_text):
+        sql_text = render_sql(sql_text, scope)
+        if scope.describe():
+            print("Recorte:", scope.describe())
+    elif scope.describe():
+        parser.error(f"{sql_path} não tem marcadores @scope/@sample para aplicar o recorte")
     statements = _split_sql_statements(sql_text)
 
     start_at = max(1, int(args.start_at))
@@ -179,49 +445,47 @@ def main() -> int:
 
     # Overrides via SET antes de tudo
     override_stmts = _apply_sets(args.set)
-
-    conn = get_snowflake_connection()
-    if conn is None:
-        return 2
+    cache = None if (args.no_cache or args.parquet_dir) else get_query_cache()
 
     try:
-        cur = conn.cursor()
-
-        # Aplica overrides
-        for s in override_stmts:
-            cur.execute(s)
-
-        for idx0, stmt in enumerate(statements, start=1):
-            if idx0 < start_at:
-                continue
-            if end_at_exclusive is not None and idx0 > end_at_exclusive:
-                break
-
-            sql_stmt = stmt.strip()
-            if not sql_stmt:
-                continue
-
-            print("\n" + "=" * 90)
-            print(f"[statement {idx0}/{len(statements)}] {sql_path}")
-            if args.print_sql:
-                print(sql_stmt)
-
-            cur.execute(sql_stmt)
-            if cur.description is None:
-                print("OK (sem result set)")
-                continue
-
-            try:
-                df = cur.fetch_pandas_all()
-            except NotSupportedError:
-                rows = cur.fetchall()
-                cols = [d[0] for d in (cur.description or [])]
-                df = pd.DataFrame(rows, columns=cols)
-            _print_df(df, max_rows=args.max_rows)
-
-        return 0
-    finally:
-        conn.close()
+        with pooled_connection() as conn:
+            cur = conn.cursor()
+
+            # Aplica overrides
+            for s in override_stmts:
+                cur.execute(s)
+
+            all_stmts = [Statement(idx=i, sql=stmt.strip()) for i, stmt in enumerate(statements, start=1) if stmt.strip()]
+            selected = [
+                st
+                for st in all_stmts
+                if st.idx >= start_at and (end_at_exclusive is None or st.idx <= end_at_exclusive)
+            ]
+
+            if args.parallel > 1:
+                # Estado de sessão anterior ao --start-at entra no preâmbulo de todas as sessões.
+                pre = [st.sql for st in all_stmts if st.idx < start_at and _is_session_stmt(st.sql)]
+                for s in pre:
+                    cur.execute(s)
+                status = _run_parallel(conn, selected, len(statements), sql_path, override_stmts + pre, cache, args)
+                report_profile(cur)
+                return status
+
+            journal = None
+            if args.checkpoint is not None:
+                journal = CheckpointJournal(args.checkpoint or default_journal_path(sql_path))
+                if not args.checkpoint_reset:
+                    journal.load()
+                print(f"Checkpoint: {journal.path}" + (" (retomando execução anterior)" if journal.resuming else ""))
+                journal.start(str(sql_path))
+
+            status = _run_sequential(conn, all_stmts, start_at, end_at_exclusive, len(statements), sql_path, cache, args, journal)
+            if journal is not None:
+                journal.end("ok" if status == 0 else "failed")
+            report_profile(cur)
+            return status
+    except ConnectionError:
+        return 2
 
 
 if __name__ == "__main__":
@@ -0,0 +1,267 @@
+"""
+Suite de validação: roda os arquivos de `queries/validate/` em paralelo e consolida um relatório.
+
+Motivação:
+  - as validações são independentes, mas rodavam uma a uma (Worksheet / `run_sql_file`);
+    depois de uma materialização, conferir tudo levava a tarde.
+
+Como funciona:
+  - descobre os `.sql` (`--glob`, `--only`, `--exclude`);
+  - cada arquivo roda numa sessão própria (os scripts usam `SET`), em até `--workers` ao mesmo tempo,
+    com `STATEMENT_TIMEOUT_IN_SECONDS` por query (`--timeout` ou `@timeout` no cabeçalho);
+  - limites declarados no cabeçalho do arquivo (comentário), avaliados sobre o result set do statement N
+    (numeração 1-based do arquivo, como no `run_sql_file`):
+        @assert 1 max(n_duplicate_rows) == 0
+        @assert 2 rows == 0
+        @assert 3 min(pct_match) >= 0.95
+        @timeout 900
+    agregações: rows | max | min | sum | avg (colunas case-insensitive; NULLs ignorados);
+  - status por arquivo: pass | fail (algum @assert falhou) | error | timeout | unchecked (rodou, mas sem
+    @assert: nada foi verificado — diagnósticos exploratórios; o resumo lista esses arquivos à parte);
+  - relatório JSON em `outputs/validation/validation_<run_id>.json` (asserts, tempos, query ids,
+    prévia dos result sets) + resumo no console; código de saída 1 se houver fail/error/timeout
+    (ou unchecked, com `--fail-unchecked`).
+
+Uso:
+  python -m src.cli.run_validation_suite --workers 6
+  python -m src.cli.run_validation_suite --only validate_c1_official_sanity,validate_n8n_coverage
+  python -m src.cli.run_validation_suite --fail-unchecked   # CI: todo arquivo precisa declarar limites
+"""
+
+from __future__ import annotations
+
+import argparse
+import io
+import json
+import operator
+import re
+import sys
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from snowflake.connector.errors import ProgrammingError
+
+from src.utils.query_profile import add_profile_args, init_profiler, report_profile, tag_query
+from src.utils.snowflake_connection import get_snowflake_connection, pooled_connection
+
+_ASSERT = re.compile(
+    r"@assert\s+(\d+)\s+(rows|(max|min|sum|avg)\((\w+)\))\s*(==|!=|<=|>=|<|>)\s*(-?[\d.]+)",
+    re.IGNORECASE,
+)
+_TIMEOUT = re.compile(r"@timeout\s+(\d+)", re.IGNORECASE)
+_OPS = {"==": operator.eq, "!=": operator.ne, "<=": operator.le, ">=": operator.ge, "<": operator.lt, ">": operator.gt}
+_TIMEOUT_ERRNOS = {604, 630}  # statement / warehouse timeout
+
+
+@dataclass
+class Assertion:
+    stmt: int
+    expr: str
+    agg: str  # rows | max | min | sum | avg
+    column: Optional[str]
+    op: str
+    value: float
+    observed: Optional[float] = None
+    passed: Optional[bool] = None
+    detail: Optional[str] = None
+
+
+@dataclass
+class FileResult:
+    file: str
+    status: str = "pending"  # pass | fail | error | timeout | unchecked
+    elapsed_s: float = 0.0
+    timeout_s: int = 0
+    statements: int = 0
+    query_ids: List[str] = field(default_factory=list)
+    assertions: List[Assertion] = field(default_factory=list)
+    previews: Dict[int, List[Dict[str, object]]] = field(default_factory=dict)
+    error: Optional[str] = None
+
+
+def parse_header(sql: str) -> tuple[List[Assertion], Optional[int]]:
+    """@assert / @timeout declarados no arquivo (em comentários)."""
+    asserts = [
+        Assertion(
+            stmt=int(m.group(1)),
+            expr=m.group(0)[len("@assert") :].strip(),
+            agg=(m.group(3) or "rows").lower(),
+            column=m.group(4),
+            op=m.group(5),
+            value=float(m.group(6)),
+        )
+        for m in _ASSERT.finditer(sql)
+    ]
+    t = _TIMEOUT.search(sql)
+    return asserts, int(t.group(1)) if t else None
+
+
+def _observe(a: Assertion, cols: List[str], rows: List[tuple]) -> Optional[float]:
+    if a.agg == "rows":
+        return float(len(rows))
+    upper = [c.upper() for c in cols]
+    if (a.column or "").upper() not in upper:
+        raise KeyError(f"coluna {a.column} não está no result set ({', '.join(cols[:12])})")
+    i = upper.index(a.column.upper())
+    vals = [float(r[i]) for r in rows if r[i] is not None]
+    if a.agg == "sum":
+        return float(sum(vals))
+    if not vals:
+        return None
+    return {"max": max, "min": min, "avg": lambda v: sum(v) / len(v)}[a.agg](vals)
+
+
+def evaluate(a: Assertion, cols: Optional[List[str]], rows: Optional[List[tuple]]) -> None:
+    if cols is None:
+        a.passed, a.detail = False, "statement sem result set (ou não executado)"
+        return
+    try:
+        a.observed = _observe(a, cols, rows or [])
+    except KeyError as e:
+        a.passed, a.detail = False, str(e)
+        return
+    if a.observed is None:
+        a.passed, a.detail = False, "sem valores não-nulos"
+        return
+    a.passed = bool(_OPS[a.op](a.observed, a.value))
+
+
+def run_file(path: Path, default_timeout: int, preview_rows: int) -> FileResult:
+    sql = path.read_text(encoding="utf-8")
+    asserts, header_timeout = parse_header(sql)
+    res = FileResult(file=str(path), timeout_s=int(header_timeout or default_timeout), assertions=asserts)
+    wanted = {a.stmt for a in asserts}
+    results: Dict[int, tuple[List[str], List[tuple]]] = {}
+
+    conn = get_snowflake_connection()
+    if conn is None:
+        res.status, res.error = "error", "falha ao conectar no Snowflake"
+        return res
+    t0 = time.time()
+    try:
+        cur = conn.cursor()
+        cur.execute(f"ALTER SESSION SET STATEMENT_TIMEOUT_IN_SECONDS = {res.timeout_s}")
+        tag_query(cur, file=str(path))
+        for i, c in enumerate(conn.execute_stream(io.StringIO(sql)), start=1):
+            res.statements = i
+            if c.sfqid:
+                res.query_ids.append(c.sfqid)
+            if c.description is None:
+                continue
+            cols = [d[0] for d in c.description]
+            rows = c.fetchall() if i in wanted else c.fetchmany(preview_rows)
+            results[i] = (cols, rows)
+            res.previews[i] = [dict(zip(cols, r)) for r in rows[:preview_rows]]
+    except ProgrammingError as e:
+        res.status = "timeout" if getattr(e, "errno", None) in _TIMEOUT_ERRNOS else "error"
+        res.error = str(e)[:500]
+    finally:
+        res.elapsed_s = round(time.time() - t0, 2)
+        try:
+            conn.close()
+        except Exception:
+            pass
+
+    for a in asserts:
+        cols, rows = results.get(a.stmt, (None, None))
+        evaluate(a, cols, rows)
+    if res.status == "pending":
+        if not asserts:
+            res.status = "unchecked"
+        else:
+            res.status = "pass" if all(a.passed for a in asserts) else "fail"
+    return res
+
+
+def discover(root: str, pattern: str, only: List[str], exclude: List[str]) -> List[Path]:
+    files = sorted(Path(root).glob(pattern))
+    if only:
+        files = [f for f in files if f.stem in only or f.name in only]
+    return [f for f in files if f.stem not in exclude and f.name not in exclude]
+
+
+def _csv(value: Optional[str]) -> List[str]:
+    return [v.strip() for v in (value or "").split(",") if v.strip()]
+
+
+def main() -> int:
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--root", default="queries/validate", help="Diretório dos arquivos de validação")
+    ap.add_argument("--glob", default="*.sql", help="Padrão dos arquivos (relativo a --root)")
+    ap.add_argument("--only", default=None, help="Lista de arquivos (stem ou nome), separados por vírgula")
+    ap.add_argument("--exclude", default=None, help="Arquivos a ignorar (stem ou nome), separados por vírgula")
+    ap.add_argument("--workers", type=int, default=4, help="Arquivos rodando ao mesmo tempo (1 sessão cada)")
+    ap.add_argument("--timeout", type=int, default=1800, help="Timeout por query (s), se o arquivo não declarar @timeout")
+    ap.add_argument("--preview-rows", type=int, default=20, help="Linhas de cada result set guardadas no relatório")
+    ap.add_argument("--out-dir", default="outputs/validation", help="Diretório do relatório JSON")
+    ap.add_argument("--fail-unchecked", action="store_true", help="Arquivos sem @assert também contam como falha")
+    add_profile_args(ap)
+    args = ap.parse_args()
+    init_profiler("validation_suite", enabled=not args.no_profile)
+
+    try:
+        sys.stdout.reconfigure(encoding="utf-8", errors="replace")  # type: ignore[attr-defined]
+    except Exception:
+        pass
+
+    files = discover(args.root, args.glob, _csv(args.only), _csv(args.exclude))
+    if not files:
+        raise SystemExit(f"Nenhum arquivo em {args.root}/{args.glob}.")
+    run_id = uuid.uuid4().hex[:12]
+    print(f"Suite de validação: {len(files)} arquivos, {args.workers} workers (run_id={run_id})")
+
+    t0 = time.time()
+    results: List[FileResult] = []
+    with ThreadPoolExecutor(max_workers=max(1, min(int(args.workers), len(files)))) as ex:
+        futures = [ex.submit(run_file, f, args.timeout, args.preview_rows) for f in files]
+        for fut in futures:
+            r = fut.result()
+            results.append(r)
+            print(f"  [{r.status:<9}] {Path(r.file).name:<60} {r.elapsed_s:>8}s")
+    wall = time.time() - t0
+
+    counts: Dict[str, int] = {}
+    for r in results:
+        counts[r.status] = counts.get(r.status, 0) + 1
+    out_dir = Path(args.out_dir)
+    out_dir.mkdir(parents=True, exist_ok=True)
+    out_path = out_dir / f"validation_{run_id}.json"
+    report = {
+        "run_id": run_id,
+        "started_at": time.strftime("%Y-%m-%dT%H:%M:%S", time.localtime(t0)),
+        "wall_s": round(wall, 2),
+        "sum_file_s": round(sum(r.elapsed_s for r in results), 2),
+        "counts": counts,
+        "files": [asdict(r) for r in results],
+    }
+    out_path.write_text(json.dumps(report, indent=2, default=str, ensure_ascii=False), encoding="utf-8")
+
+    print("\n" + "=" * 90)
+    print(f"Tempo total (s) = {round(wall, 1)} (soma dos arquivos = {report['sum_file_s']})")
+    print("Status:", ", ".join(f"{k}={v}" for k, v in sorted(counts.items())))
+    for r in results:
+        for a in r.assertions:
+            if not a.passed:
+                print(f"  FAIL {Path(r.file).name}: {a.expr} (observado={a.observed}{'; ' + a.detail if a.detail else ''})")
+        if r.error:
+            print(f"  {r.status.upper()} {Path(r.file).name} (após o statement {r.statements}): {r.error[:200]}")
+    unchecked = [Path(r.file).name for r in results if r.status == "unchecked"]
+    if unchecked:
+        print(f"  UNCHECKED ({len(unchecked)} arquivos sem @assert; só executados, nada verificado): {', '.join(unchecked)}")
+    print("Relatório:", out_path)
+
+    try:
+        with pooled_connection() as conn:
+            report_profile(conn.cursor())
+    except ConnectionError:
+        pass
+    failing = {"fail", "error", "timeout"} | ({"unchecked"} if args.fail_unchecked else set())
+    return 1 if any(r.status in failing for r in results) else 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
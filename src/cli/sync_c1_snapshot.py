@@ -0,0 +1,72 @@
+"""
+Sincroniza o snapshot local do `C1_ENRICHED_BORROWER` (Arrow IPC memory-mapped; ver `src/utils/c1_snapshot.py`).
+
+O primeiro sync (ou `--full`) carrega todas as partições (`c1_entity_type` x mês); os seguintes trazem só as
+linhas com `c1_created_at` ou update nas tabelas enriched (`cs_updated_at` da CS, `pa_updated_at` da PA)
+posteriores aos watermarks do último sync, e recarregam partições cuja contagem divergir do Snowflake.
+
+Uso:
+  python -m src.cli.sync_c1_snapshot
+  python -m src.cli.sync_c1_snapshot --columns c1_entity_type,c1_entity_id,c1_created_at,clinic_id,risk_capim
+  python -m src.cli.sync_c1_snapshot --full --workers 8
+
+No notebook:
+  from src.utils.c1_snapshot import load_snapshot
+  df = load_snapshot(columns=["clinic_id", "c1_outcome_bucket"], start_month="2025-01").to_pandas()
+"""
+
+from __future__ import annotations
+
+import argparse
+
+from src.utils.c1_snapshot import DEFAULT_ROOT, SnapshotSource, sync_snapshot
+from src.utils.query_profile import add_profile_args, init_profiler, report_profile
+from src.utils.snowflake_connection import pooled_connection
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--schema", default="CAPIM_DATA_DEV.POSSANI_SANDBOX", help="Schema da view C1 e das tabelas enriched")
+    ap.add_argument("--view", default="C1_ENRICHED_BORROWER", help="View C1 (nome sem schema)")
+    ap.add_argument("--root", default=DEFAULT_ROOT, help="Diretório do snapshot")
+    ap.add_argument("--columns", default=None,
+                    help="Projeção (vírgula); chaves e c1_created_at entram sempre. Mudar a projeção refaz o snapshot.")
+    ap.add_argument("--lookback-days", type=int, default=0,
+                    help="Relê também linhas com c1_created_at até N dias antes do watermark (re-enrichments tardios)")
+    ap.add_argument("--full", action="store_true", help="Recarrega o snapshot inteiro")
+    ap.add_argument("--no-verify", action="store_true", help="Pula a conferência de COUNT(*) por partição")
+    ap.add_argument("--workers", type=int, default=4, help="Partições lidas em paralelo (conexões do pool)")
+    ap.add_argument("--chunk-size-mb", type=int, default=None, help="CLIENT_RESULT_CHUNK_SIZE")
+    add_profile_args(ap)
+    args = ap.parse_args()
+    init_profiler("sync_c1_snapshot", enabled=not args.no_profile)
+
+    columns = [c.strip() for c in args.columns.split(",") if c.strip()] if args.columns else None
+    src = SnapshotSource.from_schema(args.schema, args.view)
+    try:
+        with pooled_connection() as conn:
+            try:
+                summary = sync_snapshot(
+                    conn.cursor(),
+                    src,
+                    root=args.root,
+                    columns=columns,
+                    lookback_days=args.lookback_days,
+                    full=args.full,
+                    verify=not args.no_verify,
+                    workers=args.workers,
+                    chunk_size_mb=args.chunk_size_mb,
+                )
+            finally:
+                report_profile(conn.cursor())
+    except ConnectionError:
+        raise SystemExit("Falha ao conectar no Snowflake.")
+
+    print("\n" + "=" * 90)
+    print(f"Snapshot {args.root} ({summary['mode']}): {summary['partitions']} partições, {summary['rows']} linhas")
+    print(f"Linhas lidas do Snowflake = {summary['rows_fetched']}")
+    print(f"Tempo total (s) = {summary['elapsed_s']}")
+
+
+if __name__ == "__main__":
+    main()
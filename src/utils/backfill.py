@@ -0,0 +1,267 @@
+"""
+Backfill particionado por mês (janelas de created_at) usando queries assíncronas do Snowflake.
+
+Motivação:
+  - O CTAS monolítico do enrichment faz os range joins (CPF+tempo) sobre todo o histórico
+    de uma vez e costuma "spillar". Janelas mensais menores podam micro-partições e cabem em memória.
+
+Fluxo:
+  1) cada mês vira um CTAS em uma tabela TRANSIENT `<final>_BF_YYYYMM` (submetido via execute_async);
+  2) no máximo `max_concurrency` janelas rodam ao mesmo tempo; janelas com erro são re-submetidas
+     até `max_retries` vezes;
+  3) as janelas concluídas são montadas na tabela final (CTAS UNION ALL, ou DELETE+INSERT dos meses
+     quando o backfill é parcial) e as tabelas de janela são removidas;
+     com `dedupe_key`, a montagem mantém 1 linha por chave (a mesma entidade pode cair em duas janelas,
+     ex.: PA com versões de created_at em meses diferentes); no parcial, `dedupe_guard` decide entre a
+     linha da janela e a já existente na tabela final (fora dos meses) com a mesma chave;
+  4) se alguma janela falhar, a tabela final não é alterada e o processo sai com erro (lista dos meses).
+"""
+
+from __future__ import annotations
+
+import argparse
+import time
+from dataclasses import dataclass
+from datetime import date
+from typing import Callable, List, Optional, Sequence
+
+from snowflake.connector.errors import ProgrammingError
+
+from src.utils.query_profile import tag_query
+
+
+@dataclass
+class WindowJob:
+    month: date
+    table: str
+    sql: str
+    attempts: int = 0
+    query_id: Optional[str] = None
+    t_submit: float = 0.0
+    elapsed: float = 0.0
+    status: str = "pending"  # pending | running | done | failed
+    error: Optional[str] = None
+
+
+def add_backfill_args(ap: argparse.ArgumentParser) -> None:
+    ap.add_argument(
+        "--backfill",
+        action="store_true",
+        help="Backfill particionado por mês (CTAS por janela via queries assíncronas) em vez do CTAS monolítico.",
+    )
+    ap.add_argument("--backfill-from", default=None, help="Primeiro mês do backfill (YYYY-MM). Padrão: mês mais antigo da fonte.")
+    ap.add_argument("--backfill-to", default=None, help="Último mês do backfill (YYYY-MM). Padrão: mês mais recente da fonte.")
+    ap.add_argument("--max-concurrency", type=int, default=4, help="Máximo de janelas rodando ao mesmo tempo.")
+    ap.add_argument("--max-retries", type=int, default=2, help="Re-tentativas por janela com erro.")
+
+
+def parse_month(value: str) -> date:
+    """'YYYY-MM' (ou 'YYYY-MM-DD') -> primeiro dia do mês."""
+    parts = value.strip().split("-")
+    if len(parts) < 2:
+        raise ValueError(f"Mês inválido: {value!r} (use YYYY-MM)")
+    return date(int(parts[0]), int(parts[1]), 1)
+
+
+def month_starts(first: date, last: date) -> List[date]:
+    out: List[date] = []
+    y, m = first.year, first.month
+    while (y, m) <= (last.year, last.month):
+        out.append(date(y, m, 1))
+        m += 1
+        if m > 12:
+            y, m = y + 1, 1
+    return out
+
+
+def source_month_range(cur, source_table: str, ts_col: str) -> tuple[date, date]:
+    cur.execute(
+        f"SELECT DATE_TRUNC('month', MIN({ts_col}))::DATE, DATE_TRUNC('month', MAX({ts_col}))::DATE FROM {source_table}"
+    )
+    lo, hi = cur.fetchone()
+    if lo is None or hi is None:
+        raise SystemExit(f"Nenhuma linha em {source_table} para definir as janelas do backfill.")
+    return lo, hi
+
+
+def run_async_windows(
+    conn,
+    jobs: List[WindowJob],
+    max_concurrency: int = 4,
+    max_retries: int = 2,
+    poll_seconds: float = 5.0,
+) -> List[WindowJob]:
+    """Submete os CTAS de janela via execute_async, limitando concorrência e re-tentando falhas."""
+    pending = list(jobs)
+    running: List[WindowJob] = []
+
+    while pending or running:
+        while pending and len(running) < max(1, int(max_concurrency)):
+            job = pending.pop(0)
+            cur = conn.cursor()
+            tag_query(cur, step="backfill", window=f"{job.month:%Y-%m}", attempt=job.attempts + 1)
+            cur.execute_async(job.sql)
+            job.query_id = cur.sfqid
+            job.attempts += 1
+            job.t_submit = time.time()
+            job.status = "running"
+            running.append(job)
+            print(f"[backfill] submit {job.month:%Y-%m} (tentativa {job.attempts}) query_id={job.query_id}")
+
+        time.sleep(poll_seconds)
+
+        still_running: List[WindowJob] = []
+        for job in running:
+            status = conn.get_query_status(job.query_id)
+            if conn.is_still_running(status):
+                still_running.append(job)
+                continue
+            job.elapsed = time.time() - job.t_submit
+            if conn.is_an_error(status):
+                try:
+                    conn.get_query_status_throw_if_error(job.query_id)
+                except ProgrammingError as e:
+                    job.error = str(e)
+                if job.attempts <= max_retries:
+                    print(f"[backfill] erro em {job.month:%Y-%m}; re-submetendo. ({job.error})")
+                    job.status = "pending"
+                    pending.append(job)
+                else:
+                    print(f"[backfill] FALHOU {job.month:%Y-%m} após {job.attempts} tentativas. ({job.error})")
+                    job.status = "failed"
+            else:
+                job.status = "done"
+                print(f"[backfill] ok {job.month:%Y-%m} em {round(job.elapsed, 1)}s")
+        running = still_running
+
+    return jobs
+
+
+def assemble_windows(
+    cur,
+    final_table: str,
+    jobs: List[WindowJob],
+    ts_col: str,
+    partial: bool,
+    dedupe_key: Sequence[str] = (),
+    dedupe_order: Optional[str] = None,
+    dedupe_guard: Optional[str] = None,
+) -> None:
+    """
+    Monta a tabela final a partir das janelas concluídas.
+    `dedupe_key`: 1 linha por chave entre as janelas (a primeira por `dedupe_order`).
+    No parcial, a chave pode já existir na tabela final em um mês fora do backfill (versão mais nova
+    ou mais antiga): a linha da janela só substitui a existente quando `dedupe_guard` (coluna) da
+    janela é >= o da existente (NULL perde); caso contrário a existente é mantida.
+    """
+    union_sql = "\nUNION ALL\n".join(f"SELECT * FROM {j.table}" for j in jobs)
+    if dedupe_key:
+        keys = ", ".join(dedupe_key)
+        union_sql = (
+            f"SELECT * FROM ({union_sql})\n"
+            f"QUALIFY ROW_NUMBER() OVER (PARTITION BY {keys} ORDER BY {dedupe_order or ts_col + ' DESC'}) = 1"
+        )
+    if not partial:
+        cur.execute(f"CREATE OR REPLACE TABLE {final_table} AS {union_sql}")
+        return
+
+    months = ", ".join(f"'{j.month.isoformat()}'::DATE" for j in jobs)
+    if not dedupe_key:
+        cur.execute("BEGIN")
+        try:
+            cur.execute(f"DELETE FROM {final_table} WHERE DATE_TRUNC('month', {ts_col})::DATE IN ({months})")
+            cur.execute(f"INSERT INTO {final_table} {union_sql}")
+            cur.execute("COMMIT")
+        except Exception:
+            cur.execute("ROLLBACK")
+            raise
+        return
+
+    # janelas já deduplicadas numa tabela única (DDL fora da transação: no Snowflake faz commit implícito)
+    new_table = f"{final_table}_BF_NEW"
+    cur.execute(f"CREATE OR REPLACE TRANSIENT TABLE {new_table} AS {union_sql}")
+    on_keys = " AND ".join(f"f.{k} = w.{k}" for k in dedupe_key)
+    guard = dedupe_guard or ts_col
+    cur.execute("BEGIN")
+    try:
+        # 1) meses do backfill: recalculados pelas janelas
+        cur.execute(f"DELETE FROM {final_table} WHERE DATE_TRUNC('month', {ts_col})::DATE IN ({months})")
+        # 2) mesma chave em outro mês: sai só se a versão da janela for tão ou mais nova
+        cur.execute(
+            f"DELETE FROM {final_table} f USING {new_table} w\n"
+            f"WHERE {on_keys} AND (f.{guard} IS NULL OR w.{guard} >= f.{guard})"
+        )
+        # 3) entra o que não tem versão mais nova remanescente na tabela final
+        cur.execute(
+            f"INSERT INTO {final_table}\n"
+            f"SELECT w.* FROM {new_table} w\n"
+            f"WHERE NOT EXISTS (SELECT 1 FROM {final_table} f WHERE {on_keys})"
+        )
+        cur.execute("COMMIT")
+    except Exception:
+        cur.execute("ROLLBACK")
+        raise
+    cur.execute(f"DROP TABLE IF EXISTS {new_table}")
+
+
+def backfill_by_month(
+    conn,
+    final_table: str,
+    months: List[date],
+    build_window_sql: Callable[[date], str],
+    ts_col: str,
+    partial: bool,
+    max_concurrency: int = 4,
+    max_retries: int = 2,
+    poll_seconds: float = 5.0,
+    dedupe_key: Sequence[str] = (),
+    dedupe_order: Optional[str] = None,
+    dedupe_guard: Optional[str] = None,
+) -> List[WindowJob]:
+    """
+    Orquestra o backfill: CTAS por janela (async) -> montagem -> limpeza.
+
+    `build_window_sql(month)` devolve o SELECT do enrichment restrito ao mês.
+    `partial=True` substitui apenas os meses informados numa tabela final já existente.
+    `dedupe_key` / `dedupe_order` / `dedupe_guard`: ver `assemble_windows`.
+    Janelas com falha: tabela final intacta e `SystemExit` com os meses (código de saída != 0).
+    """
+    jobs = [
+        WindowJob(
+            month=m,
+            table=f"{final_table}_BF_{m:%Y%m}",
+            sql=f"CREATE OR REPLACE TRANSIENT TABLE {final_table}_BF_{m:%Y%m} AS {build_window_sql(m)}",
+        )
+        for m in months
+    ]
+    print(f"[backfill] {len(jobs)} janelas mensais; concorrência={max_concurrency}; retries={max_retries}")
+
+    t0 = time.time()
+    run_async_windows(conn, jobs, max_concurrency=max_concurrency, max_retries=max_retries, poll_seconds=poll_seconds)
+
+    cur = conn.cursor()
+    failed = [j for j in jobs if j.status != "done"]
+    if failed:
+        print("[backfill] janelas com falha:", ", ".join(f"{j.month:%Y-%m}" for j in failed))
+        print("[backfill] tabelas de janela mantidas para diagnóstico; tabela final NÃO foi alterada.")
+        raise SystemExit(
+            f"Backfill incompleto ({len(failed)}/{len(jobs)} janelas com falha): "
+            + ", ".join(f"{j.month:%Y-%m}" for j in failed)
+        )
+
+    print("\n[backfill] montando tabela final:", final_table)
+    tag_query(cur, step="backfill_assemble")
+    assemble_windows(
+        cur,
+        final_table,
+        jobs,
+        ts_col=ts_col,
+        partial=partial,
+        dedupe_key=dedupe_key,
+        dedupe_order=dedupe_order,
+        dedupe_guard=dedupe_guard,
+    )
+    for j in jobs:
+        cur.execute(f"DROP TABLE IF EXISTS {j.table}")
+    print("[backfill] tempo total (min) =", round((time.time() - t0) / 60, 2))
+    return jobs
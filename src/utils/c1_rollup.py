@@ -0,0 +1,155 @@
+"""
+Consultas de painel/dashboard sobre o cubo diário do C1 (`C1_DAILY_ROLLUP`, `queries/features/c1_daily_rollup.sql`).
+
+O cubo guarda só contagens e somas no grão (day, clinic_id, c1_entity_type, c1_outcome_bucket, risk_capim,
+*_source por eixo); aqui qualquer recorte vira `SUM(...)` agrupado, e taxas/médias são razões de somas
+(corretas em qualquer nível, ao contrário de média de médias).
+
+Uso:
+  from src.utils.c1_rollup import query_rollup
+  df = query_rollup(by=["c1_entity_type"], grain="month", start="2025-01-01")            # painel padrão
+  df = query_rollup(metrics=["n_c1", "approval_rate"], by=["risk_capim"], grain="week",
+                    where={"c1_entity_type": "credit_simulation", "clinic_id": [77, 88]})
+"""
+
+from __future__ import annotations
+
+from datetime import date
+from typing import Dict, Optional, Sequence
+
+import pandas as pd
+
+DEFAULT_TABLE = "CAPIM_DATA_DEV.POSSANI_SANDBOX.C1_DAILY_ROLLUP"
+
+DIMENSIONS = (
+    "clinic_id",
+    "c1_entity_type",
+    "c1_outcome_bucket",
+    "risk_capim",
+    "cadastro_evidence_source",
+    "negativacao_source",
+    "income_estimated_source",
+    "serasa_score_source",
+)
+GRAINS = ("day", "week", "month", "quarter", "year", "all")
+
+
+def _ratio(num: str, den: str) -> str:
+    return f"SUM({num}) / NULLIF(SUM({den}), 0)"
+
+
+# nome -> expressão sobre as colunas do cubo
+METRICS: Dict[str, str] = {
+    "n_c1": "SUM(n_c1)",
+    "n_approved": "SUM(n_approved)",
+    "approval_rate": _ratio("n_approved", "n_c1"),
+    "counter_proposal_rate": _ratio("n_counter_proposal", "n_c1"),
+    "appealable_rate": _ratio("n_appealable", "n_c1"),
+    "sum_requested_amount": "SUM(sum_requested_amount)",
+    "avg_requested_amount": _ratio("sum_requested_amount", "n_requested_amount"),
+    "sum_approved_amount": "SUM(sum_approved_amount)",
+    "avg_approved_amount": _ratio("sum_approved_amount", "n_approved_amount"),
+    "avg_total_negative_value": _ratio("sum_total_negative_value", "n_total_negative_value"),
+    "negative_rate": _ratio("n_has_negative", "n_total_negative_value"),
+    "avg_income_estimated": _ratio("sum_income_estimated", "n_income_estimated"),
+    "avg_serasa_score": _ratio("sum_serasa_score", "n_serasa_score"),
+    "avg_boa_vista_score": _ratio("sum_boa_vista_score", "n_boa_vista_score"),
+    # preenchimento por eixo (fração do C1 com a coluna não nula)
+    "fill_borrower_birthdate": _ratio("n_borrower_birthdate", "n_c1"),
+    "fill_borrower_gender": _ratio("n_borrower_gender", "n_c1"),
+    "fill_borrower_zipcode": _ratio("n_borrower_zipcode", "n_c1"),
+    "fill_negativacao": _ratio("n_total_negative_value", "n_c1"),
+    "fill_income_estimated": _ratio("n_income_estimated", "n_c1"),
+    "fill_scr_operations_count": _ratio("n_scr_operations_count", "n_c1"),
+    "fill_serasa_score": _ratio("n_serasa_score", "n_c1"),
+    "fill_boa_vista_score": _ratio("n_boa_vista_score", "n_c1"),
+}
+
+# métricas do painel de série histórica (approval/risk + preenchimento dos 4 eixos)
+PANEL_METRICS = (
+    "n_c1",
+    "approval_rate",
+    "avg_requested_amount",
+    "avg_approved_amount",
+    "fill_borrower_birthdate",
+    "fill_negativacao",
+    "fill_income_estimated",
+    "fill_serasa_score",
+)
+
+
+def _literal(value) -> str:
+    if isinstance(value, bool):
+        return "TRUE" if value else "FALSE"
+    if isinstance(value, (int, float)):
+        return repr(value)
+    return "'" + str(value).replace("'", "''") + "'"
+
+
+def _filter(dim: str, value) -> str:
+    values = list(value) if isinstance(value, (list, tuple, set)) else [value]
+    preds = []
+    non_null = [v for v in values if v is not None]
+    if non_null:
+        preds.append(f"{dim} IN ({', '.join(_literal(v) for v in non_null)})")
+    if len(non_null) < len(values):
+        preds.append(f"{dim} IS NULL")
+    return "(" + " OR ".join(preds) + ")"
+
+
+def rollup_sql(
+    metrics: Sequence[str] = PANEL_METRICS,
+    by: Sequence[str] = ("c1_entity_type",),
+    grain: str = "month",
+    start: Optional[str | date] = None,
+    end: Optional[str | date] = None,
+    where: Optional[Dict[str, object]] = None,
+    table: str = DEFAULT_TABLE,
+) -> str:
+    """
+    SELECT sobre o cubo: `period` (DATE_TRUNC(grain, day); `all` = sem série) + dimensões `by` + métricas.
+    `start` inclusivo / `end` exclusivo (datas); `where`: {dimensão: valor | lista} (None = IS NULL).
+    """
+    unknown = [m for m in metrics if m not in METRICS]
+    if unknown:
+        raise ValueError(f"Métricas desconhecidas: {', '.join(unknown)} (disponíveis: {', '.join(METRICS)})")
+    bad_dims = [d for d in list(by) + list(where or {}) if d not in DIMENSIONS]
+    if bad_dims:
+        raise ValueError(f"Dimensões fora do cubo: {', '.join(bad_dims)} (disponíveis: {', '.join(DIMENSIONS)})")
+    if grain not in GRAINS:
+        raise ValueError(f"grain inválido: {grain!r} (use {', '.join(GRAINS)})")
+
+    keys = list(by)
+    if grain == "day":
+        keys.insert(0, "day AS period")
+    elif grain != "all":
+        keys.insert(0, f"DATE_TRUNC('{grain}', day) AS period")
+    preds = []
+    if start is not None:
+        preds.append(f"day >= '{start}'::DATE")
+    if end is not None:
+        preds.append(f"day < '{end}'::DATE")
+    preds.extend(_filter(dim, value) for dim, value in (where or {}).items())
+
+    select = ",\n  ".join(keys + [f"{METRICS[m]} AS {m}" for m in metrics])
+    sql = f"SELECT\n  {select}\nFROM {table}\nWHERE {' AND '.join(preds) or 'TRUE'}"
+    if keys:
+        sql += f"\nGROUP BY {', '.join(str(i) for i in range(1, len(keys) + 1))}"
+        sql += f"\nORDER BY {', '.join(str(i) for i in range(1, len(keys) + 1))}"
+    return sql
+
+
+def query_rollup(
+    metrics: Sequence[str] = PANEL_METRICS,
+    by: Sequence[str] = ("c1_entity_type",),
+    grain: str = "month",
+    start: Optional[str | date] = None,
+    end: Optional[str | date] = None,
+    where: Optional[Dict[str, object]] = None,
+    table: str = DEFAULT_TABLE,
+    use_cache: bool = True,
+) -> Optional[pd.DataFrame]:
+    """Executa `rollup_sql` (pool + cache local de `run_query`) e devolve o DataFrame (None se falhar)."""
+    from src.utils.snowflake_connection import run_query
+
+    return run_query(rollup_sql(metrics, by, grain, start, end, where, table), use_cache=use_cache)
@@ -0,0 +1,382 @@
+"""
+Snapshot local do `C1_ENRICHED_BORROWER` em Arrow IPC (Feather v2, sem compressão) para notebooks.
+
+Motivação:
+  - cada sessão de notebook recarrega o C1 inteiro do Snowflake para pandas (minutos de rede + memória).
+
+Layout (`.cache/c1_snapshot` por padrão):
+  <root>/_manifest.json                                  view, colunas, watermarks, linhas/arquivo por partição
+  <root>/c1_entity_type=<tipo>/month=YYYY-MM/data.arrow  uma partição = um arquivo IPC
+
+Leitura (`load_snapshot`): cada partição é aberta com `pa.memory_map` + `pa.ipc.open_file`; sem compressão,
+os buffers apontam direto para o page cache (zero-copy: abrir custa ~metadados, não o tamanho do arquivo).
+Poda de partições pelo manifest (tipos/meses) e de colunas por `select` (também sem cópia).
+
+Sync (`sync_snapshot`, CLI `python -m src.cli.sync_c1_snapshot`):
+  - watermarks do último sync: MAX(`c1_created_at`) do snapshot e MAX(`cs_updated_at`) / MAX(`pa_updated_at`)
+    das tabelas enriched de CS / PA (não das origens cruas: o que a view lê só muda quando a enriched é
+    re-materializada; lidos no início do sync; linhas alteradas durante o sync voltam no próximo, o merge é
+    idempotente);
+  - delta = linhas do C1 com `c1_created_at` > watermark (- `lookback_days`) OU cuja linha enriched (CS / PA)
+    tem update >= watermark (empates no MAX são relidos); cada partição afetada é relida do disco, as chaves
+    (`c1_entity_type`, `c1_entity_id`) do delta substituem as antigas e o arquivo é trocado atomicamente
+    (leitores com o arquivo antigo mapeado continuam válidos);
+  - verificação: `COUNT(*)` por partição no Snowflake vs manifest; partição divergente (ex.: linhas apagadas
+    na origem) é recarregada inteira.
+"""
+
+from __future__ import annotations
+
+import json
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional
+
+import pyarrow as pa
+import pyarrow.compute as pc
+
+from src.utils.query_profile import tag_query
+
+DEFAULT_ROOT = ".cache/c1_snapshot"
+MANIFEST = "_manifest.json"
+DATA_FILE = "data.arrow"
+KEY_COLUMNS = ("c1_entity_type", "c1_entity_id")
+
+
+def partition_key(entity: str, month: str) -> str:
+    return f"c1_entity_type={entity}/month={month}"
+
+
+def parse_partition_key(key: str) -> tuple[str, str]:
+    entity, month = (p.split("=", 1)[1] for p in key.split("/"))
+    return entity, month
+
+
+def read_manifest(root: str | Path) -> Dict[str, object]:
+    path = Path(root) / MANIFEST
+    if not path.exists():
+        return {}
+    return json.loads(path.read_text(encoding="utf-8"))
+
+
+# ---------------------------------------------------------------------------
+# Leitura
+# ---------------------------------------------------------------------------
+
+
+def _open_partition(path: Path, columns: Optional[List[str]]) -> pa.Table:
+    table = pa.ipc.open_file(pa.memory_map(str(path), "r")).read_all()
+    return table.select(columns) if columns is not None else table
+
+
+def load_snapshot(
+    root: str | Path = DEFAULT_ROOT,
+    columns: Optional[Iterable[str]] = None,
+    entity_types: Optional[Iterable[str]] = None,
+    start_month: Optional[str] = None,
+    end_month: Optional[str] = None,
+) -> pa.Table:
+    """
+    Abre o snapshot (zero-copy) como `pa.Table`.
+
+    - `columns`: projeção (nomes em minúsculas, como na view);
+    - `entity_types`: ex. ["pre_analysis"]; `start_month`/`end_month`: "YYYY-MM" (ambos inclusivos).
+
+    Para pandas: `load_snapshot(...).to_pandas()` (aqui há cópia; projete antes).
+    """
+    root = Path(root)
+    manifest = read_manifest(root)
+    if not manifest:
+        raise FileNotFoundError(f"Snapshot C1 não encontrado em {root} (rode `python -m src.cli.sync_c1_snapshot`).")
+    cols = [c.lower() for c in columns] if columns is not None else None
+    if cols is not None:
+        missing = sorted(set(cols) - set(manifest["columns"]))
+        if missing:
+            raise KeyError(f"Colunas fora do snapshot: {', '.join(missing)}")
+    types = set(entity_types) if entity_types is not None else None
+
+    tables = []
+    for key in sorted(manifest["partitions"]):
+        entity, month = parse_partition_key(key)
+        if types is not None and entity not in types:
+            continue
+        if (start_month and month < start_month) or (end_month and month > end_month):
+            continue
+        tables.append(_open_partition(root / key / DATA_FILE, cols))
+    if not tables:
+        return pa.schema([f for f in snapshot_schema(root) if cols is None or f.name in cols]).empty_table()
+    return pa.concat_tables(tables, promote_options="permissive")
+
+
+def snapshot_schema(root: str | Path = DEFAULT_ROOT) -> pa.Schema:
+    """Schema de uma partição qualquer (as partições compartilham o schema da view)."""
+    root = Path(root)
+    for key in sorted(read_manifest(root).get("partitions", {})):
+        return pa.ipc.open_file(pa.memory_map(str(root / key / DATA_FILE), "r")).schema
+    raise FileNotFoundError(f"Snapshot C1 vazio em {root}.")
+
+
+# ---------------------------------------------------------------------------
+# Sync
+# ---------------------------------------------------------------------------
+
+
+@dataclass(frozen=True)
+class SnapshotSource:
+    view: str           # db.schema.C1_ENRICHED_BORROWER
+    cs_table: str       # tabela enriched de CS (cs_updated_at)
+    pa_table: str       # tabela enriched de PA (pa_updated_at)
+
+    @classmethod
+    def from_schema(cls, schema: str, view: str = "C1_ENRICHED_BORROWER") -> "SnapshotSource":
+        return cls(
+            view=f"{schema}.{view}",
+            cs_table=f"{schema}.CREDIT_SIMULATIONS_ENRICHED_BORROWER",
+            pa_table=f"{schema}.PRE_ANALYSES_ENRICHED_BORROWER",
+        )
+
+
+def _month_expr() -> str:
+    return "COALESCE(TO_CHAR(c1_created_at, 'YYYY-MM'), 'null')"
+
+
+def _partition_filter(key: str) -> str:
+    entity, month = parse_partition_key(key)
+    if month == "null":
+        return f"c1_entity_type = '{entity}' AND c1_created_at IS NULL"
+    start = datetime.strptime(month, "%Y-%m")
+    end = (start + timedelta(days=32)).replace(day=1)
+    return (
+        f"c1_entity_type = '{entity}' AND c1_created_at >= '{start:%Y-%m-%d}'::TIMESTAMP_NTZ"
+        f" AND c1_created_at < '{end:%Y-%m-%d}'::TIMESTAMP_NTZ"
+    )
+
+
+def source_watermarks(cur, src: SnapshotSource) -> Dict[str, Optional[str]]:
+    """MAX dos timestamps de atualização das origens, lidos no início do sync."""
+    tag_query(cur, step="watermarks")
+    cur.execute(
+        f"""
+        SELECT
+          (SELECT MAX(cs_updated_at) FROM {src.cs_table}) AS cs_updated_at,
+          (SELECT MAX(pa_updated_at) FROM {src.pa_table}
+            WHERE c1_entity_type = 'pre_analysis') AS pre_analysis_updated_at,
+          (SELECT MAX(c1_created_at) FROM {src.view}) AS c1_created_at
+        """
+    )
+    row = cur.fetchone()
+    return {k: (str(v) if v is not None else None) for k, v in zip(("cs_updated_at", "pre_analysis_updated_at", "c1_created_at"), row)}
+
+
+def delta_filter(src: SnapshotSource, watermarks: Dict[str, Optional[str]], lookback_days: int) -> str:
+    """Linhas do C1 novas (c1_created_at) ou com origem atualizada depois dos watermarks do último sync."""
+    preds = []
+    if watermarks.get("c1_created_at"):
+        preds.append(
+            f"c1_created_at > DATEADD('day', -{int(lookback_days)}, '{watermarks['c1_created_at']}'::TIMESTAMP_NTZ)"
+        )
+    if watermarks.get("cs_updated_at"):
+        preds.append(
+            f"(c1_entity_type = 'credit_simulation' AND c1_entity_id IN ("
+            f"SELECT credit_simulation_id FROM {src.cs_table} "
+            f"WHERE cs_updated_at >= '{watermarks['cs_updated_at']}'::TIMESTAMP_NTZ))"
+        )
+    if watermarks.get("pre_analysis_updated_at"):
+        preds.append(
+            f"(c1_entity_type = 'pre_analysis' AND c1_entity_id IN ("
+            f"SELECT c1_entity_id FROM {src.pa_table} WHERE c1_entity_type = 'pre_analysis' "
+            f"AND pa_updated_at >= '{watermarks['pre_analysis_updated_at']}'::TIMESTAMP_NTZ))"
+        )
+    return "(" + " OR ".join(preds) + ")" if preds else "TRUE"
+
+
+def partition_counts(cur, src: SnapshotSource, where: str = "TRUE") -> Dict[str, int]:
+    tag_query(cur, step="partition_counts")
+    cur.execute(
+        f"SELECT c1_entity_type, {_month_expr()} AS month, COUNT(*) FROM {src.view} WHERE {where} GROUP BY 1, 2"
+    )
+    return {partition_key(entity, month): int(n) for entity, month, n in cur.fetchall()}
+
+
+def _fetch(src: SnapshotSource, columns: Optional[List[str]], where: str, chunk_size_mb: Optional[int]) -> Optional[pa.Table]:
+    """Lê o recorte em batches Arrow (conexão do pool) e devolve uma tabela com nomes em minúsculas."""
+    # import tardio: o loader (notebooks) não precisa carregar o connector
+    from src.utils.result_stream import iter_arrow_batches, result_chunk_size
+    from src.utils.snowflake_connection import pooled_connection
+
+    select = ", ".join(columns) if columns else "*"
+    with pooled_connection() as conn:
+        cur = conn.cursor()
+        try:
+            with result_chunk_size(cur, chunk_size_mb):
+                tag_query(cur, step="snapshot_fetch")
+                cur.execute(f"SELECT {select} FROM {src.view} WHERE {where}")
+                names = [d[0].lower() for d in cur.description]
+                batches = list(iter_arrow_batches(cur, max_batch_rows=100_000))
+        finally:
+            cur.close()
+    if not batches:
+        return None
+    table = pa.Table.from_batches(batches) if len({b.schema for b in batches}) == 1 else pa.concat_tables(
+        [pa.Table.from_batches([b]) for b in batches], promote_options="permissive"
+    )
+    return table.rename_columns(names)
+
+
+def _write_partition(root: Path, key: str, table: pa.Table) -> int:
+    path = root / key / DATA_FILE
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_suffix(".tmp")
+    with pa.OSFile(str(tmp), "wb") as sink:
+        with pa.ipc.new_file(sink, table.schema) as writer:
+            writer.write_table(table, max_chunksize=128_000)
+    tmp.replace(path)
+    return path.stat().st_size
+
+
+def _merge(existing: pa.Table, delta: pa.Table) -> pa.Table:
+    """Remove do existente as chaves presentes no delta e anexa o delta (partição = um c1_entity_type)."""
+    if set(existing.column_names) != set(delta.column_names):
+        raise RuntimeError("Colunas da view mudaram em relação ao snapshot; rode o sync com --full.")
+    keep = pc.invert(pc.is_in(existing["c1_entity_id"], value_set=delta["c1_entity_id"]))
+    kept = existing.filter(keep)
+    return pa.concat_tables([kept, delta.select(kept.column_names)], promote_options="permissive")
+
+
+class _ManifestWriter:
+    def __init__(self, root: Path, data: Dict[str, object]):
+        self.path = root / MANIFEST
+        self.data = data
+        self._lock = threading.Lock()
+
+    def set_partition(self, key: str, entry: Optional[Dict[str, object]]) -> None:
+        with self._lock:
+            if entry is None:
+                self.data["partitions"].pop(key, None)
+            else:
+                self.data["partitions"][key] = entry
+            self.save()
+
+    def save(self) -> None:
+        tmp = self.path.with_suffix(".tmp")
+        tmp.write_text(json.dumps(self.data, indent=2, ensure_ascii=False), encoding="utf-8")
+        tmp.replace(self.path)
+
+
+def sync_snapshot(
+    cur,
+    src: SnapshotSource,
+    root: str | Path = DEFAULT_ROOT,
+    columns: Optional[List[str]] = None,
+    lookback_days: int = 0,
+    full: bool = False,
+    verify: bool = True,
+    workers: int = 4,
+    chunk_size_mb: Optional[int] = None,
+) -> Dict[str, object]:
+    """
+    Sincroniza o snapshot com a view. `cur` = cursor de uma conexão já aberta (consultas de controle);
+    as leituras por partição usam conexões do pool em paralelo (`workers`).
+    Retorna um resumo {"mode", "partitions", "rows", "rows_fetched", "elapsed_s"}.
+    """
+    t0 = time.time()
+    root = Path(root)
+    root.mkdir(parents=True, exist_ok=True)
+    previous = read_manifest(root)
+    cols = [c.lower() for c in columns] if columns else None
+    if cols is not None:
+        cols = cols + [k for k in KEY_COLUMNS + ("c1_created_at",) if k not in cols]
+
+    reusable = (
+        not full
+        and previous.get("view") == src.view
+        and previous.get("requested_columns") == cols
+        and bool(previous.get("partitions"))
+    )
+    new_watermarks = source_watermarks(cur, src)
+    manifest = _ManifestWriter(root, {
+        "view": src.view,
+        "requested_columns": cols,
+        "columns": previous.get("columns", []) if reusable else [],
+        "watermarks": previous.get("watermarks", {}) if reusable else {},
+        "partitions": dict(previous.get("partitions", {})) if reusable else {},
+    })
+
+    replace: List[str] = []
+    merge: List[str] = []
+    delta_where = "TRUE"
+    if reusable:
+        delta_where = delta_filter(src, previous["watermarks"], lookback_days)
+        merge = sorted(partition_counts(cur, src, delta_where))
+    remote_counts: Dict[str, int] = {}
+    if verify or not reusable:
+        remote_counts = partition_counts(cur, src)
+    if not reusable:
+        for stale in root.glob("c1_entity_type=*/month=*"):
+            if stale.relative_to(root).as_posix() not in remote_counts:
+                (stale / DATA_FILE).unlink(missing_ok=True)
+        replace = sorted(remote_counts)
+    mode = "incremental" if reusable else "full"
+
+    def run(key: str, how: str) -> int:
+        """Recarrega (`replace`) ou aplica o delta (`merge`) numa partição; retorna linhas lidas da view."""
+        path = root / key / DATA_FILE
+        if how == "replace":
+            table = fetched = _fetch(src, cols, _partition_filter(key), chunk_size_mb)
+        else:
+            fetched = _fetch(src, cols, f"{_partition_filter(key)} AND {delta_where}", chunk_size_mb)
+            if fetched is None:
+                return 0
+            table = _merge(_open_partition(path, None), fetched) if path.exists() else fetched
+        if table is None:
+            path.unlink(missing_ok=True)
+            manifest.set_partition(key, None)
+            return 0
+        size = _write_partition(root, key, table)
+        if not manifest.data["columns"]:
+            manifest.data["columns"] = table.column_names
+        manifest.set_partition(key, {
+            "rows": table.num_rows,
+            "bytes": size,
+            "synced_at": datetime.now().isoformat(timespec="seconds"),
+        })
+        return fetched.num_rows
+
+    rows_fetched = 0
+    tasks = [(k, "replace") for k in replace] + [(k, "merge") for k in merge]
+    if tasks:
+        from src.utils.snowflake_connection import reserve_pool_workers
+
+        reserve_pool_workers(min(int(workers), len(tasks)))
+    for phase in ("sync", "verify"):
+        if tasks:
+            with ThreadPoolExecutor(max_workers=max(1, min(int(workers), len(tasks)))) as ex:
+                futures = {ex.submit(run, key, how): (key, how) for key, how in tasks}
+                for i, fut in enumerate(as_completed(futures), start=1):
+                    key, how = futures[fut]
+                    n = fut.result()
+                    rows_fetched += n
+                    print(f"  [{phase} {i}/{len(tasks)}] {key}: {how} ({n} linhas lidas, {time.time() - t0:.1f}s)")
+        if phase == "verify" or not verify:
+            break
+        # partições com contagem divergente (ex.: linhas apagadas na origem) são recarregadas inteiras
+        local_counts = {k: int(v["rows"]) for k, v in manifest.data["partitions"].items()}
+        tasks = [(k, "replace") for k in sorted(set(remote_counts) | set(local_counts))
+                 if remote_counts.get(k, 0) != local_counts.get(k, 0)]
+        if tasks:
+            print(f"Verificação: {len(tasks)} partições com contagem divergente; recarregando.")
+
+    manifest.data["watermarks"] = new_watermarks
+    manifest.data["synced_at"] = datetime.now().isoformat(timespec="seconds")
+    manifest.save()
+    return {
+        "mode": mode,
+        "partitions": len(manifest.data["partitions"]),
+        "rows": sum(int(p["rows"]) for p in manifest.data["partitions"].values()),
+        "rows_fetched": rows_fetched,
+        "elapsed_s": round(time.time() - t0, 2),
+    }
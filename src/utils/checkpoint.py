@@ -0,0 +1,148 @@
+"""
+Journal de checkpoint para execução de scripts SQL (`run_sql_file --checkpoint`).
+
+Motivação:
+  - quando um script longo falha no statement 37, `--start-at 37` perde os `SET` e as tabelas
+    temporárias criadas antes; e re-executar do início refaz queries caras que já terminaram.
+
+Formato: JSONL append-only (a última linha de cada statement vale), em
+`.cache/run_sql_file/<arquivo>-<hash do caminho>.jsonl` por padrão. Cada linha:
+  {"event": "statement", "run_id", "idx", "sql_hash", "query_id", "status", "has_result", "fingerprint", "ts"}
+e, por execução, {"event": "run_start" | "run_end", "run_id", "status", "ts"}.
+
+Regras de reaproveitamento (ver `run_sql_file`):
+  - `sql_hash` = SHA-256 do SQL normalizado + valores das variáveis de sessão (`$var`) referenciadas;
+  - statement concluído com o mesmo `sql_hash` e o mesmo `LAST_ALTERED` das tabelas referenciadas
+    (`fingerprint`, medido ao fim da execução) é pulado; se tinha result set, ele é lido de
+    `RESULT_SCAN(query_id)` (resultados persistidos valem 24h) em vez de re-executado;
+  - sem fingerprint resolvível, o reaproveitamento só vale ao retomar uma execução que não terminou ok.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import time
+import uuid
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Callable, Dict, Optional
+
+from src.utils.query_cache import (
+    normalize_sql,
+    referenced_tables,
+    session_variables,
+    table_fingerprint,
+    unqualified_tables,
+)
+
+
+def default_journal_path(sql_path: Path) -> Path:
+    digest = hashlib.sha256(str(sql_path.resolve()).encode("utf-8")).hexdigest()[:8]
+    return Path(".cache/run_sql_file") / f"{sql_path.stem}-{digest}.jsonl"
+
+
+def statement_hash(cur, sql: str) -> str:
+    """SQL normalizado + valores das variáveis de sessão referenciadas (dependem do estado da sessão)."""
+    sql_norm = normalize_sql(sql)
+    variables = session_variables(cur, sql_norm)
+    payload = json.dumps({"sql": sql_norm, "vars": sorted(variables.items())}, sort_keys=True)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def input_fingerprint(cur, sql: str) -> Optional[Dict[str, str]]:
+    """
+    LAST_ALTERED das tabelas fully-qualified referenciadas (None se não resolvível, inclusive quando
+    o statement lê/escreve tabela sem `db.schema.tabela`: o fingerprint não a enxergaria).
+    """
+    sql_norm = normalize_sql(sql)
+    variables = session_variables(cur, sql_norm)
+    if unqualified_tables(sql_norm, variables):
+        return None
+    return table_fingerprint(cur, referenced_tables(sql_norm, variables))
+
+
+@dataclass
+class JournalEntry:
+    idx: int
+    sql_hash: str
+    query_id: Optional[str]
+    status: str  # done | failed
+    has_result: bool
+    fingerprint: Optional[Dict[str, str]]
+
+
+class CheckpointJournal:
+    def __init__(self, path: str | Path):
+        self.path = Path(path)
+        self.run_id = uuid.uuid4().hex[:12]
+        self.entries: Dict[int, JournalEntry] = {}
+        self.resuming = False
+
+    def load(self) -> None:
+        """Lê o journal anterior: última entrada por statement + se a última execução terminou ok."""
+        if not self.path.exists():
+            return
+        last_status: Optional[str] = None
+        for line in self.path.read_text(encoding="utf-8").splitlines():
+            try:
+                ev = json.loads(line)
+            except json.JSONDecodeError:
+                continue  # linha truncada por interrupção
+            if ev.get("event") == "run_start":
+                last_status = "running"
+            elif ev.get("event") == "run_end":
+                last_status = ev.get("status")
+            elif ev.get("event") == "statement":
+                self.entries[int(ev["idx"])] = JournalEntry(
+                    idx=int(ev["idx"]),
+                    sql_hash=ev["sql_hash"],
+                    query_id=ev.get("query_id"),
+                    status=ev["status"],
+                    has_result=bool(ev.get("has_result")),
+                    fingerprint=ev.get("fingerprint"),
+                )
+        self.resuming = last_status not in (None, "ok")
+
+    def _append(self, event: dict) -> None:
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        event = {**event, "run_id": self.run_id, "ts": time.time()}
+        with self.path.open("a", encoding="utf-8") as f:
+            f.write(json.dumps(event) + "\n")
+
+    def start(self, sql_file: str) -> None:
+        self._append({"event": "run_start", "file": sql_file, "status": "running"})
+
+    def end(self, status: str) -> None:
+        self._append({"event": "run_end", "status": status})
+
+    def record(self, entry: JournalEntry) -> None:
+        self.entries[entry.idx] = entry
+        self._append(
+            {
+                "event": "statement",
+                "idx": entry.idx,
+                "sql_hash": entry.sql_hash,
+                "query_id": entry.query_id,
+                "status": entry.status,
+                "has_result": entry.has_result,
+                "fingerprint": entry.fingerprint,
+            }
+        )
+
+    def reusable(
+        self,
+        idx: int,
+        sql_hash: str,
+        fingerprint_fn: Callable[[], Optional[Dict[str, str]]],
+    ) -> Optional[JournalEntry]:
+        """
+        Entrada concluída reaproveitável para o statement (ou None se precisa executar).
+        `fingerprint_fn` só é chamado quando há entrada concluída com o mesmo hash (custa metadados).
+        """
+        entry = self.entries.get(idx)
+        if entry is None or entry.status != "done" or entry.sql_hash != sql_hash or entry.query_id is None:
+            return None
+        if entry.fingerprint is not None:
+            return entry if entry.fingerprint == fingerprint_fn() else None
+        return entry if self.resuming else None
@@ -0,0 +1,90 @@
+"""
+Refresh das tabelas derivadas de checks usadas pelos enrichments e bridges:
+  - índices CPF+tempo (`queries/index/refresh_checks_cpf_index.sql`);
+  - feature store de payloads (`queries/features/refresh_check_features.sql`), que depende dos índices.
+
+O SQL (DDL idempotente + MERGE/INSERT incrementais) vive nos arquivos acima; aqui só os executamos,
+em ordem, antes da materialização — para que os joins nunca leiam tabelas defasadas em relação às raw.
+
+Os arquivos usam `CAPIM_DATA_DEV.POSSANI_SANDBOX`; com outro `--schema`, `qualify_check_tables()` reaponta as
+tabelas de checks (índices + feature store) tanto no refresh quanto no SQL do enrichment.
+"""
+
+from __future__ import annotations
+
+import argparse
+import re
+import time
+
+from src.utils.query_profile import tag_query
+
+INDEX_SQL_PATH = "queries/index/refresh_checks_cpf_index.sql"
+FEATURES_SQL_PATH = "queries/features/refresh_check_features.sql"
+DEFAULT_SCHEMA = "CAPIM_DATA_DEV.POSSANI_SANDBOX"
+CHECK_TABLES = ("CREDIT_CHECKS_CPF_INDEX", "CRIVO_CHECKS_CPF_INDEX", "CREDIT_CHECK_FEATURES", "CRIVO_CHECK_FEATURES")
+_CHECK_TABLE_REF = re.compile(re.escape(DEFAULT_SCHEMA) + r"\.(" + "|".join(CHECK_TABLES) + r")\b", re.IGNORECASE)
+
+
+def add_index_args(ap: argparse.ArgumentParser) -> None:
+    ap.add_argument(
+        "--skip-index-refresh",
+        action="store_true",
+        help="Não atualiza os índices CPF+tempo nem o feature store de checks antes de materializar.",
+    )
+    ap.add_argument(
+        "--refresh-index",
+        action="store_true",
+        help="Atualiza índices/feature store também em execuções de amostra/recorte (por padrão só no full/incremental).",
+    )
+
+
+def qualify_check_tables(sql: str, schema: str = DEFAULT_SCHEMA) -> str:
+    """Reaponta as tabelas de checks (`CHECK_TABLES`) de `DEFAULT_SCHEMA` para `schema` (db.schema)."""
+    if schema.upper() == DEFAULT_SCHEMA:
+        return sql
+    return _CHECK_TABLE_REF.sub(lambda m: f"{schema}.{m.group(1).upper()}", sql)
+
+
+def _run_sql_file(conn, sql_path: str, schema: str) -> float:
+    sql = qualify_check_tables(open(sql_path, "r", encoding="utf-8").read(), schema)
+    tag_query(conn.cursor(), file=sql_path)
+    t0 = time.time()
+    for cur in conn.execute_string(sql):
+        cur.close()
+    return time.time() - t0
+
+
+def refresh_checks_cpf_index(conn, schema: str = DEFAULT_SCHEMA, sql_path: str = INDEX_SQL_PATH) -> float:
+    """Executa o refresh incremental dos índices (multi-statement). Retorna o tempo em segundos."""
+    print(f"Atualizando índices CPF+tempo de checks ({schema}):", sql_path)
+    elapsed = _run_sql_file(conn, sql_path, schema)
+    print("Tempo refresh índices (s) =", round(elapsed, 2))
+    return elapsed
+
+
+def refresh_check_features(conn, schema: str = DEFAULT_SCHEMA, sql_path: str = FEATURES_SQL_PATH) -> float:
+    """Extrai features apenas dos checks novos (feature store). Rodar depois dos índices."""
+    print(f"Atualizando feature store de payloads ({schema}):", sql_path)
+    elapsed = _run_sql_file(conn, sql_path, schema)
+    print("Tempo refresh features (s) =", round(elapsed, 2))
+    return elapsed
+
+
+def refresh_check_tables(conn, schema: str = DEFAULT_SCHEMA) -> None:
+    """Índices CPF+tempo e, em seguida, feature store (nessa ordem), no schema `schema`."""
+    refresh_checks_cpf_index(conn, schema)
+    refresh_check_features(conn, schema)
+
+
+def maybe_refresh_check_tables(conn, args, schema: str = DEFAULT_SCHEMA, partial_run: bool = False) -> bool:
+    """
+    Refresh antes da materialização, conforme `add_index_args`: sempre, salvo `--skip-index-refresh`;
+    em `partial_run` (benchmark `--only-sample`, recorte gravado em `_SCOPED`) só com `--refresh-index` —
+    essas execuções não publicam a tabela final e não pagam MERGEs/DELETEs/extração de features.
+    """
+    if args.skip_index_refresh or (partial_run and not args.refresh_index):
+        reason = "--skip-index-refresh" if args.skip_index_refresh else "amostra/recorte; --refresh-index para forçar"
+        print(f"Índices/feature store de checks NÃO atualizados ({reason}).")
+        return False
+    refresh_check_tables(conn, schema)
+    return True
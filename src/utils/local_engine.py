@@ -0,0 +1,539 @@
+"""
+Backend local (DuckDB em processo) com a interface do connector Snowflake, para rodar o SQL do repo offline.
+
+Motivação:
+  - qualquer iteração nos enrichments (`queries/enrich/*.sql`) custava créditos e fila de warehouse;
+    reescritas de performance não tinham como ser medidas/regredidas sem rede.
+
+Como funciona:
+  - `SNOWFLAKE_BACKEND=local` (ou `duckdb`): `get_snowflake_connection()` devolve uma `LocalConnection`
+    (cursor com execute/fetch*/fetch_arrow_*/fetch_pandas_*, `execute_string`, `execute_stream`);
+    os CLIs funcionam sem mudança (o relatório de perfil é pulado: não há QUERY_HISTORY local);
+    `execute_async` roda síncrono (status/resultado guardados na conexão): `--parallel`, `--staged` e
+    `--backfill` executam em série localmente;
+  - erros de tradução/execução sobem como `ProgrammingError`; BEGIN..COMMIT valem para a conexão (sessão),
+    como no Snowflake; `write_pandas` deste módulo aceita as duas conexões;
+  - cada statement é traduzido do dialeto Snowflake para DuckDB (`translate`, via sqlglot) com os ajustes
+    que o transpiler não cobre no nosso SQL:
+      * VARIANT = JSON: `v:a.b::string` extrai escalar (`->>`), `TYPEOF`/`ARRAY_SIZE` sobre JSON;
+      * `LATERAL FLATTEN(input => ...)` -> subquery lateral sobre `json_each` (colunas seq/key/path/index/value/this);
+      * `SAMPLE ROW|BLOCK` -> `TABLESAMPLE BERNOULLI|SYSTEM`; `$var` -> `getvariable('var')`;
+      * `TO_CHAR(ts, 'YYYY-MM')` -> `strftime`; `HASH_AGG(...)` -> `bit_xor(hash(...))` (fingerprint local);
+      * `FROM VALUES`: colunas `column1..N`; `<db>.INFORMATION_SCHEMA` -> `information_schema` (TABLES filtrada
+        pelo catálogo, com `comment`); `COMMENT = '...'` no CTAS -> `COMMENT ON TABLE` em seguida;
+      * `CLUSTER BY`, `TRANSIENT`, `TEMPORARY` em nome qualificado, `ALTER SESSION`, `USE ...`: ignorados;
+  - os bancos `CAPIM_DATA` / `CAPIM_DATA_DEV` são catálogos anexados (nomes db.schema.tabela iguais aos de produção);
+  - fixtures: `queries/fixtures/local/*.sql` (SQL Snowflake, traduzido igual) carregadas na abertura;
+    os índices CPF e o feature store saem do próprio SQL do repo (`refresh_check_tables`).
+
+Limitações: semântica numérica/temporal do DuckDB (ex.: NUMBER = DECIMAL(38,0), fuso via ICU); o objetivo é
+regressão de lógica e comparação relativa de reescritas, não tempo absoluto de warehouse.
+
+Uso:
+  SNOWFLAKE_BACKEND=local python -m src.cli.materialize_enriched_credit_simulations_borrower
+  SNOWFLAKE_BACKEND=local SNOWFLAKE_LOCAL_DB=outputs/local/c1.duckdb python -m src.cli.run_sql_file --file ...
+  python -m src.utils.local_engine queries/enrich/enrich_credit_simulations_borrower.sql   # imprime a tradução
+"""
+
+from __future__ import annotations
+
+import io
+import os
+import re
+import sys
+import threading
+import uuid
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional
+
+import pandas as pd
+import pyarrow as pa
+from snowflake.connector.constants import QueryStatus
+from snowflake.connector.errors import ProgrammingError
+
+try:
+    import duckdb
+    import sqlglot
+    from sqlglot import exp
+    from sqlglot.dialects.snowflake import Snowflake
+except ImportError:  # dependências só do backend local
+    duckdb = None
+    sqlglot = None
+    exp = None
+    Snowflake = None
+
+FIXTURES_DIR = "queries/fixtures/local"
+DATABASES = ("CAPIM_DATA", "CAPIM_DATA_DEV")
+
+_MACROS = (
+    """
+    CREATE OR REPLACE MACRO sf_typeof(j) AS
+      CASE json_type(CAST(j AS JSON))
+        WHEN 'BIGINT' THEN 'INTEGER'
+        WHEN 'UBIGINT' THEN 'INTEGER'
+        WHEN 'NULL' THEN 'NULL_VALUE'
+        ELSE json_type(CAST(j AS JSON))
+      END
+    """,
+)
+_FLATTEN_SQL = """
+(SELECT
+   ROW_NUMBER() OVER () AS seq,
+   CASE WHEN json_type(__j) = 'ARRAY' THEN NULL ELSE je.key END AS key,
+   je.path AS path,
+   CASE WHEN json_type(__j) = 'ARRAY' THEN TRY_CAST(je.key AS BIGINT) END AS index,
+   je.value AS value,
+   __j AS this
+ FROM json_each(__j) AS je)
+"""
+_FLATTEN_JSON_COLS = {"value", "this"}
+_SKIP_PROPERTIES = ("ClusteredByProperty", "ClusterProperty", "TransientProperty")
+
+_OPEN: Dict[str, "duckdb.DuckDBPyConnection"] = {}
+_OPEN_LOCK = threading.Lock()
+
+
+def _require() -> None:
+    if duckdb is None or sqlglot is None:
+        raise ImportError("Backend local requer `duckdb` e `sqlglot` (pip install duckdb sqlglot).")
+
+
+def _is_json_expr(node, flatten_aliases: set) -> bool:
+    if isinstance(node, exp.JSONExtract):
+        return True
+    return (
+        isinstance(node, exp.Column)
+        and node.table.lower() in flatten_aliases
+        and node.name.lower() in _FLATTEN_JSON_COLS
+    )
+
+
+def _as_scalar(node, flatten_aliases: set):
+    """Extração JSON -> texto sem aspas (equivalente a `variant::string` no Snowflake)."""
+    if isinstance(node, exp.JSONExtract):
+        return exp.JSONExtractScalar(this=node.this, expression=node.expression)
+    return exp.Anonymous(this="json_extract_string", expressions=[node.copy(), exp.Literal.string("$")])
+
+
+def _flatten_subquery(lateral):
+    arg = lateral.this.this
+    source = arg.expression if isinstance(arg, exp.Kwarg) else arg
+    sql = _FLATTEN_SQL.replace("__j", f"CAST(({source.sql('duckdb')}) AS JSON)")
+    alias = lateral.args.get("alias")
+    name = alias.this if alias is not None else exp.to_identifier("f")
+    return exp.Lateral(this=sqlglot.parse_one(sql, read="duckdb"), alias=exp.TableAlias(this=name.copy()))
+
+
+def _rewrite(tree):
+    flatten_aliases = {
+        (lat.args["alias"].name or "").lower()
+        for lat in tree.find_all(exp.Lateral)
+        if isinstance(lat.this, exp.Explode) and lat.args.get("alias") is not None
+    }
+
+    def fn(node):
+        if isinstance(node, exp.Lateral) and isinstance(node.this, exp.Explode):
+            return _flatten_subquery(node)
+        if isinstance(node, (exp.Cast, exp.TryCast)) and _is_json_expr(node.this, flatten_aliases):
+            if not node.to.is_type(exp.DataType.Type.JSON, exp.DataType.Type.VARIANT):
+                node.set("this", _as_scalar(node.this, flatten_aliases))
+            return node
+        if isinstance(node, exp.Values) and not node.alias and node.expressions and not isinstance(node.parent, exp.Insert):
+            # FROM VALUES: colunas column1..N no Snowflake (col0.. no DuckDB)
+            n = len(node.expressions[0].expressions)
+            cols = [exp.to_identifier(f"column{i}") for i in range(1, n + 1)]
+            node.set("alias", exp.TableAlias(this=exp.to_identifier("_values"), columns=cols))
+            return node
+        if isinstance(node, exp.Typeof):
+            return exp.Anonymous(this="sf_typeof", expressions=[node.this])
+        if isinstance(node, exp.ArraySize):
+            return exp.Anonymous(this="json_array_length", expressions=[exp.cast(node.this, "JSON")])
+        if isinstance(node, exp.Table) and node.db.upper() == "INFORMATION_SCHEMA" and node.catalog:
+            if node.name.upper() == "TABLES":
+                # TABLES do catálogo, com as colunas `comment` (stage_key dos estágios) e `row_count` do Snowflake
+                sub = sqlglot.parse_one(
+                    "SELECT t.*, t.table_comment AS comment, d.estimated_size AS row_count "
+                    "FROM information_schema.tables t "
+                    "LEFT JOIN duckdb_tables() d "
+                    "ON d.database_name = t.table_catalog AND d.schema_name = t.table_schema AND d.table_name = t.table_name "
+                    f"WHERE t.table_catalog = '{node.catalog}'",
+                    read="duckdb",
+                )
+                return sub.subquery(node.alias or "tables")
+            # DuckDB: information_schema é global (filtre por table_catalog se precisar)
+            return exp.Table(this=node.this.copy(), db=exp.to_identifier("information_schema"), alias=node.args.get("alias"))
+        if isinstance(node, exp.Parameter):
+            return exp.Anonymous(this="getvariable", expressions=[exp.Literal.string(node.name.upper())])
+        if isinstance(node, exp.ToChar) and isinstance(node.args.get("format"), exp.Literal):
+            fmt = Snowflake.format_time(node.args["format"])
+            return exp.Anonymous(this="strftime", expressions=[node.this, fmt])
+        if isinstance(node, exp.HashAgg):
+            # fingerprint por grupo (independe da ordem), como o HASH_AGG; valores diferem do Snowflake
+            args = [node.this, *node.expressions]
+            return exp.Anonymous(this="bit_xor", expressions=[exp.Anonymous(this="hash", expressions=args)])
+        return node
+
+    tree = tree.transform(fn)
+
+    if isinstance(tree, exp.Merge):
+        # DuckDB: SET da cláusula UPDATE sem qualificador da tabela destino
+        for when in tree.find_all(exp.When):
+            upd = when.args.get("then")
+            if isinstance(upd, exp.Update):
+                for eq in upd.expressions:
+                    if isinstance(eq.this, exp.Column):
+                        eq.this.set("table", None)
+
+    if isinstance(tree, exp.Create):
+        props = tree.args.get("properties")
+        table = tree.this.this if isinstance(tree.this, exp.Schema) else tree.this
+        qualified = isinstance(table, exp.Table) and bool(table.args.get("catalog"))
+        if props is not None:
+            for p in list(props.expressions):
+                name = type(p).__name__
+                if name in _SKIP_PROPERTIES or (name == "TemporaryProperty" and qualified):
+                    p.pop()
+    return tree
+
+
+def _pop_table_comment(tree) -> Optional[str]:
+    """`CREATE TABLE ... COMMENT = '...' AS` -> COMMENT ON TABLE separado (o DuckDB não aceita a propriedade no CTAS)."""
+    props = tree.args.get("properties") if isinstance(tree, exp.Create) else None
+    for p in list(props.expressions if props is not None else []):
+        if isinstance(p, exp.SchemaCommentProperty):
+            props.set("expressions", [q for q in props.expressions if q is not p])
+            table = tree.this.this if isinstance(tree.this, exp.Schema) else tree.this
+            return f"COMMENT ON TABLE {table.sql('duckdb')} IS {p.this.sql('duckdb')}"
+    return None
+
+
+def _is_noop(tree) -> bool:
+    if isinstance(tree, exp.Use):
+        return True
+    if isinstance(tree, exp.Alter) and str(tree.args.get("kind") or "").upper() in {"SESSION", "WAREHOUSE"}:
+        return True
+    return isinstance(tree, exp.Command) and str(tree.this).upper() in {"ALTER", "USE"}
+
+
+def split_statements(sql: str) -> List[str]:
+    """Statements do script, no dialeto Snowflake (comentários preservados no próprio statement)."""
+    _require()
+    return [t.sql("snowflake") for t in sqlglot.parse(sql, read="snowflake") if t is not None]
+
+
+def translate(sql: str) -> List[str]:
+    """Script Snowflake -> statements DuckDB (statements sem efeito local são omitidos)."""
+    _require()
+    out = []
+    for tree in sqlglot.parse(sql, read="snowflake"):
+        if tree is None or _is_noop(tree):
+            continue
+        comment = _pop_table_comment(tree)
+        text = _rewrite(tree).sql("duckdb")
+        text = re.sub(r"TABLESAMPLE ROW \(", "TABLESAMPLE BERNOULLI (", text)
+        text = re.sub(r"TABLESAMPLE BLOCK \(", "TABLESAMPLE SYSTEM (", text)
+        out.append(text)
+        if comment is not None:
+            out.append(comment)
+    return out
+
+
+@contextmanager
+def _sql_errors():
+    """Erros de tradução/execução viram `ProgrammingError`, como no connector (os CLIs capturam esse tipo)."""
+    try:
+        yield
+    except (duckdb.Error, sqlglot.errors.SqlglotError) as e:
+        raise ProgrammingError(msg=f"[backend local] {e}") from e
+
+
+def _upper_names(table: pa.Table) -> pa.Table:
+    """Snowflake devolve identificadores não-citados em maiúsculas; os CLIs contam com isso."""
+    return table.rename_columns([c.upper() for c in table.column_names])
+
+
+class LocalCursor:
+    """Subconjunto da API do `SnowflakeCursor` usado pelos CLIs/utils do repo."""
+
+    def __init__(self, conn: "LocalConnection"):
+        self.connection = conn
+        self._cur = conn._db.cursor()
+        self.description = None
+        self.rowcount = -1
+        self.sfqid: Optional[str] = None
+        self._closed = False
+        self._variables_version = 0
+
+    def _ensure_schema(self, statement: str) -> None:
+        head = re.sub(r"^(?:\s*/\*.*?\*/|\s*--[^\n]*\n)*", "", statement, flags=re.S)
+        m = re.match(r"\s*CREATE\s+(?:OR\s+REPLACE\s+)?(?:\w+\s+)*?(?:TABLE|VIEW)\s+(?:IF\s+NOT\s+EXISTS\s+)?(\w+)\.(\w+)\.\w+", head, re.I)
+        if m:
+            self._cur.execute(f"CREATE SCHEMA IF NOT EXISTS {m.group(1)}.{m.group(2)}")
+
+    def execute(self, command: str, params=None, **kwargs) -> "LocalCursor":
+        # parâmetros pyformat (%s) do connector -> placeholders do DuckDB
+        self.sfqid = uuid.uuid4().hex
+        self.description, self.rowcount = None, -1
+        with _sql_errors():
+            statements = translate(command.replace("%s", "?") if params is not None else command)
+            for s in statements:
+                self._ensure_schema(s)
+                self._execute_one(s, params)
+        if statements and self._cur.description is not None:
+            self.description = [(d[0].upper(),) + tuple(d[1:]) for d in self._cur.description]
+        return self
+
+    def _sync_variables(self, target, version: int) -> int:
+        """Variáveis (`SET`) valem para a sessão no Snowflake; no DuckDB são de cada cursor: reaplica as da conexão."""
+        conn = self.connection
+        if version != conn._variables_version:
+            for name, (value, type_) in conn._variables.items():
+                target.execute(f"SET VARIABLE {name} = CAST(? AS {type_})", [value])
+        return conn._variables_version
+
+    def _execute_one(self, statement: str, params) -> None:
+        conn = self.connection
+        if conn._in_transaction:
+            conn._db_variables_version = self._sync_variables(conn._db, conn._db_variables_version)
+        else:
+            self._variables_version = self._sync_variables(self._cur, self._variables_version)
+        self._execute_in_session(statement, params)
+        if re.match(r"\s*SET\s+VARIABLE\b", statement, re.I):
+            status = self._cur.fetch_arrow_table()
+            src = conn._db if conn._in_transaction else self._cur
+            rows = src.execute("SELECT name, CAST(value AS VARCHAR), type FROM duckdb_variables()").fetchall()
+            self._cur.register("_local_result", status)
+            self._cur.execute("SELECT * FROM _local_result")
+            conn._variables = {name: (value, type_) for name, value, type_ in rows}
+            conn._variables_version += 1
+            if conn._in_transaction:
+                conn._db_variables_version = conn._variables_version
+            else:
+                self._variables_version = conn._variables_version
+
+    def _execute_in_session(self, statement: str, params) -> None:
+        # No Snowflake a transação é da sessão (BEGIN num cursor, COMMIT em outro); no DuckDB é de
+        # cada cursor. Dentro de BEGIN..COMMIT tudo roda no cursor da sessão e o resultado é
+        # materializado, para não ser sobrescrito pelo próximo statement.
+        conn = self.connection
+        keyword = statement.lstrip().split(None, 1)[0].upper() if statement.strip() else ""
+        if not conn._in_transaction and keyword not in {"BEGIN", "START"}:
+            self._cur.execute(statement, params)
+            return
+        conn._db.execute(statement, params)
+        if keyword in {"BEGIN", "START"}:
+            conn._in_transaction = True
+        elif keyword in {"COMMIT", "ROLLBACK"}:
+            conn._in_transaction = False
+        result = conn._db.fetch_arrow_table() if conn._db.description is not None else None
+        if result is None:
+            self._cur.execute("SELECT 1 WHERE FALSE")
+            self._cur.fetchall()
+            return
+        self._cur.register("_local_result", result)
+        self._cur.execute("SELECT * FROM _local_result")
+
+    def execute_async(self, command: str, params=None, **kwargs) -> Dict[str, str]:
+        """Sem fila local: executa na hora e guarda status/resultado (`get_query_status`, `get_results_from_sfqid`)."""
+        try:
+            self.execute(command, params)
+        except ProgrammingError as e:
+            self.connection._queries[self.sfqid] = (QueryStatus.FAILED_WITH_ERROR, e, None)
+        else:
+            result = self._cur.fetch_arrow_table() if self.description is not None else None
+            self.connection._queries[self.sfqid] = (QueryStatus.SUCCESS, None, (self.description, result))
+        return {"queryId": self.sfqid}
+
+    def get_results_from_sfqid(self, sfqid: str) -> None:
+        _, error, result = self.connection._queries[sfqid]
+        if error is not None:
+            raise error
+        self.sfqid = sfqid
+        self.description, table = result
+        self.rowcount = -1
+        if table is not None:
+            self._cur.register("_local_result", table)
+            self._cur.execute("SELECT * FROM _local_result")
+
+    def executemany(self, command: str, seqparams, **kwargs) -> "LocalCursor":
+        with _sql_errors():
+            (statement,) = translate(command.replace("%s", "?"))
+            self._ensure_schema(statement)
+            self._cur.executemany(statement, [tuple(p) for p in seqparams])
+        self.sfqid = uuid.uuid4().hex
+        self.description = None
+        return self
+
+    def fetchone(self):
+        return self._cur.fetchone() if self.description is not None else None
+
+    def fetchmany(self, size: Optional[int] = None):
+        return self._cur.fetchmany(size or 1) if self.description is not None else []
+
+    def fetchall(self):
+        return self._cur.fetchall() if self.description is not None else []
+
+    def fetch_arrow_all(self) -> Optional[pa.Table]:
+        if self.description is None:
+            return None
+        table = _upper_names(self._cur.fetch_arrow_table())
+        return table if table.num_rows else None
+
+    def fetch_arrow_batches(self, rows_per_batch: int = 1_000_000) -> Iterator[pa.Table]:
+        if self.description is None:
+            return
+        reader = self._cur.fetch_record_batch(rows_per_batch)
+        for batch in reader:
+            yield _upper_names(pa.Table.from_batches([batch]))
+
+    def fetch_pandas_all(self) -> pd.DataFrame:
+        table = self.fetch_arrow_all()
+        if table is None:
+            return pd.DataFrame(columns=[d[0] for d in (self.description or [])])
+        return table.to_pandas()
+
+    def fetch_pandas_batches(self) -> Iterator[pd.DataFrame]:
+        for table in self.fetch_arrow_batches():
+            yield table.to_pandas()
+
+    def close(self) -> None:
+        if not self._closed:
+            self._cur.close()
+            self._closed = True
+
+    def is_closed(self) -> bool:
+        return self._closed
+
+    def __iter__(self):
+        row = self.fetchone()
+        while row is not None:
+            yield row
+            row = self.fetchone()
+
+
+def _open_database(path: str, fixtures_dir: str):
+    """
+    Banco DuckDB compartilhado do processo por `path` (conexões/cursores do pool enxergam as mesmas tabelas).
+    Só é publicado em `_OPEN` depois das fixtures carregadas: conexões concorrentes esperam o lock.
+    """
+    with _OPEN_LOCK:
+        db = _OPEN.get(path)
+        if db is not None:
+            return db
+        if path != ":memory:":
+            Path(path).parent.mkdir(parents=True, exist_ok=True)
+        db = duckdb.connect(path)
+        try:
+            for name in DATABASES:
+                target = ":memory:" if path == ":memory:" else f"{Path(path).with_suffix('')}.{name.lower()}.duckdb"
+                db.execute(f"ATTACH IF NOT EXISTS '{target}' AS {name}")
+            for m in _MACROS:
+                db.execute(m)
+            # DuckDB 1.5: `rn < N` sobre ROW_NUMBER() + BETWEEN entre colunas do join (janelas hash+15d do
+            # enrichment de pre_analyses) derruba o otimizador top_n_window_elimination (INTERNAL Error).
+            known = {r[0] for r in db.execute("SELECT name FROM duckdb_optimizers()").fetchall()}
+            if "top_n_window_elimination" in known:
+                db.execute("SET GLOBAL disabled_optimizers = 'top_n_window_elimination'")
+            conn = LocalConnection(path, db=db)
+            try:
+                conn.load_fixtures(fixtures_dir)
+            finally:
+                conn.close()
+        except BaseException:
+            db.close()
+            raise
+        _OPEN[path] = db
+    return db
+
+
+class LocalConnection:
+    """Conexão do backend local: `path=":memory:"` (padrão) ou arquivo .duckdb (`SNOWFLAKE_LOCAL_DB`)."""
+
+    def __init__(self, path: Optional[str] = None, fixtures_dir: Optional[str] = None, db=None):
+        _require()
+        self.path = path or os.getenv("SNOWFLAKE_LOCAL_DB") or ":memory:"
+        fixtures = fixtures_dir or os.getenv("SNOWFLAKE_LOCAL_FIXTURES") or FIXTURES_DIR
+        if db is None:
+            db = _OPEN.get(self.path) or _open_database(self.path, fixtures)
+        self._db = db.cursor()
+        self._in_transaction = False
+        self._closed = False
+        # variáveis de sessão: {nome: (valor, tipo)}; cada cursor reaplica quando a versão muda
+        self._variables: Dict[str, tuple] = {}
+        self._variables_version = 0
+        self._db_variables_version = 0
+        # execute_async local: sfqid -> (status, erro, (description, resultado))
+        self._queries: Dict[str, tuple] = {}
+
+    def get_query_status(self, sfqid: str) -> QueryStatus:
+        return self._queries[sfqid][0]
+
+    def get_query_status_throw_if_error(self, sfqid: str) -> QueryStatus:
+        status, error, _ = self._queries[sfqid]
+        if error is not None:
+            raise error
+        return status
+
+    @staticmethod
+    def is_still_running(status: QueryStatus) -> bool:
+        return False
+
+    @staticmethod
+    def is_an_error(status: QueryStatus) -> bool:
+        return status == QueryStatus.FAILED_WITH_ERROR
+
+    def load_fixtures(self, fixtures_dir: str) -> None:
+        """Executa `<dir>/*.sql` em ordem de nome (as fixtures usam CREATE OR REPLACE: recarga idempotente)."""
+        for f in sorted(Path(fixtures_dir).glob("*.sql")):
+            for c in self.execute_string(f.read_text(encoding="utf-8")):
+                c.close()
+
+    def cursor(self) -> LocalCursor:
+        return LocalCursor(self)
+
+    def execute_string(self, sql_text: str, remove_comments: bool = False, **kwargs) -> List[LocalCursor]:
+        with _sql_errors():
+            statements = split_statements(sql_text)
+        return [self.cursor().execute(statement) for statement in statements]
+
+    def execute_stream(self, stream: io.TextIOBase, remove_comments: bool = False, **kwargs) -> Iterator[LocalCursor]:
+        with _sql_errors():
+            statements = split_statements(stream.read())
+        for statement in statements:
+            yield self.cursor().execute(statement)
+
+    def close(self) -> None:
+        if not self._closed:
+            self._db.close()
+            self._closed = True
+
+    def is_closed(self) -> bool:
+        return self._closed
+
+
+def write_pandas(conn, df: pd.DataFrame, table_name: str, database: Optional[str] = None,
+                 schema: Optional[str] = None, **kwargs):
+    """`snowflake.connector.pandas_tools.write_pandas` que também aceita `LocalConnection` (INSERT BY NAME)."""
+    if not isinstance(conn, LocalConnection):
+        from snowflake.connector.pandas_tools import write_pandas as sf_write_pandas
+
+        return sf_write_pandas(conn, df, table_name, database=database, schema=schema, **kwargs)
+    target = ".".join(p for p in (database, schema, table_name) if p)
+    cur = conn._db.cursor()
+    try:
+        cur.register("_local_upload", df)
+        cur.execute(f"INSERT INTO {target} BY NAME SELECT * FROM _local_upload")
+    finally:
+        cur.close()
+    return True, 1, len(df), []
+
+
+def local_backend_enabled() -> bool:
+    return (os.getenv("SNOWFLAKE_BACKEND") or "").lower() in {"local", "duckdb"}
+
+
+if __name__ == "__main__":
+    for path in sys.argv[1:]:
+        for s in translate(open(path, "r", encoding="utf-8").read()):
+            print(s + ";\n")
@@ -0,0 +1,310 @@
+"""
+Execução paralela (com dependências) dos statements de um script SQL.
+
+Motivação:
+  - scripts de `queries/audit` / `queries/validate` têm vários SELECTs independentes depois do bloco
+    de `SET`; rodando em série, o tempo total é a soma das queries em vez da mais lenta.
+
+Como funciona:
+  - cada statement é classificado (sessão / leitura / escrita / barreira) e ganha dependências:
+      * escrita em X -> statements posteriores que leem/escrevem X esperam (RAW/WAW);
+      * leitura de X -> escrita posterior em X espera (WAR);
+      * `SET/UNSET v` -> espera os statements anteriores que usam `$v` e as escritas anteriores nas tabelas
+        que lê (`SET v = (SELECT ... FROM X)`); escrita posterior em X espera o SET; `USE`/`ALTER SESSION` esperam tudo;
+      * `LAST_QUERY_ID`/`RESULT_SCAN` dependem do histórico da sessão: barreira, e o statement anterior roda
+        também na sessão principal;
+      * statements não reconhecidos (CALL, COPY, GRANT, IDENTIFIER(...) em escrita, ...) são barreiras;
+  - statements de sessão (SET/UNSET/USE/ALTER SESSION) são executados na sessão principal e
+    re-aplicados (replay) em cada sessão worker antes do próximo statement submetido nela;
+  - objetos TEMPORARY são visíveis só na sessão que os criou: quem cria/usa temp roda na principal;
+    idem para quem usa variável calculada por query (`SET v = (SELECT ...)`): o replay recalcularia o valor;
+  - a submissão segue a ordem do arquivo (execute_async); cada sessão roda 1 query por vez;
+  - os resultados são entregues ao callback na ordem do arquivo.
+
+Scripts com transação explícita (BEGIN/COMMIT) não são paralelizados: `analyze_statements` sinaliza.
+"""
+
+from __future__ import annotations
+
+import re
+import time
+from dataclasses import dataclass, field
+from typing import Callable, List, Optional, Sequence, Set
+
+from snowflake.connector.errors import ProgrammingError
+
+from src.utils.query_cache import normalize_sql
+from src.utils.snowflake_connection import get_snowflake_connection
+
+_STRING = re.compile(r"'(?:[^']|'')*'")
+_NAME = re.compile(r"(?<![\w$])([A-Za-z_][\w$]*(?:\.[A-Za-z_][\w$]*){0,2})")
+_VAR_USE = re.compile(r"\$([A-Za-z_]\w*)")
+_SESSION = re.compile(r"^(SET|UNSET|USE|ALTER\s+SESSION)\b", re.IGNORECASE)
+_TXN = re.compile(r"^(BEGIN|START\s+TRANSACTION|COMMIT|ROLLBACK)\b", re.IGNORECASE)
+_HISTORY = re.compile(r"\b(LAST_QUERY_ID|RESULT_SCAN)\s*\(", re.IGNORECASE)
+_SUBQUERY = re.compile(r"\bSELECT\b", re.IGNORECASE)
+_READ_ONLY = re.compile(r"^(SELECT|WITH|SHOW|DESC|DESCRIBE|EXPLAIN|\()", re.IGNORECASE)
+_OBJ = r"([A-Za-z_][\w$]*(?:\.[A-Za-z_][\w$]*){0,2})"
+_WRITES = [
+    re.compile(
+        r"^CREATE\s+(?:OR\s+REPLACE\s+)?(?:(?:LOCAL|GLOBAL)\s+)?(TEMP|TEMPORARY|VOLATILE|TRANSIENT)?\s*"
+        r"(?:SECURE\s+)?(?:MATERIALIZED\s+)?(?:TABLE|VIEW)\s+(?:IF\s+NOT\s+EXISTS\s+)?" + _OBJ,
+        re.IGNORECASE,
+    ),
+    re.compile(r"^INSERT\s+(?:OVERWRITE\s+)?INTO\s+" + _OBJ, re.IGNORECASE),
+    re.compile(r"^MERGE\s+INTO\s+" + _OBJ, re.IGNORECASE),
+    re.compile(r"^UPDATE\s+" + _OBJ, re.IGNORECASE),
+    re.compile(r"^DELETE\s+FROM\s+" + _OBJ, re.IGNORECASE),
+    re.compile(r"^DROP\s+(?:TABLE|VIEW)\s+(?:IF\s+EXISTS\s+)?" + _OBJ, re.IGNORECASE),
+    re.compile(r"^TRUNCATE\s+(?:TABLE\s+)?(?:IF\s+EXISTS\s+)?" + _OBJ, re.IGNORECASE),
+    re.compile(r"^ALTER\s+(?:TABLE|VIEW)\s+(?:IF\s+EXISTS\s+)?" + _OBJ, re.IGNORECASE),
+]
+
+
+def _short(name: str) -> str:
+    """Compara objetos pelo último componente (conservador: `DB.S.T` e `T` colidem)."""
+    return name.split(".")[-1].upper()
+
+
+@dataclass
+class StatementInfo:
+    idx: int
+    sql: str
+    session: bool = False
+    barrier: bool = False
+    temp: bool = False
+    history: bool = False  # LAST_QUERY_ID / RESULT_SCAN
+    writes: Set[str] = field(default_factory=set)
+    reads: Set[str] = field(default_factory=set)
+    vars_set: Set[str] = field(default_factory=set)
+    vars_used: Set[str] = field(default_factory=set)
+    deps: List[int] = field(default_factory=list)
+    pinned: bool = False
+    # estado de execução
+    status: str = "pending"  # pending | running | done | failed | skipped
+    worker: Optional[int] = None
+    query_id: Optional[str] = None
+    t_submit: float = 0.0
+    elapsed: float = 0.0
+    error: Optional[str] = None
+    result: object = None  # payload opcional do submit (ex.: hit do cache local)
+
+
+def _classify(idx: int, sql: str) -> StatementInfo:
+    norm = _STRING.sub("''", normalize_sql(sql))
+    info = StatementInfo(idx=idx, sql=sql)
+    info.vars_used = {v.upper() for v in _VAR_USE.findall(norm)}
+    info.reads = {_short(n) for n in _NAME.findall(norm)}
+    info.history = info.barrier = _HISTORY.search(norm) is not None
+
+    if _SESSION.match(norm):
+        info.session = True
+        head = norm.split(" ", 1)[0].upper()
+        if head in {"SET", "UNSET"}:
+            lhs = norm.split("=", 1)[0] if "=" in norm else norm
+            lhs = re.sub(r"^(SET|UNSET)\s+", "", lhs, flags=re.IGNORECASE)
+            info.vars_set = {v.strip().strip("()").upper() for v in lhs.split(",") if v.strip().strip("()")}
+        else:
+            info.barrier = True
+        return info
+
+    if _READ_ONLY.match(norm):
+        return info
+
+    for rx in _WRITES:
+        m = rx.match(norm)
+        if m is None:
+            continue
+        target = m.group(m.lastindex)
+        if target.upper() == "IDENTIFIER":
+            break
+        info.writes = {_short(target)}
+        info.temp = rx is _WRITES[0] and (m.group(1) or "").upper() in {"TEMP", "TEMPORARY", "VOLATILE"}
+        return info
+
+    info.barrier = True
+    return info
+
+
+def analyze_statements(statements: Sequence[tuple[int, str]]) -> tuple[List[StatementInfo], bool]:
+    """
+    Classifica e liga dependências. Retorna (infos, paralelizável).
+    `statements` = [(índice 1-based no arquivo, sql)].
+    """
+    infos = [_classify(i, s) for i, s in statements]
+    parallelizable = not any(_TXN.match(normalize_sql(s.sql)) for s in infos)
+
+    temp_objects: Set[str] = set()
+    query_vars: Set[str] = set()
+    for j, sj in enumerate(infos):
+        if sj.temp:
+            temp_objects |= sj.writes
+        if sj.session and (sj.history or _SUBQUERY.search(normalize_sql(sj.sql))):
+            query_vars |= sj.vars_set
+        elif sj.session:
+            query_vars -= sj.vars_set
+        if (sj.reads | sj.writes) & temp_objects or sj.vars_used & query_vars or sj.barrier:
+            sj.pinned = True
+        if sj.history and j > 0:
+            infos[j - 1].pinned = True
+        deps: Set[int] = set()
+        for si in infos[:j]:
+            if sj.barrier or si.barrier:
+                deps.add(si.idx)
+            elif sj.session:
+                if sj.vars_set & si.vars_used or si.writes & sj.reads:
+                    deps.add(si.idx)
+            elif si.session:
+                if sj.writes & si.reads:
+                    deps.add(si.idx)
+            elif si.writes & (sj.reads | sj.writes) or sj.writes & si.reads:
+                deps.add(si.idx)
+        sj.deps = sorted(deps)
+    return infos, parallelizable
+
+
+@dataclass
+class _Worker:
+    wid: int
+    conn: object
+    owned: bool
+    applied: int = 0
+    busy: Optional[StatementInfo] = None
+
+
+def run_parallel(
+    primary_conn,
+    infos: List[StatementInfo],
+    n_workers: int,
+    preamble: Sequence[str] = (),
+    on_result: Optional[Callable[[StatementInfo, object], None]] = None,
+    before_submit: Optional[Callable[[StatementInfo, object], bool]] = None,
+    poll_seconds: float = 0.5,
+) -> List[StatementInfo]:
+    """
+    Executa `infos` em até `n_workers` sessões (a principal + sessões novas via get_snowflake_connection).
+
+    - `preamble`: statements de sessão aplicados em toda sessão worker ao abrir (ex.: overrides `--set`;
+      a sessão principal já deve tê-los aplicado);
+    - `before_submit(info, cursor)`: se devolver True, o statement é dado como concluído sem ir ao
+      Snowflake (ex.: hit do cache local);
+    - `on_result(info, cursor)`: chamado na ordem do arquivo; para statements executados, o cursor já
+      aponta para o resultado (`get_results_from_sfqid`).
+    Para no primeiro erro (os statements já submetidos terminam); o erro fica em `info.error`.
+    """
+    workers = [_Worker(0, primary_conn, owned=False)]
+    session_log: List[StatementInfo] = []
+    by_idx = {s.idx: s for s in infos}
+    next_pos = 0
+    emitted = 0
+    failed = False
+
+    def open_worker() -> Optional[_Worker]:
+        if len(workers) >= max(1, int(n_workers)):
+            return None
+        conn = get_snowflake_connection()
+        if conn is None:
+            raise ConnectionError("Falha ao abrir sessão worker no Snowflake.")
+        cur = conn.cursor()
+        for s in preamble:
+            cur.execute(s)
+        w = _Worker(len(workers), conn, owned=True)
+        workers.append(w)
+        return w
+
+    def replay(w: _Worker) -> None:
+        cur = w.conn.cursor()
+        for s in session_log[w.applied :]:
+            cur.execute(s.sql)
+        w.applied = len(session_log)
+
+    def finished(i: int) -> bool:
+        return by_idx[i].status in {"done", "skipped"}
+
+    try:
+        while True:
+            # 1) submissões em ordem do arquivo
+            while not failed and next_pos < len(infos):
+                s = infos[next_pos]
+                if not all(finished(d) for d in s.deps):
+                    break
+                if s.session:
+                    # aplica na principal agora; workers fazem replay antes do próximo submit
+                    try:
+                        workers[0].conn.cursor().execute(s.sql)
+                    except ProgrammingError as e:
+                        s.status, s.error, failed = "failed", str(e), True
+                        break
+                    session_log.append(s)
+                    workers[0].applied = len(session_log)
+                    s.status, s.worker = "done", 0
+                    next_pos += 1
+                    continue
+                idle = [w for w in workers if w.busy is None]
+                if s.pinned:
+                    w = workers[0] if workers[0].busy is None else None
+                else:
+                    w = idle[0] if idle else open_worker()
+                if w is None:
+                    break
+                replay(w)
+                cur = w.conn.cursor()
+                s.worker = w.wid
+                if before_submit is not None and before_submit(s, cur):
+                    s.status = "done"
+                    next_pos += 1
+                    continue
+                cur.execute_async(s.sql)
+                s.query_id = cur.sfqid
+                s.t_submit = time.time()
+                s.status = "running"
+                w.busy = s
+                next_pos += 1
+
+            running = [w for w in workers if w.busy is not None]
+
+            # 2) entrega em ordem do arquivo
+            while emitted < len(infos) and infos[emitted].status in {"done", "failed"}:
+                s = infos[emitted]
+                if on_result is not None and s.status == "done":
+                    cur = workers[s.worker or 0].conn.cursor()
+                    if s.query_id is not None:
+                        cur.get_results_from_sfqid(s.query_id)
+                    on_result(s, cur)
+                emitted += 1
+                if s.status == "failed":
+                    break
+
+            if not running and (failed or next_pos >= len(infos)):
+                break
+
+            # 3) polling das queries em execução
+            time.sleep(poll_seconds)
+            for w in running:
+                s = w.busy
+                status = w.conn.get_query_status(s.query_id)
+                if w.conn.is_still_running(status):
+                    continue
+                s.elapsed = time.time() - s.t_submit
+                w.busy = None
+                if w.conn.is_an_error(status):
+                    try:
+                        w.conn.get_query_status_throw_if_error(s.query_id)
+                    except ProgrammingError as e:
+                        s.error = str(e)
+                    s.status = "failed"
+                    failed = True
+                else:
+                    s.status = "done"
+    finally:
+        for w in workers:
+            if w.owned:
+                try:
+                    w.conn.close()
+                except Exception:
+                    pass
+
+    for s in infos:
+        if s.status == "pending":
+            s.status = "skipped" if failed else s.status
+    return infos
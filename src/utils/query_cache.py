@@ -0,0 +1,418 @@
+"""
+Cache local (em disco) de result sets, validado por frescor das tabelas referenciadas.
+
+Motivação:
+  - Queries de `queries/validate` e `queries/audit` são re-executadas várias vezes ao dia contra
+    tabelas que não mudaram; cada re-execução custa warehouse + transferência.
+
+Como funciona:
+  - chave = SHA-256 de (SQL normalizado: sem comentários/espaços redundantes) + variáveis de sessão
+    referenciadas (`$var`, inclui valores vindos de `SET`/`--set`) + contexto (account/db/schema/role/user);
+  - valor = Parquet com o result set + JSON de metadados (fingerprint das tabelas, tamanho, último acesso);
+  - fingerprint = `LAST_ALTERED` de cada tabela fully-qualified referenciada (views são expandidas
+    via `GET_OBJECT_REFERENCES`); se qualquer `LAST_ALTERED` mudou, o hit é descartado;
+  - eviction LRU por tamanho total (`QUERY_CACHE_MAX_MB`, padrão 2048).
+
+Não entram no cache:
+  - statements que não são SELECT/WITH;
+  - SQL não determinístico (RANDOM/UNIFORM/SAMPLE/CURRENT_DATE/CURRENT_TIMESTAMP/SYSTIMESTAMP/...) ou dependente do histórico da sessão (LAST_QUERY_ID/RESULT_SCAN);
+  - SQL que lê alguma tabela sem nome `db.schema.tabela` (o fingerprint não a enxergaria: hit velho);
+  - SQL cujas tabelas não puderam ser resolvidas no INFORMATION_SCHEMA.
+
+Bypass: `QUERY_CACHE_DISABLED=1`, `run_query(..., use_cache=False)` ou `run_sql_file --no-cache`.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import re
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional
+
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+_NONDETERMINISTIC = re.compile(
+    r"\b(RANDOM|UNIFORM|NORMAL|UUID_STRING|CURRENT_DATE|CURRENT_TIME|CURRENT_TIMESTAMP|"
+    r"SYSDATE|SYSTIMESTAMP|GETDATE|LOCALTIME|LOCALTIMESTAMP|SEQ[1248]|LAST_QUERY_ID|RESULT_SCAN)\b|"
+    r"\bSAMPLE\s*\(|\bTABLESAMPLE\b",
+    re.IGNORECASE,
+)
+_FQ_NAME = re.compile(r"\b([A-Za-z_][\w$]*)\.([A-Za-z_][\w$]*)\.([A-Za-z_][\w$]*)\b")
+_SESSION_VAR = re.compile(r"\$([A-Za-z_]\w*)")
+
+
+def normalize_sql(sql: str) -> str:
+    """Remove comentários e colapsa espaços fora de strings; remove ';' final."""
+    out: List[str] = []
+    i = 0
+    n = len(sql)
+    in_single = False
+    while i < n:
+        ch = sql[i]
+        nxt = sql[i + 1] if i + 1 < n else ""
+        if in_single:
+            out.append(ch)
+            if ch == "'" and nxt == "'":
+                out.append(nxt)
+                i += 2
+                continue
+            if ch == "'":
+                in_single = False
+            i += 1
+            continue
+        if ch == "'":
+            in_single = True
+            out.append(ch)
+            i += 1
+            continue
+        if ch == "-" and nxt == "-":
+            j = sql.find("\n", i)
+            i = n if j < 0 else j
+            continue
+        if ch == "/" and nxt == "*":
+            j = sql.find("*/", i + 2)
+            i = n if j < 0 else j + 2
+            out.append(" ")
+            continue
+        if ch.isspace():
+            if out and out[-1] != " ":
+                out.append(" ")
+            i += 1
+            continue
+        out.append(ch)
+        i += 1
+    return "".join(out).strip().rstrip(";").strip()
+
+
+def _is_query(sql_norm: str) -> bool:
+    return sql_norm.lstrip("( ").split(" ", 1)[0].upper() in {"SELECT", "WITH"}
+
+
+def unqualified_tables(sql_norm: str, variables: Dict[str, str]) -> List[str]:
+    """
+    Tabelas referenciadas sem nome `db.schema.tabela` (nomes de CTE não contam; `IDENTIFIER($var)` vale pelo
+    valor da variável). SQL que o parser não reconhece conta como não qualificado (conservador).
+    """
+    try:
+        import sqlglot
+        from sqlglot import exp
+    except ImportError:
+        return ["<sqlglot indisponível>"]
+    try:
+        trees = [t for t in sqlglot.parse(sql_norm, read="snowflake") if t is not None]
+    except sqlglot.errors.SqlglotError:
+        return ["<SQL não reconhecido>"]
+    out = set()
+    for tree in trees:
+        ctes = {c.alias_or_name.upper() for c in tree.find_all(exp.CTE)}
+        for t in tree.find_all(exp.Table):
+            if isinstance(t.this, exp.DynamicIdentifier):
+                value = variables.get(t.name.upper(), "").strip("'\" ")
+                if not _FQ_NAME.fullmatch(value):
+                    out.add(f"IDENTIFIER(${t.name})")
+            elif not (t.catalog and t.db) and not (not t.db and t.name.upper() in ctes):
+                out.add(".".join(p for p in (t.catalog, t.db, t.name) if p))
+    return sorted(out)
+
+
+def is_cacheable_sql(sql_norm: str, variables: Optional[Dict[str, str]] = None) -> bool:
+    if not _is_query(sql_norm) or _NONDETERMINISTIC.search(sql_norm) is not None:
+        return False
+    return not unqualified_tables(sql_norm, variables or {})
+
+
+def session_variables(cur, sql_norm: str) -> Dict[str, str]:
+    """Valores das variáveis de sessão (`$var`) referenciadas pelo SQL (via SHOW VARIABLES)."""
+    names = {m.upper() for m in _SESSION_VAR.findall(sql_norm)}
+    if not names:
+        return {}
+    cur.execute("SHOW VARIABLES")
+    cols = [d[0].lower() for d in (cur.description or [])]
+    i_name, i_value = cols.index("name"), cols.index("value")
+    return {str(r[i_name]).upper(): str(r[i_value]) for r in cur.fetchall() if str(r[i_name]).upper() in names}
+
+
+def session_identity(cur) -> Dict[str, str]:
+    """Role e usuário correntes da sessão (o mesmo SQL pode ver linhas diferentes por role/RLS)."""
+    try:
+        cur.execute("SELECT CURRENT_ROLE(), CURRENT_USER()")
+        role, user = cur.fetchone()
+    except Exception:
+        role, user = os.getenv("SNOWFLAKE_ROLE"), os.getenv("SNOWFLAKE_USER")
+    return {"role": str(role), "user": str(user)}
+
+
+def referenced_tables(sql_norm: str, variables: Dict[str, str]) -> List[str]:
+    texts = [sql_norm] + list(variables.values())
+    found = set()
+    for t in texts:
+        for db, schema, name in _FQ_NAME.findall(t):
+            found.add(f"{db.upper()}.{schema.upper()}.{name.upper()}")
+    return sorted(found)
+
+
+def _fetch_last_altered(cur, names: List[str]) -> Dict[str, tuple[str, str]]:
+    """{DB.SCHEMA.TABLE: (table_type, last_altered_iso)} para os nomes encontrados."""
+    by_db: Dict[str, List[tuple[str, str]]] = {}
+    for fq in names:
+        db, schema, name = fq.split(".")
+        by_db.setdefault(db, []).append((schema, name))
+    out: Dict[str, tuple[str, str]] = {}
+    for db, pairs in by_db.items():
+        preds = " OR ".join(f"(table_schema = '{s}' AND table_name = '{t}')" for s, t in pairs)
+        try:
+            cur.execute(
+                f"SELECT table_schema, table_name, table_type, last_altered "
+                f"FROM {db}.INFORMATION_SCHEMA.TABLES WHERE {preds}"
+            )
+        except Exception:
+            continue
+        for schema, name, table_type, last_altered in cur.fetchall():
+            out[f"{db}.{schema}.{name}"] = (str(table_type), str(last_altered))
+    return out
+
+
+def _view_references(cur, fq_view: str) -> List[str]:
+    db, schema, name = fq_view.split(".")
+    cur.execute(
+        f"SELECT referenced_database_name, referenced_schema_name, referenced_object_name "
+        f"FROM TABLE({db}.INFORMATION_SCHEMA.GET_OBJECT_REFERENCES("
+        f"DATABASE_NAME => '{db}', SCHEMA_NAME => '{schema}', OBJECT_NAME => '{name}'))"
+    )
+    return [f"{d}.{s}.{o}".upper() for d, s, o in cur.fetchall()]
+
+
+def table_fingerprint(cur, names: List[str], max_view_depth: int = 3) -> Optional[Dict[str, str]]:
+    """
+    {tabela: last_altered} das tabelas base referenciadas (views expandidas recursivamente).
+    Retorna None se alguma referência não pôde ser resolvida (não cacheável).
+    """
+    if not names:
+        return None
+    fingerprint: Dict[str, str] = {}
+    frontier = list(names)
+    for _ in range(max_view_depth + 1):
+        if not frontier:
+            break
+        info = _fetch_last_altered(cur, frontier)
+        next_frontier: List[str] = []
+        for fq in frontier:
+            if fq not in info:
+                return None
+            table_type, last_altered = info[fq]
+            fingerprint[fq] = last_altered
+            if table_type.upper() == "VIEW":
+                try:
+                    next_frontier.extend(r for r in _view_references(cur, fq) if r not in fingerprint)
+                except Exception:
+                    return None
+        frontier = sorted(set(next_frontier))
+    if frontier:
+        return None
+    return fingerprint
+
+
+@dataclass
+class CacheLookup:
+    key: Optional[str]
+    fingerprint: Optional[Dict[str, str]]
+    path: Optional[Path]  # Parquet do hit (lido sob demanda)
+
+    @property
+    def hit(self) -> bool:
+        return self.path is not None
+
+    @property
+    def cacheable(self) -> bool:
+        return self.key is not None and self.fingerprint is not None
+
+    @property
+    def table(self) -> pa.Table:
+        return pq.read_table(self.path)
+
+    def preview(self, max_rows: int) -> tuple[pa.Table, int]:
+        """Primeiras `max_rows` linhas do hit + total de linhas (lê só os row groups necessários)."""
+        pf = pq.ParquetFile(self.path)
+        batches = []
+        n = 0
+        for batch in pf.iter_batches(batch_size=max(1, int(max_rows))):
+            batches.append(batch)
+            n += batch.num_rows
+            if n >= max_rows:
+                break
+        table = pa.Table.from_batches(batches, schema=pf.schema_arrow).slice(0, max_rows)
+        return table, pf.metadata.num_rows
+
+
+class QueryCache:
+    def __init__(
+        self,
+        cache_dir: str | Path = ".cache/query_results",
+        max_bytes: int = 2048 * 1024 * 1024,
+        max_rows_per_entry: int = 500_000,
+    ):
+        self.cache_dir = Path(cache_dir)
+        self.max_bytes = int(max_bytes)
+        self.max_rows_per_entry = int(max_rows_per_entry)
+
+    def _paths(self, key: str) -> tuple[Path, Path]:
+        return self.cache_dir / f"{key}.parquet", self.cache_dir / f"{key}.json"
+
+    def _key(self, cur, sql_norm: str, variables: Dict[str, str]) -> str:
+        context = {
+            "account": os.getenv("SNOWFLAKE_ACCOUNT"),
+            "database": os.getenv("SNOWFLAKE_DATABASE"),
+            "schema": os.getenv("SNOWFLAKE_SCHEMA"),
+            **session_identity(cur),
+        }
+        payload = json.dumps({"sql": sql_norm, "vars": sorted(variables.items()), "ctx": context}, sort_keys=True)
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def lookup(self, cur, sql: str) -> CacheLookup:
+        """
+        Calcula chave + fingerprint (antes de executar a query) e devolve o hit, se fresco.
+        Usa o cursor para metadados: chame ANTES do `execute` da query principal.
+        """
+        sql_norm = normalize_sql(sql)
+        if not _is_query(sql_norm) or _NONDETERMINISTIC.search(sql_norm) is not None:
+            return CacheLookup(None, None, None)
+        variables = session_variables(cur, sql_norm)
+        if not is_cacheable_sql(sql_norm, variables):
+            return CacheLookup(None, None, None)
+        key = self._key(cur, sql_norm, variables)
+        fingerprint = table_fingerprint(cur, referenced_tables(sql_norm, variables))
+        if fingerprint is None:
+            return CacheLookup(key, None, None)
+
+        data_path, meta_path = self._paths(key)
+        if not (data_path.exists() and meta_path.exists()):
+            return CacheLookup(key, fingerprint, None)
+        meta = json.loads(meta_path.read_text(encoding="utf-8"))
+        if meta.get("fingerprint") != fingerprint:
+            self._remove(key)
+            return CacheLookup(key, fingerprint, None)
+        meta["last_access"] = time.time()
+        meta["hits"] = int(meta.get("hits", 0)) + 1
+        meta_path.write_text(json.dumps(meta, indent=2), encoding="utf-8")
+        return CacheLookup(key, fingerprint, data_path)
+
+    def store(self, lookup: CacheLookup, table: pa.Table) -> bool:
+        if not lookup.cacheable or table.num_rows > self.max_rows_per_entry:
+            return False
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        data_path, _ = self._paths(lookup.key)
+        pq.write_table(table, data_path)
+        self._write_meta(lookup, table.num_rows)
+        return True
+
+    def store_stream(self, lookup: CacheLookup, batches: Iterator[pa.RecordBatch], preview_rows: int) -> tuple[Optional[pa.Table], int]:
+        """
+        Grava o result set em disco batch a batch (memória = 1 batch + preview) e devolve
+        (primeiras `preview_rows` linhas, total de linhas). Acima de `max_rows_per_entry` o arquivo
+        parcial é descartado (o result set continua sendo consumido para o total).
+        """
+        data_path, _ = self._paths(lookup.key)
+        tmp_path = data_path.with_suffix(".parquet.tmp")
+        writer = None
+        preview: List[pa.RecordBatch] = []
+        n_preview = 0
+        total = 0
+        schema = None
+        try:
+            for batch in batches:
+                if schema is None:
+                    schema = batch.schema
+                elif batch.schema != schema:
+                    batch = batch.cast(schema)
+                total += batch.num_rows
+                if n_preview < preview_rows:
+                    preview.append(batch.slice(0, preview_rows - n_preview))
+                    n_preview += preview[-1].num_rows
+                if not lookup.cacheable or total > self.max_rows_per_entry:
+                    if writer is not None:
+                        writer.close()
+                        writer = None
+                        tmp_path.unlink(missing_ok=True)
+                    continue
+                if writer is None:
+                    self.cache_dir.mkdir(parents=True, exist_ok=True)
+                    writer = pq.ParquetWriter(tmp_path, schema)
+                writer.write_batch(batch)
+        except BaseException:
+            if writer is not None:
+                writer.close()
+            tmp_path.unlink(missing_ok=True)
+            raise
+        if writer is not None:
+            writer.close()
+            tmp_path.replace(data_path)
+            self._write_meta(lookup, total)
+        if schema is None:
+            return None, 0
+        return pa.Table.from_batches(preview, schema=schema), total
+
+    def _write_meta(self, lookup: CacheLookup, rows: int) -> None:
+        data_path, meta_path = self._paths(lookup.key)
+        now = time.time()
+        meta = {
+            "created_at": now,
+            "last_access": now,
+            "hits": 0,
+            "rows": rows,
+            "bytes": data_path.stat().st_size,
+            "fingerprint": lookup.fingerprint,
+        }
+        meta_path.write_text(json.dumps(meta, indent=2), encoding="utf-8")
+        self.evict()
+
+    def _remove(self, key: str) -> None:
+        for p in self._paths(key):
+            try:
+                p.unlink()
+            except FileNotFoundError:
+                pass
+
+    def evict(self) -> None:
+        """Remove entradas menos recentemente usadas até caber em `max_bytes`."""
+        if not self.cache_dir.exists():
+            return
+        entries = []
+        total = 0
+        for meta_path in self.cache_dir.glob("*.json"):
+            key = meta_path.stem
+            data_path = self.cache_dir / f"{key}.parquet"
+            if not data_path.exists():
+                meta_path.unlink()
+                continue
+            try:
+                last_access = float(json.loads(meta_path.read_text(encoding="utf-8")).get("last_access", 0))
+            except (ValueError, json.JSONDecodeError):
+                last_access = 0.0
+            size = data_path.stat().st_size + meta_path.stat().st_size
+            entries.append((last_access, key, size))
+            total += size
+        for _, key, size in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            self._remove(key)
+            total -= size
+
+    def clear(self) -> None:
+        for p in self.cache_dir.glob("*"):
+            if p.suffix in {".json", ".parquet"}:
+                p.unlink()
+
+
+def get_query_cache() -> Optional[QueryCache]:
+    """Cache configurado via ambiente; None se desabilitado (`QUERY_CACHE_DISABLED=1`)."""
+    if os.getenv("QUERY_CACHE_DISABLED", "").strip() in {"1", "true", "TRUE", "yes"}:
+        return None
+    return QueryCache(
+        cache_dir=os.getenv("QUERY_CACHE_DIR", ".cache/query_results"),
+        max_bytes=int(float(os.getenv("QUERY_CACHE_MAX_MB", "2048")) * 1024 * 1024),
+    )
@@ -0,0 +1,225 @@
+"""
+Instrumentação de custo por query: QUERY_TAG + métricas de QUERY_HISTORY / GET_QUERY_OPERATOR_STATS.
+
+Motivação:
+  - o único tempo que tínhamos era o wall-clock de `exec_and_time()`; para achar o hot spot
+    (spill, pruning ruim, fila) era preciso abrir o profile no Snowsight query a query.
+
+Como funciona:
+  - o CLI chama `init_profiler("<cli>")` no início: toda sessão aberta depois disso
+    (`get_snowflake_connection`, inclusive as do pool) nasce com `QUERY_TAG` = {"cli", "run_id"};
+  - `tag_query(cur, file=..., stmt=...)` / `tag_query(cur, step=...)` refina o tag da sessão antes dos
+    statements principais (statement do script, estágio, janela de backfill, CTAS, MERGE...);
+  - no fim, `report_profile(cur)` busca em `INFORMATION_SCHEMA.QUERY_HISTORY` as queries cujo tag contém
+    o run_id, e `GET_QUERY_OPERATOR_STATS` das mais lentas (top operadores por % do tempo);
+    grava `outputs/query_profiles/<cli>_<run_id>.jsonl` e imprime um resumo.
+
+Desligar: `--no-profile` nos CLIs (não cria tag nem relatório).
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import time
+import uuid
+from pathlib import Path
+from typing import Dict, List, Optional
+
+_PROFILER: Optional["QueryProfiler"] = None
+
+_HISTORY_COLS = [
+    "query_id",
+    "query_tag",
+    "query_type",
+    "execution_status",
+    "warehouse_size",
+    "total_elapsed_time",
+    "compilation_time",
+    "execution_time",
+    "queued_provisioning_time",
+    "queued_overload_time",
+    "bytes_scanned",
+    "partitions_scanned",
+    "partitions_total",
+    "bytes_spilled_to_local_storage",
+    "bytes_spilled_to_remote_storage",
+    "rows_produced",
+    "percentage_scanned_from_cache",
+]
+
+
+def fetch_query_history(cur, where: str, since: float) -> List[Dict[str, object]]:
+    """
+    Linhas de `INFORMATION_SCHEMA.QUERY_HISTORY` (queries do usuário terminadas após `since`, epoch)
+    que satisfazem `where`, com o QUERY_TAG decodificado em `labels`.
+    """
+    db = os.getenv("SNOWFLAKE_DATABASE") or "CAPIM_DATA_DEV"
+    cols = ", ".join(_HISTORY_COLS)
+    cur.execute(
+        f"""
+        SELECT {cols}
+        FROM TABLE({db}.INFORMATION_SCHEMA.QUERY_HISTORY(
+          END_TIME_RANGE_START => TO_TIMESTAMP_LTZ({int(since) - 60}),
+          RESULT_LIMIT => 10000
+        ))
+        WHERE {where}
+          AND query_type NOT IN ('ALTER_SESSION', 'UNKNOWN')
+        ORDER BY start_time
+        """
+    )
+    rows = []
+    for r in cur.fetchall():
+        rec = dict(zip(_HISTORY_COLS, r))
+        try:
+            rec["labels"] = json.loads(str(rec.pop("query_tag") or "{}"))
+        except json.JSONDecodeError:
+            rec["labels"] = {}
+        rows.append(rec)
+    return rows
+
+
+def query_metrics(cur, query_ids: List[str], since: float) -> Dict[str, Dict[str, object]]:
+    """{query_id: linha do QUERY_HISTORY} para os ids informados."""
+    if not query_ids:
+        return {}
+    ids = ", ".join(f"'{q}'" for q in query_ids)
+    return {str(r["query_id"]): r for r in fetch_query_history(cur, f"query_id IN ({ids})", since=since)}
+
+
+def add_profile_args(ap: argparse.ArgumentParser) -> None:
+    ap.add_argument(
+        "--no-profile",
+        action="store_true",
+        help="Não marca as queries com QUERY_TAG nem gera o relatório de custo (outputs/query_profiles/).",
+    )
+
+
+class QueryProfiler:
+    def __init__(self, cli: str, out_dir: str | Path = "outputs/query_profiles", top_queries: int = 5, top_operators: int = 5):
+        self.cli = cli
+        self.run_id = uuid.uuid4().hex[:12]
+        self.t_start = time.time()
+        self.out_dir = Path(out_dir)
+        self.top_queries = int(top_queries)
+        self.top_operators = int(top_operators)
+
+    def tag(self, **labels) -> str:
+        """QUERY_TAG (JSON compacto, <= 2000 chars) com cli + run_id + rótulos do statement."""
+        payload = {"cli": self.cli, "run_id": self.run_id}
+        payload.update({k: v for k, v in labels.items() if v is not None})
+        return json.dumps(payload, separators=(",", ":"), default=str)[:2000]
+
+    def _history(self, cur) -> List[Dict[str, object]]:
+        return fetch_query_history(cur, f"""CONTAINS(query_tag, '"run_id":"{self.run_id}"')""", since=self.t_start)
+
+    def _operators(self, cur, query_id: str) -> List[Dict[str, object]]:
+        cur.execute(
+            f"""
+            SELECT
+              operator_id,
+              operator_type,
+              execution_time_breakdown:overall_percentage::FLOAT AS pct,
+              operator_statistics:output_rows::NUMBER AS output_rows,
+              operator_statistics:spilling:bytes_spilled_local_storage::NUMBER AS spill_local,
+              operator_statistics:spilling:bytes_spilled_remote_storage::NUMBER AS spill_remote,
+              operator_attributes::STRING AS attributes
+            FROM TABLE(GET_QUERY_OPERATOR_STATS('{query_id}'))
+            ORDER BY pct DESC NULLS LAST
+            LIMIT {self.top_operators}
+            """
+        )
+        keys = ["operator_id", "operator_type", "pct", "output_rows", "spill_local", "spill_remote", "attributes"]
+        return [dict(zip(keys, r)) for r in cur.fetchall()]
+
+    def collect(self, cur) -> List[Dict[str, object]]:
+        rows = self._history(cur)
+        slowest = sorted(rows, key=lambda r: -(r.get("total_elapsed_time") or 0))[: self.top_queries]
+        for r in slowest:
+            try:
+                r["top_operators"] = self._operators(cur, str(r["query_id"]))
+            except Exception as e:  # query sem profile (ex.: resultado do cache do Snowflake)
+                r["top_operators"] = []
+                r["operator_stats_error"] = str(e)[:200]
+        return rows
+
+    def write_report(self, rows: List[Dict[str, object]]) -> Path:
+        self.out_dir.mkdir(parents=True, exist_ok=True)
+        path = self.out_dir / f"{self.cli}_{self.run_id}.jsonl"
+        with path.open("w", encoding="utf-8") as f:
+            for r in rows:
+                f.write(json.dumps(r, default=str) + "\n")
+        return path
+
+    def print_summary(self, rows: List[Dict[str, object]]) -> None:
+        def gb(v) -> float:
+            return round((v or 0) / 1024**3, 2)
+
+        print("\n" + "=" * 90)
+        print(f"Perfil de queries: cli={self.cli} run_id={self.run_id} ({len(rows)} queries)")
+        if not rows:
+            return
+        total_s = sum((r.get("total_elapsed_time") or 0) for r in rows) / 1000
+        total_gb = sum(gb(r.get("bytes_scanned")) for r in rows)
+        print(f"Tempo somado (s) = {round(total_s, 1)}; GB escaneados = {round(total_gb, 2)}")
+        print(f"{'rótulo':<42} {'s':>8} {'fila s':>7} {'GB':>8} {'partições':>15} {'spill L/R GB':>14}")
+        for r in sorted(rows, key=lambda x: -(x.get("total_elapsed_time") or 0))[:15]:
+            labels = r.get("labels") or {}
+            label = " ".join(f"{k}={v}" for k, v in labels.items() if k not in {"cli", "run_id"}) or str(r["query_id"])
+            queued = ((r.get("queued_provisioning_time") or 0) + (r.get("queued_overload_time") or 0)) / 1000
+            parts = f"{r.get('partitions_scanned') or 0}/{r.get('partitions_total') or 0}"
+            spill = f"{gb(r.get('bytes_spilled_to_local_storage'))}/{gb(r.get('bytes_spilled_to_remote_storage'))}"
+            print(
+                f"{label[:42]:<42} {round((r.get('total_elapsed_time') or 0) / 1000, 1):>8} {round(queued, 1):>7} "
+                f"{gb(r.get('bytes_scanned')):>8} {parts:>15} {spill:>14}"
+            )
+            for op in r.get("top_operators") or []:
+                attrs = str(op.get("attributes") or "")[:70]
+                print(f"    - {op['operator_type']:<22} {round(op.get('pct') or 0, 1):>5}%  rows={op.get('output_rows')}  {attrs}")
+
+
+def init_profiler(cli: str, enabled: bool = True) -> Optional[QueryProfiler]:
+    """Ativa o profiler do processo (chamar antes de abrir conexões)."""
+    global _PROFILER
+    _PROFILER = QueryProfiler(cli) if enabled else None
+    return _PROFILER
+
+
+def get_profiler() -> Optional[QueryProfiler]:
+    return _PROFILER
+
+
+def session_parameters() -> Dict[str, str]:
+    """Parâmetros de sessão para novas conexões (QUERY_TAG base do run), se o profiler estiver ativo."""
+    if _PROFILER is None:
+        return {}
+    return {"QUERY_TAG": _PROFILER.tag()}
+
+
+def tag_query(cur, **labels) -> None:
+    """Refina o QUERY_TAG da sessão do cursor com rótulos do próximo statement (no-op sem profiler)."""
+    if _PROFILER is None:
+        return
+    tag = _PROFILER.tag(**labels).replace("'", "''")
+    cur.execute(f"ALTER SESSION SET QUERY_TAG = '{tag}'")
+
+
+def report_profile(cur) -> Optional[Path]:
+    """Coleta métricas do run, grava o JSONL e imprime o resumo. Falhas aqui não derrubam o CLI."""
+    if _PROFILER is None:
+        return None
+    from src.utils.local_engine import local_backend_enabled
+
+    if local_backend_enabled():
+        print("(perfil de queries indisponível no backend local: sem QUERY_HISTORY)")
+        return None
+    try:
+        rows = _PROFILER.collect(cur)
+    except Exception as e:
+        print(f"(perfil de queries indisponível: {e})")
+        return None
+    path = _PROFILER.write_report(rows)
+    _PROFILER.print_summary(rows)
+    print("Relatório de queries:", path)
+    return path
@@ -0,0 +1,230 @@
+"""
+Leitura de result sets em streaming (memória limitada), sobre `fetch_arrow_batches` do connector.
+
+Motivação:
+  - `fetch_pandas_all()` materializa o result set inteiro em um DataFrame; extrações largas
+    (ex.: `C1_ENRICHED_BORROWER`) estouram memória.
+  - Aqui o consumo é batch a batch: cada batch é processado (impresso, escrito em Parquet) e descartado.
+
+Controle de memória:
+  - `chunk_size_mb`: tamanho dos chunks que o Snowflake devolve (`CLIENT_RESULT_CHUNK_SIZE`, 48..160 MB;
+    `result_chunk_size()` ajusta a sessão e desfaz na saída: a conexão volta ao pool com o padrão);
+  - `max_batch_rows`: re-fatia cada chunk em batches de no máximo N linhas antes de entregar ao chamador.
+
+Uso:
+  from src.utils.result_stream import stream_query_to_parquet
+  stream_query_to_parquet("SELECT * FROM CAPIM_DATA_DEV.POSSANI_SANDBOX.C1_ENRICHED_BORROWER",
+                          "outputs/c1_extract", partition_cols=["C1_ENTITY_TYPE"])
+"""
+
+from __future__ import annotations
+
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Iterator, List, Optional, Sequence
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.dataset as pads
+from snowflake.connector.constants import FIELD_ID_TO_NAME
+from snowflake.connector.errors import NotSupportedError
+
+from src.utils.snowflake_connection import pooled_connection
+
+
+@contextmanager
+def result_chunk_size(cur, chunk_size_mb: Optional[int]) -> Iterator[None]:
+    """
+    Ajusta o tamanho dos chunks de resultado da sessão (limita o pico de memória por chunk) durante o bloco.
+    Na saída faz `UNSET` no mesmo cursor: feche o bloco depois de consumir o result set.
+    """
+    if chunk_size_mb is None:
+        yield
+        return
+    mb = min(160, max(48, int(chunk_size_mb)))
+    cur.execute(f"ALTER SESSION SET CLIENT_RESULT_CHUNK_SIZE = {mb}")
+    try:
+        yield
+    finally:
+        cur.execute("ALTER SESSION UNSET CLIENT_RESULT_CHUNK_SIZE")
+
+
+# tipo do connector (cursor.description) -> tipo Arrow no fallback via fetchmany
+_ARROW_TYPES = {
+    "REAL": pa.float64(),
+    "TEXT": pa.string(),
+    "VARIANT": pa.string(),
+    "OBJECT": pa.string(),
+    "ARRAY": pa.string(),
+    "DATE": pa.date32(),
+    "TIME": pa.time64("us"),
+    "TIMESTAMP": pa.timestamp("us"),
+    "TIMESTAMP_NTZ": pa.timestamp("us"),
+    "TIMESTAMP_LTZ": pa.timestamp("us", tz="UTC"),
+    "TIMESTAMP_TZ": pa.timestamp("us", tz="UTC"),
+    "BINARY": pa.binary(),
+    "BOOLEAN": pa.bool_(),
+}
+
+
+def _description_types(description: Sequence) -> List[Optional[pa.DataType]]:
+    """
+    Tipos Arrow das colunas pelo `cursor.description` (None = inferir): o schema do fallback não pode
+    depender do primeiro batch (um batch só com NULL inferiria `null` e quebraria o cast dos seguintes).
+    """
+    types: List[Optional[pa.DataType]] = []
+    for d in description:
+        name = FIELD_ID_TO_NAME.get(d[1]) if isinstance(d[1], int) else None
+        if name == "FIXED":
+            scale = int(d[5] or 0)
+            types.append(pa.int64() if scale == 0 else pa.decimal128(int(d[4] or 38), scale))
+        else:
+            types.append(_ARROW_TYPES.get(name or ""))
+    return types
+
+
+def _normalize_batch(batch: pa.RecordBatch) -> pa.RecordBatch:
+    """
+    O Snowflake escolhe a largura de inteiros por chunk (int8/int16/...); para escrever vários chunks
+    no mesmo arquivo/dataset precisamos de um schema estável. Promove inteiros para int64.
+    """
+    fields = []
+    changed = False
+    for f in batch.schema:
+        if pa.types.is_integer(f.type) and f.type != pa.int64():
+            fields.append(pa.field(f.name, pa.int64(), f.nullable))
+            changed = True
+        else:
+            fields.append(f)
+    if not changed:
+        return batch
+    return batch.cast(pa.schema(fields))
+
+
+def iter_arrow_batches(cur, max_batch_rows: Optional[int] = None) -> Iterator[pa.RecordBatch]:
+    """
+    Itera o result set do cursor (já executado) como RecordBatches com schema estável.
+
+    Para result sets fora do formato Arrow (ex.: SHOW/DESCRIBE), cai para fetchmany.
+    """
+    if cur.description is None:
+        return
+    try:
+        tables = cur.fetch_arrow_batches()
+        for table in tables:
+            for batch in table.to_batches(max_chunksize=max_batch_rows):
+                yield _normalize_batch(batch)
+    except NotSupportedError:
+        cols = [d[0] for d in (cur.description or [])]
+        types = _description_types(cur.description or [])
+        size = max_batch_rows or 10_000
+        while True:
+            rows = cur.fetchmany(size)
+            if not rows:
+                break
+            arrays = [pa.array(list(values), type=t) for values, t in zip(zip(*rows), types)]
+            yield pa.RecordBatch.from_arrays(arrays, names=cols)
+
+
+def iter_pandas_batches(cur, max_batch_rows: Optional[int] = None) -> Iterator[pd.DataFrame]:
+    for batch in iter_arrow_batches(cur, max_batch_rows=max_batch_rows):
+        yield batch.to_pandas()
+
+
+def fetch_preview(cur, max_rows: int) -> tuple[pd.DataFrame, int]:
+    """
+    Busca apenas as primeiras `max_rows` linhas (para de baixar chunks assim que tem o suficiente).
+    Retorna (df_preview, total_de_linhas_do_result_set).
+    """
+    total = int(cur.rowcount) if cur.rowcount is not None and cur.rowcount >= 0 else -1
+    parts: List[pa.RecordBatch] = []
+    n = 0
+    for batch in iter_arrow_batches(cur, max_batch_rows=max(1, int(max_rows))):
+        parts.append(batch)
+        n += batch.num_rows
+        if n >= max_rows:
+            break
+    if not parts:
+        cols = [d[0] for d in (cur.description or [])]
+        return pd.DataFrame(columns=cols), max(total, 0)
+    df = pa.Table.from_batches(parts).to_pandas().head(max_rows)
+    return df, (total if total >= 0 else n)
+
+
+def write_parquet_stream(
+    batches: Iterator[pa.RecordBatch],
+    out_dir: str | Path,
+    partition_cols: Optional[List[str]] = None,
+    max_rows_per_file: int = 1_000_000,
+    max_rows_per_group: int = 128_000,
+) -> int:
+    """
+    Escreve os batches em Parquet incrementalmente (um batch em memória por vez).
+    Com `partition_cols`, grava em layout hive (`col=valor/part-*.parquet`).
+    Retorna o número de linhas escritas.
+    """
+    it = iter(batches)
+    first = next(it, None)
+    if first is None:
+        return 0
+
+    written = 0
+
+    def counted():
+        nonlocal written
+        written += first.num_rows
+        yield first
+        for b in it:
+            written += b.num_rows
+            yield b.cast(first.schema) if b.schema != first.schema else b
+
+    reader = pa.RecordBatchReader.from_batches(first.schema, counted())
+    out_dir = Path(out_dir)
+    out_dir.mkdir(parents=True, exist_ok=True)
+    pads.write_dataset(
+        reader,
+        out_dir,
+        format="parquet",
+        partitioning=partition_cols or None,
+        partitioning_flavor="hive" if partition_cols else None,
+        basename_template="part-{i}.parquet",
+        max_rows_per_file=max_rows_per_file,
+        max_rows_per_group=min(max_rows_per_group, max_rows_per_file),
+        existing_data_behavior="delete_matching",
+    )
+    return written
+
+
+def stream_query(
+    query: str,
+    max_batch_rows: Optional[int] = None,
+    chunk_size_mb: Optional[int] = None,
+) -> Iterator[pa.RecordBatch]:
+    """Executa a query (conexão do pool) e devolve os RecordBatches em streaming."""
+    with pooled_connection() as conn:
+        cur = conn.cursor()
+        try:
+            with result_chunk_size(cur, chunk_size_mb):
+                cur.execute(query)
+                yield from iter_arrow_batches(cur, max_batch_rows=max_batch_rows)
+        finally:
+            cur.close()
+
+
+def stream_query_to_parquet(
+    query: str,
+    out_dir: str | Path,
+    partition_cols: Optional[List[str]] = None,
+    max_batch_rows: Optional[int] = 100_000,
+    chunk_size_mb: Optional[int] = None,
+    max_rows_per_file: int = 1_000_000,
+) -> int:
+    """Executa a query e grava o resultado em Parquet particionado sem carregar tudo em memória."""
+    n = write_parquet_stream(
+        stream_query(query, max_batch_rows=max_batch_rows, chunk_size_mb=chunk_size_mb),
+        out_dir,
+        partition_cols=partition_cols,
+        max_rows_per_file=max_rows_per_file,
+    )
+    print(f"Parquet: {n} linhas escritas em {out_dir}")
+    return n
@@ -1,4 +1,10 @@
+import atexit
 import os
+import threading
+import time
+from contextlib import contextmanager
+from functools import lru_cache
+
 import snowflake.connector
 import pandas as pd
 from dotenv import load_dotenv
@@ -6,10 +12,12 @@ from dotenv import load_dotenv
 # Carrega variáveis de ambiente do arquivo .env
 load_dotenv()
 
-def get_snowflake_connection():
+
+@lru_cache(maxsize=1)
+def _connect_args():
     """
-    Estabelece uma conexão com o Snowflake usando credenciais do arquivo .env.
-    Retorna o objeto de conexão, ou None se falhar.
+    Lê as credenciais do ambiente (.env) uma única vez por processo.
+    Retorna o dict de argumentos do connector, ou None se faltar credencial obrigatória.
     """
     # Credenciais obrigatórias
     required_credentials = {
@@ -32,13 +40,44 @@ def get_snowflake_connection():
         print("Certifique-se de ter criado o arquivo '.env' e preenchido os valores de user, password e account.")
         return None
 
+    # Monta os argumentos de conexão
+    return {
+        **required_credentials,
+        **{k: v for k, v in optional_credentials.items() if v is not None},
+        # Mantém a sessão viva enquanto a conexão estiver parada no pool.
+        "client_session_keep_alive": True,
+    }
+
+
+def get_snowflake_connection():
+    """
+    Estabelece uma conexão com o Snowflake usando credenciais do arquivo .env.
+    Retorna o objeto de conexão, ou None se falhar.
+
+    Cada chamada autentica uma nova sessão; para reuso de sessões prefira `pooled_connection()`.
+    Com `SNOWFLAKE_BACKEND=local`, devolve uma conexão DuckDB local com fixtures (`src.utils.local_engine`).
+    """
+    from src.utils.local_engine import LocalConnection, local_backend_enabled
+
+    if local_backend_enabled():
+        try:
+            return LocalConnection()
+        except Exception as e:
+            print(f"Erro ao abrir o backend local: {e}")
+            return None
+
+    connect_args = _connect_args()
+    if connect_args is None:
+        return None
+
+    # QUERY_TAG base do run (cli + run_id), se o CLI ativou o profiler.
+    from src.utils.query_profile import session_parameters
+
+    params = session_parameters()
+    if params:
+        connect_args = {**connect_args, "session_parameters": params}
+
     try:
-        # Monta os argumentos de conexão
-        connect_args = {
-            **required_credentials,
-            **{k: v for k, v in optional_credentials.items() if v is not None}
-        }
-        
         conn = snowflake.connector.connect(**connect_args)
         print("Conexão com Snowflake estabelecida com sucesso!")
         return conn
@@ -46,27 +85,204 @@ def get_snowflake_connection():
         print(f"Erro ao conectar no Snowflake: {e}")
         return None
 
-def run_query(query):
+
+class SnowflakeConnectionPool:
     """
-    Executa uma query SQL no Snowflake e retorna os resultados como um DataFrame do Pandas.
+    Pool limitado de conexões Snowflake (thread-safe).
+
+    - `max_size`: máximo de conexões abertas ao mesmo tempo; quem pedir além disso espera (ou TimeoutError).
+    - keep-alive: conexões são abertas com `client_session_keep_alive=True`.
+    - health check: conexões fechadas são descartadas; conexões ociosas há mais de
+      `health_check_after_s` são testadas com `SELECT 1` antes de voltar ao uso.
+    - checkout por thread: cada thread segura no máximo uma conexão; `connection()` aninhado
+      na mesma thread reaproveita a conexão já em uso (reentrante).
+    - fan-out: quem dispara N threads com conexão do pool enquanto segura uma chama `reserve(N + 1)`
+      (senão, com `max_size` <= N, as threads esperam a conexão da principal para sempre).
+
+    Obs.: a sessão é reaproveitada como está (variáveis de `SET`, `USE`, tabelas temporárias);
+    scripts que dependem de sessão "limpa" devem usar `get_snowflake_connection()`.
     """
-    conn = get_snowflake_connection()
-    if conn:
+
+    def __init__(self, max_size=4, health_check_after_s=300.0, acquire_timeout_s=None):
+        self.max_size = max(1, int(max_size))
+        self.health_check_after_s = float(health_check_after_s)
+        self.acquire_timeout_s = acquire_timeout_s
+        self._idle = []  # [(conn, last_used_ts)]
+        self._size = 0
+        self._cond = threading.Condition()
+        self._local = threading.local()
+
+    def reserve(self, n):
+        """Garante `max_size >= n` (as conexões continuam sendo abertas sob demanda)."""
+        with self._cond:
+            if int(n) > self.max_size:
+                self.max_size = int(n)
+                self._cond.notify_all()
+
+    def _is_healthy(self, conn, last_used):
+        try:
+            if conn.is_closed():
+                return False
+            if time.time() - last_used >= self.health_check_after_s:
+                cur = conn.cursor()
+                try:
+                    cur.execute("SELECT 1")
+                    cur.fetchone()
+                finally:
+                    cur.close()
+            return True
+        except Exception:
+            return False
+
+    def _discard(self, conn):
         try:
+            conn.close()
+        except Exception:
+            pass
+        with self._cond:
+            self._size -= 1
+            self._cond.notify()
+
+    def acquire(self):
+        held = getattr(self._local, "conn", None)
+        if held is not None:
+            self._local.depth += 1
+            return held
+
+        deadline = None if self.acquire_timeout_s is None else time.time() + float(self.acquire_timeout_s)
+        while True:
+            with self._cond:
+                candidate = None
+                if self._idle:
+                    candidate = self._idle.pop()
+                elif self._size < self.max_size:
+                    self._size += 1
+                else:
+                    remaining = None if deadline is None else deadline - time.time()
+                    if remaining is not None and remaining <= 0:
+                        raise TimeoutError(f"Pool Snowflake esgotado ({self.max_size} conexões em uso).")
+                    self._cond.wait(timeout=remaining)
+                    continue
+
+            if candidate is not None:
+                conn, last_used = candidate
+                if not self._is_healthy(conn, last_used):
+                    self._discard(conn)
+                    continue
+            else:
+                conn = get_snowflake_connection()
+                if conn is None:
+                    with self._cond:
+                        self._size -= 1
+                        self._cond.notify()
+                    raise ConnectionError("Falha ao conectar no Snowflake.")
+
+            self._local.conn = conn
+            self._local.depth = 1
+            return conn
+
+    def release(self, conn, broken=False):
+        if getattr(self._local, "conn", None) is conn:
+            self._local.depth -= 1
+            if self._local.depth > 0:
+                return
+            self._local.conn = None
+        if broken or conn.is_closed():
+            self._discard(conn)
+            return
+        with self._cond:
+            self._idle.append((conn, time.time()))
+            self._cond.notify()
+
+    @contextmanager
+    def connection(self):
+        conn = self.acquire()
+        broken = False
+        try:
+            yield conn
+        except snowflake.connector.errors.OperationalError:
+            broken = True
+            raise
+        finally:
+            self.release(conn, broken=broken)
+
+    def close_all(self):
+        with self._cond:
+            idle, self._idle = self._idle, []
+        for conn, _ in idle:
+            self._discard(conn)
+
+
+_POOL = None
+_POOL_LOCK = threading.Lock()
+
+
+def get_pool():
+    """Pool compartilhado do processo (tamanho via SNOWFLAKE_POOL_SIZE; padrão 4)."""
+    global _POOL
+    with _POOL_LOCK:
+        if _POOL is None:
+            _POOL = SnowflakeConnectionPool(max_size=int(os.getenv("SNOWFLAKE_POOL_SIZE", "4")))
+            atexit.register(_POOL.close_all)
+        return _POOL
+
+
+def reserve_pool_workers(n_workers):
+    """Dimensiona o pool compartilhado para `n_workers` threads + a conexão da thread principal."""
+    get_pool().reserve(max(1, int(n_workers)) + 1)
+
+
+@contextmanager
+def pooled_connection():
+    """
+    Context manager para pegar uma conexão do pool compartilhado:
+
+        with pooled_connection() as conn:
+            cur = conn.cursor()
+            ...
+
+    Levanta ConnectionError se não for possível autenticar.
+    """
+    with get_pool().connection() as conn:
+        yield conn
+
+
+def run_query(query, use_cache=True):
+    """
+    Executa uma query SQL no Snowflake e retorna os resultados como um DataFrame do Pandas.
+    Reaproveita sessões do pool compartilhado (sem novo login por chamada).
+
+    SELECTs determinísticos passam pelo cache local (`src.utils.query_cache`), validado pelo
+    LAST_ALTERED das tabelas referenciadas. `use_cache=False` força a ida ao Snowflake.
+    """
+    from src.utils.query_cache import get_query_cache
+
+    cache = get_query_cache() if use_cache else None
+    try:
+        with pooled_connection() as conn:
             # Usando fetch_pandas_all() para eficiência com grandes volumes de dados
             # Requer instalação de 'pyarrow' (incluído no requirements.txt)
             cur = conn.cursor()
-            cur.execute(query)
-            # Para DDL/DML (sem result set), cur.description é None
-            if cur.description is None:
-                return pd.DataFrame()
-            return cur.fetch_pandas_all()
-        except Exception as e:
-            print(f"Erro ao executar query: {e}")
-            return None
-        finally:
-            conn.close()
-    return None
+            try:
+                lookup = cache.lookup(cur, query) if cache is not None else None
+                if lookup is not None and lookup.hit:
+                    return lookup.table.to_pandas()
+                cur.execute(query)
+                # Para DDL/DML (sem result set), cur.description é None
+                if cur.description is None:
+                    return pd.DataFrame()
+                if lookup is not None and lookup.cacheable:
+                    table = cur.fetch_arrow_all()
+                    if table is None:
+                        return pd.DataFrame(columns=[d[0] for d in cur.description])
+                    cache.store(lookup, table)
+                    return table.to_pandas()
+                return cur.fetch_pandas_all()
+            finally:
+                cur.close()
+    except Exception as e:
+        print(f"Erro ao executar query: {e}")
+        return None
 
 if __name__ == "__main__":
     # Teste simples de conexão
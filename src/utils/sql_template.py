@@ -0,0 +1,221 @@
+"""
+Recortes tipados (período, meses, amostra) aplicados por marcadores no SQL de enrichment/validate.
+
+Motivação:
+  - `make_sampled_sql()` reescrevia o literal `FROM ...CREDIT_SIMULATIONS cs`, o enrichment de PA
+    dependia de editar o CTE `sample_months` à mão e as amostras usavam
+    `ORDER BY UNIFORM(..., RANDOM())` (sort global, não reprodutível);
+  - o recorte só entrava no CTE da entidade: os CTEs de checks continuavam varrendo o histórico todo.
+
+Marcadores (comentários: o SQL continua rodando no Worksheet sem renderizar = sem recorte):
+  - `/*@scope NOME ts=<expr> id=<expr> lookback_days=N lookahead_days=N*/`
+      colocado logo após um predicado de WHERE sem OR de topo (ex.: `WHERE TRUE /*@scope ...*/`);
+      vira `AND (<predicados>)`:
+        * `ts`: período/meses, deslocados por lookback/lookahead (ex.: checks: [início-180d, fim+1d));
+        * `id`: amostra determinística por hash do id (`MOD(ABS(HASH(id, seed)), buckets) < k`):
+          o mesmo id entra/sai em todos os CTEs que usam o mesmo seed (joins coerentes, sem sort);
+        * predicado extra por nome (`where={"cs": "..."}`; ex.: watermark do incremental).
+  - `/*@sample NOME*/` logo após o alias da tabela: `SAMPLE ROW|BLOCK (pct) SEED (s)` ou `SAMPLE (N ROWS)`.
+
+Uso:
+  sql = render_sql(template, ScopeParams(period_start=date(2025, 1, 1), period_end=date(2025, 2, 1)))
+  sql = render_sql(template, ScopeParams(sample_fraction=0.01))              # hash do id (padrão)
+  sql = render_sql(template, ScopeParams(sample_fraction=0.05, sample_method="block"))
+"""
+
+from __future__ import annotations
+
+import argparse
+import re
+from dataclasses import dataclass, field, replace
+from datetime import date
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from src.utils.backfill import parse_month
+
+_SCOPE = re.compile(r"/\*@scope\s+(\w+)((?:\s+\w+=[^\s*]+)*)\s*\*/")
+_SAMPLE = re.compile(r"/\*@sample\s+(\w+)\s*\*/")
+_KV = re.compile(r"(\w+)=([^\s*]+)")
+
+SAMPLE_METHODS = ("hash", "row", "block")
+
+
+@dataclass(frozen=True)
+class ScopeParams:
+    period_start: Optional[date] = None  # inclusivo
+    period_end: Optional[date] = None  # exclusivo
+    months: Tuple[date, ...] = ()  # primeiro dia de cada mês
+    sample_fraction: Optional[float] = None  # 0 < f <= 1
+    sample_method: str = "hash"  # hash (id) | row | block
+    sample_rows: Optional[int] = None  # SAMPLE (N ROWS): tamanho fixo, não determinístico
+    seed: int = 42
+    hash_buckets: int = 10_000
+    where: Dict[str, str] = field(default_factory=dict)
+
+    def validate(self) -> None:
+        if self.sample_method not in SAMPLE_METHODS:
+            raise ValueError(f"sample_method inválido: {self.sample_method!r} (use {', '.join(SAMPLE_METHODS)})")
+        if self.sample_fraction is not None and not (0 < self.sample_fraction <= 1):
+            raise ValueError(f"sample_fraction fora de (0, 1]: {self.sample_fraction}")
+        if self.period_start and self.period_end and self.period_end <= self.period_start:
+            raise ValueError("period_end deve ser posterior a period_start (fim exclusivo).")
+        if any(m.day != 1 for m in self.months):
+            raise ValueError("months deve conter o primeiro dia de cada mês.")
+
+    def describe(self) -> str:
+        """Resumo legível do recorte ("" = sem recorte)."""
+        parts = []
+        if self.period_start or self.period_end:
+            parts.append(f"período [{self.period_start or '-inf'}, {self.period_end or '+inf'})")
+        if self.months:
+            parts.append("meses " + ",".join(m.strftime("%Y-%m") for m in sorted(self.months)))
+        if self.sample_rows is not None:
+            parts.append(f"SAMPLE ({self.sample_rows} ROWS)")
+        elif self.sample_fraction is not None:
+            parts.append(f"amostra {self.sample_method} {self.sample_fraction:g} seed={self.seed}")
+        if self.where:
+            parts.append("where " + ",".join(sorted(self.where)))
+        return "; ".join(parts)
+
+
+@dataclass(frozen=True)
+class _Marker:
+    name: str
+    ts: Optional[str]
+    id: Optional[str]
+    lookback_days: int
+    lookahead_days: int
+
+
+def _parse_marker(name: str, kv_text: str) -> _Marker:
+    kv = dict(_KV.findall(kv_text or ""))
+    unknown = set(kv) - {"ts", "id", "lookback_days", "lookahead_days"}
+    if unknown:
+        raise ValueError(f"Marcador @scope {name}: chaves desconhecidas {sorted(unknown)}")
+    return _Marker(
+        name=name,
+        ts=kv.get("ts"),
+        id=kv.get("id"),
+        lookback_days=int(kv.get("lookback_days", 0)),
+        lookahead_days=int(kv.get("lookahead_days", 0)),
+    )
+
+
+def next_month(m: date) -> date:
+    return date(m.year + (m.month == 12), m.month % 12 + 1, 1)
+
+
+def month_scope(params: ScopeParams, month: date) -> ScopeParams:
+    """Recorte de uma janela mensal (backfill): o mês substitui período/meses, a amostra é mantida."""
+    return replace(params, period_start=month, period_end=next_month(month), months=())
+
+
+def _month_ranges(months: Sequence[date]) -> List[Tuple[date, date]]:
+    """Meses -> intervalos contíguos [início, fim) (menos predicados, mesma poda)."""
+    ranges: List[Tuple[date, date]] = []
+    for m in sorted(set(months)):
+        if ranges and ranges[-1][1] == m:
+            ranges[-1] = (ranges[-1][0], next_month(m))
+        else:
+            ranges.append((m, next_month(m)))
+    return ranges
+
+
+def _range_pred(ts: str, lo: Optional[date], hi: Optional[date], marker: _Marker) -> str:
+    preds = []
+    if lo is not None:
+        lo_sql = f"'{lo.isoformat()}'::DATE"
+        if marker.lookback_days:
+            lo_sql = f"DATEADD('day', -{marker.lookback_days}, {lo_sql})"
+        preds.append(f"{ts} >= {lo_sql}")
+    if hi is not None:
+        hi_sql = f"'{hi.isoformat()}'::DATE"
+        if marker.lookahead_days:
+            hi_sql = f"DATEADD('day', {marker.lookahead_days}, {hi_sql})"
+        preds.append(f"{ts} < {hi_sql}")
+    return " AND ".join(preds)
+
+
+def scope_predicate(marker: _Marker, params: ScopeParams) -> Optional[str]:
+    preds: List[str] = []
+    if marker.ts:
+        if params.period_start or params.period_end:
+            preds.append(_range_pred(marker.ts, params.period_start, params.period_end, marker))
+        if params.months:
+            ors = [f"({_range_pred(marker.ts, lo, hi, marker)})" for lo, hi in _month_ranges(params.months)]
+            preds.append(ors[0] if len(ors) == 1 else "(" + " OR ".join(ors) + ")")
+    if marker.id and params.sample_fraction is not None and params.sample_method == "hash":
+        k = max(1, round(params.sample_fraction * params.hash_buckets))
+        preds.append(f"MOD(ABS(HASH({marker.id}, {int(params.seed)})), {int(params.hash_buckets)}) < {k}")
+    if marker.name in params.where:
+        preds.append(f"({params.where[marker.name]})")
+    return " AND ".join(preds) if preds else None
+
+
+def sample_clause(params: ScopeParams) -> str:
+    if params.sample_rows is not None:
+        return f" SAMPLE ({int(params.sample_rows)} ROWS)"
+    if params.sample_fraction is not None and params.sample_method in {"row", "block"}:
+        pct = round(params.sample_fraction * 100, 6)
+        return f" SAMPLE {params.sample_method.upper()} ({pct}) SEED ({int(params.seed)})"
+    return ""
+
+
+def scope_markers(sql: str) -> List[str]:
+    return sorted({m.group(1) for m in _SCOPE.finditer(sql)} | {m.group(1) for m in _SAMPLE.finditer(sql)})
+
+
+def render_sql(sql: str, params: ScopeParams, required: Sequence[str] = ()) -> str:
+    """
+    Substitui os marcadores pelo recorte de `params` (marcadores sem recorte viram string vazia).
+    `required`: nomes de escopo que precisam existir no SQL (erro explícito em vez de recorte silencioso).
+    """
+    params.validate()
+    present = set(scope_markers(sql))
+    missing = [r for r in required if r not in present]
+    if missing:
+        raise ValueError(f"Marcadores de escopo ausentes no SQL: {', '.join(missing)}")
+    unknown_where = set(params.where) - present
+    if unknown_where:
+        raise ValueError(f"where para escopos inexistentes no SQL: {', '.join(sorted(unknown_where))}")
+
+    def repl_scope(m: re.Match) -> str:
+        pred = scope_predicate(_parse_marker(m.group(1), m.group(2)), params)
+        return f" AND {pred}" if pred else ""
+
+    sql = _SCOPE.sub(repl_scope, sql)
+    clause = sample_clause(params)
+    return _SAMPLE.sub(lambda m: clause, sql)
+
+
+def scoped_target(final_table: str, params: ScopeParams) -> str:
+    """
+    Destino de uma materialização full/staged/backfill: com recorte ativo, `<tabela>_SCOPED`
+    (CTAS de um subconjunto não pode substituir a tabela enriched completa).
+    """
+    return f"{final_table}_SCOPED" if params.describe() else final_table
+
+
+def add_scope_args(ap: argparse.ArgumentParser) -> None:
+    ap.add_argument("--period-start", default=None, help="Recorte: início do período (YYYY-MM-DD, inclusivo)")
+    ap.add_argument("--period-end", default=None, help="Recorte: fim do período (YYYY-MM-DD, exclusivo)")
+    ap.add_argument("--months", default=None, help="Recorte: meses (YYYY-MM,YYYY-MM,...)")
+    ap.add_argument("--sample-fraction", type=float, default=None, help="Amostra: fração (0-1] das entidades")
+    ap.add_argument(
+        "--sample-method",
+        choices=SAMPLE_METHODS,
+        default="hash",
+        help="hash (id, determinística e coerente entre CTEs) | row (Bernoulli) | block (micro-partições)",
+    )
+    ap.add_argument("--seed", type=int, default=42, help="Seed da amostra (hash/row/block)")
+
+
+def scope_from_args(args) -> ScopeParams:
+    return ScopeParams(
+        period_start=date.fromisoformat(args.period_start) if args.period_start else None,
+        period_end=date.fromisoformat(args.period_end) if args.period_end else None,
+        months=tuple(parse_month(m) for m in args.months.split(",") if m.strip()) if args.months else (),
+        sample_fraction=args.sample_fraction,
+        sample_method=args.sample_method,
+        seed=args.seed,
+    )
@@ -0,0 +1,382 @@
+"""
+Materialização em estágios de um enrichment escrito como um único `WITH ... SELECT`.
+
+Motivação:
+  - `enrich_credit_simulations_borrower.sql` é um statement único com 60+ CTEs; qualquer ajuste em um
+    eixo (ex.: `axis_renda`) exige re-executar tudo, inclusive os range joins caros
+    (`crivo_resolution`, `cc_all_matches`, ...), e uma falha no fim perde todo o trabalho.
+
+Como funciona:
+  - o SQL é quebrado nas CTEs de topo; as dependências entre CTEs são derivadas das referências
+    (uma CTE só pode referenciar CTEs definidas antes dela);
+  - a lista de estágios é declarada pelo chamador (nomes de CTE). Cada estágio vira uma tabela
+    TRANSIENT `<final>__STG_<CTE>`; as CTEs intermediárias que não são estágio são inlinadas no SQL
+    de quem as usa, e estágios upstream são lidos das suas tabelas;
+  - estágios independentes rodam em paralelo (execute_async), respeitando `max_concurrency`;
+  - cada tabela de estágio guarda no COMMENT a chave `stage_key=<sha256>` = SQL normalizado do
+    estágio + chaves dos estágios upstream + `LAST_ALTERED` das tabelas base referenciadas
+    (fingerprint de `query_cache`). Se a chave não mudou, o estágio é reaproveitado;
+  - com todos os estágios prontos, a tabela final é montada (CTAS) a partir do SELECT principal
+    lendo das tabelas de estágio.
+
+Em caso de falha, os estágios concluídos ficam materializados: a próxima execução retoma a partir
+deles (a tabela final não é alterada).
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import re
+import time
+from dataclasses import dataclass, field
+from typing import Dict, Iterable, List, Optional, Sequence
+
+from snowflake.connector.errors import ProgrammingError
+
+from src.utils.query_cache import normalize_sql, referenced_tables, table_fingerprint
+from src.utils.query_profile import tag_query
+
+_CTE_HEAD = re.compile(r"\s*([A-Za-z_][\w$]*)\s+AS\s*\(", re.IGNORECASE)
+_IDENT = re.compile(r"(?<![\w$.])([A-Za-z_][\w$]*)\b(?!\s*\.)")
+_STAGE_KEY = re.compile(r"stage_key=([0-9a-f]{64})")
+
+
+@dataclass
+class Cte:
+    name: str
+    body: str
+    deps: List[str] = field(default_factory=list)
+
+
+@dataclass
+class Stage:
+    name: str
+    table: str
+    sql: str
+    upstream: List[str]
+    base_tables: List[str]
+    key: Optional[str] = None
+    query_id: Optional[str] = None
+    attempts: int = 0
+    t_submit: float = 0.0
+    elapsed: float = 0.0
+    status: str = "pending"  # pending | running | done | reused | failed | blocked
+    error: Optional[str] = None
+
+
+def _mask_sql(sql: str) -> str:
+    """Mesmo tamanho do SQL, com comentários e literais trocados por espaços (para parsing estrutural)."""
+    out = list(sql)
+    i, n = 0, len(sql)
+    while i < n:
+        ch = sql[i]
+        nxt = sql[i + 1] if i + 1 < n else ""
+        if ch == "-" and nxt == "-":
+            j = sql.find("\n", i)
+            j = n if j < 0 else j
+        elif ch == "/" and nxt == "*":
+            j = sql.find("*/", i + 2)
+            j = n if j < 0 else j + 2
+        elif ch in ("'", '"'):
+            j = i + 1
+            while j < n:
+                if sql[j] == ch and j + 1 < n and sql[j + 1] == ch:
+                    j += 2
+                    continue
+                if sql[j] == ch:
+                    break
+                j += 1
+            j = min(n, j + 1)
+        else:
+            i += 1
+            continue
+        for k in range(i, j):
+            if out[k] != "\n":
+                out[k] = " "
+        i = j
+    return "".join(out)
+
+
+def split_ctes(sql: str) -> tuple[List[Cte], str]:
+    """Quebra `WITH a AS (...), b AS (...) <select>` em CTEs de topo + SELECT principal."""
+    masked = _mask_sql(sql)
+    m = re.match(r"\s*WITH\b", masked, re.IGNORECASE)
+    if m is None:
+        raise ValueError("SQL não começa com WITH: nada a quebrar em estágios.")
+    pos = m.end()
+    ctes: List[Cte] = []
+    while True:
+        head = _CTE_HEAD.match(masked, pos)
+        if head is None:
+            raise ValueError(f"Não consegui ler a CTE na posição {pos}: {sql[pos:pos + 60]!r}")
+        depth, i = 1, head.end()
+        while depth:
+            if i >= len(masked):
+                raise ValueError(f"Parênteses desbalanceados na CTE {head.group(1)}.")
+            if masked[i] == "(":
+                depth += 1
+            elif masked[i] == ")":
+                depth -= 1
+            i += 1
+        ctes.append(Cte(name=head.group(1).lower(), body=sql[head.end() : i - 1]))
+        rest = re.match(r"\s*,", masked[i:])
+        if rest is None:
+            main = sql[i:].strip().rstrip(";").strip()
+            break
+        pos = i + rest.end()
+
+    defined: List[str] = []
+    for cte in ctes:
+        cte.deps = _references(cte.body, defined)
+        defined.append(cte.name)
+    return ctes, main
+
+
+def _references(text: str, names: Iterable[str]) -> List[str]:
+    idents = {x.lower() for x in _IDENT.findall(_mask_sql(text))}
+    return [n for n in names if n in idents]
+
+
+def _closure(
+    roots: List[str],
+    by_name: Dict[str, Cte],
+    stop: set[str],
+) -> tuple[List[str], List[str]]:
+    """CTEs a inlinar (ordem original) e estágios upstream alcançados a partir de `roots`."""
+    inline: set[str] = set()
+    upstream: set[str] = set()
+    frontier = list(roots)
+    while frontier:
+        name = frontier.pop()
+        if name in stop:
+            upstream.add(name)
+            continue
+        if name in inline:
+            continue
+        inline.add(name)
+        frontier.extend(by_name[name].deps)
+    order = list(by_name)
+    return [n for n in order if n in inline], [n for n in order if n in upstream]
+
+
+def stage_table_name(final_table: str, stage: str) -> str:
+    return f"{final_table}__STG_{stage.upper()}"
+
+
+def _compose(
+    by_name: Dict[str, Cte],
+    inline: List[str],
+    upstream: List[str],
+    tables: Dict[str, str],
+    tail: str,
+) -> str:
+    parts = [f"{u} AS (SELECT * FROM {tables[u]})" for u in upstream]
+    parts += [f"{n} AS ({by_name[n].body})" for n in inline]
+    if not parts:
+        return tail
+    return "WITH " + ",\n".join(parts) + "\n" + tail
+
+
+def plan_stages(sql: str, final_table: str, stage_names: Sequence[str]) -> tuple[List[Stage], str, List[str]]:
+    """
+    Monta o plano: um `Stage` por CTE declarada (na ordem do SQL) + o SELECT da tabela final
+    (lendo das tabelas de estágio) + os estágios dos quais a montagem final depende.
+    """
+    ctes, main = split_ctes(sql)
+    by_name = {c.name: c for c in ctes}
+    wanted = [s.lower() for s in stage_names]
+    unknown = [s for s in wanted if s not in by_name]
+    if unknown:
+        raise ValueError(f"Estágios sem CTE correspondente no SQL: {', '.join(unknown)}")
+    stop = set(wanted)
+    tables = {s: stage_table_name(final_table, s) for s in wanted}
+    stage_tables = {t.upper() for t in tables.values()}
+
+    stages: List[Stage] = []
+    for cte in ctes:
+        if cte.name not in stop:
+            continue
+        inline, upstream = _closure(list(cte.deps), by_name, stop - {cte.name})
+        body = _compose(by_name, inline, upstream, tables, f"SELECT * FROM ({cte.body})")
+        base = [t for t in referenced_tables(normalize_sql(body), {}) if t not in stage_tables]
+        stages.append(Stage(name=cte.name, table=tables[cte.name], sql=body, upstream=upstream, base_tables=base))
+
+    inline, upstream = _closure(_references(main, by_name), by_name, stop)
+    final_sql = _compose(by_name, inline, upstream, tables, main)
+    return stages, final_sql, upstream
+
+
+def compute_stage_keys(cur, stages: List[Stage], ignore_inputs: bool = False) -> None:
+    """
+    Chave de reaproveitamento por estágio (em ordem topológica).
+    Sem fingerprint resolvível das tabelas base, o estágio não tem chave (sempre re-executa).
+    """
+    fingerprint: Optional[Dict[str, str]] = {}
+    if not ignore_inputs:
+        all_base = sorted({t for s in stages for t in s.base_tables})
+        fingerprint = table_fingerprint(cur, all_base) if all_base else {}
+    by_name = {s.name: s for s in stages}
+    for s in stages:
+        up_keys = [by_name[u].key for u in s.upstream]
+        if fingerprint is None or any(k is None for k in up_keys):
+            s.key = None
+            continue
+        inputs = {} if ignore_inputs else {t: fingerprint.get(t) for t in s.base_tables}
+        payload = json.dumps(
+            {"sql": normalize_sql(s.sql), "upstream": up_keys, "inputs": sorted(inputs.items())},
+            sort_keys=True,
+        )
+        s.key = hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def existing_stage_keys(cur, final_table: str) -> Dict[str, str]:
+    """{tabela de estágio (FQ): stage_key} lidos do COMMENT das tabelas `<final>__STG_*` existentes."""
+    db, schema, table = final_table.upper().split(".")
+    cur.execute(
+        f"""
+        SELECT table_name, comment
+        FROM {db}.INFORMATION_SCHEMA.TABLES
+        WHERE table_schema = '{schema}'
+          AND STARTSWITH(table_name, '{table}__STG_')
+        """
+    )
+    out: Dict[str, str] = {}
+    for name, comment in cur.fetchall():
+        m = _STAGE_KEY.search(str(comment or ""))
+        if m:
+            out[f"{db}.{schema}.{name}"] = m.group(1)
+    return out
+
+
+def _ctas(stage: Stage) -> str:
+    comment = f"stage_key={stage.key}" if stage.key else "stage_key=none"
+    return f"CREATE OR REPLACE TRANSIENT TABLE {stage.table} COMMENT = '{comment}' AS\n{stage.sql}"
+
+
+def run_stage_graph(
+    conn,
+    stages: List[Stage],
+    max_concurrency: int = 4,
+    max_retries: int = 1,
+    poll_seconds: float = 5.0,
+) -> List[Stage]:
+    """Executa os estágios pendentes via execute_async, liberando cada um quando seus upstream terminam."""
+    by_name = {s.name: s for s in stages}
+    running: List[Stage] = []
+
+    def ready(s: Stage) -> bool:
+        return s.status == "pending" and all(by_name[u].status in {"done", "reused"} for u in s.upstream)
+
+    while True:
+        for s in stages:
+            if s.status == "pending" and any(by_name[u].status in {"failed", "blocked"} for u in s.upstream):
+                s.status = "blocked"
+        for s in stages:
+            if len(running) >= max(1, int(max_concurrency)):
+                break
+            if not ready(s):
+                continue
+            cur = conn.cursor()
+            tag_query(cur, step="stage", stage=s.name, attempt=s.attempts + 1)
+            cur.execute_async(_ctas(s))
+            s.query_id = cur.sfqid
+            s.attempts += 1
+            s.t_submit = time.time()
+            s.status = "running"
+            running.append(s)
+            print(f"[stages] submit {s.name} (tentativa {s.attempts}) query_id={s.query_id}")
+
+        if not running:
+            break
+        time.sleep(poll_seconds)
+
+        still_running: List[Stage] = []
+        for s in running:
+            status = conn.get_query_status(s.query_id)
+            if conn.is_still_running(status):
+                still_running.append(s)
+                continue
+            s.elapsed = time.time() - s.t_submit
+            if conn.is_an_error(status):
+                try:
+                    conn.get_query_status_throw_if_error(s.query_id)
+                except ProgrammingError as e:
+                    s.error = str(e)
+                if s.attempts <= max_retries:
+                    print(f"[stages] erro em {s.name}; re-submetendo. ({s.error})")
+                    s.status = "pending"
+                else:
+                    print(f"[stages] FALHOU {s.name} após {s.attempts} tentativas. ({s.error})")
+                    s.status = "failed"
+            else:
+                s.status = "done"
+                print(f"[stages] ok {s.name} em {round(s.elapsed, 1)}s")
+        running = still_running
+
+    return stages
+
+
+def run_staged(
+    conn,
+    sql: str,
+    final_table: str,
+    stage_names: Sequence[str],
+    max_concurrency: int = 4,
+    max_retries: int = 1,
+    force: Iterable[str] = (),
+    ignore_inputs: bool = False,
+    drop_stages: bool = False,
+    poll_seconds: float = 5.0,
+) -> List[Stage]:
+    """
+    Orquestra: plano -> chaves -> reaproveitamento -> estágios (async, DAG) -> montagem da final.
+
+    `force` re-executa os estágios informados (e, por consequência de chave, seus downstream).
+    `ignore_inputs=True` ignora o frescor das tabelas base: só SQL/upstream invalidam um estágio
+    (útil para iterar na lógica de um eixo sem recomputar os joins caros).
+    Estágios com falha/bloqueados: tabela final intacta e `SystemExit` com os estágios (código de saída != 0).
+    """
+    t0 = time.time()
+    stages, final_sql, final_upstream = plan_stages(sql, final_table, stage_names)
+    cur = conn.cursor()
+    compute_stage_keys(cur, stages, ignore_inputs=ignore_inputs)
+
+    forced = {f.lower() for f in force}
+    existing = existing_stage_keys(cur, final_table)
+    by_name = {s.name: s for s in stages}
+    for s in stages:
+        upstream_rebuilt = any(by_name[u].status != "reused" for u in s.upstream)
+        if s.key and s.name not in forced and not upstream_rebuilt and existing.get(s.table.upper()) == s.key:
+            s.status = "reused"
+
+    reused = [s.name for s in stages if s.status == "reused"]
+    print(f"[stages] {len(stages)} estágios; reaproveitados={len(reused)}; concorrência={max_concurrency}")
+    if reused:
+        print("[stages] reaproveitados:", ", ".join(reused))
+
+    run_stage_graph(conn, stages, max_concurrency=max_concurrency, max_retries=max_retries, poll_seconds=poll_seconds)
+
+    bad = [s for s in stages if s.status in {"failed", "blocked"}]
+    if bad:
+        print("[stages] estágios com falha/bloqueados:", ", ".join(f"{s.name}({s.status})" for s in bad))
+        print("[stages] estágios concluídos mantidos; tabela final NÃO foi alterada.")
+        raise SystemExit(
+            f"Execução em estágios incompleta ({len(bad)}/{len(stages)} estágios): "
+            + ", ".join(f"{s.name}({s.status})" for s in bad)
+        )
+
+    print("\n[stages] montando tabela final:", final_table, "a partir de:", ", ".join(final_upstream))
+    t_final = time.time()
+    tag_query(cur, step="stage_assemble")
+    cur.execute(f"CREATE OR REPLACE TABLE {final_table} AS\n{final_sql}")
+    print("[stages] tempo montagem (s) =", round(time.time() - t_final, 2))
+
+    for s in sorted(stages, key=lambda x: -x.elapsed):
+        if s.status == "done":
+            print(f"  {s.name:<40} {round(s.elapsed, 1):>8}s")
+    if drop_stages:
+        for s in stages:
+            cur.execute(f"DROP TABLE IF EXISTS {s.table}")
+    print("[stages] tempo total (min) =", round((time.time() - t0) / 60, 2))
+    return stages
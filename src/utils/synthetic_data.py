@@ -0,0 +1,839 @@
+"""
+Gerador de dados sintéticos em escala de produção (CS, checks, crivo, PRE_ANALYSES) para teste de carga do funil.
+
+Motivação:
+  - não dá para compartilhar CPF/payload de bureau reais, e os caminhos de amostragem (`SAMPLE (N ROWS)`,
+    `sample_n_per_month`) só encolhem os dados: não havia como medir os range joins CPF+tempo e as
+    janelas (ROW_NUMBER/QUALIFY) a 5–10x o volume atual.
+
+O que gera (mesmos nomes/colunas das tabelas de origem; VARIANT como texto JSON):
+  - `INCREMENTAL_SENSITIVE_DATA_API` (pessoas: CPF válido e fictício, nascimento, CEP, renda; fração de menores);
+  - `SOURCE_CREDIT_LEADS`, `CREDIT_SIMULATIONS` (financing_conditions com PMT real), `PRE_ANALYSES`
+    (type=credit_simulation, com versões antigas para o dedup);
+  - `INCREMENTAL_CREDIT_CHECKS_API` com os formatos de `docs/reference/PAYLOAD_CONTRACTS_MAP.md`:
+    SERASA novo (`reports`, score escalar/objeto/escalado + `check_income_only` HRP) e antigo (B-codes, antes do
+    cutover 2024-04-04), Boa Vista scpc_net/score_pf, bacen_internal_score e SCR;
+  - `SOURCE_CRIVO_CHECKS` (KEY_PARAMETERS:campos OBJECT, BUREAU_CHECK_INFO:campos ARRAY), parte sem engineable_id;
+  - PA legado (`pa_legacy_frac` das simulações também viram uma PRE_ANALYSES type=pre_analysis, mesma pessoa, ±30 min):
+    `SOURCE_PRE_ANALYSIS_API` (CPF/cadastro), `PRE_ANALYSIS_CREDIT_CHECK` (PACC, `pacc_frac`) e, a partir de
+    `N8N_START`, `SOURCE_CREDIT_ENGINE_INFORMATION` (motor N8N);
+  - tabelas dbt por hash_cpf derivadas dos mesmos credit checks (mesmos valores do payload; `consulted_at` =
+    created_at + 3h, como no dbt): `SOURCE_CREDIT_CHECKS_API_SERASA`, `..._BOA_VISTA_SCORE_PF`,
+    `..._BOA_VISTA_SCPC_NET`, `..._SCR_REPORT`.
+
+Distribuições configuráveis (`SyntheticConfig`):
+  - reuso de CPF: `cpf_pool_ratio` pessoas distintas por simulação e `cpf_skew` (lei de potência sobre o rank:
+    1 = uniforme; maior = poucos CPFs com muitas simulações, como retries/recorrência);
+  - timing dos checks em relação a `cs_created_at`: atraso log-normal (`check_delay_median_min`,
+    `check_delay_sigma`), fração depois da simulação (`check_after_frac`) e fração sem check novo
+    (`check_reuse_frac`: depende de check antigo do mesmo CPF, janelas 180d/cache);
+  - mix de bureaus por simulação (`source_mix`), taxa de crivo, clínicas com a mesma skew.
+
+Determinismo e paralelismo:
+  - cada chunk de ids é gerado por um processo independente (`generate_chunk`), com RNG semeado por
+    (seed, chunk); atributos da pessoa (CPF, nascimento, CEP) são função pura do id — o mesmo CPF sai igual na
+    tabela de pessoas, nos payloads e no crivo sem nenhuma coordenação entre processos;
+  - ids são derivados do id da simulação (check = sim*8 + slot, crivo = sim): únicos sem sequência global;
+  - memória limitada a um chunk por processo: cada chunk vira Parquet particionado por mês
+    (`<out>/<tabela>/created_month=YYYY-MM/part-<chunk>.parquet`) e é descartado.
+
+CLI: `python -m src.cli.generate_synthetic_data` (ver docstring do CLI).
+"""
+
+from __future__ import annotations
+
+import hashlib
+import math
+from dataclasses import dataclass, field
+from datetime import date
+from pathlib import Path
+from typing import Dict, List, Tuple
+
+import numpy as np
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.parquet as pq
+
+SERASA_CUTOVER = np.datetime64("2024-04-04T00:00:00", "s")
+N8N_START = np.datetime64("2025-10-01T00:00:00", "s")
+SOURCES = ("serasa", "boa_vista", "bacen", "none")
+CHECK_SLOTS = 8  # id do check = credit_simulation_id * CHECK_SLOTS + slot
+
+_TERMS = np.array([3, 6, 10, 12, 18, 24])
+_STATES = np.array(["AC", "BA", "CE", "DF", "GO", "MG", "PE", "PR", "RJ", "RS", "SC", "SP"])
+_OCCUPATIONS = np.array(["professor", "engenheiro", "vendedor", "autônomo", "enfermeira", "motorista", "estudante", ""])
+_REJECTIONS = np.array(["score_too_low", "has_restrictions", "income_too_low", "policy_rules"])
+
+
+@dataclass(frozen=True)
+class SyntheticTable:
+    name: str
+    table: str
+    ts_column: str
+    json_columns: Tuple[str, ...] = ()
+
+
+TABLES: Dict[str, SyntheticTable] = {
+    t.name: t
+    for t in (
+        SyntheticTable("persons", "CAPIM_DATA.RESTRICTED.INCREMENTAL_SENSITIVE_DATA_API", "created_at"),
+        SyntheticTable("credit_leads", "CAPIM_DATA.SOURCE_STAGING.SOURCE_CREDIT_LEADS", "credit_lead_created_at"),
+        SyntheticTable(
+            "credit_simulations", "CAPIM_DATA.CAPIM_PRODUCTION.CREDIT_SIMULATIONS", "created_at", ("financing_conditions",)
+        ),
+        SyntheticTable(
+            "pre_analyses",
+            "CAPIM_DATA.CAPIM_ANALYTICS.PRE_ANALYSES",
+            "pre_analysis_created_at",
+            ("financing_conditions", "interest_rates_array"),
+        ),
+        SyntheticTable("credit_checks", "CAPIM_DATA.RESTRICTED.INCREMENTAL_CREDIT_CHECKS_API", "created_at", ("data",)),
+        SyntheticTable(
+            "crivo_checks",
+            "CAPIM_DATA.SOURCE_STAGING.SOURCE_CRIVO_CHECKS",
+            "CRIVO_CHECK_CREATED_AT",
+            ("KEY_PARAMETERS", "BUREAU_CHECK_INFO"),
+        ),
+        SyntheticTable("pre_analysis_api", "CAPIM_DATA.RESTRICTED.SOURCE_PRE_ANALYSIS_API", "pre_analysis_created_at"),
+        SyntheticTable(
+            "pre_analysis_credit_check", "CAPIM_DATA.CAPIM_ANALYTICS.PRE_ANALYSIS_CREDIT_CHECK", "pre_analysis_created_at"
+        ),
+        SyntheticTable("serasa_hash", "CAPIM_DATA.RESTRICTED.SOURCE_CREDIT_CHECKS_API_SERASA", "serasa_consulted_at"),
+        SyntheticTable(
+            "bvs_score_pf_hash",
+            "CAPIM_DATA.RESTRICTED.SOURCE_CREDIT_CHECKS_API_BOA_VISTA_SCORE_PF",
+            "bvs_score_pf_net_consulted_at",
+        ),
+        SyntheticTable(
+            "bvs_scpc_net_hash", "CAPIM_DATA.RESTRICTED.SOURCE_CREDIT_CHECKS_API_BOA_VISTA_SCPC_NET", "bvs_scpc_net_consulted_at"
+        ),
+        SyntheticTable("scr_report_hash", "CAPIM_DATA.RESTRICTED.SOURCE_CREDIT_CHECKS_API_SCR_REPORT", "scr_report_consulted_at"),
+        SyntheticTable(
+            "credit_engine_information",
+            "CAPIM_DATA.SOURCE_STAGING.SOURCE_CREDIT_ENGINE_INFORMATION",
+            "credit_engine_consultation_created_at",
+        ),
+    )
+}
+
+
+@dataclass(frozen=True)
+class SyntheticConfig:
+    simulations: int = 1_000_000
+    start_date: str = "2024-01-01"
+    months: int = 12
+    seed: int = 42
+    cpf_pool_ratio: float = 0.7
+    cpf_skew: float = 1.6
+    clinics: int = 1500
+    minor_frac: float = 0.04
+    source_mix: Dict[str, float] = field(
+        default_factory=lambda: {"serasa": 0.55, "boa_vista": 0.2, "bacen": 0.15, "none": 0.1}
+    )
+    check_delay_median_min: float = 3.0
+    check_delay_sigma: float = 1.6
+    check_after_frac: float = 0.05
+    check_reuse_frac: float = 0.15
+    income_only_frac: float = 0.7
+    crivo_rate: float = 0.35
+    crivo_unlinked_frac: float = 0.15
+    pa_stale_version_frac: float = 0.02
+    pa_legacy_frac: float = 0.2
+    pacc_frac: float = 0.6
+
+    @property
+    def persons(self) -> int:
+        return max(1, int(math.ceil(self.simulations * self.cpf_pool_ratio)))
+
+    @property
+    def start(self) -> np.datetime64:
+        return np.datetime64(date.fromisoformat(self.start_date), "s")
+
+    @property
+    def span_s(self) -> int:
+        end = np.datetime64(date.fromisoformat(self.start_date), "M") + np.timedelta64(self.months, "M")
+        return int((end.astype("datetime64[s]") - self.start).astype(np.int64))
+
+
+# ----------------------------------------------------------------------------------------------
+# Primitivas vetorizadas
+# ----------------------------------------------------------------------------------------------
+
+def _hash_u01(keys: np.ndarray, salt: int) -> np.ndarray:
+    """Uniforme [0, 1) determinística por chave (splitmix64): atributo da entidade sem estado de RNG."""
+    with np.errstate(over="ignore"):
+        z = keys.astype(np.uint64) * np.uint64(0x9E3779B97F4A7C15) + np.uint64(salt * 0x632BE59BD9B4E019 & (2**64 - 1))
+        z = (z ^ (z >> np.uint64(30))) * np.uint64(0xBF58476D1CE4E5B9)
+        z = (z ^ (z >> np.uint64(27))) * np.uint64(0x94D049BB133111EB)
+        z = z ^ (z >> np.uint64(31))
+    return (z >> np.uint64(11)).astype(np.float64) / float(2**53)
+
+
+def _pick(values: np.ndarray, u: np.ndarray) -> np.ndarray:
+    return values[np.minimum((u * len(values)).astype(np.int64), len(values) - 1)]
+
+
+def _skewed_rank(u: np.ndarray, n: int, skew: float) -> np.ndarray:
+    """Rank em [0, n) com massa concentrada nos primeiros (lei de potência; skew=1 -> uniforme)."""
+    return np.minimum((n * u ** max(1.0, skew)).astype(np.int64), n - 1)
+
+
+def _scatter(rank: np.ndarray, n: int) -> np.ndarray:
+    """Bijeção rank -> id em [0, n): os ids "quentes" ficam espalhados, não contíguos."""
+    mult = 1_000_003
+    while math.gcd(mult, n) != 1:
+        mult += 2
+    return (rank * mult + 7) % n
+
+
+def _str(values) -> pa.Array:
+    arr = values if isinstance(values, pa.Array) else pa.array(values)
+    return pc.cast(arr, pa.string())
+
+
+def _cat(*parts) -> pa.Array:
+    """Concatena arrays/literais de texto linha a linha (monta os JSONs sem loop Python)."""
+    return pc.binary_join_element_wise(*[p if isinstance(p, (str, pa.Array)) else _str(p) for p in parts], "")
+
+
+def _ts(values: np.ndarray, mask: np.ndarray = None) -> pa.Array:
+    return pa.array(values.astype("datetime64[us]"), type=pa.timestamp("us"), mask=mask)
+
+
+def _date(values: np.ndarray) -> pa.Array:
+    return pa.array(values.astype("datetime64[D]"), type=pa.date32())
+
+
+def _fmt_date(values: np.ndarray, fmt: str) -> pa.Array:
+    return pc.strftime(_ts(values.astype("datetime64[s]")), format=fmt)
+
+
+def cpf_numbers(person_ids: np.ndarray) -> np.ndarray:
+    """CPF (11 dígitos, DV válido) como inteiro, bijetivo no id da pessoa; nunca um CPF "de verdade" por construção."""
+    base = (person_ids.astype(np.int64) * 7919 + 104729) % 10**9
+    digits = (base[:, None] // (10 ** np.arange(8, -1, -1))) % 10
+    d1 = ((digits * np.arange(10, 1, -1)).sum(1) * 10 % 11) % 10
+    d2 = ((np.column_stack([digits, d1]) * np.arange(11, 1, -1)).sum(1) * 10 % 11) % 10
+    return base * 100 + d1 * 10 + d2
+
+
+def cpf_strings(person_ids: np.ndarray, masked: np.ndarray) -> pa.Array:
+    """CPF como texto: `ddd.ddd.ddd-dd` onde `masked`, só dígitos no resto (exercita a normalização)."""
+    raw = pc.utf8_lpad(_str(cpf_numbers(person_ids)), 11, "0")
+    fmt = _cat(
+        pc.utf8_slice_codeunits(raw, 0, 3), ".", pc.utf8_slice_codeunits(raw, 3, 6), ".",
+        pc.utf8_slice_codeunits(raw, 6, 9), "-", pc.utf8_slice_codeunits(raw, 9, 11),
+    )
+    return pc.if_else(pa.array(masked), fmt, raw)
+
+
+def hash_cpfs(person_ids: np.ndarray) -> pa.Array:
+    """SHA2-256 (hex) do CPF só dígitos: a chave `hash_cpf` das tabelas dbt (mesma expressão do enrichment)."""
+    digits = pc.utf8_lpad(_str(cpf_numbers(person_ids)), 11, "0").to_pylist()
+    return pa.array([hashlib.sha256(d.encode()).hexdigest() for d in digits], type=pa.string())
+
+
+def _num(values: np.ndarray) -> pa.Array:
+    """float com NaN -> NULL (campo ausente quando a simulação não teve o check)."""
+    return pa.array(values, mask=np.isnan(values))
+
+
+def _num_str(values: np.ndarray) -> pa.Array:
+    """Número como texto (colunas VARCHAR do dbt); inteiros sem `.0`; NaN -> NULL."""
+    whole = np.isclose(values, np.round(values))
+    return pc.if_else(pa.array(whole), _str(_num(np.round(values)).cast(pa.int64(), safe=False)), _str(_num(values)))
+
+
+@dataclass
+class _People:
+    """Atributos determinísticos de pessoas (função do id), compartilhados por todas as tabelas."""
+
+    ids: np.ndarray
+    cfg: SyntheticConfig
+
+    def u(self, salt: int) -> np.ndarray:
+        return _hash_u01(self.ids, salt)
+
+    @property
+    def is_minor(self) -> np.ndarray:
+        return self.u(1) < self.cfg.minor_frac
+
+    @property
+    def birthdate(self) -> np.ndarray:
+        age_days = np.where(self.is_minor, 8 * 365 + self.u(2) * 9 * 365, 18 * 365 + self.u(2) * 57 * 365)
+        return (self.cfg.start - (age_days * 86400).astype("timedelta64[s]")).astype("datetime64[D]")
+
+    @property
+    def gender(self) -> np.ndarray:
+        return np.where(self.u(3) < 0.62, "F", "M")
+
+    @property
+    def zipcode(self) -> pa.Array:
+        return pc.utf8_lpad(_str((self.u(4) * 99_999_999).astype(np.int64)), 8, "0")
+
+    @property
+    def state(self) -> np.ndarray:
+        return _pick(_STATES, self.u(5))
+
+    @property
+    def monthly_income(self) -> np.ndarray:
+        return np.round(np.exp(np.log(3200) + 0.7 * np.sqrt(-2 * np.log(1 - self.u(6))) * np.cos(2 * np.pi * self.u(7))))
+
+    @property
+    def serasa_score(self) -> np.ndarray:
+        return np.clip(np.round(300 + 600 * self.u(8) ** 0.8), 1, 1000).astype(np.int64)
+
+    def cpf(self, masked_salt: int) -> pa.Array:
+        return cpf_strings(self.ids, self.u(masked_salt) < 0.7)
+
+
+def responsible_of(person_ids: np.ndarray, n_persons: int) -> np.ndarray:
+    """Responsável financeiro (adulto, de outro id) dos pacientes menores."""
+    return (person_ids + n_persons // 2 + 1) % n_persons
+
+
+# ----------------------------------------------------------------------------------------------
+# Tabelas
+# ----------------------------------------------------------------------------------------------
+
+def persons_table(cfg: SyntheticConfig, lo: int, hi: int) -> pa.Table:
+    ids = np.arange(lo, hi, dtype=np.int64)
+    p = _People(ids, cfg)
+    minor = p.is_minor
+    created = cfg.start - (p.u(9) * 365 * 86400).astype("timedelta64[s]")
+    income = p.monthly_income
+    return pa.table(
+        {
+            "id": ids,
+            "cpf": p.cpf(10),
+            "birthdate": _date(p.birthdate),
+            "city": pa.array(np.where(p.u(11) < 0.4, "Capital", "Interior")),
+            "state": pa.array(p.state),
+            "zipcode": p.zipcode,
+            "monthly_income": pa.array(income, mask=minor | (p.u(12) < 0.2)),
+            "occupation": pa.array(np.where(minor, "estudante", _pick(_OCCUPATIONS, p.u(13)))),
+            "created_at": _ts(created),
+            "updated_at": _ts(created),
+        }
+    )
+
+
+def _financing_conditions(rng, amount_cents: np.ndarray, rate: np.ndarray, approved: np.ndarray) -> pa.Array:
+    """JSON `{"<prazo>": {installment_value, term, total_debt_amount}}` com 1..3 prazos (PMT em centavos)."""
+    n = len(amount_cents)
+    k = rng.integers(1, 4, n)
+    entries: List[pa.Array] = []
+    for j in range(3):
+        term = _TERMS[j * 2 + rng.integers(0, 2, n)]
+        inst = np.round(amount_cents * rate / (1 - (1 + rate) ** (-term))).astype(np.int64)
+        entry = _cat('"', term, '": {"installment_value": ', inst, ', "term": ', term,
+                     ', "total_debt_amount": ', inst * term, "}")
+        entries.append(pc.if_else(pa.array(j < k), entry, pa.nulls(n, pa.string())))
+    body = pc.binary_join_element_wise(*[pc.fill_null(e, "") for e in entries], ", ")
+    body = pc.replace_substring_regex(pc.replace_substring_regex(body, r"(, )+$", ""), r"(, ){2,}", ", ")
+    return pc.if_else(pa.array(approved), _cat("{", body, "}"), pa.nulls(n, pa.string()))
+
+
+# Builders de payload: (JSON do check, campos que o dbt extrai dele para as tabelas por hash_cpf / PACC)
+Fields = Dict[str, np.ndarray]
+
+
+def _serasa_new(p: _People, rng, income_only: bool) -> Tuple[pa.Array, Fields]:
+    n = len(p.ids)
+    if income_only:
+        model = np.where(rng.random(n) < 0.9, "HRP9", "HSPN")
+        cents = (p.monthly_income * 100 * rng.uniform(0.8, 1.3, n)).astype(np.int64)
+        payload = _cat('{"score": ', cents, ', "range": "R', rng.integers(1, 9, n), '", "scoreModel": "', pa.array(model), '"}')
+        return payload, {"serasa_income": cents / 100.0}
+    counts = {k: rng.poisson(lam, n) for k, lam in (("pefin", 0.4), ("refin", 0.25), ("notary", 0.1), ("check", 0.03))}
+    parts = []
+    for k, c in counts.items():
+        balance = np.round(c * rng.lognormal(6.5, 1.0, n), 2)
+        parts.append(_cat('"', k, '": {"summary": {"count": ', c, ', "balance": ', balance, "}}"))
+    negative = pc.binary_join_element_wise(*parts, ", ")
+    score = p.serasa_score
+    shape = rng.random(n)
+    score_json = pc.if_else(
+        pa.array(shape < 0.6),
+        _cat('{"score": ', score, ', "range": "', _pick(np.array(list("ABCDE")), rng.random(n)), '", "scoreModel": "HSPN"}'),
+        pc.if_else(pa.array(shape < 0.85), _str(score), _str(score * 10000)),
+    )
+    phone = pc.if_else(pa.array(rng.random(n) < 0.7), _cat(', "phone": {"areaCode": ', rng.integers(11, 99, n), "}"), "")
+    registration = _cat(
+        '{"birthDate": "', _fmt_date(p.birthdate, "%Y-%m-%d"), '", "consumerGender": "', pa.array(p.gender),
+        '", "address": {"zipCode": "', p.zipcode, '"}', phone, ', "statusRegistration": "REGULAR", "statusDate": "',
+        _fmt_date(p.birthdate + np.timedelta64(18 * 365, "D"), "%Y-%m-%d"), '"}',
+    )
+    payload = _cat('{"reports": [{"reportName": "COMBO_CONCESSAO", "registration": ', registration,
+                   ', "negativeData": {', negative, '}, "score": ', score_json, "}]}")
+    return payload, {
+        "serasa_score": score.astype(float),
+        "serasa_pefin": counts["pefin"].astype(float),
+        "serasa_refin": counts["refin"].astype(float),
+        "serasa_protest": counts["notary"].astype(float),
+        "serasa_ccf": counts["check"].astype(float),
+    }
+
+
+def _serasa_old(p: _People, rng) -> Tuple[pa.Array, Fields]:
+    n = len(p.ids)
+    refin, protest = rng.poisson(0.3, n), rng.poisson(0.1, n)
+    payload = _cat(
+        '[{"B001": {"birthdate": "', _fmt_date(p.birthdate, "%Y-%m-%d"), '", "gender": "', pa.array(p.gender), '"}}, ',
+        '{"B003": {"phone": "119', rng.integers(10_000_000, 99_999_999, n), '"}}, ',
+        '{"B004": {"zip_code": "', p.zipcode, '"}}, ',
+        '{"B280": {"score": ', p.serasa_score, ', "score_range_name": "FAIXA ', rng.integers(1, 9, n),
+        '", "delinquency_probability_percent": ', np.round(rng.uniform(0.5, 40, n), 1), "}}, ",
+        '{"B357": {"occurrences_count": ', refin, ', "total_occurrence_value": ', refin * rng.integers(100, 3000, n), "}}, ",
+        '{"B361": {"occurrences_count": ', protest, ', "total_occurrence_value": ', protest * rng.integers(100, 2000, n), "}}]",
+    )
+    return payload, {
+        "serasa_score": p.serasa_score.astype(float),
+        "serasa_pefin": np.zeros(n),
+        "serasa_refin": refin.astype(float),
+        "serasa_protest": protest.astype(float),
+        "serasa_ccf": np.zeros(n),
+    }
+
+
+def _bvs_scpc_net(p: _People, rng) -> Tuple[pa.Array, Fields]:
+    n = len(p.ids)
+    debits = rng.poisson(0.5, n)
+    value = debits * rng.integers(5_000, 200_000, n)
+    payload = _cat(
+        '[{"249": {"birthdate": "', _fmt_date(p.birthdate, "%d%m%Y"), '", "name": "NOME SINTETICO", "status": "ATIVO"}}, ',
+        '{"141": {"debit_total_count": ', debits, ', "debit_total_value": ', value,
+        ', "last_debit_date": "2024-10-01"}}, {"123": {"exists": "', pa.array(np.where(debits > 0, "S", "N")), '"}}]',
+    )
+    return payload, {"bvs_total_debt": value / 100.0, "bvs_total_protest": np.zeros(n)}
+
+
+def _bvs_score_pf(p: _People, rng) -> Tuple[pa.Array, Fields]:
+    score = np.clip(p.serasa_score + rng.integers(-80, 80, len(p.ids)), 1, 1000)
+    return _cat('{"score_positivo": {"score_classificacao_varios_modelos": {"score": ', score, "}}}"), {
+        "bvs_score": score.astype(float)
+    }
+
+
+def _bacen(p: _People, rng) -> Tuple[pa.Array, Fields]:
+    n = len(p.ids)
+    not_banked = pa.array(np.where(rng.random(n) < 0.1, "true", "false"))
+    payload = _cat(
+        '{"predictions": [{"score": ', np.round(rng.random(n), 4), ', "limitesdecredito": ', np.round(rng.lognormal(8.5, 1, n)),
+        ', "valorvencimento_mean_credit_limits": ', np.round(rng.lognormal(5.5, 1, n), 2),
+        ', "is_not_banked": "', not_banked, '"}]}',
+    )
+    return payload, {}
+
+
+def _scr(p: _People, rng) -> Tuple[pa.Array, Fields]:
+    n = len(p.ids)
+    payload = _cat(
+        '{"resumoDoCliente": {"dataBaseConsultada": "2024-11", "listaDeResumoDasOperacoes": [{"modalidade": "0203", ',
+        '"listaDeVencimentos": [{"codigoVencimento": "110", "valorVencimento": ', np.round(rng.lognormal(7, 1, n), 2),
+        '}, {"codigoVencimento": "120", "valorVencimento": ', np.round(rng.lognormal(5, 1, n), 2), "}]}]}}",
+    )
+    return payload, {"scr_operations": np.ones(n)}  # 1 modalidade em listaDeResumoDasOperacoes
+
+
+def _crivo_payloads(p: _People, rng) -> Tuple[pa.Array, pa.Array]:
+    n = len(p.ids)
+    money = lambda x: pc.replace_substring(_str(np.round(x, 2)), ".", ",")  # noqa: E731 - PT-BR simplificado
+    key_parameters = _cat(
+        '{"campos": {"CPF": "', p.cpf(20), '", "BacenScore": "', money(rng.random(n)), '", "CreditLimits": "',
+        money(rng.lognormal(8.5, 1, n)), '", "OverduePortfolio": "', money(rng.lognormal(3, 2, n) * (rng.random(n) < 0.2)),
+        '", "Loss": "0,00"}}',
+    )
+    renda = pc.replace_substring(_str(np.round(p.monthly_income * rng.uniform(0.8, 1.2, n), 2)), ".", ",")
+    bureau = _cat(
+        '{"campos": [{"nome": "Score Serasa", "valor": "', p.serasa_score, '"}, {"nome": "PEFIN Serasa", "valor": "',
+        rng.poisson(0.4, n), '"}, {"nome": "REFIN Serasa", "valor": "', rng.poisson(0.25, n),
+        '"}, {"nome": "Protesto Serasa", "valor": "', rng.poisson(0.1, n),
+        '"}, {"nome": "CREDILINK - Renda Presumida", "valor": "R$ ', renda,
+        '"}, {"nome": "CEP do Proponente", "valor": "', p.zipcode, '"}], "drivers": [{"produtos": ',
+        '{"api DataBusca - Consulta Dados Pessoa - PF": {"sexo": "', pa.array(np.where(p.gender == "M", "1", "2")), '"}}}]}',
+    )
+    return key_parameters, bureau
+
+
+def _hash_source_row(kind: str, person_ids: np.ndarray, at: np.ndarray, check_kind: np.ndarray, fields: Fields):
+    """Linhas das tabelas dbt por hash_cpf derivadas de um lote de checks: (nome da tabela, linhas) ou None."""
+    m = len(person_ids)
+    consulted = _ts(at + np.timedelta64(3, "h"))  # o dbt grava em UTC; o enrichment compara com DATEADD(-3h)
+    nan = np.full(m, np.nan)
+    if kind in ("serasa", "serasa_income"):
+        return "serasa_hash", pa.table(
+            {
+                "hash_cpf": hash_cpfs(person_ids),
+                "kind": pa.array(check_kind),
+                "serasa_consulted_at": consulted,
+                "serasa_ir_status": pa.array(np.full(m, "REGULAR"), mask=np.full(m, kind == "serasa_income")),
+                "serasa_ccf": _num(fields.get("serasa_ccf", nan)),
+                "serasa_positive_score": _num(fields.get("serasa_score", nan)),
+                "serasa_refin": _num(fields.get("serasa_refin", nan)),
+                "serasa_pefin": _num(fields.get("serasa_pefin", nan)),
+                "serasa_protest": _num(fields.get("serasa_protest", nan)),
+                "serasa_presumed_income": _num(fields.get("serasa_income", nan)),
+            }
+        )
+    if kind == "boa_vista_score_pf":
+        return "bvs_score_pf_hash", pa.table(
+            {
+                "hash_cpf": hash_cpfs(person_ids),
+                "bvs_score_pf_net_consulted_at": consulted,
+                "bvs_positive_score": _num(fields.get("bvs_score", nan)),
+            }
+        )
+    if kind == "boa_vista_scpc_net":
+        return "bvs_scpc_net_hash", pa.table(
+            {
+                "hash_cpf": hash_cpfs(person_ids),
+                "bvs_scpc_net_consulted_at": consulted,
+                "bvs_ccf_count": np.zeros(m, dtype=np.int64),
+                "bvs_total_debt": _num(fields.get("bvs_total_debt", nan)),
+                "bvs_total_protest": _num(fields.get("bvs_total_protest", nan)),
+                "bvs_status_ir": pa.array(np.full(m, "REGULAR")),
+            }
+        )
+    if kind == "scr":
+        return "scr_report_hash", pa.table(
+            {
+                "hash_cpf": hash_cpfs(person_ids),
+                "scr_report_consulted_at": consulted,
+                "scr_qtd_de_operacoes": _num_str(fields.get("scr_operations", nan)),
+            }
+        )
+    return None
+
+
+def simulation_tables(cfg: SyntheticConfig, lo: int, hi: int, rng: np.random.Generator) -> Dict[str, pa.Table]:
+    """Simulações [lo, hi) e tudo que pende delas (lead, PRE_ANALYSES, checks, crivo)."""
+    n = hi - lo
+    ids = np.arange(lo, hi, dtype=np.int64) + 1
+    n_persons = cfg.persons
+
+    # created_at cresce com o id (como em produção), com jitter dentro do passo
+    step = cfg.span_s / max(1, cfg.simulations)
+    created = cfg.start + ((ids - 1 + rng.random(n)) * step).astype("timedelta64[s]")
+
+    patient = _scatter(_skewed_rank(rng.random(n), n_persons, cfg.cpf_skew), n_persons)
+    minor = _People(patient, cfg).is_minor
+    responsible = np.where(minor, responsible_of(patient, n_persons), -1)
+    checked_pid = np.where(minor, responsible, patient)
+    clinic = _scatter(_skewed_rank(rng.random(n), cfg.clinics, cfg.cpf_skew), cfg.clinics) + 1
+
+    weights = np.array([cfg.source_mix.get(s, 0.0) for s in SOURCES], dtype=float)
+    source = rng.choice(len(SOURCES), size=n, p=weights / weights.sum())
+    score = _People(checked_pid, cfg).serasa_score
+    approved = (score > 420) & (source != SOURCES.index("none")) & (rng.random(n) < 0.85)
+    amount = np.where(approved, np.round(rng.lognormal(np.log(500_000), 0.8, n), -2), 0).astype(np.int64)
+    rate = rng.uniform(0.019, 0.049, n)
+    rejected_mask = ~approved
+
+    cs = pa.table(
+        {
+            "id": ids,
+            "credit_lead_id": ids,
+            "retail_id": clinic,
+            "patient_id": patient,
+            "financial_responsible_id": pa.array(responsible, mask=~minor),
+            "state": pa.array(np.where(approved, "approved", "rejected")),
+            "rejection_reason": pa.array(_pick(_REJECTIONS, rng.random(n)), mask=approved),
+            "approved_at": _ts(created + rng.integers(60, 1800, n).astype("timedelta64[s]"), mask=rejected_mask),
+            "crivo_check_id": pa.array(ids, mask=np.ones(n, dtype=bool)),  # preenchido abaixo
+            "appealable": pa.array(rejected_mask & (rng.random(n) < 0.3)),
+            "score": pa.array(_pick(np.array(list("EDCBA")), score / 1001)),
+            "payment_default_risk": pa.array(_pick(np.array(["high", "medium", "low"]), score / 1001)),
+            "permitted_amount": amount,
+            "financing_conditions": _financing_conditions(rng, amount, rate, approved),
+            "created_at": _ts(created),
+            "updated_at": _ts(created + rng.integers(5, 3600, n).astype("timedelta64[s]")),
+        }
+    )
+
+    leads = pa.table(
+        {
+            "credit_lead_id": ids,
+            "credit_lead_requested_amount": np.round(rng.lognormal(np.log(6000), 0.8, n), 2),
+            "under_age_patient_verified": pa.array(minor & (rng.random(n) < 0.8)),
+            "credit_lead_created_at": _ts(created - rng.integers(60, 7200, n).astype("timedelta64[s]")),
+        }
+    )
+
+    # ---- credit checks: até CHECK_SLOTS por simulação, atraso log-normal relativo a cs_created_at
+    new_check = rng.random(n) >= cfg.check_reuse_frac
+    before_cutover = created < SERASA_CUTOVER
+    slots = {
+        0: ("serasa", source == 0),
+        1: ("serasa_income", (source == 0) & ~before_cutover & (rng.random(n) < cfg.income_only_frac)),
+        2: ("boa_vista_scpc_net", source == 1),
+        3: ("boa_vista_score_pf", source == 1),
+        4: ("bacen_internal_score", source == 2),
+        5: ("scr", (source == 2) & (rng.random(n) < 0.6)),
+    }
+    checks: List[pa.Table] = []
+    derived: Dict[str, List[pa.Table]] = {"serasa_hash": [], "bvs_score_pf_hash": [], "bvs_scpc_net_hash": [], "scr_report_hash": []}
+    sim_fields: Fields = {}  # campo do check -> valor por simulação (NaN = sem check), para PACC / N8N do PA legado
+    for slot, (kind, mask) in slots.items():
+        idx = np.flatnonzero(mask & new_check)
+        if not len(idx):
+            continue
+        m = len(idx)
+        p = _People(checked_pid[idx], cfg)
+        delay = rng.lognormal(np.log(cfg.check_delay_median_min), cfg.check_delay_sigma, m) * 60
+        sign = np.where(rng.random(m) < cfg.check_after_frac, 1, -1)
+        at = created[idx] + (sign * delay + slot).astype("timedelta64[s]")
+        old_fmt = before_cutover[idx]
+        if kind == "serasa":
+            data_old, f_old = _serasa_old(p, rng)
+            data_new, f_new = _serasa_new(p, rng, income_only=False)
+            data = pc.if_else(pa.array(old_fmt), data_old, data_new)
+            fields = {k: np.where(old_fmt, f_old[k], f_new[k]) for k in f_new}
+            src, kd = "serasa", np.where(old_fmt, "check_score", "check_score_without_income")
+            new_fmt = ~old_fmt
+        elif kind == "serasa_income":
+            (data, fields), src, kd = _serasa_new(p, rng, income_only=True), "serasa", "check_income_only"
+            new_fmt = np.ones(m, bool)
+        else:
+            builder = {"boa_vista_scpc_net": _bvs_scpc_net, "boa_vista_score_pf": _bvs_score_pf,
+                       "bacen_internal_score": _bacen, "scr": _scr}[kind]
+            (data, fields), src, kd, new_fmt = builder(p, rng), kind, "check_score", np.zeros(m, bool)
+        for name, values in fields.items():
+            sim_fields.setdefault(name, np.full(n, np.nan))[idx] = values
+        derived_table = _hash_source_row(kind, checked_pid[idx], at, np.broadcast_to(kd, (m,)).astype(str), fields)
+        if derived_table is not None:
+            derived[derived_table[0]].append(derived_table[1])
+        checks.append(
+            pa.table(
+                {
+                    "id": ids[idx] * CHECK_SLOTS + slot,
+                    "cpf": p.cpf(21 + slot),
+                    "source": pa.array(np.full(m, src)),
+                    "kind": pa.array(np.broadcast_to(kd, (m,)).astype(str)),
+                    "new_data_format": pa.array(new_fmt),
+                    "data": data,
+                    "created_at": _ts(at),
+                    "updated_at": _ts(at),
+                }
+            )
+        )
+
+    # ---- crivo: parte sem engineable_id (só associável por CPF+tempo)
+    cidx = np.flatnonzero(rng.random(n) < cfg.crivo_rate)
+    unlinked = rng.random(len(cidx)) < cfg.crivo_unlinked_frac
+    key_parameters, bureau = _crivo_payloads(_People(checked_pid[cidx], cfg), rng)
+    crivo = pa.table(
+        {
+            "CRIVO_CHECK_ID": ids[cidx],
+            "CRIVO_CHECK_CREATED_AT": _ts(created[cidx] + rng.integers(10, 300, len(cidx)).astype("timedelta64[s]")),
+            "ENGINEABLE_TYPE": pa.array(np.full(len(cidx), "CreditSimulation")),
+            "ENGINEABLE_ID": pa.array(ids[cidx], mask=unlinked),
+            "POLITICA": pa.array(np.full(len(cidx), "politica_padrao")),
+            "KEY_PARAMETERS": key_parameters,
+            "BUREAU_CHECK_INFO": bureau,
+        }
+    )
+    crivo_id = np.full(n, -1)
+    crivo_id[cidx[~unlinked]] = ids[cidx[~unlinked]]
+    cs = cs.set_column(cs.schema.get_field_index("crivo_check_id"), "crivo_check_id", pa.array(crivo_id, mask=crivo_id < 0))
+
+    # ---- PRE_ANALYSES (type=credit_simulation) + versões antigas para o dedup por updated_at
+    risk = np.clip(6 - np.ceil(score / 200), 1, 5).astype(np.int64)
+    terms_max = np.where(approved, _TERMS[rng.integers(2, len(_TERMS), n)], 0)
+    pa_rows = pa.table(
+        {
+            "pre_analysis_type": pa.array(np.full(n, "credit_simulation")),
+            "pre_analysis_id": ids,
+            "pre_analysis_created_at": cs["created_at"],
+            "pre_analysis_updated_at": cs["updated_at"],
+            "retail_id": clinic,
+            "retail_group": pa.nulls(n, pa.string()),
+            "retail_group_id": pa.nulls(n, pa.int64()),
+            "credit_lead_id": ids,
+            "pre_analysis_state": cs["state"],
+            "risk_capim": _str(risk),
+            "risk_capim_subclass": pa.array(_pick(np.array(list("ABC")), rng.random(n))),
+            "rejection_reason": cs["rejection_reason"],
+            "is_elegible_with_counter_proposal": pa.array(rejected_mask & (rng.random(n) < 0.2)),
+            "pre_analysis_amount": amount / 100.0,
+            "pre_analysis_installment_amount": pa.array(np.round(amount / 100.0 / np.maximum(terms_max, 1), 2), mask=~approved),
+            "counter_proposal_amount": pa.nulls(n, pa.float64()),
+            "maximum_term_available": pa.array(terms_max, mask=~approved),
+            "minimum_term_available": pa.array(np.full(n, 3), mask=~approved),
+            "proposal_interest": pa.array(np.round(rate, 4), mask=~approved),
+            "has_request": pa.array(rng.random(n) < 0.5),
+            "financing_conditions": pa.nulls(n, pa.string()),
+            "interest_rates_array": pa.nulls(n, pa.string()),
+        }
+    )
+    stale = np.flatnonzero(rng.random(n) < cfg.pa_stale_version_frac)
+    if len(stale):
+        old = pa_rows.take(pa.array(stale))
+        old = old.set_column(old.schema.get_field_index("pre_analysis_updated_at"), "pre_analysis_updated_at",
+                             old["pre_analysis_created_at"])
+        old = old.set_column(old.schema.get_field_index("pre_analysis_state"), "pre_analysis_state",
+                             pa.array(np.full(len(stale), "pending")))
+        pa_rows = pa.concat_tables([pa_rows, old])
+
+    # ---- PA legado: mesma pessoa/clínica da simulação, criada ±30 min dela (casa com os mesmos checks por CPF+tempo
+    #      e, por hash_cpf, com as tabelas dbt derivadas deles)
+    lidx = np.flatnonzero(rng.random(n) < cfg.pa_legacy_frac)
+    m = len(lidx)
+    lp = _People(checked_pid[lidx], cfg)
+    l_created = created[lidx] + rng.integers(-1800, 1800, m).astype("timedelta64[s]")
+    l_updated = l_created + rng.integers(5, 600, m).astype("timedelta64[s]")
+    l_approved = approved[lidx]
+    rates = np.round(rate[lidx], 4)
+    legacy = pa_rows.slice(0, n).take(pa.array(lidx))
+    for col, values in (
+        ("pre_analysis_type", pa.array(np.full(m, "pre_analysis"))),
+        ("pre_analysis_created_at", _ts(l_created)),
+        ("pre_analysis_updated_at", _ts(l_updated)),
+        ("credit_lead_id", pa.nulls(m, pa.int64())),
+        ("proposal_interest", pa.nulls(m, pa.float64())),
+        ("interest_rates_array", pc.if_else(
+            pa.array(l_approved),
+            _cat('{"1..12": ', rates, ', "13..24": ', np.round(rates + 0.005, 4), "}"),
+            pa.nulls(m, pa.string()),
+        )),
+    ):
+        legacy = legacy.set_column(legacy.schema.get_field_index(col), col, values)
+    pa_rows = pa.concat_tables([pa_rows, legacy])
+
+    spa = pa.table(
+        {
+            "pre_analysis_id": ids[lidx],
+            "cpf": lp.cpf(30),
+            "birthdate": _date(lp.birthdate),
+            "zipcode": lp.zipcode,
+            "state": pa.array(lp.state),
+            "occupation": pa.array(_pick(_OCCUPATIONS, lp.u(13))),
+            "pre_analysis_created_at": _ts(l_created),
+            "pre_analysis_updated_at": _ts(l_updated),
+        }
+    )
+
+    field = lambda name: sim_fields.get(name, np.full(n, np.nan))[lidx]  # noqa: E731
+    pidx = np.flatnonzero(rng.random(m) < cfg.pacc_frac)
+    pacc = pa.table(
+        {
+            "pre_analysis_type": pa.array(np.full(len(pidx), "pre_analysis")),
+            "pre_analysis_id": ids[lidx][pidx],
+            "pre_analysis_created_at": _ts(l_created[pidx]),
+            "serasa_positive_score": _num_str(field("serasa_score")[pidx]),
+            "bvs_positive_score": _num_str(field("bvs_score")[pidx]),
+            "serasa_presumed_income": _num_str(field("serasa_income")[pidx]),
+            "serasa_pefin": _num_str(field("serasa_pefin")[pidx]),
+            "serasa_refin": _num_str(field("serasa_refin")[pidx]),
+            "serasa_protest": _num_str(field("serasa_protest")[pidx]),
+            "bvs_total_debt": _num_str(field("bvs_total_debt")[pidx]),
+            "bvs_total_protest": _num_str(field("bvs_total_protest")[pidx]),
+            "score_scr": _num_str(field("scr_operations")[pidx]),
+        }
+    )
+
+    nidx = np.flatnonzero(l_created >= N8N_START)
+    n8n_at = l_created[nidx] + rng.integers(5, 60, len(nidx)).astype("timedelta64[s]")
+    n8n_value = lambda name: pc.fill_null(_num_str(field(name)[nidx]), "")  # noqa: E731
+    cei = pa.table(
+        {
+            "engineable_id": ids[lidx][nidx],
+            "engineable_type": pa.array(np.full(len(nidx), "PreAnalysis")),
+            "source": pa.array(np.full(len(nidx), "n8n_credit_engine")),
+            "credit_engine_consultation_created_at": _ts(n8n_at),
+            "credit_engine_consultation_updated_at": _ts(n8n_at + np.timedelta64(2, "s")),
+            "data": _cat(
+                '{"scoreSerasa": "', n8n_value("serasa_score"), '", "scoreBvs": "', n8n_value("bvs_score"),
+                '", "pefinSerasa": "', n8n_value("serasa_pefin"), '", "refinSerasa": "', n8n_value("serasa_refin"),
+                '", "protestoSerasa": "', n8n_value("serasa_protest"), '", "rendaSerasa": "', n8n_value("serasa_income"),
+                '", "cepProponente": "', lp.zipcode.take(pa.array(nidx)),
+                '", "dataNascimentoBvs": "', _fmt_date(lp.birthdate[nidx], "%Y-%m-%d"), '"}',
+            ),
+        }
+    )
+
+    out = {
+        "credit_simulations": cs,
+        "credit_leads": leads,
+        "pre_analyses": pa_rows,
+        "crivo_checks": crivo,
+        "pre_analysis_api": spa,
+        "pre_analysis_credit_check": pacc,
+        "credit_engine_information": cei,
+    }
+    if checks:
+        out["credit_checks"] = pa.concat_tables(checks)
+    for kind in ("serasa", "boa_vista_score_pf", "boa_vista_scpc_net", "scr"):
+        name, empty = _hash_source_row(kind, np.empty(0, np.int64), np.empty(0, "datetime64[s]"), np.empty(0, str), {})
+        out[name] = pa.concat_tables(derived[name]) if derived[name] else empty
+    return out
+
+
+# ----------------------------------------------------------------------------------------------
+# Escrita (um chunk por processo)
+# ----------------------------------------------------------------------------------------------
+
+def write_partitioned(table: pa.Table, out_dir: Path, spec: SyntheticTable, part: str) -> int:
+    """
+    Grava `<out>/<tabela>/created_month=YYYY-MM/part-<part>.parquet` (um arquivo por mês presente no chunk).
+    Chunk sem linhas (ex.: N8N antes de `N8N_START`) grava só o schema em `created_month=empty`: a tabela existe no load.
+    """
+    if not table.num_rows:
+        target = out_dir / spec.name / "created_month=empty"
+        target.mkdir(parents=True, exist_ok=True)
+        pq.write_table(table, target / f"part-{part}.parquet", compression="zstd")
+        return 0
+    months = pc.strftime(table[spec.ts_column], format="%Y-%m")
+    for month in pc.unique(months).to_pylist():
+        target = out_dir / spec.name / f"created_month={month}"
+        target.mkdir(parents=True, exist_ok=True)
+        pq.write_table(table.filter(pc.equal(months, month)), target / f"part-{part}.parquet", compression="zstd")
+    return table.num_rows
+
+
+def generate_chunk(cfg: SyntheticConfig, kind: str, lo: int, hi: int, chunk: int, out_dir: str) -> Dict[str, int]:
+    """Gera e grava um chunk (`kind` = persons | simulations); devolve linhas por tabela. Roda em subprocesso."""
+    out = Path(out_dir)
+    part = f"{kind[0]}{chunk:06d}"
+    if kind == "persons":
+        return {"persons": write_partitioned(persons_table(cfg, lo, hi), out, TABLES["persons"], part)}
+    rng = np.random.default_rng([cfg.seed, chunk])
+    tables = simulation_tables(cfg, lo, hi, rng)
+    return {name: write_partitioned(t, out, TABLES[name], part) for name, t in tables.items()}
+
+
+def plan_chunks(cfg: SyntheticConfig, chunk_rows: int) -> List[Tuple[str, int, int, int]]:
+    """Tarefas (kind, lo, hi, chunk) cobrindo pessoas e simulações em blocos de `chunk_rows`."""
+    chunk_rows = max(1, int(chunk_rows))
+    tasks = []
+    for kind, total in (("persons", cfg.persons), ("simulations", cfg.simulations)):
+        for i, lo in enumerate(range(0, total, chunk_rows)):
+            tasks.append((kind, lo, min(total, lo + chunk_rows), i))
+    return tasks
+
+
+def parquet_columns(out_dir: Path, spec: SyntheticTable) -> List[str]:
+    first = next((out_dir / spec.name).glob("*/*.parquet"))
+    return pq.read_schema(first).names
+
+
+def local_load_sql(out_dir: Path) -> str:
+    """Fixture do backend local (`SNOWFLAKE_LOCAL_FIXTURES=<out>`): tabelas de origem lidas dos Parquets."""
+    lines = [
+        "/* Gerado por src.cli.generate_synthetic_data: carrega os Parquets sintéticos nas tabelas de origem",
+        "   do backend local (SNOWFLAKE_BACKEND=local SNOWFLAKE_LOCAL_FIXTURES=<este diretório>). */",
+        "",
+    ]
+    for spec in TABLES.values():
+        if not (out_dir / spec.name).exists():
+            continue
+        cols = [
+            f"PARSE_JSON({c}) AS {c}" if c in spec.json_columns else c
+            for c in parquet_columns(out_dir, spec)
+        ]
+        path = (out_dir / spec.name).resolve().as_posix()
+        lines.append(f"CREATE OR REPLACE TABLE {spec.table} AS")
+        lines.append(f"SELECT {', '.join(cols)}")
+        lines.append(f"FROM read_parquet('{path}/*/*.parquet');")
+        lines.append("")
+    return "\n".join(lines)